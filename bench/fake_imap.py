@@ -0,0 +1,778 @@
+"""
+벤치마크/오프라인 검증용 인프로세스 가짜 IMAP 서버.
+
+실제 imap.naver.com 대신 합성 메일함을 제공하며, 응답마다 인위적인 지연을
+넣을 수 있습니다. MailService가 사용하는 명령만 구현되어 있습니다.
+"""
+import email.utils
+import random
+import re
+import select
+import socket
+import socketserver
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+
+CAPABILITIES = "IMAP4rev1 MOVE UIDPLUS IDLE CONDSTORE QRESYNC ENABLE LIST-STATUS STATUS=SIZE"
+
+_WORDS = ("회의", "보고서", "일정", "안내", "결제", "뉴스레터", "프로젝트", "업데이트",
+          "invoice", "meeting", "report", "weekly", "newsletter", "release", "review")
+
+
+# -------
+# 1. 합성 메일함
+
+
+@dataclass
+class FakeMessage:
+    uid: int
+    raw: bytes
+    flags: List[str] = field(default_factory=list)
+    modseq: int = 1
+    internal_date: float = 0.0
+
+
+@dataclass
+class FakeFolder:
+    name: str
+    uidvalidity: int
+    messages: List[FakeMessage] = field(default_factory=list)
+    uidnext: int = 1
+    highestmodseq: int = 1
+
+    def append(self, raw: bytes, flags: Optional[List[str]] = None, internal_date: float = 0.0) -> FakeMessage:
+        self.highestmodseq += 1
+        message = FakeMessage(self.uidnext, raw, list(flags or []), self.highestmodseq, internal_date)
+        self.uidnext += 1
+        self.messages.append(message)
+        return message
+
+
+def make_message(index: int, body_size: int = 2000, attachment_size: int = 0,
+                 rng: Optional[random.Random] = None) -> bytes:
+    """index번째 합성 메일의 RFC822 bytes를 만듭니다."""
+    rng = rng or random.Random(index)
+    message = EmailMessage()
+    subject_words = rng.sample(_WORDS, 3)
+    message['Subject'] = f"[{index}] " + " ".join(subject_words)
+    message['From'] = f'"발신자{index % 50}" <sender{index % 50}@example.com>'
+    message['To'] = "me@naver.com"
+    message['Date'] = email.utils.formatdate(1_700_000_000 + index * 60, localtime=False)
+    message['Message-ID'] = f"<{index}@fake.example.com>"
+    text = " ".join(rng.choice(_WORDS) for _ in range(max(1, body_size // 8)))[:body_size]
+    message.set_content(text)
+    message.add_alternative(f"<html><body><p>{text}</p><div class='sig'>--<br>서명</div></body></html>",
+                            subtype='html')
+    if attachment_size:
+        payload = rng.randbytes(attachment_size)
+        message.add_attachment(payload, maintype='application', subtype='octet-stream',
+                               filename=f"첨부{index}.bin")
+    return message.as_bytes()
+
+
+class FakeMailStore:
+    """폴더 이름 -> FakeFolder. 모든 연결이 공유합니다."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.folders: Dict[str, FakeFolder] = {}
+        self._uidvalidity = 1000
+        self.create("INBOX")
+
+    def create(self, name: str) -> FakeFolder:
+        with self.lock:
+            self._uidvalidity += 1
+            folder = FakeFolder(name, self._uidvalidity)
+            self.folders[name] = folder
+            return folder
+
+    def seed(self, folder: str = "INBOX", count: int = 1000, body_size: int = 2000,
+             attachment_size: int = 0, attachment_every: int = 10, seed: int = 0) -> None:
+        """folder에 count개의 합성 메일을 채웁니다."""
+        rng = random.Random(seed)
+        target = self.folders.get(folder) or self.create(folder)
+        templates = {}
+        for i in range(count):
+            with_attachment = attachment_size and attachment_every and i % attachment_every == 0
+            # 같은 크기의 메일은 본문을 재사용해 대용량 시딩 속도를 높임
+            key = (i % 64, bool(with_attachment))
+            if key not in templates:
+                templates[key] = make_message(i, body_size, attachment_size if with_attachment else 0, rng)
+            raw = templates[key].replace(f"[{key[0]}] ".encode(), f"[{i}] ".encode(), 1)
+            flags = ['\\Seen'] if rng.random() < 0.7 else []
+            target.append(raw, flags, internal_date=1_700_000_000 + i * 60)
+
+
+# -------
+# 2. BODYSTRUCTURE / 검색 도우미
+
+
+def _quote(value: Optional[str]) -> str:
+    if value is None:
+        return "NIL"
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _params(pairs) -> str:
+    if not pairs:
+        return "NIL"
+    # RFC 2231로 인코딩된 값은 (charset, language, value) 튜플로 돌아옴
+    return "(" + " ".join(f"{_quote(k.upper())} {_quote(email.utils.collapse_rfc2231_value(v))}"
+                          for k, v in pairs) + ")"
+
+
+def _bodystructure(part) -> str:
+    if part.is_multipart():
+        children = "".join(_bodystructure(child) for child in part.get_payload())
+        boundary = part.get_boundary()
+        return f"({children} {_quote(part.get_content_subtype().upper())} {_params([('boundary', boundary)])} NIL NIL NIL)"
+    payload = part.get_payload(decode=False)
+    payload_bytes = payload.encode() if isinstance(payload, str) else bytes(payload or b'')
+    params = [(k, v) for k, v in part.get_params()[1:]] if part.get_params() else []
+    encoding = (part.get('Content-Transfer-Encoding') or '7bit').upper()
+    disposition = part.get_content_disposition()
+    disposition_str = "NIL"
+    if disposition:
+        filename = part.get_param('filename', header='content-disposition')
+        disposition_str = f"({_quote(disposition.upper())} {_params([('filename', filename)] if filename else [])})"
+    fields = (f"{_quote(part.get_content_maintype().upper())} {_quote(part.get_content_subtype().upper())} "
+              f"{_params(params)} {_quote(part.get('Content-ID'))} NIL {_quote(encoding)} {len(payload_bytes)}")
+    if part.get_content_maintype() == 'text':
+        lines = payload_bytes.count(b'\n') + 1
+        fields += f" {lines}"
+    return f"({fields} NIL {disposition_str} NIL NIL)"
+
+
+def _split_raw(raw: bytes) -> Tuple[bytes, bytes]:
+    index = raw.find(b'\r\n\r\n')
+    sep = 4
+    if index < 0:
+        index = raw.find(b'\n\n')
+        sep = 2
+    if index < 0:
+        return raw, b''
+    return raw[:index + sep], raw[index + sep:]
+
+
+def _section(raw: bytes, section: str) -> bytes:
+    """BODY[section] 값을 반환 (HEADER, TEXT, 1, 1.2, 2.MIME 등 일부만 지원)"""
+    import email
+    if section == "":
+        return raw
+    header, body = _split_raw(raw)
+    if section == "HEADER":
+        return header
+    if section == "TEXT":
+        return body
+    message = email.message_from_bytes(raw)
+    part = message
+    for number in section.split('.'):
+        if number == 'MIME':
+            return _split_raw(part.as_bytes())[0]
+        index = int(number) - 1
+        if part.is_multipart():
+            part = part.get_payload()[index]
+        elif index != 0:
+            return b''
+    payload = part.get_payload(decode=False)
+    if isinstance(payload, list):
+        return _split_raw(part.as_bytes())[1]
+    return payload.encode() if isinstance(payload, str) else payload
+
+
+def _parse_set(value: str, maximum: int) -> List[Tuple[int, int]]:
+    ranges = []
+    for item in value.split(','):
+        if ':' in item:
+            start, end = item.split(':', 1)
+        else:
+            start = end = item
+        start_n = maximum if start == '*' else int(start)
+        end_n = maximum if end == '*' else int(end)
+        ranges.append((min(start_n, end_n), max(start_n, end_n)))
+    return ranges
+
+
+def _in_set(number: int, ranges: List[Tuple[int, int]]) -> bool:
+    return any(start <= number <= end for start, end in ranges)
+
+
+def _tokenize(line: str) -> List:
+    """검색/FETCH 인자를 괄호 구조를 유지한 토큰 리스트로 분해합니다."""
+    tokens, stack = [], []
+    current = tokens
+    for match in re.finditer(r'\(|\)|"((?:[^"\\]|\\.)*)"|[^\s()"]+', line):
+        text = match.group(0)
+        if text == '(':
+            stack.append(current)
+            new: List = []
+            current.append(new)
+            current = new
+        elif text == ')':
+            current = stack.pop() if stack else tokens
+        elif match.group(1) is not None:
+            current.append(('STR', re.sub(r'\\(.)', r'\1', match.group(1))))
+        else:
+            current.append(text)
+    return tokens
+
+
+# -------
+# 3. 연결 핸들러
+
+
+class FakeIMAPHandler(socketserver.StreamRequestHandler):
+    server: 'FakeIMAPServer'
+
+    def setup(self):
+        super().setup()
+        # 응답을 줄마다 보내므로 Nagle 알고리즘 때문에 지연 ACK(~40ms)를 기다리지 않도록 함
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.folder: Optional[FakeFolder] = None
+        self.readonly = False
+        self.known_exists = 0
+
+    # 입출력
+
+    def _send(self, data: bytes) -> None:
+        self.server.bytes_sent += len(data)
+        self.wfile.write(data)
+
+    def _line(self, text: str) -> None:
+        self._send(text.encode('utf-8') + b'\r\n')
+
+    def _read_command(self) -> Optional[str]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        self.server.bytes_received += len(line)
+        # 리터럴 인자 {n}
+        while True:
+            match = re.search(rb'\{(\d+)\+?\}\r\n$', line)
+            if not match:
+                break
+            if not line.endswith(b'+}\r\n'):
+                self._line("+ Ready for literal data")
+            literal = self.rfile.read(int(match.group(1)))
+            rest = self.rfile.readline()
+            self.server.bytes_received += len(literal) + len(rest)
+            line = line[:match.start()] + b'"' + literal.replace(b'\\', b'\\\\').replace(b'"', b'\\"') + b'"' + rest
+        return line.decode('utf-8', 'replace').rstrip('\r\n')
+
+    def handle(self):
+        self._line(f"* OK [CAPABILITY {self.server.capabilities}] Fake IMAP ready")
+        while True:
+            line = self._read_command()
+            if line is None:
+                return
+            if not line:
+                continue
+            tag, _, rest = line.partition(' ')
+            command, _, args = rest.partition(' ')
+            command = command.upper()
+            if command == 'UID':
+                sub, _, args = args.partition(' ')
+                command = 'UID ' + sub.upper()
+            self.server.commands += 1
+            self.server.command_counts[command] += 1
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            handler = getattr(self, 'cmd_' + command.replace(' ', '_'), None)
+            try:
+                if handler is None:
+                    self._line(f"{tag} BAD unknown command {command}")
+                    continue
+                if command == 'IDLE':
+                    # IDLE은 DONE까지 오래 대기하므로 메일함 잠금을 잡지 않음
+                    result = handler(tag, args)
+                else:
+                    with self.server.store.lock:
+                        result = handler(tag, args)
+                if result == 'LOGOUT':
+                    return
+            except Exception as e:  # noqa
+                self._line(f"{tag} BAD {type(e).__name__}: {e}")
+
+    # 명령 구현
+
+    def cmd_CAPABILITY(self, tag, args):
+        self._line(f"* CAPABILITY {self.server.capabilities}")
+        self._line(f"{tag} OK CAPABILITY completed")
+
+    def cmd_LOGIN(self, tag, args):
+        self._line(f"{tag} OK LOGIN completed")
+
+    def cmd_ENABLE(self, tag, args):
+        self._line(f"* ENABLED {args}")
+        self._line(f"{tag} OK ENABLE completed")
+
+    def cmd_NOOP(self, tag, args):
+        self._report_changes()
+        self._line(f"{tag} OK NOOP completed")
+
+    def cmd_LOGOUT(self, tag, args):
+        self._line("* BYE logging out")
+        self._line(f"{tag} OK LOGOUT completed")
+        return 'LOGOUT'
+
+    def _folder_name(self, token) -> str:
+        return token[1] if isinstance(token, tuple) else token
+
+    def _select(self, tag, args, readonly):
+        tokens = _tokenize(args)
+        name = self._folder_name(tokens[0])
+        folder = self.server.store.folders.get(name)
+        if folder is None:
+            self._line(f"{tag} NO no such mailbox")
+            return
+        self.folder = folder
+        self.readonly = readonly
+        self.known_exists = len(folder.messages)
+        self._line(f"* {len(folder.messages)} EXISTS")
+        self._line("* 0 RECENT")
+        self._line("* FLAGS (\\Answered \\Flagged \\Deleted \\Seen \\Draft)")
+        self._line(f"* OK [UIDVALIDITY {folder.uidvalidity}] UIDs valid")
+        self._line(f"* OK [UIDNEXT {folder.uidnext}] Predicted next UID")
+        self._line(f"* OK [HIGHESTMODSEQ {folder.highestmodseq}] Highest")
+        self._line(f"{tag} OK [{'READ-ONLY' if readonly else 'READ-WRITE'}] {'EXAMINE' if readonly else 'SELECT'} completed")
+
+    def cmd_SELECT(self, tag, args):
+        self._select(tag, args, False)
+
+    def cmd_EXAMINE(self, tag, args):
+        self._select(tag, args, True)
+
+    def _report_changes(self):
+        if self.folder is not None and len(self.folder.messages) != self.known_exists:
+            self.known_exists = len(self.folder.messages)
+            self._line(f"* {self.known_exists} EXISTS")
+
+    def cmd_LIST(self, tag, args):
+        tokens = _tokenize(args)
+        pattern = self._folder_name(tokens[1]) if len(tokens) > 1 else '*'
+        regex = re.compile('^' + re.escape(pattern).replace(r'\*', '.*').replace('%', '[^/]*') + '$')
+        # LIST-STATUS: LIST "" "*" RETURN (STATUS (MESSAGES ...))
+        status_items = None
+        if len(tokens) > 3 and str(tokens[2]).upper() == 'RETURN':
+            options = tokens[3]
+            for i, option in enumerate(options):
+                if str(option).upper() == 'STATUS':
+                    status_items = [str(t).upper() for t in options[i + 1]]
+        for name in sorted(self.server.store.folders):
+            if not regex.match(name):
+                continue
+            self._line(f'* LIST (\\HasNoChildren) "/" {_quote(name)}')
+            if status_items:
+                folder = self.server.store.folders[name]
+                self._line(f"* STATUS {_quote(name)} ({self._status_items(folder, status_items)})")
+        self._line(f"{tag} OK LIST completed")
+
+    def _status_items(self, folder: FakeFolder, items: List[str]) -> str:
+        values = {
+            'MESSAGES': len(folder.messages),
+            'RECENT': 0,
+            'UNSEEN': sum(1 for m in folder.messages if '\\Seen' not in m.flags),
+            'UIDNEXT': folder.uidnext,
+            'UIDVALIDITY': folder.uidvalidity,
+            'HIGHESTMODSEQ': folder.highestmodseq,
+            'SIZE': sum(len(m.raw) for m in folder.messages),
+        }
+        return " ".join(f"{item} {values[item]}" for item in items if item in values)
+
+    def cmd_STATUS(self, tag, args):
+        tokens = _tokenize(args)
+        folder = self.server.store.folders.get(self._folder_name(tokens[0]))
+        if folder is None:
+            self._line(f"{tag} NO no such mailbox")
+            return
+        items = [str(t).upper() for t in tokens[1]]
+        self._line(f"* STATUS {_quote(folder.name)} ({self._status_items(folder, items)})")
+        self._line(f"{tag} OK STATUS completed")
+
+    def cmd_CREATE(self, tag, args):
+        name = self._folder_name(_tokenize(args)[0])
+        if name in self.server.store.folders:
+            self._line(f"{tag} NO already exists")
+            return
+        self.server.store.create(name)
+        self._line(f"{tag} OK CREATE completed")
+
+    def cmd_DELETE(self, tag, args):
+        name = self._folder_name(_tokenize(args)[0])
+        if self.server.store.folders.pop(name, None) is None:
+            self._line(f"{tag} NO no such mailbox")
+            return
+        self._line(f"{tag} OK DELETE completed")
+
+    def cmd_RENAME(self, tag, args):
+        tokens = _tokenize(args)
+        old, new = self._folder_name(tokens[0]), self._folder_name(tokens[1])
+        folder = self.server.store.folders.pop(old, None)
+        if folder is None:
+            self._line(f"{tag} NO no such mailbox")
+            return
+        folder.name = new
+        self.server.store.folders[new] = folder
+        self._line(f"{tag} OK RENAME completed")
+
+    # 검색
+
+    def _match(self, message: FakeMessage, seq: int, tokens: List, i: int) -> Tuple[bool, int]:
+        import email
+        key = tokens[i]
+        if isinstance(key, list):
+            return self._match_all(message, seq, key), i + 1
+        key_upper = key.upper() if isinstance(key, str) else key
+        value = lambda n: tokens[i + n][1] if isinstance(tokens[i + n], tuple) else tokens[i + n]  # noqa
+        header = lambda name: str(email.message_from_bytes(_split_raw(message.raw)[0]).get(name, ''))  # noqa
+        if key_upper == 'ALL':
+            return True, i + 1
+        if key_upper == 'CHARSET':
+            return True, i + 2
+        if key_upper == 'UID':
+            maximum = self.folder.uidnext - 1 if self.folder.messages else 0
+            return _in_set(message.uid, _parse_set(value(1), max(maximum, 1))), i + 2
+        if re.match(r'^[\d*:,]+$', str(key)):
+            return _in_set(seq, _parse_set(key, len(self.folder.messages))), i + 1
+        if key_upper == 'NOT':
+            matched, j = self._match(message, seq, tokens, i + 1)
+            return not matched, j
+        if key_upper == 'OR':
+            left, j = self._match(message, seq, tokens, i + 1)
+            right, k = self._match(message, seq, tokens, j)
+            return left or right, k
+        flag_keys = {'SEEN': '\\Seen', 'FLAGGED': '\\Flagged', 'ANSWERED': '\\Answered',
+                     'DELETED': '\\Deleted', 'DRAFT': '\\Draft'}
+        if key_upper in flag_keys:
+            return flag_keys[key_upper] in message.flags, i + 1
+        if key_upper.startswith('UN') and key_upper[2:] in flag_keys:
+            return flag_keys[key_upper[2:]] not in message.flags, i + 1
+        if key_upper in ('FROM', 'TO', 'CC', 'BCC', 'SUBJECT'):
+            from email.header import decode_header, make_header
+            decoded = str(make_header(decode_header(header(key_upper.title()))))
+            return value(1).lower() in decoded.lower(), i + 2
+        if key_upper in ('BODY', 'TEXT'):
+            return value(1).encode().lower() in message.raw.lower(), i + 2
+        if key_upper == 'LARGER':
+            return len(message.raw) > int(value(1)), i + 2
+        if key_upper == 'SMALLER':
+            return len(message.raw) < int(value(1)), i + 2
+        if key_upper in ('SINCE', 'BEFORE', 'ON', 'SENTSINCE', 'SENTBEFORE', 'SENTON'):
+            import datetime
+            day = datetime.datetime.strptime(value(1), '%d-%b-%Y').date()
+            if key_upper.startswith('SENT'):
+                sent = email.utils.parsedate_to_datetime(header('Date')).date()
+            else:
+                sent = datetime.datetime.fromtimestamp(message.internal_date, datetime.timezone.utc).date()
+            op = key_upper.replace('SENT', '')
+            return {'SINCE': sent >= day, 'BEFORE': sent < day, 'ON': sent == day}[op], i + 2
+        if key_upper == 'MODSEQ':
+            return message.modseq > int(value(1)), i + 2
+        if key_upper == 'HEADER':
+            return value(2).lower() in header(value(1)).lower(), i + 3
+        if key_upper in ('KEYWORD', 'UNKEYWORD'):
+            return (value(1) in message.flags) == (key_upper == 'KEYWORD'), i + 2
+        raise ValueError(f"unsupported search key {key}")
+
+    def _match_all(self, message: FakeMessage, seq: int, tokens: List) -> bool:
+        i = 0
+        while i < len(tokens):
+            matched, i = self._match(message, seq, tokens, i)
+            if not matched:
+                return False
+        return True
+
+    def _search(self, args: str) -> List[Tuple[int, FakeMessage]]:
+        tokens = _tokenize(args)
+        return [(seq, m) for seq, m in enumerate(self.folder.messages, 1) if self._match_all(m, seq, tokens)]
+
+    def cmd_SEARCH(self, tag, args):
+        found = self._search(args)
+        self._line("* SEARCH" + "".join(f" {seq}" for seq, _ in found))
+        self._line(f"{tag} OK SEARCH completed")
+
+    def cmd_UID_SEARCH(self, tag, args):
+        found = self._search(args)
+        self._line("* SEARCH" + "".join(f" {m.uid}" for _, m in found))
+        self._line(f"{tag} OK SEARCH completed")
+
+    def cmd_UID_SORT(self, tag, args):
+        tokens = _tokenize(args)
+        found = self._search(" ".join(self._untokenize(t) for t in tokens[2:]))
+        keys = [str(k).upper() for k in tokens[0]]
+        reverse = 'REVERSE' in keys
+        found.sort(key=lambda item: item[1].internal_date, reverse=reverse)
+        self._line("* SORT" + "".join(f" {m.uid}" for _, m in found))
+        self._line(f"{tag} OK SORT completed")
+
+    @staticmethod
+    def _untokenize(token) -> str:
+        if isinstance(token, list):
+            return "(" + " ".join(FakeIMAPHandler._untokenize(t) for t in token) + ")"
+        if isinstance(token, tuple):
+            return _quote(token[1])
+        return token
+
+    # FETCH
+
+    def _fetch_items(self, message: FakeMessage, seq: int, items: List, with_uid: bool) -> bytes:
+        import email
+        out = [f"{seq} FETCH (".encode()]
+        parts = []
+        if with_uid and not any(str(i).upper() == 'UID' for i in items if isinstance(i, str)):
+            items = ['UID'] + items
+        mark_seen = False
+        idx = 0
+        while idx < len(items):
+            item = items[idx]
+            idx += 1
+            if isinstance(item, list):
+                continue
+            upper = item.upper()
+            if upper == 'UID':
+                parts.append(f"UID {message.uid}".encode())
+            elif upper == 'FLAGS':
+                parts.append(f"FLAGS ({' '.join(message.flags)})".encode())
+            elif upper == 'RFC822.SIZE':
+                parts.append(f"RFC822.SIZE {len(message.raw)}".encode())
+            elif upper == 'MODSEQ':
+                parts.append(f"MODSEQ ({message.modseq})".encode())
+            elif upper == 'INTERNALDATE':
+                parts.append(f'INTERNALDATE "{email.utils.formatdate(message.internal_date)}"'.encode())
+            elif upper in ('BODYSTRUCTURE', 'BODY') and not (idx < len(items) and isinstance(items[idx], list)):
+                structure = _bodystructure(email.message_from_bytes(message.raw))
+                parts.append(f"BODYSTRUCTURE {structure}".encode())
+            elif upper.startswith('BODY') or upper.startswith('RFC822'):
+                # BODY[...] 또는 BODY.PEEK[...] 는 토크나이저가 "BODY.PEEK[HEADER]" 처럼 한 토큰으로 남김
+                match = re.match(r'(BODY(?:\.PEEK)?)\[([^\]]*)\](?:<(\d+)\.(\d+)>)?', item, re.I)
+                if upper == 'RFC822':
+                    match = None
+                    section, start, length, peek = '', None, None, False
+                elif match:
+                    peek = '.PEEK' in match.group(1).upper()
+                    section = match.group(2).upper()
+                    start = int(match.group(3)) if match.group(3) else None
+                    length = int(match.group(4)) if match.group(4) else None
+                else:
+                    # "BODY.PEEK[HEADER.FIELDS" (...) "]" 형태는 지원하지 않음
+                    continue
+                data = _section(message.raw, section)
+                name = f"BODY[{section}]"
+                if start is not None:
+                    data = data[start:start + length]
+                    name += f"<{start}>"
+                if upper == 'RFC822':
+                    name = 'RFC822'
+                parts.append(f"{name} {{{len(data)}}}\r\n".encode() + data)
+                if not peek and '\\Seen' not in message.flags and not self.readonly:
+                    mark_seen = True
+        if mark_seen:
+            message.flags.append('\\Seen')
+            self.folder.highestmodseq += 1
+            message.modseq = self.folder.highestmodseq
+        out.append(b" ".join(parts))
+        out.append(b")\r\n")
+        return b"* " + b"".join(out)
+
+    def _fetch(self, tag, args, by_uid):
+        tokens = _tokenize(args)
+        message_set = tokens[0]
+        items = tokens[1] if isinstance(tokens[1], list) else [tokens[1]]
+        changed_since = None
+        vanished = False
+        if len(tokens) > 2 and isinstance(tokens[2], list):
+            modifiers = tokens[2]
+            for j, mod in enumerate(modifiers):
+                if str(mod).upper() == 'CHANGEDSINCE':
+                    changed_since = int(modifiers[j + 1])
+                if str(mod).upper() == 'VANISHED':
+                    vanished = True
+        if vanished and changed_since is not None and by_uid:
+            maximum = max(self.folder.uidnext - 1, 1)
+            ranges = _parse_set(message_set, maximum)
+            present = {m.uid for m in self.folder.messages}
+            gone = [uid for uid in self.server.store_expunged(self.folder) if _in_set(uid, ranges) and uid not in present]
+            if gone:
+                self._line("* VANISHED (EARLIER) " + ",".join(map(str, gone)))
+        maximum = (self.folder.uidnext - 1 if by_uid else len(self.folder.messages)) or 1
+        ranges = _parse_set(message_set, maximum)
+        for seq, message in enumerate(self.folder.messages, 1):
+            if not _in_set(message.uid if by_uid else seq, ranges):
+                continue
+            if changed_since is not None and message.modseq <= changed_since:
+                continue
+            fetch_items = items + (['MODSEQ'] if changed_since is not None else [])
+            self._send(self._fetch_items(message, seq, fetch_items, by_uid))
+        self._line(f"{tag} OK FETCH completed")
+
+    def cmd_FETCH(self, tag, args):
+        self._fetch(tag, args, False)
+
+    def cmd_UID_FETCH(self, tag, args):
+        self._fetch(tag, args, True)
+
+    # 변경
+
+    def _by_uid_set(self, uid_set: str) -> List[FakeMessage]:
+        maximum = max(self.folder.uidnext - 1, 1)
+        ranges = _parse_set(uid_set, maximum)
+        return [m for m in self.folder.messages if _in_set(m.uid, ranges)]
+
+    def cmd_UID_STORE(self, tag, args):
+        tokens = _tokenize(args)
+        uid_set, action = tokens[0], tokens[1].upper()
+        flags = [f for f in (tokens[2] if isinstance(tokens[2], list) else [tokens[2]])]
+        silent = action.endswith('.SILENT')
+        targets = {id(message) for message in self._by_uid_set(uid_set)}
+        for seq, message in enumerate(self.folder.messages, 1):
+            if id(message) not in targets:
+                continue
+            if action.startswith('+'):
+                message.flags.extend(f for f in flags if f not in message.flags)
+            elif action.startswith('-'):
+                message.flags = [f for f in message.flags if f not in flags]
+            else:
+                message.flags = list(flags)
+            self.folder.highestmodseq += 1
+            message.modseq = self.folder.highestmodseq
+            if not silent:
+                self._line(f"* {seq} FETCH (UID {message.uid} FLAGS ({' '.join(message.flags)}))")
+        self._line(f"{tag} OK STORE completed")
+
+    def _copy_to(self, messages: List[FakeMessage], dest_name: str) -> Optional[str]:
+        dest = self.server.store.folders.get(dest_name)
+        if dest is None:
+            return None
+        source_uids, dest_uids = [], []
+        for message in messages:
+            copied = dest.append(message.raw, list(message.flags), message.internal_date)
+            source_uids.append(str(message.uid))
+            dest_uids.append(str(copied.uid))
+        return f"[COPYUID {dest.uidvalidity} {','.join(source_uids)} {','.join(dest_uids)}]"
+
+    def cmd_UID_COPY(self, tag, args):
+        tokens = _tokenize(args)
+        code = self._copy_to(self._by_uid_set(tokens[0]), self._folder_name(tokens[1]))
+        if code is None:
+            self._line(f"{tag} NO [TRYCREATE] no such mailbox")
+            return
+        self._line(f"{tag} OK {code} COPY completed")
+
+    def _expunge(self, messages: List[FakeMessage]) -> None:
+        for message in messages:
+            seq = self.folder.messages.index(message) + 1
+            self.folder.messages.remove(message)
+            self.server.expunged.setdefault(id(self.folder), []).append(message.uid)
+            self._line(f"* {seq} EXPUNGE")
+        self.folder.highestmodseq += 1
+        self.known_exists = len(self.folder.messages)
+
+    def cmd_UID_MOVE(self, tag, args):
+        tokens = _tokenize(args)
+        messages = self._by_uid_set(tokens[0])
+        code = self._copy_to(messages, self._folder_name(tokens[1]))
+        if code is None:
+            self._line(f"{tag} NO [TRYCREATE] no such mailbox")
+            return
+        self._line(f"* OK {code}")
+        self._expunge(messages)
+        self._line(f"{tag} OK MOVE completed")
+
+    def cmd_EXPUNGE(self, tag, args):
+        self._expunge([m for m in self.folder.messages if '\\Deleted' in m.flags])
+        self._line(f"{tag} OK EXPUNGE completed")
+
+    def cmd_UID_EXPUNGE(self, tag, args):
+        targets = self._by_uid_set(_tokenize(args)[0])
+        self._expunge([m for m in targets if '\\Deleted' in m.flags])
+        self._line(f"{tag} OK EXPUNGE completed")
+
+    def cmd_IDLE(self, tag, args):
+        self._line("+ idling")
+        while True:
+            with self.server.store.lock:
+                self._report_changes()
+            # 소켓 타임아웃을 쓰면 rfile을 더 읽을 수 없게 되므로 select로 기다림
+            ready, _, _ = select.select([self.request], [], [], 0.05)
+            if not ready:
+                continue
+            line = self.rfile.readline()
+            if not line:
+                return 'LOGOUT'
+            if line.strip().upper() == b'DONE':
+                break
+        self._line(f"{tag} OK IDLE terminated")
+
+
+# -------
+# 4. 서버
+
+
+class FakeIMAPServer(socketserver.ThreadingTCPServer):
+    """별도 스레드에서 동작하는 가짜 IMAP 서버"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, store: Optional[FakeMailStore] = None, latency: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            store: 메일함 데이터 (None이면 빈 INBOX)
+            latency: 명령마다 추가할 인위적인 지연(초)
+        """
+        super().__init__((host, port), FakeIMAPHandler)
+        self.store = store or FakeMailStore()
+        self.latency = latency
+        # 확장이 없는 서버를 흉내 낼 때 테스트에서 바꿈 (새 연결부터 적용)
+        self.capabilities = CAPABILITIES
+        self.commands = 0
+        self.command_counts: Counter = Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.expunged: Dict[int, List[int]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._connections: set = set()
+
+    def process_request(self, request, client_address):
+        self._connections.add(request)
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        self._connections.discard(request)
+        super().shutdown_request(request)
+
+    def drop_connections(self) -> int:
+        """서버 쪽에서 열린 연결을 모두 끊고 끊은 개수를 반환합니다. (유휴 연결 타임아웃 흉내)"""
+        connections = list(self._connections)
+        for sock in connections:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        return len(connections)
+
+    def store_expunged(self, folder: FakeFolder) -> List[int]:
+        return self.expunged.get(id(folder), [])
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> 'FakeIMAPServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def reset_counters(self) -> None:
+        self.commands = 0
+        self.command_counts: Counter = Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
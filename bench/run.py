@@ -0,0 +1,370 @@
+"""
+가짜 IMAP 서버(bench/fake_imap.py)를 대상으로 MCP tool을 호출해 성능을 측정합니다.
+
+    python -m bench.run --messages 10000 --latency 0.02 --output results.json
+    python -m bench.run --messages 500000 --body-size 4000 --attachment-size 200000 --tools list_mails,search_mails
+    python -m bench.run --baseline results.json     # 이전 결과와 p50 비교
+
+tool 호출은 메모리 스트림으로 연결한 MCP ClientSession을 거치므로
+JSON-RPC 직렬화부터 IMAP 왕복까지 포함한 end-to-end 지연을 측정합니다.
+가짜 서버가 같은 프로세스에서 동작하므로 RSS에는 합성 메일함 크기도 포함됩니다. (rss_after_seed_kb와 비교)
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from bench.fake_imap import FakeIMAPServer, FakeMailStore
+from service.metrics import METRICS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class Dataset:
+    """합성 메일함 설정"""
+    messages: int
+    body_size: int
+    attachment_size: int
+    attachment_every: int
+    extra_folders: int
+
+    @property
+    def latest_uids(self) -> List[str]:
+        return [str(uid) for uid in range(self.messages, max(0, self.messages - 10), -1)]
+
+    @property
+    def attachment_uids(self) -> List[str]:
+        # FakeMailStore.seed는 i % attachment_every == 0인 메일(UID i + 1)에 첨부파일을 붙임
+        if not self.attachment_size or not self.attachment_every:
+            return []
+        return [str(i + 1) for i in range(0, min(self.messages, self.attachment_every * 10), self.attachment_every)]
+
+
+@dataclass
+class Scenario:
+    """측정할 tool 호출 하나"""
+    name: str
+    tool: str
+    args: Callable[[Dataset], Optional[Dict[str, Any]]]  # None을 반환하면 이 데이터셋에서는 건너뜀
+
+
+SCENARIOS = [
+    Scenario("list_folders", "list_folders", lambda d: {}),
+    Scenario("folder_stats", "folder_stats", lambda d: {}),
+    Scenario("list_mails", "list_mails", lambda d: {"max_count": 20}),
+    Scenario("list_mails_paginated", "list_mails_paginated", lambda d: {"page_size": 50}),
+    Scenario("list_mails_by_range", "list_mails_by_range",
+             lambda d: {"start_index": d.messages // 2, "count": 50}),
+    Scenario("search_subject", "search_mails", lambda d: {"subject": "meeting", "page_size": 20}),
+    Scenario("search_from", "search_mails", lambda d: {"from": "sender7@example.com", "page_size": 20}),
+    Scenario("get_mail_detail", "get_mail_detail", lambda d: {"uid": d.latest_uids[0]}),
+    Scenario("get_mail_details", "get_mail_details", lambda d: {"uids": d.latest_uids}),
+    Scenario("list_attachments", "list_attachments",
+             lambda d: {"uids": d.attachment_uids} if d.attachment_uids else None),
+    Scenario("get_attachment", "get_attachment",
+             lambda d: {"uid": d.attachment_uids[0], "section": "2"} if d.attachment_uids else None),
+    Scenario("mark_mails_read", "mark_mails_read", lambda d: {"mail_uids": d.latest_uids}),
+    Scenario("mark_mails_unread", "mark_mails_unread", lambda d: {"mail_uids": d.latest_uids}),
+    Scenario("flag_by_query_dry_run", "flag_by_query",
+             lambda d: {"subject": "report", "flag": "seen", "value": True, "dry_run": True}),
+]
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    tool: str
+    args: Dict[str, Any]
+    latencies: List[float] = field(default_factory=list)
+    cold_ms: Optional[float] = None
+    errors: int = 0
+    first_error: Optional[str] = None
+    response_bytes: int = 0
+    imap_commands: int = 0
+    imap_bytes_sent: int = 0
+    imap_bytes_received: int = 0
+    peak_rss_kb: int = 0
+    # server_metrics와 같은 구간별 평균 시간 (connect, imap, parse, serialize 등)
+    phases_ms: Dict[str, float] = field(default_factory=dict)
+    other_ms: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        calls = max(1, len(self.latencies))
+        result = {
+            "name": self.name,
+            "tool": self.tool,
+            "args": self.args,
+            "calls": len(self.latencies),
+            "errors": self.errors,
+            "cold_ms": _round(self.cold_ms),
+            "latency_ms": latency_summary(self.latencies),
+            # 호출 한 번당 평균값 (bytes_sent는 IMAP 서버 -> 클라이언트 방향)
+            "response_bytes": self.response_bytes // calls,
+            "imap_commands": round(self.imap_commands / calls, 2),
+            "imap_bytes_sent": self.imap_bytes_sent // calls,
+            "imap_bytes_received": self.imap_bytes_received // calls,
+            "phases_ms": self.phases_ms,
+            "other_ms": self.other_ms,
+            "peak_rss_kb": self.peak_rss_kb,
+        }
+        if self.first_error:
+            result["first_error"] = self.first_error
+        return result
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+def percentile(values: List[float], q: float) -> float:
+    """정렬된 값에서 q(0~100) 백분위수를 선형 보간으로 구합니다."""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def latency_summary(latencies: List[float]) -> dict:
+    values = sorted(latencies)
+    if not values:
+        return {}
+    return {
+        "min": _round(values[0]),
+        "mean": _round(sum(values) / len(values)),
+        "p50": _round(percentile(values, 50)),
+        "p90": _round(percentile(values, 90)),
+        "p95": _round(percentile(values, 95)),
+        "p99": _round(percentile(values, 99)),
+        "max": _round(values[-1]),
+    }
+
+
+def peak_rss_kb() -> int:
+    """지금까지의 최대 RSS (Linux는 KB, macOS는 bytes 단위로 반환되므로 KB로 맞춤)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_store(dataset: Dataset, seed: int) -> FakeMailStore:
+    store = FakeMailStore()
+    store.seed("INBOX", count=dataset.messages, body_size=dataset.body_size,
+               attachment_size=dataset.attachment_size, attachment_every=dataset.attachment_every, seed=seed)
+    for i in range(dataset.extra_folders):
+        store.seed(f"Folder{i}", count=100, body_size=dataset.body_size, seed=seed + i + 1)
+    return store
+
+
+async def call(session, scenario: Scenario, args: dict, result: ScenarioResult, record: bool) -> None:
+    started = time.perf_counter()
+    try:
+        response = await session.call_tool(scenario.tool, args)
+        error = response.content[0].text if response.isError and response.content else None
+        size = len(response.model_dump_json())
+    except Exception as e:  # noqa
+        error, size = f"{type(e).__name__}: {e}", 0
+    elapsed = (time.perf_counter() - started) * 1000
+    if not record:
+        return
+    result.latencies.append(elapsed)
+    result.response_bytes += size
+    if error:
+        result.errors += 1
+        result.first_error = result.first_error or error[:200]
+
+
+async def run_scenario(session, imap: FakeIMAPServer, scenario: Scenario, args: dict,
+                       iterations: int, warmup: int, concurrency: int) -> ScenarioResult:
+    result = ScenarioResult(scenario.name, scenario.tool, args)
+
+    # 첫 호출은 캐시/연결이 비어있는 상태의 지연으로 따로 기록
+    cold = ScenarioResult(scenario.name, scenario.tool, args)
+    await call(session, scenario, args, cold, record=True)
+    result.cold_ms = cold.latencies[0]
+    for _ in range(warmup):
+        await call(session, scenario, args, result, record=False)
+
+    imap.reset_counters()
+    METRICS.reset()
+    remaining = iterations
+    while remaining > 0:
+        batch = min(concurrency, remaining)
+        await asyncio.gather(*(call(session, scenario, args, result, record=True) for _ in range(batch)))
+        remaining -= batch
+    result.imap_commands = imap.commands
+    result.imap_bytes_sent = imap.bytes_sent
+    result.imap_bytes_received = imap.bytes_received
+    tool_metrics = METRICS.snapshot()["tools"].get(scenario.tool, {})
+    result.phases_ms = tool_metrics.get("phases_ms", {})
+    result.other_ms = tool_metrics.get("other_ms")
+    result.errors += cold.errors
+    result.first_error = result.first_error or cold.first_error
+    result.peak_rss_kb = peak_rss_kb()
+    return result
+
+
+async def run(options: argparse.Namespace) -> dict:
+    # server 모듈은 MCP SDK 전체를 불러오므로 --help 등에서는 불러오지 않도록 측정 직전에 불러옴
+    import server
+    from mcp.shared.memory import create_connected_server_and_client_session
+    from service.accounts import DEFAULT_ACCOUNT, AccountConfig, AccountRegistry
+
+    dataset = Dataset(options.messages, options.body_size, options.attachment_size,
+                      options.attachment_every, options.extra_folders)
+    started = time.perf_counter()
+    store = build_store(dataset, options.seed)
+    seed_seconds = time.perf_counter() - started
+    rss_after_seed = peak_rss_kb()
+
+    imap = FakeIMAPServer(store, latency=options.latency).start()
+    config = AccountConfig(DEFAULT_ACCOUNT, "bench", "bench", host="127.0.0.1", port=imap.port, ssl=False,
+                           pool_size=options.pool_size, max_concurrency=options.max_concurrency,
+                           cache_max_mb=options.cache_max_mb, index_path=options.index_path)
+    server.EVENT_LOOP = asyncio.get_running_loop()
+    server.ACCOUNTS = AccountRegistry([config], DEFAULT_ACCOUNT, listener=server.on_watch_event)
+
+    names = set(options.tools.split(',')) if options.tools else None
+    results = []
+    try:
+        async with create_connected_server_and_client_session(server.server) as session:
+            for scenario in SCENARIOS:
+                if names and scenario.name not in names and scenario.tool not in names:
+                    continue
+                args = scenario.args(dataset)
+                if args is None:
+                    continue
+                result = await run_scenario(session, imap, scenario, args,
+                                            options.iterations, options.warmup, options.concurrency)
+                results.append(result.to_dict())
+                print_row(results[-1])
+    finally:
+        server.ACCOUNTS.close()
+        imap.stop()
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "iterations": options.iterations,
+            "warmup": options.warmup,
+            "concurrency": options.concurrency,
+            "latency_ms": options.latency * 1000,
+            "pool_size": options.pool_size,
+            "max_concurrency": options.max_concurrency,
+            "cache_max_mb": options.cache_max_mb,
+            "index_path": options.index_path,
+        },
+        "dataset": {
+            "messages": dataset.messages,
+            "body_size": dataset.body_size,
+            "attachment_size": dataset.attachment_size,
+            "attachment_every": dataset.attachment_every,
+            "extra_folders": dataset.extra_folders,
+            "seed_seconds": round(seed_seconds, 2),
+            "rss_after_seed_kb": rss_after_seed,
+        },
+        "results": results,
+    }
+
+
+def print_row(row: dict) -> None:
+    latency = row["latency_ms"]
+    line = (f"{row['name']:<24} p50 {latency.get('p50', 0):>9.2f}ms  p99 {latency.get('p99', 0):>9.2f}ms  "
+            f"cold {row['cold_ms'] or 0:>9.2f}ms  imap {row['imap_commands']:>6} cmd "
+            f"{row['imap_bytes_sent']:>10} B  resp {row['response_bytes']:>9} B")
+    if row["errors"]:
+        line += f"  errors {row['errors']}"
+    print(line, file=sys.stderr)
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[str]:
+    """baseline 대비 p50이 threshold배 이상 느려진 시나리오 이름을 반환합니다."""
+    previous = {row["name"]: row for row in baseline.get("results", [])}
+    regressions = []
+    print("\nbaseline 대비 p50", file=sys.stderr)
+    for row in report["results"]:
+        before = previous.get(row["name"])
+        if not before or not before["latency_ms"].get("p50"):
+            continue
+        ratio = row["latency_ms"]["p50"] / before["latency_ms"]["p50"]
+        mark = "  <-- 느려짐" if ratio >= threshold else ""
+        print(f"{row['name']:<24} {before['latency_ms']['p50']:>9.2f}ms -> "
+              f"{row['latency_ms']['p50']:>9.2f}ms  x{ratio:.2f}{mark}", file=sys.stderr)
+        if ratio >= threshold:
+            regressions.append(row["name"])
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='가짜 IMAP 서버를 대상으로 MCP tool 성능을 측정합니다.')
+    dataset = parser.add_argument_group('합성 메일함')
+    dataset.add_argument('--messages', type=int, default=1000, help='INBOX 메일 개수 (1k ~ 500k)')
+    dataset.add_argument('--body-size', type=int, default=2000, help='메일 본문 크기(bytes)')
+    dataset.add_argument('--attachment-size', type=int, default=0, help='첨부파일 크기(bytes), 0이면 첨부파일 없음')
+    dataset.add_argument('--attachment-every', type=int, default=10, help='N통마다 첨부파일 하나')
+    dataset.add_argument('--extra-folders', type=int, default=5, help='메일 100통씩 담은 추가 폴더 개수')
+    dataset.add_argument('--seed', type=int, default=0, help='합성 데이터 난수 시드')
+
+    measure = parser.add_argument_group('측정')
+    measure.add_argument('--latency', type=float, default=0.0, help='IMAP 명령마다 추가할 지연(초)')
+    measure.add_argument('--iterations', type=int, default=20, help='시나리오마다 측정할 호출 횟수')
+    measure.add_argument('--warmup', type=int, default=1, help='측정 전에 버리는 호출 횟수 (첫 호출 제외)')
+    measure.add_argument('--concurrency', type=int, default=1, help='동시에 보낼 tool 호출 개수')
+    measure.add_argument('--tools', help='측정할 시나리오 또는 tool 이름 (쉼표로 구분, 기본: 전체)')
+
+    service = parser.add_argument_group('서버 설정')
+    service.add_argument('--pool-size', type=int, default=4, help='IMAP 연결 풀 크기')
+    service.add_argument('--max-concurrency', type=int, default=None, help='동시에 실행할 IMAP 작업 개수')
+    service.add_argument('--cache-max-mb', type=int, default=256, help='메일 캐시 최대 크기(MB), 0이면 캐시 사용 안 함')
+    service.add_argument('--index-path', help='로컬 검색 색인 SQLite 경로')
+
+    output = parser.add_argument_group('결과')
+    output.add_argument('--output', help='결과 JSON 파일 경로 (기본: 표준 출력)')
+    output.add_argument('--baseline', help='비교할 이전 결과 JSON 파일')
+    output.add_argument('--threshold', type=float, default=1.2,
+                        help='baseline 대비 p50이 이 배수 이상이면 종료 코드 1')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    options = parse_args(argv)
+    report = asyncio.run(run(options))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if options.baseline:
+        with open(options.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, options.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,10 @@
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 import os
 from typing import Any, Dict, List
 from imap_tools import FolderInfo
 
+from service.encoder import dumps
+
 
 @dataclass
 class Folder:
@@ -21,11 +23,14 @@ class Folder:
         )
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            "name": self.name,
+            "delim": self.delim,
+            "flags": list(self.flags),
+        }
 
     def to_json_string(self) -> str:
-        import json
-        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        return dumps(self.to_dict())
 
 
 def folder_info_list_to_folder_list(folder_info_list: List[FolderInfo]) -> List[Folder]:
@@ -1,25 +1,111 @@
 import argparse
 import asyncio
+import contextlib
+import logging
 import os
+import weakref
+from collections.abc import Callable, Iterator
 from mcp import Tool, stdio_server
-from imap_tools import MailBox, AND
-from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
 from mcp.server.stdio import stdio_server
-from mcp.types import Tool, TextContent
-
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.types import (
+    BlobResourceContents,
+    EmbeddedResource,
+    LoggingLevel,
+    Resource,
+    ResourceTemplate,
+    ServerCapabilities,
+    TextContent,
+    Tool,
+)
+from pydantic import AnyUrl
+
+from service.accounts import (
+    ACCOUNTS_ENV,
+    DEFAULT_ACCOUNT,
+    Account,
+    AccountConfig,
+    AccountRegistry,
+    load_account_configs,
+)
 from service.mail_service import MailService
-from service.mail_dto import mails_to_json, mails_to_text, mail_to_json, mail_to_text
+from service.executor import MailExecutor
+from service.mail_watcher import MAX_WATCH_FOLDERS, WatchEvent
+from service.search_query import FLAG_NAMES, SEARCH_CRITERIA_SCHEMA
+from service.bulk import BulkResult
+from service.folders import FolderStats
+from service.body_renderer import BODY_OPTIONS_SCHEMA
+from service.mail_dto import MailDTO, mails_to_json, mails_to_jsonl, mails_to_msgpack, mails_to_text, mail_to_format
+from service.encoder import DATA_FORMATS, FORMATS, dumps, encode
+from service.metrics import METRICS, mark_failed, track_call
+from service.profiling import (
+    PROFILE_DIR_ENV,
+    PROFILE_ENV,
+    PROFILE_SAMPLE_RATE_ENV,
+    Profiler,
+    configure_profiling,
+    profile_call,
+)
+from service.attachment import read_base64, resolve_save_dir, safe_filename, save_spool
+from service.resources import (
+    ResourceRef,
+    attachment_uri,
+    canonical_uri,
+    folder_etag,
+    folder_uri,
+    message_uri,
+    parse_uri,
+)
 from data.folder import folder_info_list_to_folder_list
 
 # -------
-# 1. Global credentials (set by main function)
-NAVER_ID = None
-NAVER_PASSWORD = None
+# 1. Global accounts (set by main function)
+# 계정마다 연결 풀, 캐시, 메일 서비스와 executor를 가진 레지스트리 (main 함수에서 생성)
+ACCOUNTS: AccountRegistry | None = None
+# 새 메일 알림을 받을 세션들과 알림을 보낼 이벤트 루프 (main 함수에서 설정)
+NOTIFY_SESSIONS: weakref.WeakSet = weakref.WeakSet()
+# 세션별로 구독한 리소스 URI
+SUBSCRIPTIONS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+EVENT_LOOP: asyncio.AbstractEventLoop | None = None
+# 클라이언트가 logging/setLevel로 정한 세션별 로그 알림 수준 (정하지 않은 세션은 DEFAULT_LOG_LEVEL)
+LOG_LEVELS = ["debug", "info", "notice", "warning", "error", "critical", "alert", "emergency"]
+DEFAULT_LOG_LEVEL: LoggingLevel = "info"
+SESSION_LOG_LEVELS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+# wait_for_new_mail의 최대 대기 시간(초)
+MAX_WAIT_TIMEOUT = 1500.0
+# get_attachment가 save_dir 없이 base64로 바로 반환하는 첨부파일의 기본 최대 크기
+MAX_INLINE_ATTACHMENT_BYTES = 5 * 1024 * 1024
+# 검색 조건 대량 작업의 dry_run에서 보여줄 최근 메일 개수
+DRY_RUN_SAMPLE_SIZE = 5
+# 모든 메일 tool이 받는 계정 인자
+ACCOUNT_SCHEMA = {
+    "type": "string",
+    "description": "사용할 계정 이름 (기본값: 기본 계정)"
+}
+# 계정 인자를 받지 않는 tool
+ACCOUNTLESS_TOOLS = ("debug_env", "ping", "server_metrics")
+# format 인자 설명의 msgpack 항목 (msgpack 패키지가 없으면 선택할 수 없으므로 뺌)
+MSGPACK_FORMAT_DESCRIPTION = ", msgpack: base64로 인코딩한 MessagePack" if "msgpack" in FORMATS else ""
+# tool 실패의 traceback을 남기는 서버 로그 (stdio 전송을 방해하지 않도록 stderr로 출력됨)
+logger = logging.getLogger("navermail")
 
 # -------
 # 2. Server Instance
-server = Server("naver-mail-mcp")
+
+
+class MailServer(Server):
+    def get_capabilities(self, notification_options: NotificationOptions,
+                         experimental_capabilities: dict) -> ServerCapabilities:
+        capabilities = super().get_capabilities(notification_options, experimental_capabilities)
+        # 저수준 Server는 subscribe 핸들러가 있어도 subscribe=False로 알리므로 직접 켬
+        # (HTTP 전송은 세션마다 create_initialization_options로 capabilities를 만듦)
+        if capabilities.resources:
+            capabilities.resources.subscribe = True
+        return capabilities
+
+
+server = MailServer("naver-mail-mcp", version="0.1.0")
 
 # -------
 # 3. Tools
@@ -29,13 +115,18 @@ server = Server("naver-mail-mcp")
 
 @server.list_tools()
 async def handle_list_tools() -> list[Tool]:
-    return [
+    tools = [
         Tool(
             name="list_mails",
             description="최근 N개 메일 목록 조회 (JSON 또는 텍스트 형태)",
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "조회할 폴더 이름"
+                    },
                     "max_count": {
                         "type": "number",
                         "default": 10,
@@ -43,9 +134,9 @@ async def handle_list_tools() -> list[Tool]:
                     },
                     "format": {
                         "type": "string",
-                        "enum": ["json", "text"],
+                        "enum": list(FORMATS),
                         "default": "text",
-                        "description": "출력 형태 (json: JSON 형태, text: 읽기 쉬운 텍스트(내용은 없음))"
+                        "description": f"출력 형태 (json: 압축된 JSON, jsonl: 메일마다 한 줄인 JSON Lines(여러 덩어리로 나눠 반환){MSGPACK_FORMAT_DESCRIPTION}, text: 읽기 쉬운 텍스트(내용은 없음))"
                     }
                 },
                 "required": [],
@@ -57,6 +148,11 @@ async def handle_list_tools() -> list[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "조회할 폴더 이름"
+                    },
                     "page_size": {
                         "type": "number",
                         "default": 10,
@@ -68,9 +164,76 @@ async def handle_list_tools() -> list[Tool]:
                     },
                     "format": {
                         "type": "string",
-                        "enum": ["json", "text"],
+                        "enum": list(FORMATS),
                         "default": "text",
-                        "description": "출력 형태 (json: JSON 형태, text: 읽기 쉬운 텍스트(내용은 없음))"
+                        "description": f"출력 형태 (json: 압축된 JSON, jsonl: 메일마다 한 줄인 JSON Lines(여러 덩어리로 나눠 반환){MSGPACK_FORMAT_DESCRIPTION}, text: 읽기 쉬운 텍스트(내용은 없음))"
+                    }
+                },
+                "required": [],
+            }
+        ),
+        Tool(
+            name="list_mails_by_range",
+            description="인덱스 범위로 메일 목록 조회 (최신 메일이 0번, 임의의 위치로 바로 이동 가능)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "start_index": {
+                        "type": "number",
+                        "default": 0,
+                        "description": "시작 인덱스 (0: 가장 최신 메일)"
+                    },
+                    "count": {
+                        "type": "number",
+                        "default": 10,
+                        "description": "가져올 메일 개수"
+                    },
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "조회할 폴더 이름"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(FORMATS),
+                        "default": "text",
+                        "description": f"출력 형태 (json: 압축된 JSON, jsonl: 메일마다 한 줄인 JSON Lines(여러 덩어리로 나눠 반환){MSGPACK_FORMAT_DESCRIPTION}, text: 읽기 쉬운 텍스트(내용은 없음))"
+                    }
+                },
+                "required": [],
+            }
+        ),
+        Tool(
+            name="search_mails",
+            description="조건으로 메일 검색 (서버에서 IMAP SEARCH로 검색하며 페이징 지원)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    **SEARCH_CRITERIA_SCHEMA,
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "검색할 폴더 이름"
+                    },
+                    "local": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "true면 서버 대신 로컬 색인에서 관련도 순으로 검색 (이미 조회한 메일만 대상, 본문은 상세 조회한 메일만이며 max_chars/max_tokens로 조회했으면 받은 앞부분만)"
+                    },
+                    "page_size": {
+                        "type": "number",
+                        "default": 10,
+                        "description": "한 페이지당 메일 개수"
+                    },
+                    "last_uid": {
+                        "type": "string",
+                        "description": "이전 페이지의 마지막 UID (다음 페이지 요청시 사용)"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(FORMATS),
+                        "default": "text",
+                        "description": f"출력 형태 (json: 압축된 JSON, jsonl: 메일마다 한 줄인 JSON Lines(여러 덩어리로 나눠 반환){MSGPACK_FORMAT_DESCRIPTION}, text: 읽기 쉬운 텍스트(내용은 없음))"
                     }
                 },
                 "required": [],
@@ -82,27 +245,180 @@ async def handle_list_tools() -> list[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
                     "uid": {
                         "type": "string",
                         "description": "조회할 메일의 UID"
                     },
+                    **BODY_OPTIONS_SCHEMA,
                     "format": {
                         "type": "string",
-                        "enum": ["json", "text"],
+                        "enum": list(FORMATS),
                         "default": "json",
-                        "description": "출력 형태 (json: JSON 형태, text: 읽기 쉬운 텍스트(내용은 없음))"
+                        "description": f"출력 형태 (json: 압축된 JSON, jsonl: JSON 한 줄{MSGPACK_FORMAT_DESCRIPTION}, text: 읽기 쉬운 텍스트)"
                     }
                 },
                 "required": ["uid"],
             }
         ),
+        Tool(
+            name="get_mail_details",
+            description="여러 메일의 상세 정보를 한 번에 조회 (메일마다 결과를 따로 반환, progressToken을 주면 메일마다 진행률 알림)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "uids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "조회할 메일들의 UID 목록"
+                    },
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
+                    **BODY_OPTIONS_SCHEMA,
+                    "format": {
+                        "type": "string",
+                        "enum": list(FORMATS),
+                        "default": "json",
+                        "description": f"출력 형태 (json: 압축된 JSON, jsonl: JSON 한 줄{MSGPACK_FORMAT_DESCRIPTION}, text: 읽기 쉬운 텍스트)"
+                    }
+                },
+                "required": ["uids"],
+            }
+        ),
+        Tool(
+            name="list_attachments",
+            description="메일들의 첨부파일 목록 조회 (첨부파일을 내려받지 않고 BODYSTRUCTURE만 사용)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "uids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "조회할 메일들의 UID 목록"
+                    },
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(FORMATS),
+                        "default": "json",
+                        "description": f"출력 형태 (json: 압축된 JSON, jsonl: 메일마다 한 줄인 JSON Lines{MSGPACK_FORMAT_DESCRIPTION}, text: 읽기 쉬운 텍스트)"
+                    }
+                },
+                "required": ["uids"],
+            }
+        ),
+        Tool(
+            name="get_attachment",
+            description="첨부파일 하나를 내려받기 (save_dir을 주면 서버의 다운로드 디렉터리에 저장, 없으면 base64 리소스로 반환)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "uid": {
+                        "type": "string",
+                        "description": "메일 UID"
+                    },
+                    "section": {
+                        "type": "string",
+                        "description": "첨부파일 파트 번호 (list_attachments 결과의 section, 예: \"2\")"
+                    },
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
+                    "save_dir": {
+                        "type": "string",
+                        "description": "첨부파일을 저장할 다운로드 디렉터리 안의 상대 경로 (\".\"이면 다운로드 디렉터리, 주면 내용 대신 저장된 경로를 반환)"
+                    },
+                    "max_inline_bytes": {
+                        "type": "number",
+                        "default": MAX_INLINE_ATTACHMENT_BYTES,
+                        "description": "save_dir 없이 바로 반환할 수 있는 최대 크기 (인코딩된 크기 기준)"
+                    }
+                },
+                "required": ["uid", "section"],
+            }
+        ),
+        Tool(
+            name="wait_for_new_mail",
+            description="새 메일이 도착할 때까지 기다렸다가 새 메일 목록을 반환 (IMAP IDLE 사용, 폴링 대신 사용)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "기다릴 폴더 이름"
+                    },
+                    "timeout": {
+                        "type": "number",
+                        "default": 60,
+                        "description": "최대 대기 시간(초), 최대 1500초"
+                    },
+                    "since_uid": {
+                        "type": "string",
+                        "description": "이전 호출의 last_uid (주면 그 뒤에 이미 도착한 메일이 있을 때 바로 반환)"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(FORMATS),
+                        "default": "text",
+                        "description": f"출력 형태 (json: 압축된 JSON, jsonl: 메일마다 한 줄인 JSON Lines(여러 덩어리로 나눠 반환){MSGPACK_FORMAT_DESCRIPTION}, text: 읽기 쉬운 텍스트(내용은 없음))"
+                    }
+                },
+            }
+        ),
         # 폴더 관리 tools
         Tool(
             name="list_folders",
             description="메일 폴더 목록 조회",
             inputSchema={
                 "type": "object",
-                "properties": {},
+                "properties": {
+                    "format": {
+                        "type": "string",
+                        "enum": list(DATA_FORMATS),
+                        "default": "json",
+                        "description": f"출력 형태 (json: 압축된 JSON, jsonl: 폴더마다 한 줄인 JSON Lines{MSGPACK_FORMAT_DESCRIPTION})"
+                    },
+                    "refresh": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "true면 캐시된 목록 대신 서버에서 다시 가져옴"
+                    }
+                },
+                "required": [],
+            }
+        ),
+        Tool(
+            name="folder_stats",
+            description="폴더별 전체/안 읽은 메일 개수를 한 번에 조회 (메일함 개요)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "folders": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "조회할 폴더 이름 목록 (기본값: 모든 폴더)"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(FORMATS),
+                        "default": "text",
+                        "description": f"출력 형태 (json: 압축된 JSON, jsonl: 폴더마다 한 줄인 JSON Lines{MSGPACK_FORMAT_DESCRIPTION}, text: 읽기 쉬운 텍스트)"
+                    }
+                },
                 "required": [],
             }
         ),
@@ -159,6 +475,11 @@ async def handle_list_tools() -> list[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 원본 폴더 이름"
+                    },
                     "mail_uids": {
                         "type": "array",
                         "items": {"type": "string"},
@@ -178,6 +499,11 @@ async def handle_list_tools() -> list[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 원본 폴더 이름"
+                    },
                     "mail_uids": {
                         "type": "array",
                         "items": {"type": "string"},
@@ -193,10 +519,15 @@ async def handle_list_tools() -> list[Tool]:
         ),
         Tool(
             name="delete_mails",
-            description="메일 삭제",
+            description="메일 삭제 (서버가 UIDPLUS를 지원하지 않으면 폴더에 \\Deleted로 표시된 다른 메일도 함께 지워짐)",
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
                     "mail_uids": {
                         "type": "array",
                         "items": {"type": "string"},
@@ -212,6 +543,11 @@ async def handle_list_tools() -> list[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
                     "mail_uids": {
                         "type": "array",
                         "items": {"type": "string"},
@@ -227,6 +563,11 @@ async def handle_list_tools() -> list[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
                     "mail_uids": {
                         "type": "array",
                         "items": {"type": "string"},
@@ -242,6 +583,11 @@ async def handle_list_tools() -> list[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
                     "mail_uids": {
                         "type": "array",
                         "items": {"type": "string"},
@@ -257,6 +603,11 @@ async def handle_list_tools() -> list[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
                     "mail_uids": {
                         "type": "array",
                         "items": {"type": "string"},
@@ -266,6 +617,84 @@ async def handle_list_tools() -> list[Tool]:
                 "required": ["mail_uids"],
             }
         ),
+        # 검색 조건으로 대량 작업하는 tools
+        Tool(
+            name="move_by_query",
+            description="조건에 맞는 메일을 UID 목록 없이 서버에서 찾아 다른 폴더로 이동 (dry_run으로 먼저 개수 확인 가능)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    **SEARCH_CRITERIA_SCHEMA,
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 원본 폴더 이름"
+                    },
+                    "folder_name": {
+                        "type": "string",
+                        "description": "이동할 대상 폴더 이름"
+                    },
+                    "dry_run": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "true면 이동하지 않고 조건에 맞는 메일 개수와 최근 메일 몇 개만 반환"
+                    }
+                },
+                "required": ["folder_name"],
+            }
+        ),
+        Tool(
+            name="flag_by_query",
+            description="조건에 맞는 메일의 읽음/중요/답장 표시를 UID 목록 없이 한 번에 변경 (dry_run으로 먼저 개수 확인 가능)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    **SEARCH_CRITERIA_SCHEMA,
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
+                    "flag": {
+                        "type": "string",
+                        "enum": list(FLAG_NAMES),
+                        "description": "바꿀 표시 (seen: 읽음, flagged: 중요, answered: 답장)"
+                    },
+                    "value": {
+                        "type": "boolean",
+                        "default": True,
+                        "description": "true면 표시 추가, false면 표시 제거"
+                    },
+                    "dry_run": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "true면 변경하지 않고 조건에 맞는 메일 개수와 최근 메일 몇 개만 반환"
+                    }
+                },
+                "required": ["flag"],
+            }
+        ),
+        Tool(
+            name="delete_by_query",
+            description="조건에 맞는 메일을 UID 목록 없이 서버에서 찾아 삭제 (dry_run으로 먼저 개수 확인 권장, UIDPLUS를 지원하는 서버에서만 가능)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    **SEARCH_CRITERIA_SCHEMA,
+                    "folder": {
+                        "type": "string",
+                        "default": "INBOX",
+                        "description": "메일이 있는 폴더 이름"
+                    },
+                    "dry_run": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "true면 삭제하지 않고 조건에 맞는 메일 개수와 최근 메일 몇 개만 반환"
+                    }
+                },
+                "required": [],
+            }
+        ),
         Tool(
             name="debug_env",
             description="환경 변수 및 서버 상태 디버깅",
@@ -275,6 +704,27 @@ async def handle_list_tools() -> list[Tool]:
                 "additionalProperties": False,
             }
         ),
+        Tool(
+            name="server_metrics",
+            description="tool별 지연과 구간(연결 대기, 로그인, IMAP 응답 대기, 파싱, 직렬화)별 시간, IMAP 명령 수/전송량, 캐시 적중률, 연결 풀 사용량 조회",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "format": {
+                        "type": "string",
+                        "enum": ["text", "json", "openmetrics"],
+                        "default": "text",
+                        "description": "출력 형태 (openmetrics: Prometheus/OpenMetrics 텍스트)"
+                    },
+                    "reset": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "조회한 뒤 누적 값을 초기화할지 여부"
+                    }
+                },
+                "additionalProperties": False,
+            }
+        ),
         Tool(
             name="ping",
             description="서버 상태 확인",
@@ -285,45 +735,480 @@ async def handle_list_tools() -> list[Tool]:
             }
         )
     ]
+    for tool in tools:
+        if tool.name not in ACCOUNTLESS_TOOLS:
+            tool.inputSchema["properties"]["account"] = ACCOUNT_SCHEMA
+    return tools
 
 # -------
-# 4. Tool Functions
+# 4. Resources
+
+
+@server.list_resources()
+async def handle_list_resources() -> list[Resource]:
+    """
+    폴더마다 리소스 하나를 노출합니다. 메일/첨부파일은 리소스 템플릿으로 접근합니다.
+    로그인하지 않은 계정까지 연결하지 않도록 기본 계정과 이미 사용 중인 계정의 폴더만 보여줍니다.
+    """
+    if ACCOUNTS is None:
+        return []
+    accounts = {account.name: account for account in [ACCOUNTS.get(), *ACCOUNTS.active()]}
+    resources = []
+    for account in accounts.values():
+        folder_info_list = await account.executor.run(account.service.get_folder_list)
+        uri_account = resource_account_name(account.name)
+        prefix = f"{account.name}: " if uri_account else ""
+        resources.extend(
+            Resource(
+                uri=AnyUrl(folder_uri(folder.name, uri_account)),
+                name=prefix + folder.name,
+                description=f"'{folder.name}' 폴더의 최근 메일 목록 (구독하면 새 메일/변경 알림)",
+                mimeType="application/json",
+            )
+            for folder in folder_info_list_to_folder_list(folder_info_list)
+        )
+    return resources
+
+
+@server.list_resource_templates()
+async def handle_list_resource_templates() -> list[ResourceTemplate]:
+    return [
+        ResourceTemplate(
+            uriTemplate="navermail://{folder}/{uid}",
+            name="mail",
+            description="메일 한 통 (본문 포함, ETag로 변경 여부 확인 가능)",
+            mimeType="application/json",
+        ),
+        ResourceTemplate(
+            uriTemplate="navermail://{folder}/{uid}/attachments/{section}",
+            name="attachment",
+            description="첨부파일 파트 (section은 list_attachments 결과 참고)",
+        ),
+    ]
+
+
+def resource_account_name(name: str | None) -> str | None:
+    """리소스 URI에 쓸 계정 이름 (기본 계정은 URI에 계정 이름을 붙이지 않음)"""
+    return None if not name or name == ACCOUNTS.default else name
+
+
+def resolve_resource(uri: AnyUrl) -> tuple[ResourceRef, Account]:
+    """리소스 URI를 파싱해 계정을 찾습니다. URI의 계정 이름은 기본 계정이면 None으로 맞춥니다."""
+    if ACCOUNTS is None:
+        raise RuntimeError("계정이 설정되지 않았습니다.")
+    ref = parse_uri(str(uri))
+    account = ACCOUNTS.get(ref.account)
+    ref.account = resource_account_name(account.name)
+    return ref, account
+
+
+def is_subscribed(account: Account, folder: str) -> bool:
+    """어느 세션이든 account의 folder(또는 그 안의 메일)를 구독하고 있는지 확인합니다."""
+    name = resource_account_name(account.name)
+    for uris in list(SUBSCRIPTIONS.values()):
+        for uri in uris:
+            ref = parse_uri(uri)
+            if ref.account == name and ref.folder == folder:
+                return True
+    return False
+
+
+def not_modified(uri: str, etag: str) -> list[ReadResourceContents]:
+    return [ReadResourceContents(dumps({"uri": uri, "etag": etag, "not_modified": True}), "application/json")]
+
+
+@server.read_resource()
+async def handle_read_resource(uri: AnyUrl) -> list[ReadResourceContents]:
+    """
+    폴더/메일/첨부파일 리소스를 읽습니다.
+
+    폴더와 메일 결과에는 UIDVALIDITY/MODSEQ로 만든 etag가 담기며,
+    URI에 ?if_none_match=<etag>를 붙여 읽으면 바뀌지 않았을 때 본문 없이 not_modified만 반환합니다.
+    폴더는 ?count=N(기본 20), 메일은 ?max_chars=N&max_tokens=N으로 크기를 조절할 수 있습니다.
+    """
+    ref, account = resolve_resource(uri)
+    mail_service, executor = account.service, account.executor
+    remember_session()
+    if_none_match = ref.query.get("if_none_match")
+
+    if ref.kind == "folder":
+        status = await executor.run(mail_service.get_folder_status, ref.folder)
+        etag = folder_etag(status)
+        if etag == if_none_match:
+            return not_modified(str(uri), etag)
+        count = int(ref.query.get("count", 20))
+        result = await executor.run(mail_service.get_mails_by_range, 0, count, ref.folder)
+        page_info = {"uri": folder_uri(ref.folder, ref.account), "etag": etag, "total": result['total'],
+                     "has_more": result['has_more'], "next_index": count}
+        content = await executor.run(mails_to_json, result['mails'], page_info)
+        return [ReadResourceContents(content, "application/json")]
+
+    if ref.kind == "message":
+        etag = await executor.run(mail_service.get_message_etag, ref.uid, ref.folder)
+        if etag is None:
+            raise ValueError(f"UID {ref.uid}에 해당하는 메일을 찾을 수 없습니다.")
+        if etag == if_none_match:
+            return not_modified(str(uri), etag)
+
+        def render_message() -> str | None:
+            # 리소스는 메일 원문을 대신하므로 인용/서명을 걷어내지 않음
+            bodies = mail_service.iter_mail_bodies(
+                [ref.uid], ref.folder,
+                max_chars=int(ref.query["max_chars"]) if "max_chars" in ref.query else None,
+                max_tokens=int(ref.query["max_tokens"]) if "max_tokens" in ref.query else None,
+                strip_quotes=False)
+            for mail, body in bodies:
+                data = MailDTO.from_mail_message(mail, body=body).to_dict()
+                data["uri"] = message_uri(ref.folder, ref.uid, ref.account)
+                data["etag"] = etag
+                return dumps(data)
+            return None
+
+        content = await executor.run(render_message)
+        if content is None:
+            raise ValueError(f"UID {ref.uid}에 해당하는 메일을 찾을 수 없습니다.")
+        return [ReadResourceContents(content, "application/json")]
+
+    result = await executor.run(mail_service.fetch_attachment, ref.uid, ref.section, ref.folder,
+                                     MAX_INLINE_ATTACHMENT_BYTES)
+    if result is None:
+        raise ValueError(f"UID {ref.uid} 메일에서 파트 {ref.section}을(를) 찾을 수 없습니다.")
+    part, spool = result
+    with spool:
+        data = await executor.run(spool.read)
+    return [ReadResourceContents(data, part.content_type)]
+
+
+@server.subscribe_resource()
+async def handle_subscribe_resource(uri: AnyUrl) -> None:
+    """
+    리소스를 구독합니다. 구독한 폴더(또는 메일이 있는 폴더)는 IDLE로 감시하며,
+    바뀌면 notifications/resources/updated를 보냅니다.
+    """
+    ref, account = resolve_resource(uri)
+    remember_session()
+    session = server.request_context.session
+    SUBSCRIPTIONS.setdefault(session, set()).add(canonical_uri(ref))
+    if account.service.watcher:
+        account.service.watcher.watch([ref.folder])
+
+
+@server.unsubscribe_resource()
+async def handle_unsubscribe_resource(uri: AnyUrl) -> None:
+    ref, account = resolve_resource(uri)
+    session = server.request_context.session
+    SUBSCRIPTIONS.get(session, set()).discard(canonical_uri(ref))
+    # 이 폴더를 구독하는 곳이 더 없으면 감시 고정을 풀어 쓰지 않을 때 전용 연결을 닫게 함
+    watcher = account.service.watcher
+    if watcher and ref.folder not in account.config.watch_folders and not is_subscribed(account, ref.folder):
+        watcher.release(ref.folder)
+
+
+# -------
+# 5. Notifications
+
+
+def remember_session() -> None:
+    """tool을 호출한 세션을 기록해 두었다가 새 메일 알림을 보냅니다."""
+    try:
+        NOTIFY_SESSIONS.add(server.request_context.session)
+    except LookupError:
+        pass
+
+
+@server.set_logging_level()
+async def handle_set_logging_level(level: LoggingLevel) -> None:
+    SESSION_LOG_LEVELS[server.request_context.session] = level
+    remember_session()
+
+
+def updated_uris(event: WatchEvent, subscribed: set[str], account: str | None = None) -> list[str]:
+    """변경 내용에 해당하는 구독 URI들 (폴더는 모든 변경, 메일은 플래그 변경)"""
+    uris = []
+    uri = folder_uri(event.folder, account)
+    if uri in subscribed:
+        uris.append(uri)
+    for uid in event.flags_changed:
+        uri = message_uri(event.folder, uid, account)
+        if uri in subscribed:
+            uris.append(uri)
+    return uris
+
+
+async def notify_watch_event(account: str, event: WatchEvent) -> None:
+    """IDLE 감시기가 알려준 변경을 구독한 리소스에는 resource-updated로, 모든 세션에는 로그 알림으로 보냅니다."""
+    uri_account = resource_account_name(account)
+    data = {
+        "account": account,
+        "folder": event.folder,
+        "new_uids": event.new_uids,
+        "expunged": event.expunged,
+        "flags_changed": event.flags_changed,
+    }
+    for session in list(NOTIFY_SESSIONS):
+        try:
+            for uri in updated_uris(event, SUBSCRIPTIONS.get(session, set()), uri_account):
+                await session.send_resource_updated(AnyUrl(uri))
+            level = SESSION_LOG_LEVELS.get(session, DEFAULT_LOG_LEVEL)
+            if LOG_LEVELS.index(level) <= LOG_LEVELS.index("info"):
+                await session.send_log_message(level="info", data=data, logger="navermail.watch")
+        except Exception:
+            # 끊어진 세션은 더 이상 알리지 않음
+            NOTIFY_SESSIONS.discard(session)
+
+
+def on_watch_event(account: str, event: WatchEvent) -> None:
+    """감시 스레드에서 호출되므로 이벤트 루프로 넘겨 알림을 보냅니다."""
+    if EVENT_LOOP is not None and NOTIFY_SESSIONS:
+        asyncio.run_coroutine_threadsafe(notify_watch_event(account, event), EVENT_LOOP)
+
+
+def progress_reporter(total: int) -> Callable[[int], None] | None:
+    """
+    요청에 progressToken이 있으면 executor 스레드에서 부를 수 있는 진행률 알림 함수를 반환합니다.
+    알림은 이벤트 루프로 넘겨 보내며 전송을 기다리지 않습니다. 이벤트 루프 안에서 호출해야 합니다.
+    """
+    try:
+        context = server.request_context
+    except LookupError:
+        return None
+    token = context.meta.progressToken if context.meta else None
+    if token is None:
+        return None
+    loop = asyncio.get_running_loop()
+
+    def report(done: int) -> None:
+        asyncio.run_coroutine_threadsafe(
+            context.session.send_progress_notification(token, done, total, related_request_id=str(context.request_id)),
+            loop)
+    return report
+
+
+# -------
+# 6. Tool Functions
+
+
+async def render_mail_list(executor: MailExecutor, mails: list, page_info: dict | None,
+                           output_format: str) -> list[TextContent]:
+    """
+    이미 받아 온 한 페이지의 메일 목록을 요청한 형태로 직렬화합니다.
+    직렬화도 executor에서 실행하며, json/jsonl은 중간 dict 목록 없이 메일마다 바로 직렬화하고
+    jsonl은 일정 크기의 덩어리마다 TextContent를 나눠 반환합니다.
+    """
+    if output_format == "jsonl":
+        chunks = await executor.run(mails_to_jsonl, mails, page_info)
+        return [TextContent(type="text", text=chunk) for chunk in chunks or [""]]
+    if output_format == "json":
+        content = await executor.run(mails_to_json, mails, page_info)
+    elif output_format == "msgpack":
+        content = await executor.run(mails_to_msgpack, mails, page_info)
+    else:
+        content = await executor.run(mails_to_text, mails, page_info)
+    return [TextContent(type="text", text=content)]
+
+
+def iter_mail_details(mail_service: MailService, uids: list[str], folder: str,
+                      output_format: str, args: dict,
+                      progress: Callable[[int], None] | None = None) -> Iterator[TextContent]:
+    """
+    상세 조회 결과를 메일마다 TextContent로 만들어 바로 내보내고, 마지막에 찾지 못한 UID를 알립니다.
+
+    기본은 text/plain(없으면 HTML) 파트만 예산만큼 부분 FETCH해 정리한 본문을 담고,
+    full_body이면 원본 전체를 받아 text/html 원문을 담습니다.
+    메일을 파싱하는 대로 바로 직렬화해 메일 객체를 모두 메모리에 들고 있지 않습니다.
+    progress가 있으면 메일을 하나 내보낼 때마다 지금까지 내보낸 메일 개수로 부릅니다.
+    """
+    max_chars = int(args["max_chars"]) if args.get("max_chars") is not None else None
+    max_tokens = int(args["max_tokens"]) if args.get("max_tokens") is not None else None
+    found = set()
+    if args.get("full_body", False):
+        for mail in mail_service.iter_mails(uids, folder):
+            found.add(mail.uid)
+            yield TextContent(type="text", text=mail_to_format(mail, output_format, max_chars))
+            if progress:
+                progress(len(found))
+    else:
+        bodies = mail_service.iter_mail_bodies(
+            uids, folder, max_chars, max_tokens, args.get("strip_quotes", True))
+        for mail, body in bodies:
+            found.add(mail.uid)
+            yield TextContent(type="text", text=mail_to_format(mail, output_format, body=body))
+            if progress:
+                progress(len(found))
+    missing = [uid for uid in uids if uid not in found]
+    if missing:
+        yield TextContent(type="text", text=f"UID {', '.join(missing)}에 해당하는 메일을 찾을 수 없습니다.")
+
+
+def render_mail_details(mail_service: MailService, uids: list[str], folder: str, output_format: str,
+                        args: dict, progress: Callable[[int], None] | None = None) -> list[TextContent]:
+    """
+    executor에서 iter_mail_details를 실행해 tool 응답 목록을 만듭니다.
+    MCP 응답은 한 번에 보내므로, 메일마다 만들어지는 진행 상황은 progress 알림으로 알립니다.
+    """
+    return list(iter_mail_details(mail_service, uids, folder, output_format, args, progress))
+
+
+def folder_stats_to_text(stats: list[FolderStats]) -> str:
+    """폴더별 메일 개수를 읽기 쉬운 표로 만듭니다."""
+    if not stats:
+        return "조회할 수 있는 폴더가 없습니다."
+    total = sum(stat.messages or 0 for stat in stats)
+    unseen = sum(stat.unseen or 0 for stat in stats)
+    lines = [f"폴더 {len(stats)}개 / 전체 메일 {total:,}개 / 안 읽은 메일 {unseen:,}개", "-" * 50]
+    for stat in stats:
+        line = f"{stat.name}: 전체 {stat.messages or 0:,}개, 안 읽음 {stat.unseen or 0:,}개"
+        if stat.size is not None:
+            line += f", {stat.size / (1024 * 1024):.1f}MB"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def metrics_snapshot() -> dict:
+    """누적 metrics에 계정별 연결 풀/캐시/executor 상태를 더합니다."""
+    data = METRICS.snapshot()
+    accounts = {}
+    for active in ACCOUNTS.active() if ACCOUNTS else []:
+        service = active.service
+        info = {
+            "pool": service.pool.stats(),
+            "executor": {
+                "max_workers": active.executor.max_workers,
+                "max_concurrency": active.executor.max_concurrency,
+            },
+        }
+        if service.cache:
+            cache = service.cache.stats()
+            lookups = cache['hits'] + cache['misses']
+            info["cache"] = {**cache, "hit_ratio": round(cache['hits'] / lookups, 4) if lookups else None}
+        accounts[active.name] = info
+    data["accounts"] = accounts
+    return data
+
+
+def metric_gauges() -> list[tuple[str, dict, float]]:
+    """OpenMetrics로 내보낼 현재 값(연결 풀, 캐시)"""
+    gauges = []
+    for active in ACCOUNTS.active() if ACCOUNTS else []:
+        labels = {"account": active.name}
+        pool = active.service.pool.stats()
+        gauges.append(("pool_connections_max", labels, pool['max_size']))
+        gauges.append(("pool_connections", {**labels, "state": "in_use"}, pool['in_use']))
+        gauges.append(("pool_connections", {**labels, "state": "idle"}, pool['idle']))
+        if active.service.cache:
+            cache = active.service.cache.stats()
+            gauges.append(("cache_hits", labels, cache['hits']))
+            gauges.append(("cache_misses", labels, cache['misses']))
+            gauges.append(("cache_bytes", labels, cache['bytes']))
+            gauges.append(("cache_messages", labels, cache['messages']))
+    return gauges
+
+
+def metrics_to_text(data: dict) -> str:
+    """metrics를 tool별 한 줄 요약으로 만듭니다."""
+    lines = [f"가동 시간 {data['uptime_seconds']:,.0f}초"]
+    if not data["tools"]:
+        lines.append("아직 호출된 tool이 없습니다.")
+    for tool, stat in sorted(data["tools"].items(), key=lambda item: -item[1]["mean_ms"] * item[1]["calls"]):
+        phases = ", ".join(f"{phase} {ms:.1f}" for phase, ms in stat["phases_ms"].items() if ms >= 0.05)
+        lines.append(
+            f"{tool}: {stat['calls']}회" + (f" (오류 {stat['errors']})" if stat['errors'] else "")
+            + f", 평균 {stat['mean_ms']:.1f}ms / 최대 {stat['max_ms']:.1f}ms"
+            + f" [{phases + ', ' if phases else ''}기타 {stat['other_ms']:.1f}]"
+            + f", IMAP 명령 {stat['imap_commands']}개, 수신 {stat['imap_bytes_received']:,}B"
+        )
+    imap = data["imap"]
+    lines.append("-" * 50)
+    lines.append(f"IMAP: 명령 {sum(imap['commands'].values()):,}개, 송신 {imap['bytes_sent']:,}B, "
+                 f"수신 {imap['bytes_received']:,}B, 새 연결 {imap['connects']}개"
+                 + (f" (평균 {imap['connect_mean_ms']:.1f}ms)" if imap['connect_mean_ms'] is not None else ""))
+    for name, info in data["accounts"].items():
+        pool = info["pool"]
+        line = f"[{name}] 연결 풀 {pool['in_use']}/{pool['max_size']} 사용 중, 유휴 {pool['idle']}"
+        cache = info.get("cache")
+        if cache:
+            ratio = f"{cache['hit_ratio'] * 100:.1f}%" if cache['hit_ratio'] is not None else "-"
+            line += f", 캐시 적중률 {ratio} ({cache['hits']:,}/{cache['hits'] + cache['misses']:,})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def search_criteria(args: dict) -> dict:
+    """tool 인자에서 검색 조건만 골라냅니다."""
+    return {key: args[key] for key in SEARCH_CRITERIA_SCHEMA if key in args}
+
+
+async def render_bulk_result(account: Account, result: BulkResult, done_message: str,
+                             action: str) -> list[TextContent]:
+    """
+    검색 조건으로 실행한 대량 작업 결과를 텍스트로 만듭니다.
+    dry_run이면 조건에 맞는 메일 개수와 최근 메일 몇 개를 보여줍니다.
+    """
+    if not result.dry_run:
+        return [TextContent(type="text", text=result.to_text(done_message))]
+
+    matched = result.matched or []
+    lines = [f"[dry run] {action} 메일 {len(matched)}개 ('{result.folder}' 폴더, 실제로 처리하지 않음)"]
+    if matched:
+        sample = await account.executor.run(
+            account.service.get_mail_headers, matched[-DRY_RUN_SAMPLE_SIZE:], result.folder)
+        lines.append(await account.executor.run(mails_to_text, sample, {'total': len(matched)}))
+    return [TextContent(type="text", text="\n".join(lines))]
+
+
+class ToolCallError(Exception):
+    """tool 실행 중 오류. MCP 서버가 isError=True 결과로 클라이언트에 돌려줌"""
 
 
 @server.call_tool()
-async def handle_call_tool(name: Tool, args: dict | None):
+async def handle_call_tool(name: str, args: dict | None):
+    # tool 호출마다 IMAP 명령 수/전송량과 구간별 시간을 metrics에 집계하고,
+    # --profile을 켰으면 표본으로 뽑힌 호출의 cProfile 통계나 스팬을 파일로 남김
+    with track_call(name) as stats, profile_call(name) as profile:
+        try:
+            return await call_tool(name, args)
+        finally:
+            if profile:
+                profile.attributes.update(account=(args or {}).get("account") or (ACCOUNTS.default if ACCOUNTS else None),
+                                          failed=stats.failed, imap_commands=stats.commands,
+                                          imap_bytes_sent=stats.bytes_sent,
+                                          imap_bytes_received=stats.bytes_received)
+
+
+async def call_tool(name: str, args: dict | None):
     if not args:
         args = {}
 
     try:
-        # 글로벌 변수에서 자격 증명 가져오기
-        if not NAVER_ID or not NAVER_PASSWORD:
-            return [TextContent(type="text", text="자격 증명이 설정되지 않았습니다. 서버를 --naver-id와 --naver-password 인수로 시작해주세요.")]
+        if ACCOUNTS is None:
+            return [TextContent(type="text", text="계정이 설정되지 않았습니다. 서버를 --naver-id와 --naver-password 인수나 --accounts 설정 파일로 시작해주세요.")]
 
-        # 메일 서비스 인스턴스 생성
-        mail_service = MailService(id=NAVER_ID, password=NAVER_PASSWORD)
+        # 요청마다 새로 만들지 않고 계정별 연결 풀을 가진 서비스를 재사용
+        # (등록되지 않은 계정이면 ValueError가 나고 다른 오류처럼 isError 결과로 돌아감)
+        account = ACCOUNTS.get(args.get("account"))
+        mail_service, executor = account.service, account.executor
+        remember_session()
 
         if name == "list_mails":
             max_count = args.get("max_count", 10)
+            folder = args.get("folder", "INBOX")
             output_format = args.get("format", "text")
 
-            mails = mail_service.get_mails(max_count=max_count)
-
-            if output_format == "json":
-                content = mails_to_json(mails)
-            else:
-                content = mails_to_text(mails)
+            mails = await executor.run(mail_service.get_mails, max_count=max_count, folder=folder)
 
-            return [TextContent(type="text", text=content)]
+            return await render_mail_list(executor, mails, None, output_format)
 
         elif name == "list_mails_paginated":
             page_size = args.get("page_size", 10)
             last_uid = args.get("last_uid")
+            folder = args.get("folder", "INBOX")
             output_format = args.get("format", "text")
 
-            result = mail_service.get_mails_paginated(
+            result = await executor.run(
+                mail_service.get_mails_paginated,
                 page_size=page_size,
-                last_uid=last_uid
+                last_uid=last_uid,
+                folder=folder
             )
 
             mails = result['mails']
@@ -332,40 +1217,165 @@ async def handle_call_tool(name: Tool, args: dict | None):
                 'has_more': result['has_more']
             }
 
-            if output_format == "json":
-                content = mails_to_json(mails, page_info)
-            else:
-                content = mails_to_text(mails, page_info)
+            return await render_mail_list(executor, mails, page_info, output_format)
 
-            return [TextContent(type="text", text=content)]
+        elif name == "list_mails_by_range":
+            start_index = int(args.get("start_index", 0))
+            count = int(args.get("count", 10))
+            folder = args.get("folder", "INBOX")
+            output_format = args.get("format", "text")
+
+            result = await executor.run(
+                mail_service.get_mails_by_range,
+                start_index=start_index,
+                count=count,
+                folder=folder
+            )
+
+            mails = result['mails']
+            page_info = {
+                'start_index': start_index,
+                'next_index': start_index + count,
+                'has_more': result['has_more'],
+                'total': result['total']
+            }
+
+            return await render_mail_list(executor, mails, page_info, output_format)
+
+        elif name == "search_mails":
+            page_size = args.get("page_size", 10)
+            last_uid = args.get("last_uid")
+            folder = args.get("folder", "INBOX")
+            output_format = args.get("format", "text")
+            result = await executor.run(
+                mail_service.search_mails,
+                search_criteria(args),
+                folder=folder,
+                page_size=page_size,
+                last_uid=last_uid,
+                local=bool(args.get("local", False))
+            )
+
+            mails = result['mails']
+            page_info = {
+                'last_uid': result['last_uid'],
+                'has_more': result['has_more'],
+                'total': result['total']
+            }
+
+            return await render_mail_list(executor, mails, page_info, output_format)
 
         elif name == "get_mail_detail":
             uid = args.get("uid")
+            folder = args.get("folder", "INBOX")
             output_format = args.get("format", "json")
 
             if not uid:
                 return [TextContent(type="text", text="UID가 필요합니다.")]
 
-            # 특정 UID의 메일 가져오기
-            with MailBox("imap.naver.com").login(NAVER_ID, NAVER_PASSWORD, "INBOX") as mailbox:
-                mails = list(mailbox.fetch(criteria=AND(uid=uid)))
+            return await executor.run(render_mail_details, mail_service, [str(uid)], folder, output_format, args)
 
-                if not mails:
-                    return [TextContent(type="text", text=f"UID {uid}에 해당하는 메일을 찾을 수 없습니다.")]
+        elif name == "get_mail_details":
+            uids = [str(uid) for uid in args.get("uids", [])]
+            folder = args.get("folder", "INBOX")
+            output_format = args.get("format", "json")
+
+            if not uids:
+                return [TextContent(type="text", text="UID 목록이 필요합니다.")]
 
-                mail = mails[0]
+            # progressToken을 준 클라이언트에는 메일을 하나 만들 때마다 진행률을 알림
+            return await executor.run(render_mail_details, mail_service, uids, folder, output_format, args,
+                                      progress_reporter(len(uids)))
 
-                if output_format == "json":
-                    content = mail_to_json(mail)
-                else:
-                    content = mail_to_text(mail, detailed=True)
+        elif name == "list_attachments":
+            uids = [str(uid) for uid in args.get("uids", [])]
+            folder = args.get("folder", "INBOX")
+            output_format = args.get("format", "json")
 
+            if not uids:
+                return [TextContent(type="text", text="UID 목록이 필요합니다.")]
+
+            attachments = await executor.run(mail_service.list_attachments, uids, folder)
+            if output_format == "text":
+                lines = []
+                for uid in uids:
+                    if uid not in attachments:
+                        lines.append(f"UID {uid}: 메일을 찾을 수 없습니다.")
+                        continue
+                    parts = attachments[uid]
+                    lines.append(f"UID {uid}: 첨부파일 {len(parts)}개")
+                    for part in parts:
+                        lines.append(f"  [{part.section}] {part.filename or '(이름 없음)'} | {part.content_type} | {part.size:,} bytes")
+                content = "\n".join(lines)
+            else:
+                items = [{"uid": uid, "attachments": [part.to_dict() for part in parts]}
+                         for uid, parts in attachments.items()]
+                content = encode(items, output_format)
             return [TextContent(type="text", text=content)]
 
+        elif name == "get_attachment":
+            uid = args.get("uid")
+            section = args.get("section")
+            folder = args.get("folder", "INBOX")
+            save_dir = args.get("save_dir")
+
+            if not uid or not section:
+                return [TextContent(type="text", text="UID와 파트 번호(section)가 필요합니다.")]
+            if save_dir:
+                # 클라이언트가 준 경로는 서버가 정한 다운로드 디렉터리 밖으로 나갈 수 없음
+                if not account.config.download_dir:
+                    raise ValueError("다운로드 디렉터리(--download-dir)가 설정되지 않아 첨부파일을 저장할 수 없습니다.")
+                save_dir = resolve_save_dir(account.config.download_dir, str(save_dir))
+
+            # 파일로 저장할 때는 크기 제한 없이 임시 파일을 거쳐 디스크로 옮김
+            max_size = None if save_dir else int(args.get("max_inline_bytes", MAX_INLINE_ATTACHMENT_BYTES))
+            result = await executor.run(mail_service.fetch_attachment, str(uid), str(section), folder, max_size)
+            if result is None:
+                return [TextContent(type="text", text=f"UID {uid} 메일에서 파트 {section}을(를) 찾을 수 없습니다.")]
+
+            part, spool = result
+            filename = safe_filename(part.filename, f"{uid}_{section}.bin")
+            with spool:
+                size = spool.seek(0, os.SEEK_END)
+                if save_dir:
+                    path = await executor.run(save_spool, spool, save_dir, filename)
+                    return [TextContent(type="text", text=f"첨부파일을 저장했습니다: {path} ({size:,} bytes)")]
+                blob = await executor.run(read_base64, spool)
+
+            uri = attachment_uri(folder, str(uid), str(section), resource_account_name(account.name))
+            return [
+                TextContent(type="text", text=f"{filename} ({part.content_type}, {size:,} bytes)"),
+                EmbeddedResource(
+                    type="resource",
+                    resource=BlobResourceContents(uri=uri, mimeType=part.content_type, blob=blob),
+                ),
+            ]
+
+        elif name == "wait_for_new_mail":
+            folder = args.get("folder", "INBOX")
+            timeout = min(float(args.get("timeout", 60)), MAX_WAIT_TIMEOUT)
+            since_uid = args.get("since_uid")
+            output_format = args.get("format", "text")
+
+            if not mail_service.watcher:
+                return [TextContent(type="text", text="IDLE 감시기가 설정되지 않았습니다.")]
+            if since_uid is not None and not str(since_uid).isdigit():
+                return [TextContent(type="text", text=f"잘못된 UID입니다: {since_uid}")]
+
+            # 대기는 연결을 쓰지 않으므로 IMAP 작업용 스레드 풀 대신 기본 스레드에서 기다림
+            new_uids = await asyncio.to_thread(mail_service.watcher.wait_for_new_mail, folder, timeout, since_uid)
+            if not new_uids:
+                return [TextContent(type="text", text=f"{timeout:g}초 동안 새 메일이 없습니다.")]
+
+            mails = await executor.run(mail_service.get_mail_headers, new_uids, folder)
+            page_info = {"last_uid": new_uids[-1], "has_more": False, "total": len(new_uids)}
+            return await render_mail_list(executor, mails, page_info, output_format)
+
         elif name == "debug_env":
             debug_info = {
-                "naver_id": "***" if NAVER_ID else None,
-                "naver_password": "***" if NAVER_PASSWORD else None,
+                "accounts": ACCOUNTS.names(),
+                "default_account": ACCOUNTS.default,
+                "active_accounts": [active.name for active in ACCOUNTS.active()],
                 "working_dir": os.getcwd(),
             }
             return [TextContent(type="text", text=f"Debug Info:\n{debug_info}")]
@@ -373,21 +1383,41 @@ async def handle_call_tool(name: Tool, args: dict | None):
         elif name == "ping":
             return [TextContent(type="text", text="MCP Server is running")]
 
+        elif name == "server_metrics":
+            output_format = args.get("format", "text")
+            if output_format == "openmetrics":
+                content = METRICS.to_openmetrics(metric_gauges())
+            elif output_format == "json":
+                content = dumps(metrics_snapshot())
+            else:
+                content = metrics_to_text(metrics_snapshot())
+            if args.get("reset", False):
+                METRICS.reset()
+            return [TextContent(type="text", text=content)]
+
         # 폴더 관리 tools
         elif name == "list_folders":
-            folder_info_list = mail_service.get_folder_list()
+            folder_info_list = await executor.run(
+                mail_service.get_folder_list, refresh=bool(args.get("refresh", False)))
             folder_list = folder_info_list_to_folder_list(folder_info_list)
-            import json
-            content = json.dumps(
-                [folder.to_dict() for folder in folder_list], ensure_ascii=False, indent=2)
+            content = encode([folder.to_dict() for folder in folder_list], args.get("format", "json"))
             return [TextContent(type="text", text=content)]
 
+        elif name == "folder_stats":
+            folders = args.get("folders") or None
+            output_format = args.get("format", "text")
+
+            stats = await executor.run(mail_service.get_folder_stats, folders)
+            if output_format != "text":
+                return [TextContent(type="text", text=encode([stat.to_dict() for stat in stats], output_format))]
+            return [TextContent(type="text", text=folder_stats_to_text(stats))]
+
         elif name == "create_folder":
             folder_name = args.get("folder_name")
             if not folder_name:
                 return [TextContent(type="text", text="폴더 이름이 필요합니다.")]
 
-            mail_service.create_folder(folder_name)
+            await executor.run(mail_service.create_folder, folder_name)
             return [TextContent(type="text", text=f"폴더 '{folder_name}'가 성공적으로 생성되었습니다.")]
 
         elif name == "delete_folder":
@@ -396,10 +1426,10 @@ async def handle_call_tool(name: Tool, args: dict | None):
                 return [TextContent(type="text", text="폴더 이름이 필요합니다.")]
 
             # 폴더 존재 여부 확인
-            if not mail_service.is_folder_exists(folder_name):
+            if not await executor.run(mail_service.is_folder_exists, folder_name):
                 return [TextContent(type="text", text=f"폴더 '{folder_name}'가 존재하지 않습니다.")]
 
-            mail_service.delete_folder(folder_name)
+            await executor.run(mail_service.delete_folder, folder_name)
             return [TextContent(type="text", text=f"폴더 '{folder_name}'가 성공적으로 삭제되었습니다.")]
 
         elif name == "rename_folder":
@@ -410,124 +1440,358 @@ async def handle_call_tool(name: Tool, args: dict | None):
                 return [TextContent(type="text", text="기존 폴더 이름과 새 폴더 이름이 모두 필요합니다.")]
 
             # 기존 폴더 존재 여부 확인
-            if not mail_service.is_folder_exists(old_folder_name):
+            if not await executor.run(mail_service.is_folder_exists, old_folder_name):
                 return [TextContent(type="text", text=f"폴더 '{old_folder_name}'가 존재하지 않습니다.")]
 
-            mail_service.rename_folder(old_folder_name, new_folder_name)
+            await executor.run(mail_service.rename_folder, old_folder_name, new_folder_name)
             return [TextContent(type="text", text=f"폴더 '{old_folder_name}'가 '{new_folder_name}'로 성공적으로 변경되었습니다.")]
 
         # 메일 조작 tools
         elif name == "move_mails":
             mail_uids = args.get("mail_uids", [])
             folder_name = args.get("folder_name")
+            folder = args.get("folder", "INBOX")
 
             if not mail_uids or not folder_name:
                 return [TextContent(type="text", text="메일 UID 목록과 폴더 이름이 필요합니다.")]
 
             # 폴더 존재 여부 확인
-            if not mail_service.is_folder_exists(folder_name):
+            if not await executor.run(mail_service.is_folder_exists, folder_name):
                 return [TextContent(type="text", text=f"폴더 '{folder_name}'가 존재하지 않습니다.")]
 
-            mail_service.move_mails(mail_uids, folder_name)
-            return [TextContent(type="text", text=f"{len(mail_uids)}개의 메일이 '{folder_name}' 폴더로 성공적으로 이동되었습니다.")]
+            result = await executor.run(mail_service.move_mails, mail_uids, folder_name, folder=folder)
+            return [TextContent(type="text", text=result.to_text(f"{result.total}개의 메일이 '{folder_name}' 폴더로 성공적으로 이동되었습니다."))]
 
         elif name == "copy_mails":
             mail_uids = args.get("mail_uids", [])
             folder_name = args.get("folder_name")
+            folder = args.get("folder", "INBOX")
 
             if not mail_uids or not folder_name:
                 return [TextContent(type="text", text="메일 UID 목록과 폴더 이름이 필요합니다.")]
 
             # 폴더 존재 여부 확인
-            if not mail_service.is_folder_exists(folder_name):
+            if not await executor.run(mail_service.is_folder_exists, folder_name):
                 return [TextContent(type="text", text=f"폴더 '{folder_name}'가 존재하지 않습니다.")]
 
-            mail_service.copy_mails(mail_uids, folder_name)
-            return [TextContent(type="text", text=f"{len(mail_uids)}개의 메일이 '{folder_name}' 폴더로 성공적으로 복사되었습니다.")]
+            result = await executor.run(mail_service.copy_mails, mail_uids, folder_name, folder=folder)
+            return [TextContent(type="text", text=result.to_text(f"{result.total}개의 메일이 '{folder_name}' 폴더로 성공적으로 복사되었습니다."))]
 
         elif name == "delete_mails":
             mail_uids = args.get("mail_uids", [])
+            folder = args.get("folder", "INBOX")
 
             if not mail_uids:
                 return [TextContent(type="text", text="삭제할 메일 UID 목록이 필요합니다.")]
 
-            mail_service.delete_mails(mail_uids)
-            return [TextContent(type="text", text=f"{len(mail_uids)}개의 메일이 성공적으로 삭제되었습니다.")]
+            result = await executor.run(mail_service.delete_mails, mail_uids, folder=folder)
+            return [TextContent(type="text", text=result.to_text(f"{result.total}개의 메일이 성공적으로 삭제되었습니다."))]
 
         elif name == "mark_mails_read":
             mail_uids = args.get("mail_uids", [])
+            folder = args.get("folder", "INBOX")
 
             if not mail_uids:
                 return [TextContent(type="text", text="읽음 처리할 메일 UID 목록이 필요합니다.")]
 
-            mail_service.mark_as_read(mail_uids)
-            return [TextContent(type="text", text=f"{len(mail_uids)}개의 메일이 읽음 상태로 변경되었습니다.")]
+            result = await executor.run(mail_service.mark_as_read, mail_uids, folder=folder)
+            return [TextContent(type="text", text=result.to_text(f"{result.total}개의 메일이 읽음 상태로 변경되었습니다."))]
 
         elif name == "mark_mails_unread":
             mail_uids = args.get("mail_uids", [])
+            folder = args.get("folder", "INBOX")
 
             if not mail_uids:
                 return [TextContent(type="text", text="읽지 않음 처리할 메일 UID 목록이 필요합니다.")]
 
-            mail_service.mark_as_unread(mail_uids)
-            return [TextContent(type="text", text=f"{len(mail_uids)}개의 메일이 읽지 않음 상태로 변경되었습니다.")]
+            result = await executor.run(mail_service.mark_as_unread, mail_uids, folder=folder)
+            return [TextContent(type="text", text=result.to_text(f"{result.total}개의 메일이 읽지 않음 상태로 변경되었습니다."))]
 
         elif name == "mark_mails_important":
             mail_uids = args.get("mail_uids", [])
+            folder = args.get("folder", "INBOX")
 
             if not mail_uids:
                 return [TextContent(type="text", text="중요 처리할 메일 UID 목록이 필요합니다.")]
 
-            mail_service.mark_as_important(mail_uids)
-            return [TextContent(type="text", text=f"{len(mail_uids)}개의 메일이 중요 상태로 변경되었습니다.")]
+            result = await executor.run(mail_service.mark_as_important, mail_uids, folder=folder)
+            return [TextContent(type="text", text=result.to_text(f"{result.total}개의 메일이 중요 상태로 변경되었습니다."))]
 
         elif name == "mark_mails_unimportant":
             mail_uids = args.get("mail_uids", [])
+            folder = args.get("folder", "INBOX")
 
             if not mail_uids:
                 return [TextContent(type="text", text="중요하지 않음 처리할 메일 UID 목록이 필요합니다.")]
 
-            mail_service.mark_as_unimportant(mail_uids)
-            return [TextContent(type="text", text=f"{len(mail_uids)}개의 메일이 중요하지 않음 상태로 변경되었습니다.")]
+            result = await executor.run(mail_service.mark_as_unimportant, mail_uids, folder=folder)
+            return [TextContent(type="text", text=result.to_text(f"{result.total}개의 메일이 중요하지 않음 상태로 변경되었습니다."))]
+
+        # 검색 조건으로 대량 작업
+        elif name == "move_by_query":
+            folder_name = args.get("folder_name")
+            folder = args.get("folder", "INBOX")
+            dry_run = bool(args.get("dry_run", False))
+
+            if not folder_name:
+                return [TextContent(type="text", text="이동할 폴더 이름이 필요합니다.")]
+            if not await executor.run(mail_service.is_folder_exists, folder_name):
+                return [TextContent(type="text", text=f"폴더 '{folder_name}'가 존재하지 않습니다.")]
+
+            result = await executor.run(
+                mail_service.move_by_query, search_criteria(args), folder_name, folder=folder, dry_run=dry_run)
+            return await render_bulk_result(
+                account, result, f"{result.total}개의 메일이 '{folder_name}' 폴더로 성공적으로 이동되었습니다.",
+                f"'{folder_name}' 폴더로 이동할")
+
+        elif name == "flag_by_query":
+            flag = args.get("flag")
+            value = bool(args.get("value", True))
+            folder = args.get("folder", "INBOX")
+            dry_run = bool(args.get("dry_run", False))
+
+            if flag not in FLAG_NAMES:
+                return [TextContent(type="text", text=f"flag는 {', '.join(FLAG_NAMES)} 중 하나여야 합니다.")]
+
+            result = await executor.run(
+                mail_service.flag_by_query, search_criteria(args), flag, value, folder=folder, dry_run=dry_run)
+            action = f"{flag} 표시를 {'추가' if value else '제거'}"
+            return await render_bulk_result(
+                account, result, f"{result.total}개의 메일에 {action}했습니다.", f"{action}할")
+
+        elif name == "delete_by_query":
+            folder = args.get("folder", "INBOX")
+            dry_run = bool(args.get("dry_run", False))
+
+            result = await executor.run(
+                mail_service.delete_by_query, search_criteria(args), folder=folder, dry_run=dry_run)
+            return await render_bulk_result(
+                account, result, f"{result.total}개의 메일이 성공적으로 삭제되었습니다.", "삭제할")
 
         raise ValueError(f"Unknown tool: {name}")
 
     except Exception as e:
-        error_msg = f"Error occurred: {str(e)}\nType: {type(e).__name__}\nArgs: {args}"
-        import traceback
-        error_msg += f"\nTraceback:\n{traceback.format_exc()}"
-        return [TextContent(type="text", text=error_msg)]
-
-
-async def main(naver_id: str, naver_password: str):
-    # 글로벌 변수에 자격 증명 설정
-    global NAVER_ID, NAVER_PASSWORD
-    NAVER_ID = naver_id
-    NAVER_PASSWORD = naver_password
-
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="naver-mail-mcp",
-                server_version="0.1.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
-                ),
-            ),
-        )
+        mark_failed()
+        # 클라이언트에는 짧은 메시지만 돌려주고 traceback은 서버 로그에만 남김 (인자는 메일 내용을 담을 수 있어 남기지 않음)
+        if isinstance(e, ValueError):
+            # 잘못된 인자 등 사용자가 고칠 수 있는 오류
+            logger.warning("tool %s 실패: %s", name, e)
+            raise ToolCallError(str(e)) from e
+        logger.exception("tool %s 실행 중 오류", name)
+        raise ToolCallError(f"{name} 실행 중 오류가 발생했습니다 ({type(e).__name__}: {e}). "
+                            f"자세한 내용은 서버 로그를 확인해주세요.") from e
+
+
+async def main(naver_id: str | None = None, naver_password: str | None = None, pool_size: int = 4,
+               pool_idle_timeout: float = 300.0, max_concurrency: int | None = None, cache_path: str = ":memory:",
+               cache_max_mb: int = 256, sync_interval: float = 0.0, sync_folders: list[str] | None = None,
+               index_path: str | None = None,
+               watch_folders: list[str] | None = None, max_watch_folders: int = MAX_WATCH_FOLDERS,
+               folder_cache_ttl: float = 300.0, accounts_path: str | None = None, transport: str = "stdio", http_host: str = "127.0.0.1",
+               http_port: int = 8000, http_path: str = "/mcp", metrics_path: str | None = "/metrics",
+               profile: str | None = None, profile_dir: str = "profiles", profile_sample_rate: float = 1.0,
+               profile_tools: list[str] | None = None, download_dir: str | None = None):
+    global ACCOUNTS, EVENT_LOOP
+
+    # 명령줄 옵션은 모든 계정의 기본 설정이 되고, 설정 파일의 계정 항목이 이를 덮어씀
+    defaults = {
+        "pool_size": pool_size,
+        "pool_idle_timeout": pool_idle_timeout,
+        "max_concurrency": max_concurrency,
+        "cache_path": cache_path,
+        "cache_max_mb": cache_max_mb,
+        "sync_interval": sync_interval,
+        "sync_folders": sync_folders or ["INBOX"],
+        "index_path": index_path,
+        "watch_folders": watch_folders or [],
+        "max_watch_folders": max_watch_folders,
+        "folder_cache_ttl": folder_cache_ttl,
+        "download_dir": download_dir,
+    }
+    if accounts_path:
+        configs, default = load_account_configs(accounts_path, defaults)
+    elif naver_id and naver_password:
+        configs, default = [AccountConfig(DEFAULT_ACCOUNT, naver_id, naver_password, **defaults)], DEFAULT_ACCOUNT
+    else:
+        raise SystemExit("--naver-id와 --naver-password 또는 --accounts 설정 파일이 필요합니다.")
+
+    if profile:
+        try:
+            configure_profiling(Profiler(profile.split(','), profile_dir, profile_sample_rate, profile_tools))
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+    EVENT_LOOP = asyncio.get_running_loop()
+    ACCOUNTS = AccountRegistry(configs, default, listener=on_watch_event)
+    # 백그라운드 동기화/감시를 설정한 계정만 바로 연결하고 나머지는 처음 사용할 때 연결
+    ACCOUNTS.start()
+
+    try:
+        if transport == "http":
+            await run_http(http_host, http_port, http_path, metrics_path)
+        else:
+            async with stdio_server() as (read_stream, write_stream):
+                await server.run(read_stream, write_stream, server.create_initialization_options())
+    finally:
+        ACCOUNTS.close()
+        # 프로파일러가 아직 쓰지 않은 결과를 파일로 남김
+        configure_profiling(None)
+
+
+class StreamableHTTPEndpoint:
+    """Starlette Route가 요청/응답 함수로 감싸지 않도록 ASGI 앱으로 세션 매니저에 요청을 넘깁니다."""
+
+    def __init__(self, session_manager):
+        self.session_manager = session_manager
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.session_manager.handle_request(scope, receive, send)
+
+
+async def run_http(host: str, port: int, path: str = "/mcp", metrics_path: str | None = "/metrics") -> None:
+    """
+    Streamable HTTP(응답 스트리밍은 SSE) 전송으로 서버를 실행합니다.
+    프로세스 하나가 연결 풀과 캐시를 유지한 채 여러 클라이언트를 받으며,
+    클라이언트마다 MCP 세션(Mcp-Session-Id)이 따로 만들어져 구독과 로그 수준이 섞이지 않습니다.
+    metrics_path가 있으면 그 경로에서 Prometheus가 수집할 수 있는 OpenMetrics 텍스트를 제공합니다.
+    """
+    import uvicorn
+
+    app = create_http_app(path, metrics_path)
+    config = uvicorn.Config(app, host=host, port=port, log_level="info")
+    await uvicorn.Server(config).serve()
+
+
+def create_http_app(path: str = "/mcp", metrics_path: str | None = "/metrics"):
+    """MCP 엔드포인트와 metrics 엔드포인트를 담은 Starlette 앱을 만듭니다."""
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+
+    session_manager = StreamableHTTPSessionManager(app=server)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        async with session_manager.run():
+            yield
+
+    async def handle_metrics(request) -> PlainTextResponse:
+        return PlainTextResponse(METRICS.to_openmetrics(metric_gauges()),
+                                 media_type="application/openmetrics-text; version=1.0.0; charset=utf-8")
+
+    routes = [Route(path, endpoint=StreamableHTTPEndpoint(session_manager))]
+    if metrics_path:
+        routes.append(Route(metrics_path, endpoint=handle_metrics, methods=["GET"]))
+    return Starlette(routes=routes, lifespan=lifespan)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Naver Mail MCP Server')
+    parser.add_argument('--transport',
+                        choices=['stdio', 'http'],
+                        default='stdio',
+                        help='MCP 전송 방식 (http: 여러 클라이언트가 연결 풀과 캐시를 공유하는 Streamable HTTP 서버)')
+    parser.add_argument('--host',
+                        default='127.0.0.1',
+                        help='--transport http에서 바인딩할 주소')
+    parser.add_argument('--port',
+                        type=int,
+                        default=8000,
+                        help='--transport http에서 바인딩할 포트')
+    parser.add_argument('--http-path',
+                        default='/mcp',
+                        help='--transport http의 MCP 엔드포인트 경로')
+    parser.add_argument('--metrics-path',
+                        default='/metrics',
+                        help='--transport http에서 OpenMetrics 텍스트를 제공할 경로 (빈 문자열이면 제공하지 않음)')
     parser.add_argument('--naver-id',
-                        required=True,
-                        help='Naver ID')
+                        default=os.environ.get('NAVER_ID'),
+                        help='Naver ID (기본값: NAVER_ID 환경 변수)')
     parser.add_argument('--naver-password',
-                        required=True,
-                        help='Naver Password')
+                        default=os.environ.get('NAVER_PASSWORD'),
+                        help='Naver Password (기본값: NAVER_PASSWORD 환경 변수)')
+    parser.add_argument('--accounts',
+                        default=os.environ.get(ACCOUNTS_ENV),
+                        help=f'여러 계정을 담은 JSON 설정 파일 경로 (기본값: {ACCOUNTS_ENV} 환경 변수, 주면 --naver-id 대신 사용)')
+    parser.add_argument('--pool-size',
+                        type=int,
+                        default=4,
+                        help='재사용할 IMAP 연결의 최대 개수')
+    parser.add_argument('--pool-idle-timeout',
+                        type=float,
+                        default=300.0,
+                        help='유휴 IMAP 연결을 닫기까지의 시간(초)')
+    parser.add_argument('--max-concurrency',
+                        type=int,
+                        default=None,
+                        help='계정당 동시에 실행할 IMAP 작업 개수 (기본값: --pool-size)')
+    parser.add_argument('--cache-path',
+                        default=':memory:',
+                        help='메일 캐시 SQLite 파일 경로 (기본값: 메모리에만 저장)')
+    parser.add_argument('--cache-max-mb',
+                        type=int,
+                        default=256,
+                        help='메일 캐시 최대 크기(MB), 0이면 캐시 사용 안 함')
+    parser.add_argument('--sync-interval',
+                        type=float,
+                        default=0.0,
+                        help='--sync-folders 백그라운드 증분 동기화 주기(초), 0이면 사용 안 함')
+    parser.add_argument('--sync-folders',
+                        default=None,
+                        help='백그라운드로 증분 동기화할 폴더 목록 (쉼표로 구분, 기본값: INBOX)')
+    parser.add_argument('--index-path',
+                        default=None,
+                        help='로컬 검색 색인 SQLite 파일 경로 (":memory:" 가능, 기본값: 사용 안 함)')
+    parser.add_argument('--watch-folders',
+                        default=None,
+                        help='시작할 때부터 IDLE로 감시할 폴더 목록 (쉼표로 구분, 예: INBOX,Sent)')
+    parser.add_argument('--max-watch-folders',
+                        type=int,
+                        default=MAX_WATCH_FOLDERS,
+                        help='계정당 동시에 IDLE로 감시할 최대 폴더 수 (폴더마다 전용 연결을 하나씩 씀)')
+    parser.add_argument('--folder-cache-ttl',
+                        type=float,
+                        default=300.0,
+                        help='폴더 목록을 다시 가져오기까지의 시간(초), 0이면 매번 가져옴')
+    parser.add_argument('--download-dir',
+                        default=None,
+                        help='get_attachment가 첨부파일을 저장할 수 있는 디렉터리 (기본값: 저장하지 않음)')
+    parser.add_argument('--profile',
+                        default=os.environ.get(PROFILE_ENV),
+                        help=f'tool 호출 프로파일링 방식: cprofile, spans 또는 cprofile,spans (기본값: {PROFILE_ENV} 환경 변수, 없으면 사용 안 함)')
+    parser.add_argument('--profile-dir',
+                        default=os.environ.get(PROFILE_DIR_ENV, 'profiles'),
+                        help=f'.prof 파일과 spans.jsonl을 저장할 디렉터리 (기본값: {PROFILE_DIR_ENV} 환경 변수 또는 profiles)')
+    parser.add_argument('--profile-sample-rate',
+                        type=float,
+                        default=float(os.environ.get(PROFILE_SAMPLE_RATE_ENV, 1.0)),
+                        help=f'프로파일링할 tool 호출 비율 (0~1, 기본값: {PROFILE_SAMPLE_RATE_ENV} 환경 변수 또는 1)')
+    parser.add_argument('--profile-tools',
+                        default=None,
+                        help='프로파일링할 tool 이름 목록 (쉼표로 구분, 기본값: 전체)')
 
     args = parser.parse_args()
     asyncio.run(main(naver_id=args.naver_id,
-                naver_password=args.naver_password))
+                naver_password=args.naver_password,
+                pool_size=args.pool_size,
+                pool_idle_timeout=args.pool_idle_timeout,
+                max_concurrency=args.max_concurrency,
+                cache_path=args.cache_path,
+                cache_max_mb=args.cache_max_mb,
+                sync_interval=args.sync_interval,
+                sync_folders=args.sync_folders.split(',') if args.sync_folders else None,
+                index_path=args.index_path,
+                watch_folders=args.watch_folders.split(',') if args.watch_folders else None,
+                max_watch_folders=args.max_watch_folders,
+                folder_cache_ttl=args.folder_cache_ttl,
+                accounts_path=args.accounts,
+                transport=args.transport,
+                http_host=args.host,
+                http_port=args.port,
+                http_path=args.http_path,
+                metrics_path=args.metrics_path or None,
+                profile=args.profile,
+                profile_dir=args.profile_dir,
+                profile_sample_rate=args.profile_sample_rate,
+                profile_tools=args.profile_tools.split(',') if args.profile_tools else None,
+                download_dir=args.download_dir))
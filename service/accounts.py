@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from service.executor import MailExecutor
+from service.folders import FOLDER_CACHE_TTL, FolderCache
+from service.mail_cache import MailCache
+from service.mail_service import MailService
+from service.mail_sync import MailSync
+from service.mail_watcher import MAX_WATCH_FOLDERS, MailWatcher, WatchEvent
+from service.mailbox_pool import MailBoxPool
+from service.search_index import SearchIndex
+
+# 계정 설정 파일 경로를 담는 환경 변수
+ACCOUNTS_ENV = "NAVER_MAIL_ACCOUNTS"
+# 계정 이름을 주지 않은 설정(--naver-id, NAVER_ID 환경 변수)의 계정 이름
+DEFAULT_ACCOUNT = "default"
+
+
+@dataclass
+class AccountConfig:
+    """계정 하나의 자격 증명과 연결 풀/캐시 설정"""
+    name: str
+    naver_id: str
+    naver_password: str = field(repr=False)
+    host: str = "imap.naver.com"
+    port: int = 993
+    ssl: bool = True
+    pool_size: int = 4
+    pool_idle_timeout: float = 300.0
+    max_concurrency: Optional[int] = None
+    cache_path: str = ":memory:"
+    cache_max_mb: int = 256
+    sync_interval: float = 0.0
+    sync_folders: List[str] = field(default_factory=lambda: ["INBOX"])
+    index_path: Optional[str] = None
+    watch_folders: List[str] = field(default_factory=list)
+    max_watch_folders: int = MAX_WATCH_FOLDERS
+    folder_cache_ttl: float = FOLDER_CACHE_TTL
+    # get_attachment가 파일을 저장할 수 있는 유일한 디렉터리 (없으면 저장하지 않고 리소스로만 반환)
+    download_dir: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None) -> 'AccountConfig':
+        """
+        설정 파일의 계정 항목으로 AccountConfig를 만듭니다.
+        항목에 없는 값은 defaults(명령줄 옵션)를 따르며, 비밀번호는 naver_password_env로 환경 변수에서 읽을 수 있습니다.
+        파일 캐시/색인 경로를 공유하면 계정끼리 섞이므로 defaults에서 받은 경로에는 계정 이름을 붙입니다.
+        """
+        data = dict(data)
+        if 'naver_password_env' in data:
+            data['naver_password'] = os.environ.get(data.pop('naver_password_env'), '')
+        name = data.get('name') or data.get('naver_id')
+        if not name or not data.get('naver_id') or not data.get('naver_password'):
+            raise ValueError(f"계정 설정에는 naver_id와 naver_password가 필요합니다: {name or data}")
+
+        known = {f.name for f in fields(cls)}
+        values = {key: value for key, value in (defaults or {}).items() if key in known and value is not None}
+        for key in ('cache_path', 'index_path'):
+            if key in values and key not in data:
+                values[key] = _namespaced_path(values[key], name)
+        values.update({key: value for key, value in data.items() if key in known})
+        values['name'] = name
+        for key in ('sync_folders', 'watch_folders'):
+            if isinstance(values.get(key), str):
+                values[key] = [folder for folder in values[key].split(',') if folder]
+        return cls(**values)
+
+
+def _namespaced_path(path: Optional[str], name: str) -> Optional[str]:
+    """SQLite 파일 경로에 계정 이름을 붙입니다. (mail.db -> mail.work.db)"""
+    if not path or path == ":memory:":
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{name}{ext}"
+
+
+def load_account_configs(path: str, defaults: Optional[Dict[str, Any]] = None) -> Tuple[List[AccountConfig], str]:
+    """
+    JSON 설정 파일에서 계정 목록을 읽어 (계정 설정 목록, 기본 계정 이름)을 반환합니다.
+
+    형식:
+        {"default": "work",
+         "accounts": [{"name": "work", "naver_id": "...", "naver_password_env": "WORK_PW", "pool_size": 2}, ...]}
+    계정 목록만 담은 배열도 받으며, 이때 첫 계정이 기본 계정입니다.
+    """
+    with open(os.path.expanduser(path), encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"accounts": data}
+    configs = [AccountConfig.from_dict(item, defaults) for item in data.get("accounts", [])]
+    if not configs:
+        raise ValueError(f"계정 설정 파일에 계정이 없습니다: {path}")
+    return configs, data.get("default") or configs[0].name
+
+
+class Account:
+    """
+    계정 하나가 쓰는 연결 풀, 캐시, 동기화/감시기, 메일 서비스와 executor 묶음.
+    계정마다 연결 개수와 동시 실행 개수가 따로 제한되므로 한 계정의 대량 작업이 다른 계정을 막지 않습니다.
+    """
+
+    def __init__(self, config: AccountConfig,
+                 listener: Optional[Callable[[str, WatchEvent], None]] = None):
+        self.config = config
+        self.name = config.name
+        pool = MailBoxPool(config.naver_id, config.naver_password, host=config.host, port=config.port, ssl=config.ssl,
+                           max_size=config.pool_size, idle_timeout=config.pool_idle_timeout)
+        # cache_max_mb가 0 이하이면 캐시를 사용하지 않음
+        cache = MailCache(config.cache_path, max_bytes=config.cache_max_mb * 1024 * 1024) \
+            if config.cache_max_mb > 0 else None
+        # index_path가 있으면 가져온 메일로 로컬 검색 색인을 만듦
+        index = SearchIndex(config.index_path) if config.index_path else None
+        # sync_interval이 0보다 크면 백그라운드에서 sync_folders를 증분 동기화
+        self.sync = MailSync(pool, cache, interval=config.sync_interval, index=index) \
+            if config.sync_interval > 0 else None
+        # IDLE 감시기는 watch_folders 또는 wait_for_new_mail 호출 시 폴더마다 전용 연결을 엶
+        # (풀 밖의 연결이므로 max_watch_folders개까지만 열고 쓰지 않는 폴더부터 닫음)
+        watcher = MailWatcher(pool, sync=self.sync, cache=cache, max_folders=config.max_watch_folders)
+        if listener:
+            watcher.add_listener(lambda event: listener(self.name, event))
+        self.service = MailService(id=config.naver_id, password=config.naver_password, pool=pool,
+                                   cache=cache, sync=self.sync, index=index, watcher=watcher,
+                                   folder_cache=FolderCache(ttl=config.folder_cache_ttl))
+        # 스레드 개수는 연결 풀 크기에 맞춰 연결을 기다리며 노는 스레드가 없도록 함
+        self.executor = MailExecutor(max_workers=config.pool_size, max_concurrency=config.max_concurrency)
+
+    def start(self) -> None:
+        """백그라운드 동기화와 IDLE 감시를 시작합니다."""
+        if self.sync:
+            self.sync.start(self.config.sync_folders)
+        if self.config.watch_folders:
+            self.service.watcher.watch(self.config.watch_folders)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+        self.service.close()
+
+
+class AccountRegistry:
+    """
+    이름으로 계정을 찾는 레지스트리.
+    계정의 연결 풀과 executor는 처음 사용할 때 만들어 쓰지 않는 계정은 자원을 차지하지 않습니다.
+    """
+
+    def __init__(self, configs: List[AccountConfig], default: Optional[str] = None,
+                 listener: Optional[Callable[[str, WatchEvent], None]] = None):
+        if not configs:
+            raise ValueError("계정이 하나 이상 필요합니다.")
+        self._configs = {config.name: config for config in configs}
+        if len(self._configs) != len(configs):
+            raise ValueError("계정 이름이 중복되었습니다.")
+        self.default = default or configs[0].name
+        if self.default not in self._configs:
+            raise ValueError(f"기본 계정 '{self.default}'가 계정 목록에 없습니다.")
+        self.listener = listener
+        self._accounts: Dict[str, Account] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        return list(self._configs)
+
+    def get(self, name: Optional[str] = None) -> Account:
+        """계정을 반환합니다. name이 없으면 기본 계정, 등록되지 않은 이름이면 ValueError를 발생시킵니다."""
+        name = name or self.default
+        with self._lock:
+            account = self._accounts.get(name)
+            if account is None:
+                config = self._configs.get(name)
+                if config is None:
+                    raise ValueError(f"등록되지 않은 계정입니다: {name} (사용 가능: {', '.join(self._configs)})")
+                account = self._accounts[name] = Account(config, self.listener)
+                account.start()
+            return account
+
+    def active(self) -> List[Account]:
+        """이미 만들어진 계정들"""
+        with self._lock:
+            return list(self._accounts.values())
+
+    def start(self) -> None:
+        """백그라운드 동기화나 감시를 설정한 계정은 바로 만들어 시작합니다."""
+        for config in self._configs.values():
+            if config.sync_interval > 0 or config.watch_folders:
+                self.get(config.name)
+
+    def close(self) -> None:
+        with self._lock:
+            accounts = list(self._accounts.values())
+            self._accounts.clear()
+        for account in accounts:
+            account.close()
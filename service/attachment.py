@@ -0,0 +1,129 @@
+import base64
+import binascii
+import os
+import quopri
+import re
+import tempfile
+from typing import BinaryIO, Optional
+
+from service.bodystructure import BodyPart, iter_body_parts
+
+# BODY.PEEK[section]<offset.N>로 한 번에 받을 바이트 수
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+# 디코딩 결과가 이 크기를 넘으면 메모리 대신 임시 파일에 씀
+SPOOL_MAX_SIZE = 1024 * 1024
+
+_WHITESPACE_RE = re.compile(rb'\s+')
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+class StreamDecoder:
+    """
+    전송 인코딩(base64, quoted-printable)된 파트를 조각 단위로 디코딩해 out에 씁니다.
+    조각 경계에서 잘린 base64 4글자 묶음/quoted-printable 줄은 다음 조각과 합쳐 디코딩합니다.
+    """
+
+    def __init__(self, encoding: str, out: BinaryIO):
+        self.encoding = (encoding or '7bit').lower()
+        self.out = out
+        self._pending = b''
+        self.written = 0
+
+    def _write(self, data: bytes) -> None:
+        if data:
+            self.out.write(data)
+            self.written += len(data)
+
+    def feed(self, data: bytes) -> None:
+        if self.encoding == 'base64':
+            data = self._pending + _WHITESPACE_RE.sub(b'', data)
+            usable = len(data) - len(data) % 4
+            self._pending = data[usable:]
+            try:
+                self._write(base64.b64decode(data[:usable]))
+            except binascii.Error as e:
+                raise ValueError(f"첨부파일의 base64 인코딩이 올바르지 않습니다: {e}") from e
+        elif self.encoding == 'quoted-printable':
+            data = self._pending + data
+            # 마지막 줄은 "=" 이스케이프가 잘렸을 수 있으므로 다음 조각까지 보류
+            end = data.rfind(b'\n') + 1
+            self._pending = data[end:]
+            self._write(quopri.decodestring(data[:end]))
+        else:
+            self._write(data)
+
+    def close(self) -> None:
+        """남아있는 조각을 마저 디코딩합니다."""
+        pending, self._pending = self._pending, b''
+        if not pending:
+            return
+        if self.encoding == 'base64':
+            self._write(base64.b64decode(pending + b'=' * (-len(pending) % 4)))
+        elif self.encoding == 'quoted-printable':
+            self._write(quopri.decodestring(pending))
+
+
+def new_spool() -> tempfile.SpooledTemporaryFile:
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+
+
+def find_part(structure: Optional[list], section: str) -> Optional[BodyPart]:
+    """BODYSTRUCTURE에서 section 번호의 파트를 찾습니다."""
+    for part in iter_body_parts(structure):
+        if part.section == section:
+            return part
+    return None
+
+
+def read_base64(file: BinaryIO, chunk_size: int = 3 * 256 * 1024) -> str:
+    """파일을 처음부터 읽어 base64 문자열로 만듭니다. 원본 bytes 전체를 한 번에 읽지 않습니다."""
+    file.seek(0)
+    pieces = []
+    while True:
+        # 3의 배수 단위로 읽어야 조각별 base64를 이어 붙여도 올바름
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        pieces.append(base64.b64encode(chunk).decode('ascii'))
+    return ''.join(pieces)
+
+
+def safe_filename(filename: Optional[str], fallback: str) -> str:
+    """첨부파일 이름에서 경로와 파일 시스템에 쓸 수 없는 문자를 제거합니다."""
+    name = _UNSAFE_FILENAME_RE.sub('_', os.path.basename(filename or '')).strip(' .')
+    return name or fallback
+
+
+def resolve_save_dir(download_dir: str, save_dir: str) -> str:
+    """
+    download_dir 아래의 상대 경로 save_dir을 실제 경로로 바꿉니다.
+    절대 경로나 "..", 심볼릭 링크로 download_dir 밖을 가리키면 ValueError를 발생시킵니다.
+    """
+    root = os.path.realpath(os.path.expanduser(download_dir))
+    path = os.path.realpath(os.path.join(root, save_dir))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"첨부파일은 다운로드 디렉터리 안에만 저장할 수 있습니다: {save_dir}")
+    return path
+
+
+def save_spool(spool: BinaryIO, directory: str, filename: str) -> str:
+    """
+    디코딩된 첨부파일을 directory에 저장하고 경로를 반환합니다.
+    같은 이름의 파일이 있으면 "이름 (1).확장자" 형태로 바꿔 저장합니다.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stem, ext = os.path.splitext(filename)
+    path = os.path.join(directory, filename)
+    counter = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{stem} ({counter}){ext}")
+        counter += 1
+
+    spool.seek(0)
+    with open(path, 'wb') as f:
+        while True:
+            chunk = spool.read(ATTACHMENT_CHUNK_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
+    return path
@@ -0,0 +1,237 @@
+import base64
+import binascii
+import html
+import quopri
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+from imap_tools.utils import decode_value
+
+from service.bodystructure import BodyPart, iter_body_parts
+
+# 블록 요소가 끝나는 곳은 줄바꿈으로 바꿔 문단 구분을 유지
+_HTML_DROP_RE = re.compile(r'<(script|style|head|title)\b.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+_HTML_BLOCKQUOTE_RE = re.compile(r'<blockquote\b.*?</blockquote\s*>', re.IGNORECASE | re.DOTALL)
+_HTML_BREAK_RE = re.compile(r'<br\s*/?>|</(p|div|tr|h[1-6]|ul|ol|table)\s*>', re.IGNORECASE)
+_HTML_ITEM_RE = re.compile(r'<li\b[^>]*>', re.IGNORECASE)
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_INLINE_SPACE_RE = re.compile(r'[ \t\r\f\v\u00a0]+')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+# 답장 인용이 시작되는 줄 (이 줄부터 끝까지는 이전 메일)
+_REPLY_HEADER_RES = [
+    re.compile(r'^-{2,}\s*(Original Message|원본 메시지|원본 메일)\s*-{2,}$', re.IGNORECASE),
+    re.compile(r'^On .+ wrote:$'),
+    re.compile(r'^\d{4}[년./-].*(작성|wrote):?$'),
+]
+# Outlook 형태의 인용 머리글: "From:" 다음 몇 줄 안에 "Sent:" 같은 줄이 이어짐
+_OUTLOOK_FROM_RE = re.compile(r'^(From|보낸 사람)\s*:', re.IGNORECASE)
+_OUTLOOK_NEXT_RE = re.compile(r'^(Sent|Date|보낸 날짜|날짜)\s*:', re.IGNORECASE)
+# 서명 구분자(RFC 3676)와 모바일 기본 서명
+_SIGNATURE_RES = [
+    re.compile(r'^--\s?$'),
+    re.compile(r'^(Sent from my .{1,30}|.{1,20}에서 보냄)$'),
+]
+_CJK_RE = re.compile(r'[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]')
+
+# 토큰 예산을 글자 수로 바꿀 때 쓰는 비율 (영문은 대략 4글자가 1토큰)
+CHARS_PER_TOKEN = 4
+
+# 상세 조회 tool들이 공유하는 본문 옵션 JSON Schema
+BODY_OPTIONS_SCHEMA = {
+    "max_chars": {
+        "type": "number",
+        "description": "본문을 이 글자 수까지만 포함 (기본값: 제한 없음)"
+    },
+    "max_tokens": {
+        "type": "number",
+        "description": "본문을 이 토큰 수(한글 1글자 = 1토큰, 영문 4글자 = 1토큰으로 어림)까지만 포함"
+    },
+    "strip_quotes": {
+        "type": "boolean",
+        "default": True,
+        "description": "답장 인용(> 줄, Original Message 이후)과 서명을 제외"
+    },
+    "full_body": {
+        "type": "boolean",
+        "default": False,
+        "description": "정리하지 않은 원문 text/html 본문을 모두 포함 (원본 메일 전체를 내려받음)"
+    },
+}
+
+
+@dataclass(slots=True)
+class RenderedBody:
+    """예산에 맞춰 정리한 메일 본문"""
+    text: str
+    content_type: Optional[str]  # 본문을 만든 파트 형식 (text/plain 또는 text/html)
+    truncated: bool  # 예산 때문에 뒷부분이 잘렸는지 여부
+
+    def to_dict(self) -> dict:
+        return {
+            "body": self.text,
+            "body_type": self.content_type,
+            "body_truncated": self.truncated,
+        }
+
+
+def html_to_text(value: str, strip_quotes: bool = True) -> str:
+    """HTML 본문을 문단 구분이 남은 간결한 텍스트로 바꿉니다."""
+    value = _HTML_DROP_RE.sub('', value)
+    if strip_quotes:
+        value = _HTML_BLOCKQUOTE_RE.sub('', value)
+    value = _HTML_BREAK_RE.sub('\n', value)
+    value = _HTML_ITEM_RE.sub('\n- ', value)
+    value = html.unescape(_HTML_TAG_RE.sub('', value))
+    lines = [_INLINE_SPACE_RE.sub(' ', line).strip() for line in value.split('\n')]
+    return _BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def _is_reply_header(lines: List[str], i: int) -> bool:
+    line = lines[i].strip()
+    if any(pattern.match(line) for pattern in _REPLY_HEADER_RES):
+        return True
+    if _OUTLOOK_FROM_RE.match(line):
+        return any(_OUTLOOK_NEXT_RE.match(next_line.strip()) for next_line in lines[i + 1:i + 4])
+    return False
+
+
+def strip_quoted(text: str) -> str:
+    """
+    답장 인용(">"로 시작하는 줄, "-----Original Message-----" 이후)과 서명을 걷어냅니다.
+    모두 걷어내서 아무것도 남지 않으면 원래 텍스트를 그대로 반환합니다.
+    """
+    lines = text.splitlines()
+    kept = []
+    for i, line in enumerate(lines):
+        if _is_reply_header(lines, i) or any(pattern.match(line.rstrip()) for pattern in _SIGNATURE_RES):
+            break
+        if line.lstrip().startswith('>'):
+            continue
+        kept.append(line)
+    result = _BLANK_LINES_RE.sub('\n\n', '\n'.join(kept)).strip()
+    return result or text.strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 토큰 수를 어림합니다. 한글/한자는 글자당 1토큰, 나머지는 4글자당 1토큰으로 셉니다."""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + -(-(len(text) - cjk) // CHARS_PER_TOKEN)
+
+
+def _token_cut(text: str, max_tokens: int) -> int:
+    """앞에서부터 max_tokens 토큰에 들어가는 글자 수를 반환합니다."""
+    cost = 0
+    # 글자당 비용은 최소 1/4토큰이므로 그 이상은 볼 필요가 없음
+    limit = min(len(text), max_tokens * CHARS_PER_TOKEN)
+    for i in range(limit):
+        cost += CHARS_PER_TOKEN if _CJK_RE.match(text[i]) else 1
+        if cost > max_tokens * CHARS_PER_TOKEN:
+            return i
+    return limit
+
+
+def truncate_to_budget(text: str, max_chars: Optional[int] = None,
+                       max_tokens: Optional[int] = None, partial: bool = False) -> tuple:
+    """
+    text를 max_chars 글자, max_tokens 토큰 중 작은 쪽에 맞춰 자르고 (텍스트, 잘림 여부)를 반환합니다.
+    가능하면 단어/줄 경계에서 자릅니다. partial이면 text가 이미 앞부분뿐이므로 생략된 글자 수를 표시하지 않습니다.
+    """
+    cut = len(text)
+    if max_chars is not None:
+        cut = min(cut, max_chars)
+    if max_tokens is not None:
+        cut = min(cut, _token_cut(text, max_tokens))
+    if cut >= len(text):
+        return text, False
+
+    # 예산의 뒤쪽 20% 안에 공백이 있으면 그 앞에서 자름
+    boundary = max(text.rfind('\n', 0, cut + 1), text.rfind(' ', 0, cut + 1))
+    if boundary > cut * 0.8:
+        cut = boundary
+    if partial:
+        return text[:cut].rstrip() + "\n...(이하 생략)", True
+    return text[:cut].rstrip() + f"\n...(이하 {len(text) - cut:,}자 생략)", True
+
+
+def render_body(text: Optional[str], html_value: Optional[str] = None,
+                max_chars: Optional[int] = None, max_tokens: Optional[int] = None,
+                strip_quotes: bool = True, partial: bool = False) -> RenderedBody:
+    """
+    text/plain 본문을 우선 사용하고, 없으면 HTML을 텍스트로 바꿔 예산에 맞춘 본문을 만듭니다.
+
+    Args:
+        text: text/plain 본문
+        html_value: text/html 본문
+        max_chars: 최대 글자 수
+        max_tokens: 최대 토큰 수 (estimate_tokens 기준)
+        strip_quotes: 답장 인용과 서명을 걷어낼지 여부
+        partial: 본문 앞부분만 가져온 경우 True (뒷부분이 잘렸다고 표시)
+    """
+    if text and text.strip():
+        content_type, value = 'text/plain', text
+    elif html_value:
+        content_type, value = 'text/html', html_to_text(html_value, strip_quotes)
+    else:
+        return RenderedBody(text='', content_type=None, truncated=False)
+
+    value = value.replace('\r\n', '\n')
+    if strip_quotes:
+        value = strip_quoted(value)
+    value, truncated = truncate_to_budget(value, max_chars, max_tokens, partial)
+    if partial and not truncated:
+        value = value.rstrip() + "\n...(이하 생략)"
+        truncated = True
+    return RenderedBody(text=value, content_type=content_type, truncated=truncated)
+
+
+# 파트 단위 부분 FETCH
+
+def select_body_part(structure: Optional[list]) -> Optional[BodyPart]:
+    """BODYSTRUCTURE에서 본문으로 쓸 파트를 고릅니다. 첨부가 아닌 text/plain, 없으면 text/html 순입니다."""
+    parts = [part for part in iter_body_parts(structure) if not part.is_attachment]
+    for content_type in ('text/plain', 'text/html'):
+        for part in parts:
+            if part.content_type == content_type:
+                return part
+    return None
+
+
+def fetch_limit(part: BodyPart, max_chars: Optional[int] = None,
+                max_tokens: Optional[int] = None) -> Optional[int]:
+    """
+    예산을 채우는 데 필요한 만큼만 받도록 BODY.PEEK[section]<0.N>의 N을 계산합니다.
+    예산이 없거나 파트 전체가 더 작으면 None(파트 전체)을 반환합니다.
+    """
+    budgets = [value for value in (max_chars, max_tokens and max_tokens * CHARS_PER_TOKEN) if value]
+    if not budgets:
+        return None
+    # UTF-8 한 글자 최대 3바이트 x base64 4/3배, HTML은 태그와 인용 몫을 더 받음
+    limit = min(budgets) * 4 + 2048
+    if part.content_type == 'text/html':
+        limit *= 4
+    if part.size and limit >= part.size:
+        return None
+    return limit
+
+
+def decode_part(raw: bytes, part: BodyPart, partial: bool = False) -> str:
+    """
+    BODY[section]으로 받은 파트를 전송 인코딩과 charset에 맞춰 문자열로 바꿉니다.
+    partial이면 중간에서 잘린 base64/quoted-printable 꼬리를 버리고 디코딩합니다.
+    """
+    if part.encoding == 'base64':
+        data = re.sub(rb'\s+', b'', raw)
+        if partial:
+            data = data[:len(data) - len(data) % 4]
+        else:
+            data += b'=' * (-len(data) % 4)
+        try:
+            raw = base64.b64decode(data)
+        except binascii.Error:
+            raw = b''
+    elif part.encoding == 'quoted-printable':
+        if partial:
+            raw = re.sub(rb'=[0-9A-Fa-f]?$', b'', raw)
+        raw = quopri.decodestring(raw)
+    return decode_value(raw, part.charset or 'utf-8')
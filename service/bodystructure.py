@@ -0,0 +1,174 @@
+import re
+from dataclasses import dataclass, field
+from email.header import decode_header
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import unquote
+from imap_tools.utils import decode_value
+
+# BODYSTRUCTURE 파싱 결과: 문자열/숫자/None 또는 중첩 리스트
+Node = Union[None, int, str, list]
+
+_TOKEN_RE = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|\{(\d+)\}\r?\n|([^\s()"]+))', re.S)
+
+
+def _parse_tokens(raw: bytes, pos: int = 0) -> Tuple[list, int]:
+    """괄호로 묶인 IMAP 리스트 하나를 파싱하고 (리스트, 다음 위치)를 반환합니다."""
+    result: list = []
+    while pos < len(raw):
+        match = _TOKEN_RE.match(raw, pos)
+        if not match:
+            break
+        pos = match.end()
+        open_paren, close_paren, quoted, literal_len, atom = match.groups()
+        if open_paren:
+            child, pos = _parse_tokens(raw, pos)
+            result.append(child)
+        elif close_paren:
+            return result, pos
+        elif quoted is not None:
+            result.append(re.sub(rb'\\(.)', rb'\1', quoted).decode('utf-8', 'replace'))
+        elif literal_len is not None:
+            end = pos + int(literal_len)
+            result.append(raw[pos:end].decode('utf-8', 'replace'))
+            pos = end
+        else:
+            value = atom.decode('utf-8', 'replace')
+            if value.upper() == 'NIL':
+                result.append(None)
+            elif value.isdigit():
+                result.append(int(value))
+            else:
+                result.append(value)
+    return result, pos
+
+
+def parse_bodystructure(fetch_text: bytes) -> Optional[list]:
+    """
+    FETCH 응답 텍스트에서 BODYSTRUCTURE 값을 찾아 중첩 리스트로 파싱합니다.
+    BODYSTRUCTURE가 없으면 None을 반환합니다.
+    """
+    match = re.search(rb'BODYSTRUCTURE\s*\(', fetch_text)
+    if not match:
+        return None
+    structure, _ = _parse_tokens(fetch_text, match.end())
+    return structure
+
+
+def _to_params(node: Node) -> Dict[str, str]:
+    """("NAME" "value" ...) 형태의 파라미터 리스트를 소문자 키 딕셔너리로 변환"""
+    if not isinstance(node, list):
+        return {}
+    params = {}
+    for i in range(0, len(node) - 1, 2):
+        if isinstance(node[i], str):
+            params[node[i].lower()] = '' if node[i + 1] is None else str(node[i + 1])
+    return params
+
+
+def _decode_param(params: Dict[str, str], name: str) -> Optional[str]:
+    """RFC 2231(name*) 및 RFC 2047(=?utf-8?...) 인코딩을 풀어 파라미터 값을 반환"""
+    extended = params.get(f'{name}*')
+    if extended:
+        charset, _, value = extended.partition("''")
+        if value:
+            return unquote(value, encoding=charset or 'utf-8', errors='replace')
+        return unquote(extended)
+    raw = params.get(name)
+    if not raw:
+        return None
+    return ''.join(decode_value(*part) for part in decode_header(raw))
+
+
+@dataclass
+class BodyPart:
+    """BODYSTRUCTURE의 단일(non-multipart) 파트"""
+    section: str  # BODY[section]에 사용할 파트 번호 (예: "1", "2.1")
+    content_type: str  # 소문자 MIME 타입 (예: "text/plain")
+    params: Dict[str, str] = field(default_factory=dict)
+    content_id: Optional[str] = None
+    encoding: str = '7bit'
+    size: int = 0
+    disposition: Optional[str] = None
+    disposition_params: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def charset(self) -> Optional[str]:
+        return self.params.get('charset')
+
+    @property
+    def filename(self) -> Optional[str]:
+        return _decode_param(self.disposition_params, 'filename') or _decode_param(self.params, 'name')
+
+    @property
+    def is_attachment(self) -> bool:
+        """imap_tools의 MailMessage.attachments와 같은 기준으로 첨부파일 여부를 판단"""
+        return (
+            self.content_id is not None
+            or self.filename is not None
+            or self.content_type == 'message/rfc822'
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """첨부파일 목록 표시용 딕셔너리 (size는 전송 인코딩된 크기)"""
+        return {
+            "section": self.section,
+            "filename": self.filename,
+            "content_type": self.content_type,
+            "encoding": self.encoding,
+            "size": self.size,
+            "disposition": self.disposition,
+        }
+
+
+def _single_part(node: list, section: str) -> BodyPart:
+    maintype = (node[0] or '').lower() if len(node) > 0 else ''
+    subtype = (node[1] or '').lower() if len(node) > 1 else ''
+
+    # 확장 필드 위치: text/*는 lines 1개, message/rfc822는 envelope/body/lines 3개가 추가됨
+    ext_start = 7
+    if maintype == 'text':
+        ext_start = 8
+    elif maintype == 'message' and subtype == 'rfc822':
+        ext_start = 10
+
+    disposition = None
+    disposition_params: Dict[str, str] = {}
+    disposition_node = node[ext_start + 1] if len(node) > ext_start + 1 else None
+    if isinstance(disposition_node, list) and disposition_node:
+        disposition = str(disposition_node[0]).lower() if disposition_node[0] else None
+        disposition_params = _to_params(disposition_node[1] if len(disposition_node) > 1 else None)
+
+    return BodyPart(
+        section=section,
+        content_type=f'{maintype}/{subtype}',
+        params=_to_params(node[2] if len(node) > 2 else None),
+        content_id=node[3] if len(node) > 3 else None,
+        encoding=(node[5] or '7bit').lower() if len(node) > 5 else '7bit',
+        size=node[6] if len(node) > 6 and isinstance(node[6], int) else 0,
+        disposition=disposition,
+        disposition_params=disposition_params,
+    )
+
+
+def iter_body_parts(structure: Optional[list], section: str = '') -> Iterator[BodyPart]:
+    """
+    BODYSTRUCTURE를 순회하며 단일 파트를 섹션 번호와 함께 반환합니다.
+    multipart는 컨테이너이므로 자식 파트만 반환합니다.
+    """
+    if not structure:
+        return
+    if isinstance(structure[0], list):
+        # multipart: (part1)(part2)... "SUBTYPE" ...
+        index = 0
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            index += 1
+            child_section = f'{section}.{index}' if section else str(index)
+            yield from iter_body_parts(child, child_section)
+        return
+    yield _single_part(structure, section or '1')
+
+
+def get_attachment_parts(structure: Optional[list]) -> List[BodyPart]:
+    return [part for part in iter_body_parts(structure) if part.is_attachment]
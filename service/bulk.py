@@ -0,0 +1,157 @@
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# 명령 줄이 너무 길면 서버가 거부하므로 UID 집합 문자열을 이 길이 이하로 나눔
+# (RFC 7162 권고 8192바이트보다 넉넉하게 잡음)
+MAX_UID_SET_LENGTH = 1000
+# 한 묶음에 담을 최대 UID 개수 (실패 범위를 줄이고 여러 연결에 나눠 처리하기 위함)
+MAX_CHUNK_UIDS = 500
+
+
+@dataclass(slots=True)
+class UidChunk:
+    """한 번의 UID 명령으로 처리할 UID 묶음"""
+    uid_set: str  # 범위로 압축한 UID 집합 ("1:500,720,900:950")
+    uids: List[str]
+
+
+@dataclass(slots=True)
+class ChunkResult:
+    """묶음 하나의 처리 결과"""
+    uid_set: str
+    count: int
+    ok: bool
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        result = {"uid_set": self.uid_set, "count": self.count, "ok": self.ok}
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+@dataclass
+class BulkResult:
+    """대량 작업 전체 결과. 묶음마다 성공/실패를 따로 기록합니다."""
+    operation: str
+    folder: str
+    chunks: List[ChunkResult] = field(default_factory=list)
+    # 검색 조건으로 실행한 경우 조건에 맞은 UID 목록 (오름차순)
+    matched: Optional[List[str]] = None
+    # True면 조건에 맞는 메일만 세고 실제로 처리하지 않음
+    dry_run: bool = False
+
+    @property
+    def total(self) -> int:
+        if self.dry_run:
+            return len(self.matched or [])
+        return sum(chunk.count for chunk in self.chunks)
+
+    @property
+    def succeeded(self) -> int:
+        return sum(chunk.count for chunk in self.chunks if chunk.ok)
+
+    @property
+    def failed_chunks(self) -> List[ChunkResult]:
+        return [chunk for chunk in self.chunks if not chunk.ok]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed_chunks
+
+    def to_dict(self) -> dict:
+        result = {
+            "operation": self.operation,
+            "folder": self.folder,
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "chunks": [chunk.to_dict() for chunk in self.chunks],
+        }
+        if self.dry_run:
+            result["dry_run"] = True
+        return result
+
+    def to_text(self, done_message: str) -> str:
+        """
+        모두 성공했으면 done_message만, 일부 실패했으면 묶음별 결과를 함께 반환합니다.
+        """
+        if self.ok:
+            if len(self.chunks) <= 1:
+                return done_message
+            return f"{done_message} ({len(self.chunks)}개 묶음으로 처리)"
+
+        lines = [f"{self.total}개 중 {self.succeeded}개만 처리되었습니다. "
+                 f"({len(self.failed_chunks)}/{len(self.chunks)}개 묶음 실패)"]
+        for chunk in self.chunks:
+            status = "성공" if chunk.ok else f"실패: {chunk.error}"
+            lines.append(f"- UID {chunk.uid_set} ({chunk.count}개): {status}")
+        return '\n'.join(lines)
+
+
+def normalize_uids(uids: Iterable) -> List[int]:
+    """UID 목록을 중복 없이 오름차순 정수 목록으로 바꿉니다. 숫자가 아닌 UID가 있으면 ValueError를 발생시킵니다."""
+    result = set()
+    for uid in uids:
+        text = str(uid).strip()
+        if not text.isdigit() or int(text) == 0:
+            raise ValueError(f"잘못된 UID입니다: {uid}")
+        result.add(int(text))
+    return sorted(result)
+
+
+def _runs(uids: List[int]) -> Iterator[Tuple[int, int]]:
+    """정렬된 UID 목록을 연속 구간 (시작, 끝)으로 묶습니다."""
+    start = prev = None
+    for uid in uids:
+        if prev is not None and uid == prev + 1:
+            prev = uid
+            continue
+        if start is not None:
+            yield start, prev
+        start = prev = uid
+    if start is not None:
+        yield start, prev
+
+
+def _format_run(start: int, end: int) -> str:
+    return str(start) if start == end else f"{start}:{end}"
+
+
+def compress_uids(uids: Iterable) -> str:
+    """UID 목록을 IMAP 범위 집합 문자열("1:500,720,900:950")로 압축합니다."""
+    return ','.join(_format_run(start, end) for start, end in _runs(normalize_uids(uids)))
+
+
+def chunk_uids(uids: Iterable, max_length: int = MAX_UID_SET_LENGTH,
+               max_count: int = MAX_CHUNK_UIDS) -> List[UidChunk]:
+    """
+    UID 목록을 범위 집합으로 압축해 묶음으로 나눕니다.
+    각 묶음의 UID 집합 문자열은 max_length 이하, UID 개수는 max_count 이하입니다.
+    """
+    chunks: List[UidChunk] = []
+    runs: List[str] = []
+    members: List[str] = []
+    length = 0
+
+    def flush():
+        nonlocal runs, members, length
+        if runs:
+            chunks.append(UidChunk(','.join(runs), members))
+        runs, members, length = [], [], 0
+
+    for start, end in _runs(normalize_uids(uids)):
+        while start <= end:
+            # 남은 개수만큼만 잘라 현재 묶음에 넣음
+            stop = min(end, start + max_count - len(members) - 1)
+            text = _format_run(start, stop)
+            if runs and length + 1 + len(text) > max_length:
+                flush()
+                continue
+            runs.append(text)
+            members.extend(str(uid) for uid in range(start, stop + 1))
+            length += len(text) + (1 if len(runs) > 1 else 0)
+            start = stop + 1
+            if len(members) >= max_count:
+                flush()
+    flush()
+    return chunks
@@ -0,0 +1,59 @@
+import base64
+import json
+from typing import Any, Iterable, Iterator
+
+from service.metrics import timed
+
+# 선택 의존성: 설치되어 있으면 사용
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# tool 호출마다 고를 수 있는 출력 형태 (msgpack은 msgpack 패키지가 설치된 경우에만)
+FORMATS = ("json", "jsonl", "msgpack", "text") if msgpack is not None else ("json", "jsonl", "text")
+# 텍스트 요약이 없는 결과에 쓸 수 있는 출력 형태
+DATA_FORMATS = tuple(f for f in FORMATS if f != "text")
+
+
+def dumps(obj: Any) -> str:
+    """
+    공백 없는 JSON 문자열로 변환합니다.
+    orjson이 설치되어 있으면 orjson을, 없으면 표준 json 모듈을 사용합니다.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def dumps_lines(items: Iterable[Any]) -> Iterator[str]:
+    """항목마다 한 줄씩 JSON Lines로 변환합니다."""
+    for item in items:
+        yield dumps(item) + "\n"
+
+
+def packb(obj: Any) -> str:
+    """
+    MessagePack으로 직렬화한 뒤 TextContent에 담을 수 있도록 base64 문자열로 반환합니다.
+    """
+    if msgpack is None:
+        raise ValueError("msgpack 형식을 사용하려면 msgpack 패키지를 설치해주세요.")
+    return base64.b64encode(msgpack.packb(obj, use_bin_type=True)).decode('ascii')
+
+
+@timed("serialize")
+def encode(obj: Any, output_format: str = "json") -> str:
+    """obj를 output_format(json, jsonl, msgpack)에 맞춰 하나의 문자열로 변환합니다."""
+    if output_format == "msgpack":
+        return packb(obj)
+    if output_format == "jsonl":
+        items = obj if isinstance(obj, (list, tuple)) else [obj]
+        return ''.join(dumps_lines(items))
+    if output_format == "json":
+        return dumps(obj)
+    raise ValueError(f"지원하지 않는 출력 형태입니다: {output_format} (가능한 값: {', '.join(FORMATS)})")
@@ -0,0 +1,56 @@
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from service.metrics import record_service_call
+from service.profiling import traced
+
+T = TypeVar('T')
+
+
+class MailExecutor:
+    """
+    imap_tools의 블로킹 호출을 이벤트 루프 밖의 전용 스레드 풀에서 실행합니다.
+
+    IMAP 왕복이 진행되는 동안에도 MCP 서버가 다른 요청(ping 등)을 처리할 수 있고,
+    서로 독립적인 tool 호출은 동시에 진행됩니다.
+    """
+
+    def __init__(self, max_workers: int, max_concurrency: Optional[int] = None):
+        """
+        Args:
+            max_workers: 스레드 개수 (보통 연결 풀 크기와 같게 설정)
+            max_concurrency: 동시에 실행할 수 있는 작업 개수 (None이면 max_workers)
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers는 1 이상이어야 합니다.")
+
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="imap-worker",
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        func(*args, **kwargs)를 스레드 풀에서 실행하고 결과를 기다립니다.
+        현재 컨텍스트(진행 중인 tool 호출의 metrics와 스팬)를 작업 스레드로 넘기고 실행 시간을 기록합니다.
+        """
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            started = time.perf_counter()
+            try:
+                return await loop.run_in_executor(
+                    self._executor, functools.partial(context.run, traced(func), *args, **kwargs)
+                )
+            finally:
+                record_service_call(getattr(func, '__name__', repr(func)), time.perf_counter() - started)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,173 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from imap_tools import FolderInfo
+from imap_tools.errors import MailboxFolderStatusError
+from imap_tools.imap_utf7 import utf7_decode
+from imap_tools.utils import check_command_status, encode_folder
+
+from service.mailbox_pool import PooledMailBox
+
+# 폴더 목록을 다시 LIST하기까지의 기본 시간(초)
+FOLDER_CACHE_TTL = 300.0
+# folder_stats에서 요청하는 STATUS 항목 (SIZE는 STATUS=SIZE를 지원할 때만)
+STATUS_ITEMS = ('MESSAGES', 'UNSEEN', 'UIDNEXT', 'UIDVALIDITY')
+
+# imap_tools FolderManager.list와 같은 LIST 응답 형식
+_LIST_ITEM_RE = re.compile(r'\((?P<flags>[\S ]*?)\) (?P<delim>\S+) (?P<name>.+)')
+_STATUS_ITEM_RE = re.compile(r'^(?:"(?P<quoted>(?:[^"\\]|\\.)*)"|(?P<atom>\S+)) \((?P<items>[^)]*)\)$')
+_STATUS_VALUE_RE = re.compile(r'([A-Z-]+)\s+(\d+)')
+
+
+class FolderCache:
+    """
+    LIST 결과(폴더 트리)를 ttl초 동안 보관합니다.
+    이 서버가 폴더를 만들거나 지우거나 이름을 바꾸면 invalidate로 비웁니다.
+    """
+
+    def __init__(self, ttl: float = FOLDER_CACHE_TTL):
+        self.ttl = ttl
+        self._folders: Optional[List[FolderInfo]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[List[FolderInfo]]:
+        """유효한 폴더 목록을 반환합니다. 없거나 만료되었으면 None을 반환합니다."""
+        with self._lock:
+            if self._folders is None or time.monotonic() - self._loaded_at > self.ttl:
+                return None
+            return list(self._folders)
+
+    def set(self, folders: Iterable[FolderInfo]) -> None:
+        with self._lock:
+            self._folders = list(folders)
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._folders = None
+
+
+@dataclass(slots=True)
+class FolderStats:
+    """STATUS로 얻은 폴더 하나의 메일 개수"""
+    name: str
+    messages: Optional[int] = None
+    unseen: Optional[int] = None
+    uidnext: Optional[int] = None
+    uidvalidity: Optional[int] = None
+    size: Optional[int] = None  # 메일 크기 합계(bytes), STATUS=SIZE를 지원할 때만
+
+    @classmethod
+    def from_status(cls, name: str, status: Dict[str, int]) -> 'FolderStats':
+        return cls(
+            name=name,
+            messages=status.get('MESSAGES'),
+            unseen=status.get('UNSEEN'),
+            uidnext=status.get('UIDNEXT'),
+            uidvalidity=status.get('UIDVALIDITY'),
+            size=status.get('SIZE'),
+        )
+
+    def to_dict(self) -> dict:
+        result = {
+            "name": self.name,
+            "messages": self.messages,
+            "unseen": self.unseen,
+            "uidnext": self.uidnext,
+            "uidvalidity": self.uidvalidity,
+        }
+        if self.size is not None:
+            result["size"] = self.size
+        return result
+
+
+def parse_list_response(data: list) -> List[FolderInfo]:
+    """LIST 응답을 FolderInfo 목록으로 바꿉니다. (imap_tools FolderManager.list와 같은 방식)"""
+    result = []
+    for item in data:
+        if isinstance(item, bytes):
+            match = _LIST_ITEM_RE.search(utf7_decode(item))
+            if not match:
+                continue
+            name = match.group('name')
+            if name.startswith('"') and name.endswith('"'):
+                name = name[1:-1]
+        elif isinstance(item, tuple):
+            # 이름에 " 나 \ 가 있으면 리터럴로 옴
+            match = _LIST_ITEM_RE.search(utf7_decode(item[0]))
+            if not match:
+                continue
+            name = utf7_decode(item[1])
+        else:
+            continue
+        result.append(FolderInfo(
+            name=name.replace('\\"', '"'),
+            delim=match.group('delim').replace('"', ''),
+            flags=tuple(match.group('flags').split()),
+        ))
+    return result
+
+
+def parse_status_response(data: list) -> Dict[str, Dict[str, int]]:
+    """STATUS 응답들을 {폴더 이름: {항목: 값}}으로 바꿉니다."""
+    result = {}
+    pending_name = None
+    for item in data:
+        if isinstance(item, tuple):
+            # 리터럴로 온 폴더 이름: (b'{N}', b'이름') 다음에 b' (MESSAGES ...)'가 옴
+            pending_name = utf7_decode(item[1])
+            continue
+        if not isinstance(item, bytes):
+            continue
+        text = utf7_decode(item).strip()
+        if pending_name is not None:
+            name, items = pending_name, text
+            pending_name = None
+        else:
+            match = _STATUS_ITEM_RE.match(text)
+            if not match:
+                continue
+            name = match.group('atom') or re.sub(r'\\(.)', r'\1', match.group('quoted'))
+            items = match.group('items')
+        result[name] = {key: int(value) for key, value in _STATUS_VALUE_RE.findall(items.upper())}
+    return result
+
+
+def status_items(mailbox: PooledMailBox) -> Tuple[str, ...]:
+    """서버가 지원하는 범위에서 folder_stats가 요청할 STATUS 항목을 정합니다."""
+    if 'STATUS=SIZE' in mailbox.client.capabilities:
+        return STATUS_ITEMS + ('SIZE',)
+    return STATUS_ITEMS
+
+
+def list_status(mailbox: PooledMailBox, items: Iterable[str]) -> Tuple[List[FolderInfo], Dict[str, Dict[str, int]]]:
+    """
+    LIST-STATUS(RFC 5819)로 폴더 목록과 폴더별 STATUS를 한 번의 왕복으로 가져옵니다.
+    """
+    client = mailbox.client
+    for name in ('LIST', 'STATUS'):
+        client.untagged_responses.pop(name, None)
+    result = client._simple_command('LIST', '""', '"*"', 'RETURN', f"(STATUS ({' '.join(items)}))")
+    check_command_status(result, MailboxFolderStatusError)
+    folders = parse_list_response(client.untagged_responses.pop('LIST', []))
+    statuses = parse_status_response(client.untagged_responses.pop('STATUS', []))
+    return folders, statuses
+
+
+def pipelined_status(mailbox: PooledMailBox, folders: Iterable[str],
+                     items: Iterable[str]) -> Dict[str, Dict[str, int]]:
+    """
+    폴더마다 STATUS를 응답을 기다리지 않고 연달아 보낸 뒤 응답을 한꺼번에 읽습니다.
+    폴더 개수와 관계없이 왕복 지연은 한 번입니다. STATUS가 실패한 폴더는 결과에서 빠집니다.
+    """
+    client = mailbox.client
+    client.untagged_responses.pop('STATUS', None)
+    request = f"({' '.join(items)})"
+    tags = [client._command('STATUS', encode_folder(folder), request) for folder in folders]
+    for tag in tags:
+        # 선택할 수 없는 폴더 등은 NO를 받으며 그 폴더는 응답이 없으므로 건너뜀
+        client._command_complete('STATUS', tag)
+    return parse_status_response(client.untagged_responses.pop('STATUS', []))
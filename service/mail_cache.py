@@ -0,0 +1,257 @@
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Sequence
+from imap_tools import MailMessage
+
+from service.mail_message import HeaderMailMessage
+
+_FLAGS_RE = re.compile(rb'FLAGS \([^)]*\)')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    folder TEXT PRIMARY KEY,
+    uidvalidity INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    folder TEXT NOT NULL,
+    uid INTEGER NOT NULL,
+    flags TEXT NOT NULL DEFAULT '',
+    header_meta BLOB,
+    header BLOB,
+    full_meta BLOB,
+    body BLOB,
+    nbytes INTEGER NOT NULL DEFAULT 0,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (folder, uid)
+);
+CREATE INDEX IF NOT EXISTS messages_last_access ON messages (last_access);
+"""
+
+
+def _with_flags(meta: bytes, flags: str) -> bytes:
+    """저장된 FETCH 메타데이터의 FLAGS를 캐시에 기록된 최신 값으로 바꿉니다."""
+    return _FLAGS_RE.sub(lambda _: b'FLAGS (' + flags.encode() + b')', meta, count=1)
+
+
+class MailCache:
+    """
+    (폴더, UIDVALIDITY, UID) 단위로 메일 헤더와 원본을 저장하는 SQLite 캐시.
+
+    같은 UID의 메일 내용은 바뀌지 않으므로, UIDVALIDITY가 유지되는 동안
+    이미 받은 헤더/본문은 IMAP 통신 없이 다시 사용할 수 있습니다.
+    저장 용량이 max_bytes를 넘으면 가장 오래 읽지 않은 메일부터 지웁니다.
+
+    FLAGS는 바뀔 수 있는 값이므로 이 서버에서 변경한 내용만 반영됩니다.
+    """
+
+    def __init__(self, path: str = ":memory:", max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            path: SQLite 파일 경로 (":memory:"이면 프로세스 메모리에만 저장)
+            max_bytes: 캐시에 저장할 최대 바이트 수
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM messages").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    # 폴더 단위 관리
+
+    def check_uidvalidity(self, folder: str, uidvalidity: Optional[int]) -> None:
+        """
+        UIDVALIDITY가 바뀌었으면 해당 폴더의 캐시를 모두 비웁니다.
+        """
+        if uidvalidity is None:
+            return
+        with self._lock:
+            row = self._db.execute(
+                "SELECT uidvalidity FROM folders WHERE folder = ?", (folder,)).fetchone()
+            if row and row[0] == uidvalidity:
+                return
+            self._db.execute("BEGIN")
+            if row:
+                self._delete_folder_rows(folder)
+            self._db.execute(
+                "INSERT OR REPLACE INTO folders (folder, uidvalidity) VALUES (?, ?)",
+                (folder, uidvalidity))
+            self._db.execute("COMMIT")
+
+    def _delete_folder_rows(self, folder: str) -> None:
+        freed = self._db.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM messages WHERE folder = ?", (folder,)).fetchone()[0]
+        self._db.execute("DELETE FROM messages WHERE folder = ?", (folder,))
+        self._total_bytes -= freed
+
+    def get_uidvalidity(self, folder: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT uidvalidity FROM folders WHERE folder = ?", (folder,)).fetchone()
+        return row[0] if row else None
+
+    # 조회
+
+    def _touch(self, folder: str, uids: Sequence[int]) -> None:
+        if uids:
+            placeholders = ','.join('?' * len(uids))
+            self._db.execute(
+                f"UPDATE messages SET last_access = ? WHERE folder = ? AND uid IN ({placeholders})",
+                (time.time(), folder, *uids))
+
+    def get_headers(self, folder: str, uids: Sequence[str]) -> Dict[str, HeaderMailMessage]:
+        """캐시에 있는 헤더만 {uid: HeaderMailMessage}로 반환합니다."""
+        if not uids:
+            return {}
+        result = {}
+        with self._lock:
+            for i in range(0, len(uids), 500):
+                chunk = [int(uid) for uid in uids[i:i + 500]]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT uid, flags, header_meta, header FROM messages "
+                    f"WHERE folder = ? AND uid IN ({placeholders}) AND header IS NOT NULL",
+                    (folder, *chunk)).fetchall()
+                for uid, flags, meta, header in rows:
+                    result[str(uid)] = HeaderMailMessage.from_raw(_with_flags(meta, flags), header)
+                self._touch(folder, [row[0] for row in rows])
+            self.hits += len(result)
+            self.misses += len(uids) - len(result)
+        return result
+
+    def get_message(self, folder: str, uid: str) -> Optional[MailMessage]:
+        """캐시에 원본이 있으면 MailMessage로 복원해 반환합니다."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT flags, full_meta, body FROM messages "
+                "WHERE folder = ? AND uid = ? AND body IS NOT NULL",
+                (folder, int(uid))).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(folder, [int(uid)])
+        flags, meta, body = row
+        return MailMessage([(_with_flags(meta, flags), body)])
+
+    # 저장
+
+    def put_headers(self, folder: str, mails: Iterable[HeaderMailMessage]) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            for mail in mails:
+                self._upsert(folder, int(mail.uid), mail.flags,
+                             header_meta=mail.raw_meta, header=mail.raw_header)
+            self._db.execute("COMMIT")
+            self._evict()
+
+    def put_message(self, folder: str, uid: str, flags: Sequence[str], raw_meta: bytes, raw: bytes) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._upsert(folder, int(uid), flags, full_meta=raw_meta, body=raw)
+            self._db.execute("COMMIT")
+            self._evict()
+
+    def _upsert(self, folder: str, uid: int, flags: Sequence[str], **columns: bytes) -> None:
+        previous = self._db.execute(
+            "SELECT nbytes FROM messages WHERE folder = ? AND uid = ?", (folder, uid)).fetchone()
+        names = ', '.join(columns)
+        placeholders = ', '.join('?' * len(columns))
+        updates = ', '.join(f"{name} = excluded.{name}" for name in columns)
+        self._db.execute(
+            f"INSERT INTO messages (folder, uid, flags, last_access, {names}) "
+            f"VALUES (?, ?, ?, ?, {placeholders}) "
+            f"ON CONFLICT (folder, uid) DO UPDATE SET flags = excluded.flags, "
+            f"last_access = excluded.last_access, {updates}",
+            (folder, uid, ' '.join(flags), time.time(), *columns.values()))
+        nbytes = self._db.execute(
+            "UPDATE messages SET nbytes = COALESCE(length(header_meta), 0) + COALESCE(length(header), 0)"
+            " + COALESCE(length(full_meta), 0) + COALESCE(length(body), 0)"
+            " WHERE folder = ? AND uid = ? RETURNING nbytes", (folder, uid)).fetchone()[0]
+        self._total_bytes += nbytes - (previous[0] if previous else 0)
+
+    def _evict(self) -> None:
+        """max_bytes를 넘으면 가장 오래 사용하지 않은 메일부터 삭제 (LRU)"""
+        while self._total_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT folder, uid, nbytes FROM messages ORDER BY last_access LIMIT 100").fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            self._db.execute("BEGIN")
+            for folder, uid, nbytes in rows:
+                self._db.execute("DELETE FROM messages WHERE folder = ? AND uid = ?", (folder, uid))
+                self._total_bytes -= nbytes
+                if self._total_bytes <= self.max_bytes:
+                    break
+            self._db.execute("COMMIT")
+
+    # 이 서버에서 변경한 내용 반영
+
+    def set_flags(self, folder: str, uids: Iterable[str], flag: str, value: bool) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            for uid in uids:
+                row = self._db.execute(
+                    "SELECT flags FROM messages WHERE folder = ? AND uid = ?", (folder, int(uid))).fetchone()
+                if row is None:
+                    continue
+                flags = [f for f in row[0].split() if f != flag]
+                if value:
+                    flags.append(flag)
+                self._db.execute(
+                    "UPDATE messages SET flags = ? WHERE folder = ? AND uid = ?",
+                    (' '.join(flags), folder, int(uid)))
+            self._db.execute("COMMIT")
+
+    def update_flags(self, folder: str, flags_by_uid: Dict[str, Sequence[str]]) -> None:
+        """서버에서 받은 최신 FLAGS로 캐시를 갱신합니다."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "UPDATE messages SET flags = ? WHERE folder = ? AND uid = ?",
+                [(' '.join(flags), folder, int(uid)) for uid, flags in flags_by_uid.items()])
+            self._db.execute("COMMIT")
+
+    def discard(self, folder: str, uids: Iterable[str]) -> None:
+        """이동/삭제되어 폴더에서 사라진 메일을 캐시에서 제거합니다."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            for uid in uids:
+                row = self._db.execute(
+                    "SELECT nbytes FROM messages WHERE folder = ? AND uid = ?", (folder, int(uid))).fetchone()
+                if row is None:
+                    continue
+                self._db.execute("DELETE FROM messages WHERE folder = ? AND uid = ?", (folder, int(uid)))
+                self._total_bytes -= row[0]
+            self._db.execute("COMMIT")
+
+    def drop_folder(self, folder: str) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._delete_folder_rows(folder)
+            self._db.execute("DELETE FROM folders WHERE folder = ?", (folder,))
+            self._db.execute("COMMIT")
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+            return {
+                'path': self.path,
+                'messages': count,
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
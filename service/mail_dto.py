@@ -1,11 +1,29 @@
-from dataclasses import dataclass, asdict
-from typing import Optional, List, Dict, Any
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Iterable, Iterator
 from imap_tools import MailMessage
 
+from service.body_renderer import RenderedBody
+from service.encoder import dumps, dumps_lines, encode, packb
+from service.mail_message import HeaderMailMessage
+from service.metrics import timed
 
-@dataclass
-class MailDTO:
-    """메일 데이터 전송 객체"""
+# 아직 계산하지 않은 지연 필드 표시
+_UNSET = object()
+
+
+def _truncate(value: Optional[str], max_chars: Optional[int]) -> Optional[str]:
+    """본문이 max_chars보다 길면 잘라내고 잘린 글자 수를 표시합니다."""
+    if value is None or max_chars is None or len(value) <= max_chars:
+        return value
+    return value[:max_chars] + f"\n...(이하 {len(value) - max_chars:,}자 생략)"
+
+
+@dataclass(slots=True)
+class MailSummaryDTO:
+    """
+    목록 표시용 메일 요약 객체.
+    본문 없이 헤더에서 얻을 수 있는 값만 담으며, 메일이 많아도 가볍도록 __slots__를 사용합니다.
+    """
     uid: str
     subject: str
     from_email: str
@@ -14,49 +32,60 @@ class MailDTO:
     cc_emails: List[str]
     bcc_emails: List[str]
     date: str  # ISO 형식 문자열
-    text_content: Optional[str]
-    html_content: Optional[str]
     has_attachments: bool
     attachment_count: int
     flags: List[str]
     size: int
 
     @classmethod
-    def from_mail_message(cls, mail: MailMessage) -> 'MailDTO':
-        """MailMessage 객체를 MailDTO로 변환"""
-        # from_ 필드 파싱
-        from_parts = mail.from_.split(
-            '<') if '<' in mail.from_ else [mail.from_]
-        from_name = from_parts[0].strip().strip(
-            '"') if len(from_parts) > 1 else None
-        from_email = from_parts[1].rstrip('>') if len(
-            from_parts) > 1 else from_parts[0]
-
-        return cls(
+    def _summary_fields(cls, mail: MailMessage) -> Dict[str, Any]:
+        sender = mail.from_values
+        # 헤더만 가져온 메일은 첨부파일 개수를 BODYSTRUCTURE로 계산
+        if isinstance(mail, HeaderMailMessage):
+            attachment_count = mail.attachment_count
+        else:
+            attachment_count = len(mail.attachments)
+
+        return dict(
             uid=mail.uid,
             subject=mail.subject or "",
-            from_email=from_email,
-            from_name=from_name,
-            to_emails=list(mail.to) if mail.to else [],
-            cc_emails=list(mail.cc) if mail.cc else [],
-            bcc_emails=list(mail.bcc) if mail.bcc else [],
+            from_email=sender.email if sender else mail.from_,
+            from_name=(sender.name or None) if sender else None,
+            to_emails=list(mail.to),
+            cc_emails=list(mail.cc),
+            bcc_emails=list(mail.bcc),
             date=mail.date.isoformat() if mail.date else "",
-            text_content=mail.text,
-            html_content=mail.html,
-            has_attachments=len(mail.attachments) > 0,
-            attachment_count=len(mail.attachments),
-            flags=list(mail.flags) if mail.flags else [],
-            size=mail.size or 0
+            has_attachments=attachment_count > 0,
+            attachment_count=attachment_count,
+            flags=list(mail.flags),
+            size=mail.size_rfc822 or mail.size or 0,
         )
 
+    @classmethod
+    def from_mail_message(cls, mail: MailMessage) -> 'MailSummaryDTO':
+        """MailMessage 객체를 MailSummaryDTO로 변환"""
+        return cls(**cls._summary_fields(mail))
+
     def to_dict(self) -> Dict[str, Any]:
         """딕셔너리로 변환 (JSON 직렬화용)"""
-        return asdict(self)
+        return {
+            "uid": self.uid,
+            "subject": self.subject,
+            "from_email": self.from_email,
+            "from_name": self.from_name,
+            "to_emails": self.to_emails,
+            "cc_emails": self.cc_emails,
+            "bcc_emails": self.bcc_emails,
+            "date": self.date,
+            "has_attachments": self.has_attachments,
+            "attachment_count": self.attachment_count,
+            "flags": self.flags,
+            "size": self.size,
+        }
 
     def to_json_string(self) -> str:
         """JSON 문자열로 변환"""
-        import json
-        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        return dumps(self.to_dict())
 
     def to_summary_text(self) -> str:
         """간단한 텍스트 요약 형태로 변환"""
@@ -66,6 +95,74 @@ class MailDTO:
 
         return f"{date_str} | {from_display} | {self.subject}{attachment_info}"
 
+
+class MailDTO(MailSummaryDTO):
+    """
+    상세 조회용 메일 데이터 전송 객체.
+    본문(text/html)과 첨부파일 정보는 처음 읽을 때 원본 메일에서 꺼내고 그 값을 재사용합니다.
+    예산에 맞춰 정리한 본문(body)이 있으면 text/html 원문 대신 그 본문만 담습니다.
+    """
+    __slots__ = ('_mail', '_max_body_chars', '_body', '_text_content', '_html_content', '_attachments')
+
+    @classmethod
+    def from_mail_message(cls, mail: MailMessage, max_body_chars: Optional[int] = None,
+                          body: Optional[RenderedBody] = None) -> 'MailDTO':
+        """
+        MailMessage 객체를 MailDTO로 변환
+        max_body_chars를 주면 text/html 본문을 각각 그 길이까지만 담습니다.
+        """
+        dto = cls(**cls._summary_fields(mail))
+        dto._mail = mail
+        dto._max_body_chars = max_body_chars
+        dto._body = body
+        dto._text_content = _UNSET
+        dto._html_content = _UNSET
+        dto._attachments = _UNSET
+        return dto
+
+    @property
+    def headers_only(self) -> bool:
+        return isinstance(self._mail, HeaderMailMessage)
+
+    @property
+    def text_content(self) -> Optional[str]:
+        if self._text_content is _UNSET:
+            self._text_content = None if self.headers_only else _truncate(self._mail.text, self._max_body_chars)
+        return self._text_content
+
+    @property
+    def html_content(self) -> Optional[str]:
+        if self._html_content is _UNSET:
+            self._html_content = None if self.headers_only else _truncate(self._mail.html, self._max_body_chars)
+        return self._html_content
+
+    @property
+    def attachments(self) -> List[Dict[str, Any]]:
+        """첨부파일 이름/형식/크기 (헤더만 있으면 BODYSTRUCTURE 기준이라 인코딩된 크기)"""
+        if self._attachments is _UNSET:
+            if self.headers_only:
+                self._attachments = [
+                    {"filename": part.filename, "content_type": part.content_type, "size": part.size}
+                    for part in self._mail.attachment_parts
+                ]
+            else:
+                self._attachments = [
+                    {"filename": att.filename, "content_type": att.content_type, "size": att.size}
+                    for att in self._mail.attachments
+                ]
+        return self._attachments
+
+    def to_dict(self) -> Dict[str, Any]:
+        """딕셔너리로 변환 (JSON 직렬화용)"""
+        result = MailSummaryDTO.to_dict(self)
+        if self._body is not None:
+            result.update(self._body.to_dict())
+        else:
+            result["text_content"] = self.text_content
+            result["html_content"] = self.html_content
+        result["attachments"] = self.attachments
+        return result
+
     def to_detailed_text(self) -> str:
         """상세한 텍스트 형태로 변환"""
         lines = [
@@ -85,7 +182,11 @@ class MailDTO:
             f"플래그: {', '.join(self.flags) if self.flags else '없음'}",
         ])
 
-        if self.text_content:
+        if self._body is not None:
+            # 이미 예산에 맞춰 정리된 본문이므로 그대로 보여줌
+            if self._body.text:
+                lines.append(f"본문:\n{self._body.text}")
+        elif self.text_content:
             preview = self.text_content[:200] + "..." if len(
                 self.text_content) > 200 else self.text_content
             lines.append(f"내용 미리보기:\n{preview}")
@@ -97,7 +198,7 @@ class MailListDTO:
     """메일 목록 DTO"""
 
     def __init__(self, mails: List[MailMessage], page_info: Optional[Dict] = None):
-        self.mails = [MailDTO.from_mail_message(mail) for mail in mails]
+        self.mails = [MailSummaryDTO.from_mail_message(mail) for mail in mails]
         self.page_info = page_info or {}
         self.total_count = len(self.mails)
 
@@ -111,8 +212,7 @@ class MailListDTO:
 
     def to_json_string(self) -> str:
         """JSON 문자열로 변환"""
-        import json
-        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        return dumps(self.to_dict())
 
     def to_summary_list(self) -> List[str]:
         """간단한 텍스트 목록으로 변환"""
@@ -125,8 +225,15 @@ class MailListDTO:
 
         lines = [f"메일 {self.total_count}개"]
         if self.page_info:
+            if self.page_info.get('total') is not None:
+                lines[0] += f" / 전체 {self.page_info['total']}개"
             if self.page_info.get('has_more'):
-                lines[0] += f" (다음 페이지 있음)"
+                if self.page_info.get('last_uid'):
+                    lines[0] += f" (다음 페이지 있음, last_uid: {self.page_info['last_uid']})"
+                elif self.page_info.get('next_index') is not None:
+                    lines[0] += f" (다음 페이지 있음, start_index: {self.page_info['next_index']})"
+                else:
+                    lines[0] += " (다음 페이지 있음)"
         lines.append("-" * 50)
 
         for i, mail in enumerate(self.mails, 1):
@@ -135,26 +242,100 @@ class MailListDTO:
         return "\n".join(lines)
 
 
+# 스트리밍 직렬화
+def iter_mails_json(mails: Iterable[MailMessage], page_info: Optional[Dict] = None) -> Iterator[str]:
+    """
+    메일 목록을 압축된 JSON 조각으로 하나씩 만들어 냅니다.
+    조각을 모두 이어 붙이면 MailListDTO.to_dict()와 같은 구조의 JSON이 됩니다.
+
+    mails는 한 번만 순회하므로 리스트든 제너레이터든 받으며, DTO/dict 목록을 따로 만들지 않습니다.
+    (tool 핸들러는 page_info의 last_uid/has_more를 정하려고 한 페이지의 헤더를 다 받은 리스트를 넘깁니다.)
+    """
+    yield '{"mails":['
+    count = 0
+    for mail in mails:
+        item = dumps(MailSummaryDTO.from_mail_message(mail).to_dict())
+        yield item if count == 0 else ',' + item
+        count += 1
+    yield f'],"total_count":{count},"page_info":{dumps(page_info or {})}}}'
+
+
+def iter_mails_jsonl(mails: Iterable[MailMessage], page_info: Optional[Dict] = None) -> Iterator[str]:
+    """
+    메일 목록을 JSON Lines로 한 줄씩 만들어 냅니다.
+    페이지 정보가 있으면 마지막 줄에 {"page_info": ...}로 붙입니다.
+    iter_mails_json과 마찬가지로 mails를 한 번만 순회합니다.
+    """
+    yield from dumps_lines(MailSummaryDTO.from_mail_message(mail).to_dict() for mail in mails)
+    if page_info:
+        yield dumps({"page_info": page_info}) + "\n"
+
+
+def chunk_text(pieces: Iterable[str], max_chars: int = 16000) -> Iterator[str]:
+    """
+    조각들을 max_chars를 넘지 않는 덩어리로 묶습니다. 조각 중간에서 자르지 않으므로
+    JSON Lines는 덩어리마다 온전한 줄로 끝납니다.
+    """
+    buffer: List[str] = []
+    size = 0
+    for piece in pieces:
+        if buffer and size + len(piece) > max_chars:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+        buffer.append(piece)
+        size += len(piece)
+    if buffer:
+        yield ''.join(buffer)
+
+
 # 편의 함수들
-def mails_to_json(mails: List[MailMessage], page_info: Optional[Dict] = None) -> str:
-    """메일 목록을 JSON 문자열로 변환하는 편의 함수"""
+@timed("serialize")
+def mails_to_json(mails: Iterable[MailMessage], page_info: Optional[Dict] = None) -> str:
+    """메일 목록을 JSON 문자열로 변환하는 편의 함수 (중간 dict 목록을 만들지 않음)"""
+    return ''.join(iter_mails_json(mails, page_info))
+
+
+@timed("serialize")
+def mails_to_jsonl(mails: Iterable[MailMessage], page_info: Optional[Dict] = None,
+                   max_chars: int = 16000) -> List[str]:
+    """메일 목록을 max_chars 이하의 JSON Lines 덩어리 목록으로 변환하는 편의 함수"""
+    return list(chunk_text(iter_mails_jsonl(mails, page_info), max_chars))
+
+
+@timed("serialize")
+def mails_to_msgpack(mails: List[MailMessage], page_info: Optional[Dict] = None) -> str:
+    """메일 목록을 base64로 인코딩한 MessagePack 문자열로 변환하는 편의 함수"""
     mail_list = MailListDTO(mails, page_info)
-    return mail_list.to_json_string()
+    return packb(mail_list.to_dict())
 
 
+@timed("serialize")
 def mails_to_text(mails: List[MailMessage], page_info: Optional[Dict] = None) -> str:
     """메일 목록을 텍스트로 변환하는 편의 함수"""
     mail_list = MailListDTO(mails, page_info)
     return mail_list.to_summary_text()
 
 
-def mail_to_json(mail: MailMessage) -> str:
+@timed("serialize")
+def mail_to_json(mail: MailMessage, max_body_chars: Optional[int] = None) -> str:
     """단일 메일을 JSON 문자열로 변환하는 편의 함수"""
-    mail_dto = MailDTO.from_mail_message(mail)
+    mail_dto = MailDTO.from_mail_message(mail, max_body_chars)
     return mail_dto.to_json_string()
 
 
-def mail_to_text(mail: MailMessage, detailed: bool = False) -> str:
+@timed("serialize")
+def mail_to_text(mail: MailMessage, detailed: bool = False, max_body_chars: Optional[int] = None) -> str:
     """단일 메일을 텍스트로 변환하는 편의 함수"""
-    mail_dto = MailDTO.from_mail_message(mail)
+    mail_dto = MailDTO.from_mail_message(mail, max_body_chars)
     return mail_dto.to_detailed_text() if detailed else mail_dto.to_summary_text()
+
+
+@timed("serialize")
+def mail_to_format(mail: MailMessage, output_format: str = "json", max_body_chars: Optional[int] = None,
+                   body: Optional[RenderedBody] = None) -> str:
+    """단일 메일을 output_format(json, jsonl, msgpack, text)으로 변환하는 편의 함수"""
+    mail_dto = MailDTO.from_mail_message(mail, max_body_chars, body)
+    if output_format == "text":
+        return mail_dto.to_detailed_text()
+    return encode(mail_dto.to_dict(), output_format)
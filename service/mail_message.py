@@ -0,0 +1,110 @@
+import re
+from functools import cached_property
+from typing import List, Optional, Sequence, Tuple
+from imap_tools import MailMessage
+
+from service.bodystructure import BodyPart, get_attachment_parts, parse_bodystructure
+
+# 목록 조회용 FETCH 항목: 본문/첨부 없이 헤더와 메타데이터만 가져옴
+HEADER_FETCH_PARTS = "(UID FLAGS RFC822.SIZE BODYSTRUCTURE BODY.PEEK[HEADER])"
+# 상세 조회용 FETCH 항목: 원본 메일 전체
+FULL_FETCH_PARTS = "(UID FLAGS RFC822.SIZE BODY[])"
+
+_FETCH_START_RE = re.compile(rb'^\d+ \(')
+_LITERAL_TAIL_RE = re.compile(rb'\{(\d+)\}$')
+_HEADER_LITERAL_RE = re.compile(rb'BODY\[HEADER\]\s*\{\d+\}$')
+
+
+def group_fetch_response(data: Sequence) -> List[list]:
+    """
+    imaplib의 FETCH 응답 데이터를 메일 단위로 묶습니다.
+    리터럴이 여러 개 섞여 있어도 "<seq> (" 로 시작하는 항목을 기준으로 나눕니다.
+    """
+    messages: List[list] = []
+    for item in data:
+        if item is None:
+            continue
+        head = item[0] if isinstance(item, tuple) else item
+        if _FETCH_START_RE.match(head):
+            messages.append([])
+        if messages:
+            messages[-1].append(item)
+    return messages
+
+
+def _quote_literal(literal: bytes) -> bytes:
+    return b'"' + literal.replace(b'\\', b'\\\\').replace(b'"', b'\\"') + b'"'
+
+
+def split_full_fetch(fetch_parts: list) -> Tuple[bytes, bytes]:
+    """
+    BODY[] FETCH 결과를 (UID/FLAGS/RFC822.SIZE 메타데이터, 원본 메일 bytes)로 나눕니다.
+    """
+    raw = b''
+    meta = []
+    for item in fetch_parts:
+        if isinstance(item, tuple):
+            meta.append(_LITERAL_TAIL_RE.sub(b'NIL', item[0]))
+            raw = item[1]
+        else:
+            meta.append(item)
+    return b''.join(meta), raw
+
+
+class HeaderMailMessage(MailMessage):
+    """
+    헤더, FLAGS, RFC822.SIZE, BODYSTRUCTURE만 가져온 메일.
+
+    본문과 첨부파일을 내려받지 않으므로 text/html은 비어 있고,
+    첨부파일 정보는 BODYSTRUCTURE로부터 계산합니다.
+    """
+
+    def __init__(self, fetch_parts: list):
+        header = b''
+        meta = []
+        for item in fetch_parts:
+            if isinstance(item, tuple):
+                prefix, literal = item
+                if _HEADER_LITERAL_RE.search(prefix):
+                    header = literal
+                    meta.append(_LITERAL_TAIL_RE.sub(b'NIL', prefix))
+                else:
+                    # BODYSTRUCTURE 안의 리터럴(비ASCII 파일명 등)은 따옴표 문자열로 치환
+                    meta.append(_LITERAL_TAIL_RE.sub(b'', prefix) + _quote_literal(literal))
+            else:
+                meta.append(item)
+        self._init_raw(b''.join(meta), header)
+
+    def _init_raw(self, raw_meta: bytes, raw_header: bytes) -> None:
+        self._raw_meta = raw_meta
+        self.raw_header = raw_header
+        super().__init__([(raw_meta, raw_header)])
+
+    @classmethod
+    def from_raw(cls, raw_meta: bytes, raw_header: bytes) -> 'HeaderMailMessage':
+        """캐시에 저장해 둔 메타데이터와 헤더로 메일 객체를 복원합니다."""
+        mail = cls.__new__(cls)
+        mail._init_raw(raw_meta, raw_header)
+        return mail
+
+    @property
+    def raw_meta(self) -> bytes:
+        """UID/FLAGS/RFC822.SIZE/BODYSTRUCTURE가 담긴 FETCH 응답 텍스트"""
+        return self._raw_meta
+
+    @cached_property
+    def body_structure(self) -> Optional[list]:
+        return parse_bodystructure(self._raw_meta)
+
+    @cached_property
+    def attachment_parts(self) -> List[BodyPart]:
+        return get_attachment_parts(self.body_structure)
+
+    @property
+    def attachment_count(self) -> int:
+        return len(self.attachment_parts)
+
+    @cached_property
+    def size(self) -> int:
+        """헤더만 있으므로 서버가 알려준 RFC822.SIZE를 사용"""
+        return self.size_rfc822
@@ -1,28 +1,216 @@
-from typing import List
-from imap_tools import MailBox, MailMessage, AND, FolderInfo
+import contextvars
+import datetime
+import imaplib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+from imap_tools import MailMessage, AND, FolderInfo
+from imap_tools.consts import UID_PATTERN
+from imap_tools.errors import (
+    MailboxCopyError,
+    MailboxExpungeError,
+    MailboxFetchError,
+    MailboxFlagError,
+    MailboxMoveError,
+)
+from imap_tools.utils import check_command_status, encode_folder
+
+from service.attachment import ATTACHMENT_CHUNK_SIZE, StreamDecoder, find_part, new_spool
+from service.body_renderer import (
+    RenderedBody,
+    decode_part,
+    fetch_limit,
+    html_to_text,
+    render_body,
+    select_body_part,
+)
+from service.bulk import BulkResult, ChunkResult, UidChunk, chunk_uids
+from service.bodystructure import BodyPart
+from service.folders import FolderCache, FolderStats, list_status, pipelined_status, status_items
+from service.mailbox_pool import MailBoxPool, PooledMailBox
+from service.mail_cache import MailCache
+from service.mail_sync import MailSync, folder_status
+from service.mail_watcher import MailWatcher
+from service.metrics import phase
+from service.profiling import traced
+from service.resources import message_etag
+from service.search_index import INDEX_COLUMNS, SearchIndex
+from service.search_query import FLAG_NAMES, build_search_criteria, parse_date, search_charset
+from service.mail_message import (
+    FULL_FETCH_PARTS,
+    HEADER_FETCH_PARTS,
+    HeaderMailMessage,
+    group_fetch_response,
+    split_full_fetch,
+)
+
+_MODSEQ_RE = re.compile(rb'MODSEQ \((\d+)\)')
 
 
 class MailService:
-    def __init__(self, id: str, password: str):
+    def __init__(self, id: str, password: str, pool: Optional[MailBoxPool] = None,
+                 cache: Optional[MailCache] = None, sync: Optional[MailSync] = None,
+                 index: Optional[SearchIndex] = None, watcher: Optional[MailWatcher] = None,
+                 folder_cache: Optional[FolderCache] = None):
         self.id = id
         self.password = password
+        # 연결 풀을 넘겨받지 않으면 서비스 전용 풀을 만듭니다.
+        self.pool = pool or MailBoxPool(id, password)
+        # 캐시가 없으면 항상 서버에서 가져옵니다.
+        self.cache = cache
+        # 동기화 엔진이 있으면 목록 조회 시 UID SEARCH 대신 로컬 미러를 사용합니다.
+        self.sync = sync
+        # 색인이 있으면 가져온 메일을 색인해 두고 local 검색에 사용합니다.
+        self.index = index
+        # IDLE 감시기가 있으면 새 메일을 폴링 없이 기다릴 수 있습니다.
+        self.watcher = watcher
+        # 폴더 목록(LIST 결과)은 TTL 동안 재사용하고 폴더를 만들거나 지우면 비웁니다.
+        self.folder_cache = folder_cache or FolderCache()
+
+    def _get_mailbox_client(self, folder: Optional[str] = None,
+                            readonly: bool = True) -> ContextManager[PooledMailBox]:
+        """
+        풀에서 로그인된 MailBox 연결을 빌려옵니다.
+        with 블록이 끝나면 연결은 닫히지 않고 풀로 반환됩니다.
 
-    def _get_mailbox_client(self) -> MailBox:
-        return MailBox("imap.naver.com").login(
-            self.id, self.password, "INBOX"
-        )
+        Args:
+            folder: 작업할 폴더 (이미 선택된 연결이면 다시 선택하지 않음, None이면 폴더 작업용)
+            readonly: 읽기 작업이면 True (EXAMINE으로 선택해 \\Recent 갱신 비용을 피함)
+        """
+        return self.pool.acquire(folder, readonly)
+
+    def close(self) -> None:
+        """동기화/감시를 멈추고 풀에 남아있는 연결과 캐시를 모두 닫습니다."""
+        if self.watcher:
+            self.watcher.stop()
+        if self.sync:
+            self.sync.stop()
+        self.pool.close()
+        if self.cache:
+            self.cache.close()
+        if self.index:
+            self.index.close()
+
+    def _check_cache(self, mailbox: PooledMailBox) -> Optional[str]:
+        """
+        캐시를 쓸 수 있으면 현재 폴더 이름을 반환합니다.
+        UIDVALIDITY가 바뀐 폴더의 캐시는 이때 비워집니다.
+        """
+        if not self.cache or mailbox.uidvalidity is None:
+            return None
+        folder = mailbox.folder.get()
+        self.cache.check_uidvalidity(folder, mailbox.uidvalidity)
+        return folder
+
+    def _index_mails(self, mailbox: PooledMailBox, mails: Sequence[MailMessage],
+                     bodies: Optional[Dict[str, str]] = None) -> None:
+        """
+        서버에서 새로 가져온 메일을 로컬 검색 색인에 추가합니다.
+        bodies는 헤더만 가져온 메일에 대해 따로 받은 본문 텍스트입니다. {uid: 본문}
+        """
+        if not self.index or not mails or mailbox.uidvalidity is None:
+            return
+        folder = mailbox.folder.get()
+        self.index.check_uidvalidity(folder, mailbox.uidvalidity)
+        self.index.add(folder, mails, bodies)
+
+    def _fetch_headers(self, mailbox: PooledMailBox, uids: Sequence[str]) -> List[HeaderMailMessage]:
+        """
+        본문 없이 헤더/FLAGS/RFC822.SIZE/BODYSTRUCTURE만 한 번의 UID FETCH로 가져옵니다.
+        캐시에 있는 메일은 서버에 요청하지 않습니다. 결과는 uids 순서를 따릅니다.
+        """
+        if not uids:
+            return []
+
+        folder = self._check_cache(mailbox)
+        mails = self.cache.get_headers(folder, uids) if folder else {}
+        missing = [uid for uid in uids if uid not in mails]
+
+        if missing:
+            fetch_result = mailbox.client.uid('FETCH', ','.join(missing), HEADER_FETCH_PARTS)
+            check_command_status(fetch_result, MailboxFetchError)
+
+            with phase("parse"):
+                fetched = [HeaderMailMessage(parts) for parts in group_fetch_response(fetch_result[1])]
+            if folder:
+                self.cache.put_headers(folder, fetched)
+            self._index_mails(mailbox, fetched)
+            mails.update((mail.uid, mail) for mail in fetched)
 
-    def get_mails(self, max_count: int = 10) -> List[MailMessage]:
+        return [mails[uid] for uid in uids if uid in mails]
+
+    def _get_headers(self, folder: str, uids: List[str], uidvalidity: Optional[int]) -> List[HeaderMailMessage]:
+        """
+        미러나 로컬 색인에서 얻은 UID 목록의 헤더를 가져옵니다.
+        UID를 얻은 시점의 UIDVALIDITY가 캐시와 같고 모두 캐시에 있으면 연결을 빌리지 않고 바로 반환합니다.
+        """
+        if not uids:
+            return []
+        if self.cache and uidvalidity is not None and self.cache.get_uidvalidity(folder) == uidvalidity:
+            mails = self.cache.get_headers(folder, uids)
+            if len(mails) == len(uids):
+                return [mails[uid] for uid in uids]
+        with self._get_mailbox_client(folder) as mailbox:
+            return self._fetch_headers(mailbox, uids)
+
+    def get_mail_headers(self, uids: Sequence[str], folder: str = "INBOX") -> List[HeaderMailMessage]:
+        """UID 목록의 헤더를 최신순으로 가져옵니다. 캐시에 있는 메일은 서버에 요청하지 않습니다."""
+        uids = sorted((str(uid) for uid in uids), key=int, reverse=True)
+        with self._get_mailbox_client(folder) as mailbox:
+            return self._fetch_headers(mailbox, uids)
+
+    def get_folder_status(self, folder: str = "INBOX") -> Dict[str, int]:
+        """STATUS로 폴더의 MESSAGES/UIDNEXT/UIDVALIDITY/HIGHESTMODSEQ를 가져옵니다. 폴더를 선택하지 않습니다."""
         with self._get_mailbox_client() as mailbox:
-            return list(mailbox.fetch(limit=max_count, reverse=True))
+            return folder_status(mailbox, folder)
 
-    def get_mails_paginated(self, page_size: int = 10, last_uid: str = None) -> dict:
+    def get_message_etag(self, uid: str, folder: str = "INBOX") -> Optional[str]:
+        """
+        메일의 현재 ETag를 반환합니다. 메일이 없으면 None을 반환합니다.
+        본문 없이 FLAGS(CONDSTORE가 있으면 MODSEQ까지)만 가져오며, 받은 FLAGS는 캐시에도 반영합니다.
         """
-        UID 기반 페이징으로 메일을 가져옵니다.
+        if not str(uid).isdigit():
+            raise ValueError(f"잘못된 UID입니다: {uid}")
+        with self._get_mailbox_client(folder) as mailbox:
+            condstore = 'CONDSTORE' in mailbox.client.capabilities
+            fetch_result = mailbox.client.uid('FETCH', str(uid), "(UID FLAGS MODSEQ)" if condstore else "(UID FLAGS)")
+            check_command_status(fetch_result, MailboxFetchError)
+            for item in fetch_result[1]:
+                if not isinstance(item, bytes):
+                    continue
+                match = re.search(UID_PATTERN, item.decode())
+                if not match or match.group('uid') != str(uid):
+                    continue
+                flags = tuple(flag.decode() for flag in imaplib.ParseFlags(item))
+                modseq = _MODSEQ_RE.search(item)
+                cache_folder = self._check_cache(mailbox)
+                if cache_folder:
+                    self.cache.update_flags(cache_folder, {str(uid): flags})
+                return message_etag(mailbox.uidvalidity, str(uid),
+                                    int(modseq.group(1)) if modseq else None, flags)
+        return None
+
+    def get_mails(self, max_count: int = 10, folder: str = "INBOX") -> List[MailMessage]:
+        """
+        최근 메일 목록을 가져옵니다. 목록 표시용이므로 헤더만 가져옵니다.
+        """
+        mirror_uids = self.sync.get_uids(folder) if self.sync else None
+        if mirror_uids is not None:
+            return self._get_headers(folder, mirror_uids[:max_count], self.sync.get_state(folder).uidvalidity)
+
+        with self._get_mailbox_client(folder) as mailbox:
+            uids = mailbox.uids()
+            uids.reverse()  # 최신순 정렬
+            return self._fetch_headers(mailbox, uids[:max_count])
+
+    def get_mails_paginated(self, page_size: int = 10, last_uid: str = None, folder: str = "INBOX") -> dict:
+        """
+        UID 기반 페이징으로 메일을 가져옵니다. 목록 표시용이므로 헤더만 가져옵니다.
 
         Args:
             page_size: 한 페이지당 메일 개수
             last_uid: 이전 페이지의 마지막 UID (다음 페이지를 가져올 때 사용)
+            folder: 조회할 폴더
 
         Returns:
             {
@@ -31,30 +219,30 @@ class MailService:
                 'has_more': bool  # 다음 페이지가 있는지
             }
         """
-        with self._get_mailbox_client() as mailbox:
+        mirror_uids = self.sync.get_uids(folder, before_uid=last_uid) if self.sync else None
+        if mirror_uids is not None:
+            mails = self._get_headers(folder, mirror_uids[:page_size], self.sync.get_state(folder).uidvalidity)
+            return {
+                'mails': mails,
+                'last_uid': mails[-1].uid if mails else None,
+                'has_more': len(mirror_uids) > page_size
+            }
+
+        with self._get_mailbox_client(folder) as mailbox:
             # 검색 조건 설정
             if last_uid:
-                # 특정 UID보다 작은 메일들만 가져오기 (reverse=True이므로)
-                criteria = AND(uid=f"1:{last_uid}")
-                # UID로 정렬하여 last_uid보다 작은 것들 중에서 최신순으로
-                mails = list(mailbox.fetch(
-                    criteria=criteria,
-                    limit=page_size + 1,  # +1로 다음 페이지 존재 여부 확인
-                    reverse=True
-                ))
+                # 특정 UID보다 작은 메일들만 가져오기
+                uids = mailbox.uids(AND(uid=f"1:{last_uid}"))
                 # last_uid는 제외
-                mails = [mail for mail in mails if mail.uid != last_uid]
+                uids = [uid for uid in uids if uid != last_uid]
             else:
                 # 첫 페이지
-                mails = list(mailbox.fetch(
-                    limit=page_size + 1,
-                    reverse=True
-                ))
+                uids = mailbox.uids()
+            uids.reverse()  # 최신순 정렬
 
-            # 다음 페이지 존재 여부 확인
-            has_more = len(mails) > page_size
-            if has_more:
-                mails = mails[:page_size]
+            # 다음 페이지 존재 여부 확인 (+1개를 보지 않고 UID 개수로 판단)
+            has_more = len(uids) > page_size
+            mails = self._fetch_headers(mailbox, uids[:page_size])
 
             # 마지막 UID 추출
             last_uid = mails[-1].uid if mails else None
@@ -65,91 +253,594 @@ class MailService:
                 'has_more': has_more
             }
 
-    def get_mails_by_range(self, start_index: int = 0, count: int = 10) -> List[MailMessage]:
+    def get_mails_by_range(self, start_index: int = 0, count: int = 10, folder: str = "INBOX") -> dict:
         """
         인덱스 기반 페이징 (비추천: 메일이 추가/삭제되면 인덱스가 변경됨)
+        최신 메일이 0번이며, 목록 표시용이므로 헤더만 가져옵니다.
+
+        전체 UID 목록을 받지 않습니다. 동기화해 둔 미러가 있으면 그 UID 배열에서 범위를 자르고,
+        없으면(동기화 엔진이 없거나 아직 동기화하지 않은 폴더) 메일 개수(STATUS MESSAGES)로
+        시퀀스 번호 범위를 계산해 그 범위의 UID만 가져옵니다.
+
+        Returns:
+            {
+                'mails': list[MailMessage],
+                'total': int,  # 폴더의 전체 메일 개수
+                'has_more': bool  # 다음 범위가 있는지
+            }
         """
-        with self._get_mailbox_client() as mailbox:
-            # 전체 메일 UID 목록 가져오기
-            all_uids = mailbox.uids()
-            all_uids.reverse()  # 최신순 정렬
+        if start_index < 0 or count <= 0:
+            raise ValueError("start_index는 0 이상, count는 1 이상이어야 합니다.")
+
+        if self.sync and self.sync.get_state(folder) is not None:
+            if not self.sync.is_fresh(folder):
+                # 미러가 오래되었으면 변경분만 동기화
+                # (한 번도 동기화하지 않은 폴더는 전체 UID 목록을 받아야 하므로 아래 시퀀스 번호 경로를 씀)
+                self.sync.sync_folder(folder)
+            mirror = self.sync.get_uids_by_index(folder, start_index, count)
+            if mirror is not None:
+                uids, total = mirror
+                mails = self._get_headers(folder, uids, self.sync.get_state(folder).uidvalidity)
+                return {
+                    'mails': mails,
+                    'total': total,
+                    'has_more': start_index + count < total
+                }
+
+        with self._get_mailbox_client(folder) as mailbox:
+            total = mailbox.folder.status(folder, ['MESSAGES'])['MESSAGES']
+            # 시퀀스 번호는 오래된 메일이 1번이므로 최신순 인덱스를 뒤집어 계산
+            end = total - start_index
+            uids = []
+            if end >= 1:
+                fetch_result = mailbox.client.fetch(f"{max(end - count + 1, 1)}:{end}", "(UID)")
+                check_command_status(fetch_result, MailboxFetchError)
+                for item in fetch_result[1]:
+                    match = isinstance(item, bytes) and re.search(UID_PATTERN, item.decode())
+                    if match:
+                        uids.append(match.group('uid'))
+                uids.sort(key=int, reverse=True)  # 최신순 정렬
+            mails = self._fetch_headers(mailbox, uids)
+
+        return {
+            'mails': mails,
+            'total': total,
+            'has_more': start_index + count < total
+        }
+
+    def get_mail(self, uid: str, folder: str = "INBOX") -> Optional[MailMessage]:
+        """
+        UID로 메일 한 통을 가져옵니다. 없으면 None을 반환합니다.
+        캐시에 원본이 있으면 서버에 요청하지 않습니다.
+        """
+        mails = self.iter_mails([uid], folder)
+        try:
+            return next(mails, None)
+        finally:
+            # 연결을 바로 풀로 돌려보냄
+            mails.close()
+
+    def iter_mails(self, uids: Sequence[str], folder: str = "INBOX") -> Iterator[MailMessage]:
+        """
+        여러 메일의 원본을 가져와 파싱되는 대로 하나씩 반환합니다.
 
-            # 범위에 해당하는 UID만 선택
-            target_uids = all_uids[start_index:start_index + count]
+        캐시에 있는 메일을 먼저 반환하고, 나머지는 한 번의 UID FETCH로 가져옵니다.
+        반환 순서는 uids 순서와 다를 수 있으며, 없는 UID는 건너뜁니다.
+        """
+        for uid in uids:
+            if not str(uid).isdigit():
+                raise ValueError(f"잘못된 UID입니다: {uid}")
+        if not uids:
+            return
+
+        with self._get_mailbox_client(folder) as mailbox:
+            cache_folder = self._check_cache(mailbox)
+            missing = []
+            for uid in uids:
+                mail = self.cache.get_message(cache_folder, uid) if cache_folder else None
+                if mail:
+                    yield mail
+                else:
+                    missing.append(str(uid))
+            if not missing:
+                return
+
+            fetch_result = mailbox.client.uid('FETCH', ','.join(missing), FULL_FETCH_PARTS)
+            check_command_status(fetch_result, MailboxFetchError)
+            messages = group_fetch_response(fetch_result[1])
+            del fetch_result
+
+            for i, parts in enumerate(messages):
+                # 파싱이 끝난 원본은 바로 놓아 최대 메모리 사용량을 줄임
+                messages[i] = None
+                with phase("parse"):
+                    raw_meta, raw = split_full_fetch(parts)
+                    mail = MailMessage([(raw_meta, raw)])
+                if cache_folder:
+                    self.cache.put_message(cache_folder, mail.uid, mail.flags, raw_meta, raw)
+                self._index_mails(mailbox, [mail])
+                yield mail
+
+    def iter_mail_bodies(self, uids: Sequence[str], folder: str = "INBOX",
+                         max_chars: Optional[int] = None, max_tokens: Optional[int] = None,
+                         strip_quotes: bool = True) -> Iterator[Tuple[MailMessage, RenderedBody]]:
+        """
+        여러 메일의 본문을 예산에 맞춰 정리해 (메일, 본문) 쌍으로 하나씩 반환합니다.
 
-            if not target_uids:
-                return []
+        원본 전체를 받지 않고 헤더의 BODYSTRUCTURE로 본문 파트(text/plain 우선)를 고른 뒤
+        그 파트의 예산만큼만 BODY.PEEK[section]<0.N>으로 가져옵니다.
+        캐시에 원본이 있는 메일은 서버에 요청하지 않습니다. 반환 순서는 uids 순서와 다를 수 있습니다.
+        검색 색인이 있으면 받은 본문 파트도 색인합니다.
 
-            # 선택된 UID들의 메일 가져오기
-            return list(mailbox.fetch(
-                criteria=AND(uid=target_uids),
-                reverse=True
-            ))
+        Args:
+            uids: 가져올 메일 UID 목록
+            folder: 메일이 있는 폴더
+            max_chars: 본문 최대 글자 수
+            max_tokens: 본문 최대 토큰 수 (어림값)
+            strip_quotes: 답장 인용과 서명을 걷어낼지 여부
+        """
+        for uid in uids:
+            if not str(uid).isdigit():
+                raise ValueError(f"잘못된 UID입니다: {uid}")
+        if not uids:
+            return
+
+        with self._get_mailbox_client(folder) as mailbox:
+            cache_folder = self._check_cache(mailbox)
+            missing = []
+            for uid in uids:
+                mail = self.cache.get_message(cache_folder, uid) if cache_folder else None
+                if mail:
+                    yield mail, render_body(mail.text, mail.html, max_chars, max_tokens, strip_quotes)
+                else:
+                    missing.append(str(uid))
+
+            # 같은 파트/길이를 요청하는 메일끼리 묶어 FETCH 횟수를 줄임
+            requests: Dict[Tuple[str, Optional[int]], List[Tuple[HeaderMailMessage, BodyPart]]] = {}
+            for mail in self._fetch_headers(mailbox, missing):
+                part = select_body_part(mail.body_structure)
+                if part is None:
+                    yield mail, render_body(None)
+                    continue
+                requests.setdefault((part.section, fetch_limit(part, max_chars, max_tokens)), []).append((mail, part))
+
+            for (section, limit), mails in requests.items():
+                item = f"BODY.PEEK[{section}]" + (f"<0.{limit}>" if limit else "")
+                fetch_result = mailbox.client.uid('FETCH', ','.join(mail.uid for mail, _ in mails), f"({item})")
+                check_command_status(fetch_result, MailboxFetchError)
+                bodies = {}
+                with phase("parse"):
+                    for parts in group_fetch_response(fetch_result[1]):
+                        raw_meta, raw = split_full_fetch(parts)
+                        match = re.search(UID_PATTERN, raw_meta.decode())
+                        if match:
+                            bodies[match.group('uid')] = raw
+                del fetch_result
+
+                rendered = []
+                texts = {}
+                for mail, part in mails:
+                    raw = bodies.pop(mail.uid, b'')
+                    partial = limit is not None and len(raw) >= limit
+                    text = decode_part(raw, part, partial)
+                    if part.content_type == 'text/html':
+                        body = render_body(None, text, max_chars, max_tokens, strip_quotes, partial)
+                        text = html_to_text(text, strip_quotes=False)
+                    else:
+                        body = render_body(text, None, max_chars, max_tokens, strip_quotes, partial)
+                    rendered.append((mail, body))
+                    texts[mail.uid] = text
+                # 받은 본문 파트(예산만큼 받았으면 앞부분)를 색인해 local 검색에서 본문도 찾을 수 있게 함
+                self._index_mails(mailbox, [mail for mail, _ in rendered], texts)
+                yield from rendered
+
+    def list_attachments(self, uids: Sequence[str], folder: str = "INBOX") -> Dict[str, List[BodyPart]]:
+        """
+        메일별 첨부파일 파트 목록을 반환합니다. 없는 UID는 결과에 포함되지 않습니다.
+        본문과 첨부파일을 내려받지 않고 BODYSTRUCTURE만으로 계산합니다.
+        """
+        for uid in uids:
+            if not str(uid).isdigit():
+                raise ValueError(f"잘못된 UID입니다: {uid}")
+        with self._get_mailbox_client(folder) as mailbox:
+            mails = self._fetch_headers(mailbox, [str(uid) for uid in uids])
+        return {mail.uid: mail.attachment_parts for mail in mails}
+
+    def fetch_attachment(self, uid: str, section: str, folder: str = "INBOX", max_size: Optional[int] = None,
+                         chunk_size: int = ATTACHMENT_CHUNK_SIZE) -> Optional[Tuple[BodyPart, BinaryIO]]:
+        """
+        메일의 MIME 파트 하나를 디코딩해 (파트 정보, 임시 파일)로 반환합니다.
+        메일이나 파트가 없으면 None을 반환합니다.
+
+        BODY.PEEK[section]<offset.chunk_size>로 조각씩 받아 바로 디코딩해 SpooledTemporaryFile에 쓰므로
+        큰 첨부파일도 인코딩된 원본 전체를 메모리에 올리지 않습니다. 임시 파일은 호출한 쪽에서 닫아야 합니다.
+
+        Args:
+            uid: 메일 UID
+            section: BODYSTRUCTURE 파트 번호 (list_attachments 결과의 section)
+            folder: 메일이 있는 폴더
+            max_size: 파트의 인코딩된 크기가 이보다 크면 받지 않고 ValueError 발생
+            chunk_size: 한 번의 FETCH로 받을 최대 바이트 수
+        """
+        if not str(uid).isdigit():
+            raise ValueError(f"잘못된 UID입니다: {uid}")
+        if not re.fullmatch(r'\d+(\.\d+)*', section):
+            raise ValueError(f"잘못된 파트 번호입니다: {section}")
+
+        with self._get_mailbox_client(folder) as mailbox:
+            mails = self._fetch_headers(mailbox, [str(uid)])
+            part = find_part(mails[0].body_structure, section) if mails else None
+            if part is None:
+                return None
+            if max_size is not None and part.size > max_size:
+                raise ValueError(f"첨부파일이 너무 큽니다: {part.size:,} bytes (최대 {max_size:,} bytes)")
+
+            spool = new_spool()
+            decoder = StreamDecoder(part.encoding, spool)
+            try:
+                offset = 0
+                while True:
+                    item = f"(BODY.PEEK[{section}]<{offset}.{chunk_size}>)"
+                    fetch_result = mailbox.client.uid('FETCH', str(uid), item)
+                    check_command_status(fetch_result, MailboxFetchError)
+                    messages = group_fetch_response(fetch_result[1])
+                    del fetch_result
+                    chunk = split_full_fetch(messages[0])[1] if messages else b''
+                    del messages
+                    decoder.feed(chunk)
+                    offset += len(chunk)
+                    # 요청한 길이보다 짧게 오면 파트의 끝
+                    if len(chunk) < chunk_size:
+                        break
+                decoder.close()
+            except BaseException:
+                spool.close()
+                raise
+            spool.seek(0)
+            return part, spool
+
+    def search_mails(self, criteria: Dict[str, Any], folder: str = "INBOX",
+                     page_size: int = 10, last_uid: str = None, local: bool = False) -> dict:
+        """
+        조건에 맞는 메일을 찾습니다. 목록 표시용이므로 헤더만 가져옵니다.
+
+        기본적으로 IMAP SEARCH로 서버에서 검색하며, local이면 이 서버가 가져온 적 있는
+        메일의 로컬 색인에서 관련도 순으로 검색합니다.
+
+        Args:
+            criteria: 검색 조건 (from, subject, since, before, seen, larger, text 등)
+            folder: 검색할 폴더
+            page_size: 한 페이지당 메일 개수
+            last_uid: 이전 페이지의 마지막 UID (다음 페이지를 가져올 때 사용)
+            local: 로컬 검색 색인 사용 여부
 
-    def search_mails(self) -> List[MailMessage]:
-        pass
+        Returns:
+            {
+                'mails': list[MailMessage],
+                'last_uid': str,  # 다음 페이지 요청시 사용할 UID
+                'has_more': bool,  # 다음 페이지가 있는지
+                'total': int  # last_uid 이후 조건에 맞는 메일 개수
+            }
+        """
+        if last_uid and not str(last_uid).isdigit():
+            raise ValueError(f"잘못된 UID입니다: {last_uid}")
+        if local:
+            return self._search_index(criteria, folder, page_size, last_uid)
+        if criteria.get('attachment'):
+            raise ValueError("첨부파일 이름 검색은 local 검색에서만 사용할 수 있습니다.")
+
+        search = build_search_criteria(criteria)
+        if last_uid:
+            # 이전 페이지 이후의 UID만 서버에서 걸러냄
+            uid_range = AND(uid=f"1:{last_uid}")
+            search = AND(search, uid_range) if search else uid_range
+
+        with self._get_mailbox_client(folder) as mailbox:
+            uids = mailbox.uids(search or 'ALL', charset=search_charset(search))
+            if last_uid:
+                uids = [uid for uid in uids if int(uid) < int(last_uid)]
+            uids.reverse()  # 최신순 정렬
+            mails = self._fetch_headers(mailbox, uids[:page_size])
+
+        return {
+            'mails': mails,
+            'last_uid': mails[-1].uid if mails else None,
+            'has_more': len(uids) > page_size,
+            'total': len(uids)
+        }
+
+    def _search_index(self, criteria: Dict[str, Any], folder: str,
+                      page_size: int, last_uid: Optional[str]) -> dict:
+        """로컬 색인에서 검색합니다. 결과는 관련도 순이며 last_uid 다음 순위부터 이어집니다."""
+        if not self.index:
+            raise ValueError("로컬 검색 색인이 설정되지 않았습니다. 서버를 --index-path 인수로 시작해주세요.")
+        range_keys = {'since', 'before', 'older_than_days', 'larger', 'smaller'}
+        unsupported = {key for key, value in criteria.items() if value is not None} - set(INDEX_COLUMNS) - range_keys
+        if unsupported:
+            raise ValueError(f"local 검색에서 지원하지 않는 조건입니다: {', '.join(sorted(unsupported))}")
+
+        before = criteria.get('before') and parse_date('before', criteria['before'])
+        if criteria.get('older_than_days') is not None:
+            before = datetime.date.today() - datetime.timedelta(days=int(criteria['older_than_days']))
+        since = criteria.get('since') and parse_date('since', criteria['since'])
+        uids = self.index.search(
+            folder,
+            {key: criteria[key] for key in INDEX_COLUMNS if criteria.get(key)},
+            since=since.isoformat() if since else None,
+            before=before.isoformat() if before else None,
+            larger=criteria.get('larger'),
+            smaller=criteria.get('smaller'),
+        )
+        if last_uid:
+            # 이전 페이지 이후 색인에서 빠진 메일이면 더 이상 이어갈 수 없으므로 빈 페이지
+            uids = uids[uids.index(last_uid) + 1:] if last_uid in uids else []
+
+        mails = self._get_headers(folder, uids[:page_size], self.index.get_uidvalidity(folder))
+        return {
+            'mails': mails,
+            'last_uid': mails[-1].uid if mails else None,
+            'has_more': len(uids) > page_size,
+            'total': len(uids)
+        }
 
     # 개별 메일 관련 메소드
 
-    def move_mails(self, mail_uids: List[str], folder_name: str) -> None:
+    def _discard_cached(self, mailbox: PooledMailBox, mail_uids: List[str]) -> None:
+        if self.sync:
+            self.sync.forget(mailbox.folder.get(), mail_uids)
+        if self.index:
+            self.index.discard(mailbox.folder.get(), mail_uids)
+        folder = self._check_cache(mailbox)
+        if folder:
+            self.cache.discard(folder, mail_uids)
+
+    def _set_cached_flags(self, mailbox: PooledMailBox, mail_uids: List[str], flag: str, value: bool) -> None:
+        folder = self._check_cache(mailbox)
+        if folder:
+            self.cache.set_flags(folder, mail_uids, flag, value)
+
+    # 대량 작업 (이동/복사/삭제/플래그)
+
+    def _run_chunks(self, operation: str, folder: str, mail_uids: Sequence[str],
+                    action: Callable[[PooledMailBox, UidChunk], None], readonly: bool = False) -> BulkResult:
         """
-        메일을 폴더로 이동합니다.
+        UID 목록을 범위 집합 묶음으로 나눠 묶음마다 action(mailbox, chunk)을 실행합니다.
+        묶음이 여럿이면 풀의 연결 여러 개에서 동시에 처리하고,
+        한 묶음이 실패해도 나머지 묶음은 계속 처리한 뒤 묶음별 결과를 반환합니다.
         """
-        with self._get_mailbox_client() as mailbox:
-            mailbox.move(mail_uids, folder_name)
+        chunks = chunk_uids(mail_uids)
+
+        def run(chunk: UidChunk) -> ChunkResult:
+            try:
+                with self._get_mailbox_client(folder, readonly=readonly) as mailbox:
+                    action(mailbox, chunk)
+            except Exception as e:
+                return ChunkResult(chunk.uid_set, len(chunk.uids), False, str(e) or type(e).__name__)
+            return ChunkResult(chunk.uid_set, len(chunk.uids), True)
+
+        result = BulkResult(operation, folder)
+        workers = min(self.pool.max_size, len(chunks))
+        if workers <= 1:
+            result.chunks = [run(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imap-bulk") as executor:
+                # 묶음마다 현재 컨텍스트를 복사해 tool 호출의 metrics에 합산되게 함
+                futures = [executor.submit(contextvars.copy_context().run, traced(run, f"{operation} chunk"), chunk)
+                           for chunk in chunks]
+                result.chunks = [future.result() for future in futures]
+        return result
+
+    @staticmethod
+    def _store_flag(mailbox: PooledMailBox, uid_set: str, flag: str, value: bool) -> None:
+        # .SILENT: 바뀐 플래그를 FETCH 응답으로 돌려받지 않음
+        result = mailbox.client.uid('STORE', uid_set, ('+' if value else '-') + 'FLAGS.SILENT', f'({flag})')
+        check_command_status(result, MailboxFlagError)
+
+    @staticmethod
+    def _expunge(mailbox: PooledMailBox, uid_set: str) -> None:
+        # UIDPLUS가 있으면 이 묶음의 메일만 지움 (다른 \Deleted 메일은 건드리지 않음)
+        # 없으면 폴더의 모든 \Deleted 메일을 지우는 EXPUNGE로 대신하므로 검색 조건 작업은 미리 거부함
+        if 'UIDPLUS' in mailbox.client.capabilities:
+            result = mailbox.client.uid('EXPUNGE', uid_set)
+        else:
+            result = mailbox.client.expunge()
+        check_command_status(result, MailboxExpungeError)
+
+    def move_mails(self, mail_uids: List[str], folder_name: str, folder: str = "INBOX") -> BulkResult:
+        """
+        folder의 메일을 folder_name 폴더로 이동합니다.
+        MOVE를 지원하면 UID MOVE, 아니면 UID COPY 후 \\Deleted 표시와 UID EXPUNGE로 처리합니다.
+        """
+        def action(mailbox: PooledMailBox, chunk: UidChunk) -> None:
+            if 'MOVE' in mailbox.client.capabilities:
+                result = mailbox.client.uid('MOVE', chunk.uid_set, encode_folder(folder_name))
+                check_command_status(result, MailboxMoveError)
+            else:
+                result = mailbox.client.uid('COPY', chunk.uid_set, encode_folder(folder_name))
+                check_command_status(result, MailboxCopyError)
+                self._store_flag(mailbox, chunk.uid_set, '\\Deleted', True)
+                self._expunge(mailbox, chunk.uid_set)
+            self._discard_cached(mailbox, chunk.uids)
 
-    def copy_mails(self, mail_uids: List[str], folder_name: str) -> None:
+        return self._run_chunks('move', folder, mail_uids, action)
+
+    def copy_mails(self, mail_uids: List[str], folder_name: str, folder: str = "INBOX") -> BulkResult:
         """
-        메일을 폴더로 복사합니다.
+        folder의 메일을 folder_name 폴더로 복사합니다.
+        원본 폴더는 바뀌지 않으므로 EXAMINE 상태에서도 복사할 수 있습니다.
         """
-        with self._get_mailbox_client() as mailbox:
-            mailbox.copy(mail_uids, folder_name)
+        def action(mailbox: PooledMailBox, chunk: UidChunk) -> None:
+            result = mailbox.client.uid('COPY', chunk.uid_set, encode_folder(folder_name))
+            check_command_status(result, MailboxCopyError)
 
-    def delete_mails(self, mail_uids: List[str]) -> None:
+        return self._run_chunks('copy', folder, mail_uids, action, readonly=True)
+
+    def delete_mails(self, mail_uids: List[str], folder: str = "INBOX") -> BulkResult:
         """
         메일을 삭제합니다.
         """
-        with self._get_mailbox_client() as mailbox:
-            mailbox.delete(mail_uids)
+        def action(mailbox: PooledMailBox, chunk: UidChunk) -> None:
+            self._store_flag(mailbox, chunk.uid_set, '\\Deleted', True)
+            self._expunge(mailbox, chunk.uid_set)
+            self._discard_cached(mailbox, chunk.uids)
+
+        return self._run_chunks('delete', folder, mail_uids, action)
 
-    def mark_as_read(self, mail_uids: List[str]) -> None:
+    def flag_mails(self, mail_uids: List[str], flag: str, value: bool, folder: str = "INBOX") -> BulkResult:
+        """
+        메일에 flag를 추가(value=True)하거나 제거합니다.
+        EXPUNGE를 함께 보내지 않으므로 다른 \\Deleted 메일이 지워지지 않습니다.
+        """
+        def action(mailbox: PooledMailBox, chunk: UidChunk) -> None:
+            self._store_flag(mailbox, chunk.uid_set, flag, value)
+            self._set_cached_flags(mailbox, chunk.uids, flag, value)
+
+        return self._run_chunks('flag', folder, mail_uids, action)
+
+    def mark_as_read(self, mail_uids: List[str], folder: str = "INBOX") -> BulkResult:
         """
         메일을 읽음 상태로 변경합니다.
         """
-        with self._get_mailbox_client() as mailbox:
-            mailbox.flag(mail_uids, '\\Seen', True)
+        return self.flag_mails(mail_uids, '\\Seen', True, folder=folder)
 
-    def mark_as_unread(self, mail_uids: List[str]) -> None:
+    def mark_as_unread(self, mail_uids: List[str], folder: str = "INBOX") -> BulkResult:
         """
         메일을 읽지 않음 상태로 변경합니다.
         """
-        with self._get_mailbox_client() as mailbox:
-            mailbox.flag(mail_uids, '\\Seen', False)
+        return self.flag_mails(mail_uids, '\\Seen', False, folder=folder)
 
-    def mark_as_important(self, mail_uids: List[str]) -> None:
+    def mark_as_important(self, mail_uids: List[str], folder: str = "INBOX") -> BulkResult:
         """
         메일을 중요 상태로 변경합니다.
         중요 상태는 메일 클라이언트에서 중요 표시로 표시됩니다.
         """
-        with self._get_mailbox_client() as mailbox:
-            mailbox.flag(mail_uids, '\\Flagged', True)
+        return self.flag_mails(mail_uids, '\\Flagged', True, folder=folder)
 
-    def mark_as_unimportant(self, mail_uids: List[str]) -> None:
+    def mark_as_unimportant(self, mail_uids: List[str], folder: str = "INBOX") -> BulkResult:
         """
         메일을 중요 상태로 변경합니다.
         중요 상태는 메일 클라이언트에서 중요 표시로 표시됩니다.
         """
-        with self._get_mailbox_client() as mailbox:
-            mailbox.flag(mail_uids, '\\Flagged', False)
+        return self.flag_mails(mail_uids, '\\Flagged', False, folder=folder)
+
+    # 검색 조건으로 대량 작업
+
+    def search_uids(self, criteria: Dict[str, Any], folder: str = "INBOX") -> List[str]:
+        """
+        IMAP SEARCH로 조건에 맞는 메일 UID를 모두 찾습니다 (오름차순).
+        대량 작업이 폴더 전체에 적용되지 않도록 조건이 하나도 없으면 ValueError를 발생시킵니다.
+        """
+        if criteria.get('attachment'):
+            raise ValueError("첨부파일 이름 검색은 local 검색에서만 사용할 수 있습니다.")
+        search = build_search_criteria(criteria)
+        if search is None:
+            raise ValueError("검색 조건이 하나 이상 필요합니다.")
+        with self._get_mailbox_client(folder) as mailbox:
+            return mailbox.uids(search, charset=search_charset(search))
+
+    def _by_query(self, operation: str, criteria: Dict[str, Any], folder: str, dry_run: bool,
+                  apply: Callable[[List[str]], BulkResult]) -> BulkResult:
+        """조건에 맞는 UID를 서버에서 찾아 apply로 묶음 처리합니다. dry_run이면 찾기만 합니다."""
+        uids = self.search_uids(criteria, folder)
+        if dry_run or not uids:
+            return BulkResult(operation, folder, matched=uids, dry_run=dry_run)
+        result = apply(uids)
+        result.matched = uids
+        return result
+
+    def _require_uid_expunge(self, folder: str, operation: str, unless: Optional[str] = None) -> None:
+        """
+        UIDPLUS가 없으면 EXPUNGE가 폴더의 다른 \\Deleted 메일까지 지우므로 검색 조건 대량 작업을 거부합니다.
+        unless 확장(예: MOVE)이 있으면 EXPUNGE를 보내지 않으므로 허용합니다.
+        """
+        with self._get_mailbox_client(folder) as mailbox:
+            capabilities = mailbox.client.capabilities
+        if 'UIDPLUS' in capabilities or (unless and unless in capabilities):
+            return
+        raise ValueError(f"서버가 UIDPLUS를 지원하지 않아 {operation}_by_query를 실행할 수 없습니다. "
+                         "(EXPUNGE가 폴더의 다른 \\Deleted 메일까지 지우기 때문)")
+
+    def move_by_query(self, criteria: Dict[str, Any], folder_name: str, folder: str = "INBOX",
+                      dry_run: bool = False) -> BulkResult:
+        """
+        folder에서 조건에 맞는 메일을 모두 folder_name 폴더로 이동합니다.
+        MOVE와 UIDPLUS를 모두 지원하지 않는 서버에서는 ValueError를 발생시킵니다.
+        """
+        self._require_uid_expunge(folder, 'move', unless='MOVE')
+        return self._by_query('move', criteria, folder, dry_run,
+                              lambda uids: self.move_mails(uids, folder_name, folder=folder))
+
+    def delete_by_query(self, criteria: Dict[str, Any], folder: str = "INBOX",
+                        dry_run: bool = False) -> BulkResult:
+        """
+        folder에서 조건에 맞는 메일을 모두 삭제합니다.
+        UIDPLUS를 지원하지 않는 서버에서는 ValueError를 발생시킵니다.
+        """
+        self._require_uid_expunge(folder, 'delete')
+        return self._by_query('delete', criteria, folder, dry_run,
+                              lambda uids: self.delete_mails(uids, folder=folder))
+
+    def flag_by_query(self, criteria: Dict[str, Any], flag: str, value: bool, folder: str = "INBOX",
+                      dry_run: bool = False) -> BulkResult:
+        """
+        folder에서 조건에 맞는 메일의 플래그를 바꿉니다.
+
+        Args:
+            criteria: 검색 조건
+            flag: 바꿀 플래그 (seen, flagged, answered)
+            value: True면 플래그 추가, False면 제거
+        """
+        if flag not in FLAG_NAMES:
+            raise ValueError(f"지원하지 않는 플래그입니다: {flag}")
+        # 아래에서 붙이는 플래그 조건만 남으면 폴더 전체에 적용되므로 사용자 조건부터 확인
+        if build_search_criteria(criteria) is None:
+            raise ValueError("검색 조건이 하나 이상 필요합니다.")
+        # 이미 원하는 상태인 메일은 STORE하지 않도록 반대 상태인 메일만 찾음
+        criteria = {flag: not value, **criteria}
+        return self._by_query('flag', criteria, folder, dry_run,
+                              lambda uids: self.flag_mails(uids, FLAG_NAMES[flag], value, folder=folder))
 
     # 폴더 관련 메소드
 
-    def get_folder_list(self) -> List[FolderInfo]:
+    def get_folder_list(self, refresh: bool = False) -> List[FolderInfo]:
         """
         IMAP 형식에 맞는 폴더를 가져옵니다.
+        폴더 캐시가 유효하면 LIST를 보내지 않습니다.
         """
+        if not refresh:
+            folders = self.folder_cache.get()
+            if folders is not None:
+                return folders
         with self._get_mailbox_client() as mailbox:
-            return mailbox.folder.list()
+            folders = mailbox.folder.list()
+        self.folder_cache.set(folders)
+        return folders
+
+    def get_folder_stats(self, folders: Optional[Sequence[str]] = None) -> List[FolderStats]:
+        """
+        폴더별 메일 개수(MESSAGES/UNSEEN/UIDNEXT/UIDVALIDITY, 지원하면 SIZE)를 한 번의 왕복으로 가져옵니다.
+        LIST-STATUS를 지원하면 폴더 목록과 함께 받고(폴더 캐시도 갱신), 아니면 STATUS를 파이프라인으로 보냅니다.
+
+        Args:
+            folders: 조회할 폴더 이름 목록 (None이면 선택할 수 있는 모든 폴더)
+        """
+        with self._get_mailbox_client() as mailbox:
+            items = status_items(mailbox)
+            if folders is None and 'LIST-STATUS' in mailbox.client.capabilities:
+                folder_list, statuses = list_status(mailbox, items)
+                self.folder_cache.set(folder_list)
+                names = [folder.name for folder in folder_list]
+            else:
+                if folders is None:
+                    folder_list = self.folder_cache.get()
+                    if folder_list is None:
+                        folder_list = mailbox.folder.list()
+                        self.folder_cache.set(folder_list)
+                    names = [folder.name for folder in folder_list if '\\Noselect' not in folder.flags]
+                else:
+                    names = list(folders)
+                statuses = pipelined_status(mailbox, names, items)
+        return [FolderStats.from_status(name, statuses[name]) for name in names if name in statuses]
 
     def create_folder(self, folder_name: str) -> None:
         """
@@ -157,6 +848,7 @@ class MailService:
         """
         with self._get_mailbox_client() as mailbox:
             mailbox.folder.create(folder_name)
+        self.folder_cache.invalidate()
 
     def delete_folder(self, folder_name: str) -> None:
         """
@@ -164,6 +856,14 @@ class MailService:
         """
         with self._get_mailbox_client() as mailbox:
             mailbox.folder.delete(folder_name)
+        self.folder_cache.invalidate()
+        if self.cache:
+            self.cache.drop_folder(folder_name)
+        if self.index:
+            self.index.drop_folder(folder_name)
+        if self.sync:
+            self.sync.forget(folder_name)
+        self.pool.forget_folder(folder_name)
 
     def rename_folder(self, old_folder_name: str, new_folder_name: str) -> None:
         """
@@ -171,14 +871,24 @@ class MailService:
         """
         with self._get_mailbox_client() as mailbox:
             mailbox.folder.rename(old_folder_name, new_folder_name)
+        self.folder_cache.invalidate()
+        if self.cache:
+            # 이름이 바뀐 폴더는 UIDVALIDITY가 새로 정해질 수 있으므로 비움
+            self.cache.drop_folder(old_folder_name)
+        if self.index:
+            self.index.drop_folder(old_folder_name)
+        if self.sync:
+            self.sync.forget(old_folder_name)
+        self.pool.forget_folder(old_folder_name)
 
     def is_folder_exists(self, folder_name: str) -> bool:
         """
         폴더가 존재하는지 확인합니다.
+        캐시된 폴더 목록에 없으면 다른 클라이언트가 만들었을 수 있으므로 목록을 한 번 새로 가져와 확인합니다.
         """
-        with self._get_mailbox_client() as mailbox:
-            return mailbox.folder.exists(folder_name)
-
+        if any(folder.name == folder_name for folder in self.get_folder_list()):
+            return True
+        return any(folder.name == folder_name for folder in self.get_folder_list(refresh=True))
 
 if __name__ == "__main__":
     import os
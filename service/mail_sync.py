@@ -0,0 +1,277 @@
+import bisect
+import imaplib
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from imap_tools.consts import UID_PATTERN
+from imap_tools.errors import MailboxFetchError
+from imap_tools.utils import check_command_status, encode_folder
+
+from service.mail_cache import MailCache
+from service.search_index import SearchIndex
+from service.mail_message import HEADER_FETCH_PARTS, HeaderMailMessage, group_fetch_response
+from service.mailbox_pool import MailBoxPool, PooledMailBox
+
+_STATUS_RE = re.compile(r'(MESSAGES|UIDNEXT|UIDVALIDITY|HIGHESTMODSEQ)\s+(\d+)')
+
+
+def _parse_uid_set(value: str) -> List[int]:
+    """"1:3,7" 형태의 UID 집합을 정수 리스트로 풀어냅니다."""
+    uids = []
+    for item in value.split(','):
+        if ':' in item:
+            start, end = (int(v) for v in item.split(':', 1))
+            uids.extend(range(min(start, end), max(start, end) + 1))
+        elif item.isdigit():
+            uids.append(int(item))
+    return uids
+
+
+def folder_status(mailbox: PooledMailBox, folder: str) -> Dict[str, int]:
+    """
+    STATUS로 MESSAGES/UIDNEXT/UIDVALIDITY(CONDSTORE가 있으면 HIGHESTMODSEQ까지)를 가져옵니다.
+    imap_tools의 folder.status는 HIGHESTMODSEQ를 받지 않으므로 직접 요청합니다.
+    """
+    items = "MESSAGES UIDNEXT UIDVALIDITY"
+    if 'CONDSTORE' in mailbox.client.capabilities:
+        items += " HIGHESTMODSEQ"
+    typ, data = mailbox.client._simple_command('STATUS', encode_folder(folder), f"({items})")
+    typ, data = mailbox.client._untagged_response(typ, data, 'STATUS')
+    text = b' '.join(item for item in data if isinstance(item, bytes)).decode()
+    return {key: int(value) for key, value in _STATUS_RE.findall(text)}
+
+
+@dataclass
+class FolderSyncState:
+    """폴더 하나의 동기화 상태 (로컬 미러)"""
+    folder: str
+    uidvalidity: Optional[int] = None
+    uidnext: Optional[int] = None
+    highestmodseq: Optional[int] = None
+    uids: List[int] = field(default_factory=list)  # 오름차순
+    last_sync: float = 0.0
+
+
+class MailSync:
+    """
+    폴더별 UIDVALIDITY/UIDNEXT/HIGHESTMODSEQ를 추적하며 변경분만 가져오는 동기화 엔진.
+
+    - 새 메일: UIDNEXT 이후의 UID만 검색해 헤더를 캐시에 저장
+    - 플래그 변경: CONDSTORE가 있으면 CHANGEDSINCE로 바뀐 메일의 FLAGS만 가져옴
+    - 삭제: QRESYNC가 켜져 있으면 VANISHED, 아니면 메일 개수가 다를 때 UID 목록을 비교
+    """
+
+    def __init__(self, pool: MailBoxPool, cache: Optional[MailCache] = None,
+                 interval: float = 60.0, header_window: int = 200,
+                 index: Optional[SearchIndex] = None):
+        """
+        Args:
+            pool: 동기화에 사용할 연결 풀
+            cache: 새 메일 헤더/플래그를 저장할 캐시
+            index: 새 메일 헤더를 추가할 로컬 검색 색인
+            interval: 백그라운드 동기화 주기(초)
+            header_window: 캐시에 미리 채워둘 최신 메일 헤더 개수
+        """
+        self.pool = pool
+        self.cache = cache
+        self.index = index
+        self.interval = interval
+        self.header_window = header_window
+        self._states: Dict[str, FolderSyncState] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._folders: List[str] = []
+
+    # 미러 조회
+
+    def get_state(self, folder: str) -> Optional[FolderSyncState]:
+        with self._lock:
+            return self._states.get(folder)
+
+    def is_fresh(self, folder: str) -> bool:
+        """마지막 동기화가 동기화 주기의 두 배 이내이면 미러를 신뢰합니다."""
+        state = self.get_state(folder)
+        if state is None or not state.last_sync:
+            return False
+        return time.monotonic() - state.last_sync <= self.interval * 2
+
+    def get_uids(self, folder: str, before_uid: Optional[str] = None) -> Optional[List[str]]:
+        """
+        미러에 있는 UID 목록을 최신순으로 반환합니다.
+        미러가 없거나 오래되었으면 None을 반환합니다.
+        """
+        if not self.is_fresh(folder):
+            return None
+        with self._lock:
+            uids = self._states[folder].uids
+            end = bisect.bisect_left(uids, int(before_uid)) if before_uid else len(uids)
+            return [str(uid) for uid in reversed(uids[:end])]
+
+    def get_uids_by_index(self, folder: str, start_index: int, count: int) -> Optional[Tuple[List[str], int]]:
+        """
+        최신순으로 start_index번째부터 count개의 UID와 전체 메일 개수를 반환합니다.
+        미러가 없거나 오래되었으면 None을 반환합니다.
+        """
+        if not self.is_fresh(folder):
+            return None
+        with self._lock:
+            uids = self._states[folder].uids
+            end = max(len(uids) - start_index, 0)
+            return [str(uid) for uid in reversed(uids[max(end - count, 0):end])], len(uids)
+
+    def forget(self, folder: str, uids: Optional[Iterable[str]] = None) -> None:
+        """
+        이 서버에서 이동/삭제한 메일을 미러에서 제거합니다.
+        uids가 없으면 삭제/이름 변경된 폴더로 보고 폴더의 미러를 통째로 버립니다.
+        """
+        with self._lock:
+            if uids is None:
+                self._states.pop(folder, None)
+                return
+            removed = {int(uid) for uid in uids}
+            state = self._states.get(folder)
+            if state:
+                state.uids = [uid for uid in state.uids if uid not in removed]
+
+    # 동기화
+
+    def _fetch_new_headers(self, mailbox: PooledMailBox, folder: str, uids: List[int]) -> None:
+        if not (self.cache or self.index) or not uids:
+            return
+        uid_set = ','.join(str(uid) for uid in uids[-self.header_window:])
+        fetch_result = mailbox.client.uid('FETCH', uid_set, HEADER_FETCH_PARTS)
+        check_command_status(fetch_result, MailboxFetchError)
+        mails = [HeaderMailMessage(parts) for parts in group_fetch_response(fetch_result[1])]
+        if self.cache:
+            self.cache.put_headers(folder, mails)
+        if self.index:
+            self.index.add(folder, mails)
+
+    def _discard(self, folder: str, uids: Iterable[int]) -> None:
+        """서버에서 사라진 메일을 캐시와 색인에서 제거합니다."""
+        uids = [str(uid) for uid in uids]
+        if self.cache:
+            self.cache.discard(folder, uids)
+        if self.index:
+            self.index.discard(folder, uids)
+
+    def _fetch_flags(self, mailbox: PooledMailBox, folder: str, uid_set: str = '1:*',
+                     modseq: Optional[int] = None) -> List[int]:
+        """
+        FLAGS를 가져와 캐시에 반영하고, VANISHED로 알려진 UID를 반환합니다.
+        modseq가 있으면 CHANGEDSINCE로 그 이후 바뀐 메일만 가져옵니다.
+        """
+        args = [uid_set, '(UID FLAGS)']
+        if modseq is not None:
+            args.append(f"(CHANGEDSINCE {modseq}{' VANISHED' if mailbox.qresync else ''})")
+        typ, data = mailbox.client.uid('FETCH', *args)
+        if typ != 'OK':
+            return []
+        flags_by_uid = {}
+        for item in data:
+            if not isinstance(item, bytes):
+                continue
+            uid_match = re.search(UID_PATTERN, item.decode())
+            if uid_match:
+                flags = tuple(flag.decode() for flag in imaplib.ParseFlags(item))
+                flags_by_uid[uid_match.group('uid')] = flags
+        if self.cache and flags_by_uid:
+            self.cache.update_flags(folder, flags_by_uid)
+
+        vanished = []
+        for item in mailbox.client.untagged_responses.pop('VANISHED', []):
+            text = item.decode() if isinstance(item, bytes) else str(item)
+            vanished.extend(_parse_uid_set(text.replace('(EARLIER)', '').strip()))
+        return vanished
+
+    def sync_folder(self, folder: str = "INBOX") -> FolderSyncState:
+        """폴더 하나를 동기화하고 갱신된 상태를 반환합니다."""
+        with self.pool.acquire(folder) as mailbox:
+            return self.sync_selected(mailbox, folder)
+
+    def sync_selected(self, mailbox: PooledMailBox, folder: str) -> FolderSyncState:
+        """folder가 이미 선택된 연결(IDLE 감시 연결 등)로 동기화합니다."""
+        status = folder_status(mailbox, folder)
+        previous = self.get_state(folder)
+        state = FolderSyncState(
+            folder=folder,
+            uidvalidity=status.get('UIDVALIDITY'),
+            uidnext=status.get('UIDNEXT'),
+            highestmodseq=status.get('HIGHESTMODSEQ'),
+        )
+        if self.cache:
+            self.cache.check_uidvalidity(folder, state.uidvalidity)
+        if self.index:
+            self.index.check_uidvalidity(folder, state.uidvalidity)
+
+        if previous is None or previous.uidvalidity != state.uidvalidity:
+            # 처음 동기화하거나 UIDVALIDITY가 바뀌면 전체 UID 목록부터 다시 만듦
+            state.uids = sorted(int(uid) for uid in mailbox.uids())
+            self._fetch_new_headers(mailbox, folder, state.uids)
+        else:
+            uids = list(previous.uids)
+
+            # 1) 새 메일: UIDNEXT 이후만 검색
+            if state.uidnext and previous.uidnext and state.uidnext > previous.uidnext:
+                new_uids = sorted(
+                    int(uid) for uid in mailbox.uids(f"UID {previous.uidnext}:*")
+                    if int(uid) >= previous.uidnext
+                )
+                uids.extend(new_uids)
+                self._fetch_new_headers(mailbox, folder, new_uids)
+
+            # 2) 플래그 변경/삭제: MODSEQ 이후 변경분만
+            vanished = []
+            if state.highestmodseq and previous.highestmodseq:
+                if state.highestmodseq > previous.highestmodseq:
+                    vanished = self._fetch_flags(mailbox, folder, modseq=previous.highestmodseq)
+            elif self.cache and uids:
+                # CONDSTORE가 없으면 캐시해 둔 최신 메일들의 FLAGS만 새로 가져옴
+                recent = uids[-self.header_window:]
+                self._fetch_flags(mailbox, folder, f"{recent[0]}:{recent[-1]}")
+            if vanished:
+                gone = set(vanished)
+                uids = [uid for uid in uids if uid not in gone]
+                self._discard(folder, vanished)
+
+            # 3) 대체 경로: 메일 개수가 맞지 않으면 UID 목록을 비교해 사라진 메일을 찾음
+            if status.get('MESSAGES') is not None and status['MESSAGES'] != len(uids):
+                current = sorted(int(uid) for uid in mailbox.uids())
+                self._discard(folder, set(uids) - set(current))
+                uids = current
+
+            state.uids = uids
+
+        state.last_sync = time.monotonic()
+        with self._lock:
+            self._states[folder] = state
+        return state
+
+    # 백그라운드 실행
+
+    def start(self, folders: Iterable[str] = ("INBOX",)) -> None:
+        """folders를 interval마다 동기화하는 백그라운드 스레드를 시작합니다."""
+        self._folders = list(folders)
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mail-sync", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for folder in self._folders:
+                try:
+                    self.sync_folder(folder)
+                except Exception:
+                    # 일시적인 네트워크 오류는 다음 주기에 다시 시도
+                    pass
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
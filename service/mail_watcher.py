@@ -0,0 +1,380 @@
+import imaplib
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, List, Optional
+
+from service.mail_cache import MailCache
+from service.mail_sync import MailSync, _parse_uid_set
+from service.mailbox_pool import CONNECTION_ERRORS, MailBoxPool, PooledMailBox
+
+_EXISTS_RE = re.compile(rb'^\* (\d+) EXISTS', re.IGNORECASE)
+_EXPUNGE_RE = re.compile(rb'^\* (\d+) EXPUNGE', re.IGNORECASE)
+_VANISHED_RE = re.compile(rb'^\* VANISHED (?:\(EARLIER\) )?([\d:,]+)', re.IGNORECASE)
+_FETCH_RE = re.compile(rb'^\* \d+ FETCH \(', re.IGNORECASE)
+_FETCH_UID_RE = re.compile(rb'UID (\d+)')
+
+# RFC 2177: 서버가 연결을 끊지 않도록 29분 안에 IDLE을 다시 시작해야 함
+IDLE_RENEW_INTERVAL = 25 * 60
+# 새 메일 UID를 폴더마다 최근 몇 개까지 기억할지
+RECENT_UID_LIMIT = 1000
+# 동시에 감시할 최대 폴더 수 (폴더마다 풀 밖의 전용 연결과 스레드를 하나씩 씀)
+MAX_WATCH_FOLDERS = 8
+# 고정하지 않은 폴더를 아무도 기다리지 않은 채 이 시간(초)이 지나면 감시를 끝냄
+WATCH_IDLE_TIMEOUT = 10 * 60
+
+
+@dataclass
+class WatchEvent:
+    """IDLE 중 받은 폴더 변경 내용"""
+    folder: str
+    new_uids: List[str] = field(default_factory=list)  # 새로 도착한 메일
+    expunged: int = 0  # 삭제된 메일 개수 (EXPUNGE/VANISHED)
+    flags_changed: List[str] = field(default_factory=list)  # 플래그가 바뀐 메일 UID
+
+
+@dataclass
+class _FolderWatch:
+    folder: str
+    thread: Optional[threading.Thread] = None
+    # watch_folders나 리소스 구독처럼 계속 감시해야 하는 폴더는 고정해 정리 대상에서 뺌
+    pinned: bool = False
+    waiters: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    stop: threading.Event = field(default_factory=threading.Event)
+    # 감시 스레드를 끝낸 오류 또는 다시 연결하며 마지막으로 겪은 오류
+    error: Optional[BaseException] = None
+    uidnext: Optional[int] = None
+    recent: Deque[int] = field(default_factory=lambda: deque(maxlen=RECENT_UID_LIMIT))
+
+    @property
+    def alive(self) -> bool:
+        return bool(self.thread and self.thread.is_alive() and not self.stop.is_set())
+
+
+class MailWatcher:
+    """
+    폴더마다 전용 연결로 IMAP IDLE을 유지하며 새 메일/삭제/플래그 변경을 기다리는 감시기.
+
+    변경 알림(EXISTS/EXPUNGE/VANISHED/FETCH)을 받으면 IDLE을 잠시 멈추고
+    동기화 엔진(또는 UID SEARCH)으로 새 메일 UID를 알아낸 뒤 캐시를 갱신하고
+    등록된 리스너에 WatchEvent를 전달합니다.
+
+    전용 연결은 연결 풀의 max_size 밖에서 열리므로 감시 폴더 수를 max_folders로 제한합니다.
+    고정하지 않은 폴더는 idle_timeout 동안 쓰이지 않으면 감시를 끝내고,
+    한도에 닿으면 가장 오래 쓰이지 않은 폴더부터 감시를 끝냅니다.
+    """
+
+    def __init__(self, pool: MailBoxPool, sync: Optional[MailSync] = None,
+                 cache: Optional[MailCache] = None, poll_interval: float = 1.0,
+                 renew_interval: float = IDLE_RENEW_INTERVAL, max_folders: int = MAX_WATCH_FOLDERS,
+                 idle_timeout: float = WATCH_IDLE_TIMEOUT):
+        """
+        Args:
+            pool: 전용 연결을 만들 연결 풀
+            sync: 변경이 있을 때 미러/캐시/색인을 갱신할 동기화 엔진
+            cache: 동기화 엔진이 없을 때 플래그 변경/삭제를 반영할 캐시
+            poll_interval: 종료 요청을 확인하는 주기(초)
+            renew_interval: IDLE을 다시 시작하는 주기(초)
+            max_folders: 동시에 감시할 최대 폴더 수
+            idle_timeout: 고정하지 않은 폴더를 쓰지 않은 채 감시를 유지할 시간(초)
+        """
+        self.pool = pool
+        self.sync = sync
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.renew_interval = renew_interval
+        self.max_folders = max_folders
+        self.idle_timeout = idle_timeout
+        self._watches: Dict[str, _FolderWatch] = {}
+        self._listeners: List[Callable[[WatchEvent], None]] = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+
+    # 리스너
+
+    def add_listener(self, callback: Callable[[WatchEvent], None]) -> None:
+        """변경이 있을 때마다 감시 스레드에서 호출할 함수를 등록합니다."""
+        self._listeners.append(callback)
+
+    def _notify(self, event: WatchEvent) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(event)
+            except Exception:
+                # 리스너 오류 때문에 감시가 멈추지 않도록 함
+                pass
+
+    # 감시 시작/종료
+
+    def watch(self, folders: Iterable[str] = ("INBOX",), pinned: bool = True) -> None:
+        """
+        folders를 감시하는 스레드를 시작합니다. 이미 감시 중인 폴더는 마지막 사용 시각만 갱신합니다.
+
+        Args:
+            folders: 감시할 폴더 목록
+            pinned: True면 idle_timeout이나 한도 때문에 감시를 끝내지 않음 (release로 풀 수 있음)
+
+        Raises:
+            RuntimeError: 감시 중인 폴더가 모두 고정되었거나 사용 중이어서 max_folders를 넘을 때
+        """
+        self._stop.clear()
+        with self._cond:
+            for folder in folders:
+                watch = self._watches.get(folder)
+                if watch and watch.alive:
+                    watch.pinned = watch.pinned or pinned
+                    watch.last_used = time.monotonic()
+                    continue
+                self._make_room()
+                watch = _FolderWatch(folder, pinned=pinned)
+                watch.thread = threading.Thread(target=self._run, args=(watch,),
+                                                name=f"mail-idle-{folder}", daemon=True)
+                self._watches[folder] = watch
+                watch.thread.start()
+
+    def release(self, folder: str) -> None:
+        """고정을 풀어 idle_timeout이 지나거나 한도에 닿으면 감시를 끝낼 수 있게 합니다."""
+        with self._cond:
+            watch = self._watches.get(folder)
+            if watch:
+                watch.pinned = False
+                watch.last_used = time.monotonic()
+
+    def _make_room(self) -> None:
+        """새 폴더를 감시할 자리가 없으면 가장 오래 쓰이지 않은 폴더의 감시를 끝냅니다. (잠금을 잡고 호출)"""
+        for folder in [folder for folder, watch in self._watches.items() if not watch.alive]:
+            del self._watches[folder]
+        if len(self._watches) < self.max_folders:
+            return
+        candidates = [watch for watch in self._watches.values() if not watch.pinned and not watch.waiters]
+        if not candidates:
+            raise RuntimeError(f"감시 중인 폴더가 한도({self.max_folders}개)에 닿았습니다: "
+                               f"{', '.join(self._watches)}")
+        self._retire(min(candidates, key=lambda watch: watch.last_used))
+
+    def _retire(self, watch: _FolderWatch) -> None:
+        """감시를 끝내도록 표시합니다. 스레드는 poll_interval 안에 IDLE을 멈추고 전용 연결을 닫습니다. (잠금을 잡고 호출)"""
+        watch.stop.set()
+        if self._watches.get(watch.folder) is watch:
+            del self._watches[watch.folder]
+        self._cond.notify_all()
+
+    def is_watching(self, folder: str) -> bool:
+        with self._cond:
+            watch = self._watches.get(folder)
+            return bool(watch and watch.alive)
+
+    def folders(self) -> List[str]:
+        with self._cond:
+            return [folder for folder, watch in self._watches.items() if watch.alive]
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            watches = list(self._watches.values())
+            for watch in watches:
+                watch.stop.set()
+            self._cond.notify_all()
+        for watch in watches:
+            watch.thread.join(timeout=self.poll_interval + 5)
+
+    # 새 메일 기다리기
+
+    def wait_for_new_mail(self, folder: str = "INBOX", timeout: float = 60.0,
+                          since_uid: Optional[str] = None) -> Optional[List[str]]:
+        """
+        folder에 새 메일이 도착하거나 timeout이 지날 때까지 기다립니다.
+        감시 중이 아니면 감시를 시작합니다.
+
+        Args:
+            folder: 기다릴 폴더
+            timeout: 최대 대기 시간(초)
+            since_uid: 주면 이 UID보다 큰 새 메일이 이미 도착해 있을 때 바로 반환
+
+        Returns:
+            새 메일 UID 목록 (오름차순), 시간 초과면 None
+
+        Raises:
+            RuntimeError: 감시 스레드가 오류로 끝났거나, 시간 안에 감시 연결을 열지 못했을 때
+        """
+        self.watch([folder], pinned=False)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            watch = self._watches[folder]
+            watch.waiters += 1
+            try:
+                # 감시 연결이 UIDNEXT를 알아낼 때까지 기다린 뒤 기준 UID를 정함
+                while watch.uidnext is None and not self._stop.is_set():
+                    if not watch.alive:
+                        raise self._failure(watch)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        if watch.error is not None:
+                            # 다시 연결하는 중이라 새 메일을 확인할 수 없었음
+                            raise self._failure(watch)
+                        return None
+                    self._cond.wait(remaining)
+                if since_uid is not None:
+                    threshold = int(since_uid) + 1
+                else:
+                    threshold = watch.uidnext or 0
+
+                while not self._stop.is_set():
+                    new_uids = [uid for uid in watch.recent if uid >= threshold]
+                    if new_uids:
+                        return [str(uid) for uid in sorted(new_uids)]
+                    if not watch.alive:
+                        raise self._failure(watch)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+            finally:
+                watch.waiters -= 1
+                watch.last_used = time.monotonic()
+        return None
+
+    @staticmethod
+    def _failure(watch: _FolderWatch) -> RuntimeError:
+        if watch.error is None:
+            return RuntimeError(f"'{watch.folder}' 폴더 감시가 중단되었습니다.")
+        return RuntimeError(f"'{watch.folder}' 폴더 감시가 중단되었습니다: "
+                            f"{type(watch.error).__name__}: {watch.error}")
+
+    # 감시 스레드
+
+    def _run(self, watch: _FolderWatch) -> None:
+        try:
+            self._run_forever(watch)
+        except Exception as e:
+            # wait_for_new_mail이 "새 메일 없음" 대신 이 오류를 알리도록 기록
+            watch.error = e
+            raise
+        finally:
+            # 감시가 끝나면 기다리던 호출이 바로 반환되도록 깨움
+            with self._cond:
+                watch.stop.set()
+                if self._watches.get(watch.folder) is watch:
+                    del self._watches[watch.folder]
+                self._cond.notify_all()
+
+    def _keep_running(self, watch: _FolderWatch) -> bool:
+        """종료 요청이 없고, 고정하지 않은 폴더라면 idle_timeout 안에 쓰인 적이 있는지 확인합니다."""
+        if watch.stop.is_set():
+            return False
+        with self._cond:
+            if (not watch.pinned and not watch.waiters
+                    and time.monotonic() - watch.last_used > self.idle_timeout):
+                self._retire(watch)
+                return False
+        return True
+
+    def _run_forever(self, watch: _FolderWatch) -> None:
+        folder = watch.folder
+        backoff = 1.0
+        while self._keep_running(watch):
+            mailbox = None
+            try:
+                mailbox = self.pool.open_dedicated(folder)
+                watch.error = None
+                if self._set_uidnext(watch, mailbox):
+                    if self.sync:
+                        self.sync.sync_selected(mailbox, folder)
+                else:
+                    # 다시 연결한 경우: 끊겨 있던 동안 도착한 메일을 찾아 알림
+                    self._handle(mailbox, watch, [], check_new=True)
+                backoff = 1.0
+                while self._keep_running(watch):
+                    responses = self._idle(mailbox, watch)
+                    if responses:
+                        self._handle(mailbox, watch, responses)
+            except (RuntimeError, *CONNECTION_ERRORS, imaplib.IMAP4.error) as e:
+                # 연결이 끊어지면 점점 길게 기다렸다가 다시 연결
+                # (폴더가 없거나 IDLE을 지원하지 않는 등 다른 오류는 감시를 끝냄)
+                watch.error = e
+                with self._cond:
+                    self._cond.notify_all()
+                watch.stop.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+            finally:
+                if mailbox is not None:
+                    self.pool.close_dedicated(mailbox)
+
+    def _set_uidnext(self, watch: _FolderWatch, mailbox: PooledMailBox) -> bool:
+        """처음 연결했을 때 UIDNEXT를 기록합니다. 이미 알고 있으면 False를 반환합니다."""
+        with self._cond:
+            if watch.uidnext is not None:
+                return False
+        values = mailbox.client.untagged_responses.get('UIDNEXT')
+        if values:
+            uidnext = int(values[-1])
+        else:
+            # UIDNEXT를 알려주지 않는 서버는 가장 큰 UID로 계산
+            uidnext = max((int(uid) for uid in mailbox.uids()), default=0) + 1
+        with self._cond:
+            watch.uidnext = uidnext
+            self._cond.notify_all()
+        return True
+
+    def _idle(self, mailbox: PooledMailBox, watch: _FolderWatch) -> List[bytes]:
+        """IDLE을 시작해 변경 알림을 받거나 renew_interval이 지나면 멈추고 받은 응답을 반환합니다."""
+        mailbox.idle.start()
+        responses: List[bytes] = []
+        deadline = time.monotonic() + self.renew_interval
+        try:
+            while not responses and time.monotonic() < deadline and self._keep_running(watch):
+                responses = mailbox.idle.poll(timeout=self.poll_interval)
+        finally:
+            _, extra = mailbox.idle.stop()
+        return responses + [line for line in extra if isinstance(line, bytes)]
+
+    def _handle(self, mailbox: PooledMailBox, watch: _FolderWatch, responses: List[bytes],
+                check_new: bool = False) -> None:
+        folder = watch.folder
+        event = WatchEvent(folder)
+        has_exists = check_new
+        vanished: List[int] = []
+        flags_by_uid = {}
+        for line in responses:
+            if _EXISTS_RE.match(line):
+                has_exists = True
+            elif _EXPUNGE_RE.match(line):
+                event.expunged += 1
+            elif match := _VANISHED_RE.match(line):
+                vanished.extend(_parse_uid_set(match.group(1).decode()))
+            elif _FETCH_RE.match(line):
+                uid_match = _FETCH_UID_RE.search(line)
+                if uid_match:
+                    uid = uid_match.group(1).decode()
+                    flags_by_uid[uid] = tuple(flag.decode() for flag in imaplib.ParseFlags(line))
+                    event.flags_changed.append(uid)
+        event.expunged += len(vanished)
+        if not (has_exists or event.expunged or event.flags_changed):
+            return
+
+        with self._cond:
+            uidnext = watch.uidnext or 0
+        if self.sync:
+            # 동기화 엔진이 새 메일 헤더, 플래그, 삭제를 모두 반영함
+            state = self.sync.sync_selected(mailbox, folder)
+            new_uids = [uid for uid in state.uids if uid >= uidnext]
+        else:
+            new_uids = []
+            if has_exists:
+                new_uids = sorted(int(uid) for uid in mailbox.uids(f"UID {uidnext}:*") if int(uid) >= uidnext)
+            if self.cache and flags_by_uid:
+                self.cache.update_flags(folder, flags_by_uid)
+            if self.cache and vanished:
+                self.cache.discard(folder, [str(uid) for uid in vanished])
+
+        event.new_uids = [str(uid) for uid in new_uids]
+        with self._cond:
+            if new_uids:
+                watch.recent.extend(new_uids)
+                watch.uidnext = max(uidnext, new_uids[-1] + 1)
+            self._cond.notify_all()
+        if event.new_uids or event.expunged or event.flags_changed:
+            self._notify(event)
@@ -0,0 +1,387 @@
+import imaplib
+import select
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Iterator, Optional, Tuple
+from imap_tools import MailBox
+
+from service.metrics import phase, record_command, record_connect, record_io
+from service.profiling import end_span, start_span
+
+# 연결이 끊어졌거나 더 이상 쓸 수 없는 소켓에서 발생하는 예외들
+CONNECTION_ERRORS = (imaplib.IMAP4.abort, OSError, EOFError)
+
+
+class _InstrumentedClient:
+    """보낸 명령 수와 소켓 입출력(바이트, 응답 대기 시간)을 metrics에 기록하는 imaplib 클라이언트 mixin"""
+
+    def _command(self, name, *args):
+        # UID FETCH/STORE 등은 하위 명령까지 구분해 기록
+        command = f"{name} {args[0]}" if name == 'UID' and args else name
+        record_command(command)
+        span = start_span(f"imap {command}", push=False)
+        tag = super()._command(name, *args)
+        if span:
+            # 파이프라이닝하면 응답을 나중에 한꺼번에 읽으므로 태그별로 스팬을 보관
+            self.__dict__.setdefault('_spans', {})[tag] = span
+        return tag
+
+    def _command_complete(self, name, tag):
+        try:
+            return super()._command_complete(name, tag)
+        finally:
+            end_span(self.__dict__.get('_spans', {}).pop(tag, None), pop=False)
+
+    def send(self, data):
+        super().send(data)
+        record_io(sent=len(data))
+
+    def readline(self):
+        started = time.perf_counter()
+        line = super().readline()
+        record_io(time.perf_counter() - started, received=len(line))
+        return line
+
+    def read(self, size):
+        started = time.perf_counter()
+        data = super().read(size)
+        record_io(time.perf_counter() - started, received=len(data))
+        return data
+
+
+class InstrumentedIMAP4(_InstrumentedClient, imaplib.IMAP4):
+    pass
+
+
+class InstrumentedIMAP4_SSL(_InstrumentedClient, imaplib.IMAP4_SSL):
+    pass
+
+
+class PooledMailBox(MailBox):
+    """현재 선택된 폴더와 그 폴더의 UIDVALIDITY를 기억하는 MailBox"""
+
+    def __init__(self, *args, ssl: bool = True, **kwargs):
+        # 부모 생성자에서 바로 접속하므로 먼저 설정해야 함
+        self.ssl = ssl
+        super().__init__(*args, **kwargs)
+        self.uidvalidity: Optional[int] = None
+        # 현재 선택된 폴더와 EXAMINE(읽기 전용)으로 선택했는지 여부
+        self.selected: Optional[str] = None
+        self.readonly = False
+        # ENABLE QRESYNC 성공 여부 (VANISHED 응답 사용 가능)
+        self.qresync = False
+
+    def _get_mailbox_client(self) -> imaplib.IMAP4:
+        # ssl=False는 로컬 가짜 서버(bench/fake_imap.py)처럼 암호화 없는 서버에만 사용
+        if not self.ssl:
+            return InstrumentedIMAP4(self._host, self._port, timeout=self._timeout)
+        return InstrumentedIMAP4_SSL(self._host, self._port, ssl_context=self._ssl_context, timeout=self._timeout)
+
+    def select(self, folder: str, readonly: bool = False) -> tuple:
+        """
+        폴더를 선택(readonly이면 EXAMINE)하고 SELECT 응답에 포함된 UIDVALIDITY를 저장합니다.
+        """
+        # 선택에 실패하면 서버는 선택된 폴더가 없는 상태가 됨
+        self.selected = None
+        result = self.folder.set(folder, readonly)
+        values = self.client.untagged_responses.get('UIDVALIDITY')
+        self.uidvalidity = int(values[-1]) if values else None
+        self.selected = folder
+        self.readonly = readonly
+        return result
+
+    def ensure_selected(self, folder: str, readonly: bool = True) -> None:
+        """
+        folder가 이미 선택되어 있으면 아무것도 하지 않습니다.
+        읽기 작업은 EXAMINE으로 선택하며, 쓰기 작업인데 EXAMINE 상태이면 SELECT로 다시 선택합니다.
+        """
+        if self.selected == folder and (readonly or not self.readonly):
+            return
+        self.select(folder, readonly)
+
+
+class _IdleConnection:
+    """풀에 보관되는 MailBox 연결과 마지막 사용 시각"""
+    __slots__ = ('mailbox', 'last_used')
+
+    def __init__(self, mailbox: PooledMailBox):
+        self.mailbox = mailbox
+        self.last_used = time.monotonic()
+
+
+class MailBoxPool:
+    """
+    로그인과 폴더 선택이 끝난 MailBox 연결을 재사용하는 풀.
+
+    호출마다 TLS 핸드셰이크 + LOGIN + SELECT를 반복하지 않도록
+    최대 max_size개의 연결을 유지하며 재사용합니다.
+    """
+
+    def __init__(
+        self,
+        id: str,
+        password: str,
+        host: str = "imap.naver.com",
+        port: int = 993,
+        ssl: bool = True,
+        max_size: int = 4,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        initial_folder: str = "INBOX",
+    ):
+        """
+        Args:
+            id: 네이버 아이디
+            password: 네이버 비밀번호
+            host: IMAP 서버 주소
+            port: IMAP 서버 포트
+            ssl: False이면 암호화하지 않은 IMAP으로 접속 (로컬 테스트/벤치마크 전용)
+            max_size: 동시에 열어둘 수 있는 최대 연결 개수
+            idle_timeout: 이 시간(초) 이상 쓰이지 않은 연결은 닫고 새로 맺음
+            health_check_interval: 이 시간(초) 이상 쉬던 연결은 꺼내기 전에 NOOP으로 확인
+            initial_folder: 로그인 직후 EXAMINE으로 선택할 폴더
+        """
+        if max_size < 1:
+            raise ValueError("max_size는 1 이상이어야 합니다.")
+
+        self.id = id
+        self.password = password
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.initial_folder = initial_folder
+
+        self._idle: Deque[_IdleConnection] = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._in_use = 0
+        self._closed = False
+
+    # 연결 생성/폐기
+
+    def _connect(self) -> PooledMailBox:
+        started = time.perf_counter()
+        # 핸드셰이크와 LOGIN의 응답 대기는 imap이 아니라 connect 구간으로 기록
+        with phase("connect", absorb_io=True):
+            mailbox = PooledMailBox(self.host, self.port, ssl=self.ssl).login(self.id, self.password, None)
+            # QRESYNC는 SELECT 전에 켜야 VANISHED 응답을 받을 수 있음
+            if 'QRESYNC' in mailbox.client.capabilities and 'ENABLE' in mailbox.client.capabilities:
+                typ, _ = mailbox.client.enable('QRESYNC')
+                mailbox.qresync = typ == 'OK'
+            mailbox.select(self.initial_folder, readonly=True)
+        record_connect(time.perf_counter() - started)
+        return mailbox
+
+    @staticmethod
+    def _discard(mailbox: PooledMailBox) -> None:
+        """연결을 닫습니다. 이미 끊어진 연결이면 조용히 무시합니다."""
+        try:
+            mailbox.logout()
+        except Exception:
+            try:
+                mailbox.client.shutdown()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _has_pending_input(mailbox: PooledMailBox) -> bool:
+        """
+        쉬는 동안 서버가 보낸 데이터가 있는지 왕복 없이 확인합니다.
+        서버가 연결을 끊었거나(EOF) BYE를 보냈으면 소켓이 읽기 가능 상태가 됩니다.
+        """
+        sock = mailbox.client.sock
+        try:
+            if getattr(sock, 'pending', None) and sock.pending():
+                return True
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _is_alive(self, pooled: _IdleConnection) -> bool:
+        """
+        오래 쉬었거나 쉬는 동안 서버가 무언가를 보낸 연결은 NOOP으로 살아있는지 확인합니다.
+        """
+        if time.monotonic() - pooled.last_used < self.health_check_interval \
+                and not self._has_pending_input(pooled.mailbox):
+            return True
+        try:
+            typ, _ = pooled.mailbox.client.noop()
+            return typ == 'OK'
+        except CONNECTION_ERRORS + (imaplib.IMAP4.error,):
+            return False
+
+    def _pop_idle(self, folder: Optional[str]) -> Optional[_IdleConnection]:
+        """폴더를 다시 선택하지 않도록 folder가 선택된 유휴 연결을 우선 꺼냅니다."""
+        if folder is not None:
+            for pooled in reversed(self._idle):
+                if pooled.mailbox.selected == folder:
+                    self._idle.remove(pooled)
+                    return pooled
+        return self._idle.pop() if self._idle else None
+
+    def _checkout(self, folder: Optional[str] = None) -> Tuple[PooledMailBox, bool]:
+        """연결과 풀에서 재사용한 연결인지 여부를 반환합니다."""
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("이미 닫힌 연결 풀입니다.")
+                pooled = self._pop_idle(folder)
+
+            if pooled is None:
+                return self._connect(), False
+
+            if time.monotonic() - pooled.last_used > self.idle_timeout:
+                self._discard(pooled.mailbox)
+                continue
+
+            if self._is_alive(pooled):
+                return pooled.mailbox, True
+
+            # 끊어진 연결은 버리고 다음 연결(또는 새 연결)로 재시도
+            self._discard(pooled.mailbox)
+
+    def _checkout_selected(self, folder: Optional[str], readonly: bool) -> PooledMailBox:
+        """
+        연결을 꺼내 folder를 선택합니다.
+        재사용한 연결이 선택 중에 끊어지면 버리고 새 연결로 한 번만 다시 시도합니다.
+        """
+        mailbox, reused = self._checkout(folder)
+        if folder is None:
+            return mailbox
+        try:
+            mailbox.ensure_selected(folder, readonly)
+            return mailbox
+        except CONNECTION_ERRORS:
+            self._discard(mailbox)
+            if not reused:
+                raise
+        except BaseException:
+            self._checkin(mailbox)
+            raise
+
+        mailbox = self._connect()
+        try:
+            mailbox.ensure_selected(folder, readonly)
+        except CONNECTION_ERRORS:
+            self._discard(mailbox)
+            raise
+        except BaseException:
+            self._checkin(mailbox)
+            raise
+        return mailbox
+
+    def _checkin(self, mailbox: PooledMailBox) -> None:
+        # STORE 등이 남긴 FETCH 응답이 다음 사용자의 FETCH 결과에 섞이지 않도록 비움
+        mailbox.client.untagged_responses.pop('FETCH', None)
+        with self._lock:
+            if not self._closed:
+                self._idle.append(_IdleConnection(mailbox))
+                return
+        self._discard(mailbox)
+
+    # 공개 API
+
+    @contextmanager
+    def acquire(self, folder: Optional[str] = None, readonly: bool = True) -> Iterator[PooledMailBox]:
+        """
+        풀에서 연결을 하나 빌려옵니다.
+
+        folder를 주면 그 폴더가 선택된 연결을 우선 사용하고, 필요할 때만 폴더를 다시 선택합니다.
+        with 블록이 끝나면 연결은 로그아웃하지 않고 풀로 반환됩니다.
+        블록 안에서 소켓 오류가 발생하면 해당 연결은 폐기됩니다.
+
+        서버가 끊은 유휴 연결은 내주기 전에 걸러내고, 재사용한 연결이 폴더 선택 중에 끊어지면
+        새 연결로 한 번 다시 시도합니다. (with 블록은 다시 실행할 수 없으므로 블록 안의 오류는 그대로 전달)
+
+        Args:
+            folder: 사용할 폴더 (None이면 현재 선택된 폴더 그대로 사용)
+            readonly: 읽기 작업이면 True (EXAMINE으로 선택)
+        """
+        with phase("pool_wait"):
+            self._slots.acquire()
+        try:
+            mailbox = self._checkout_selected(folder, readonly)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+        try:
+            yield mailbox
+        except CONNECTION_ERRORS:
+            self._discard(mailbox)
+            raise
+        except BaseException:
+            self._checkin(mailbox)
+            raise
+        else:
+            self._checkin(mailbox)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def open_dedicated(self, folder: str) -> PooledMailBox:
+        """
+        풀에 넣지 않는 전용 연결을 만들어 folder를 EXAMINE으로 선택합니다.
+        IDLE처럼 연결을 오래 붙잡는 작업이 다른 요청의 연결을 차지하지 않도록 할 때 사용합니다.
+        다 쓴 연결은 close_dedicated로 닫아야 합니다.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("이미 닫힌 연결 풀입니다.")
+        mailbox = self._connect()
+        try:
+            mailbox.ensure_selected(folder, readonly=True)
+        except BaseException:
+            self._discard(mailbox)
+            raise
+        return mailbox
+
+    def close_dedicated(self, mailbox: PooledMailBox) -> None:
+        self._discard(mailbox)
+
+    def prune(self) -> int:
+        """idle_timeout이 지난 유휴 연결을 정리하고 정리된 개수를 반환합니다."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [p for p in self._idle if now - p.last_used > self.idle_timeout]
+            for pooled in expired:
+                self._idle.remove(pooled)
+        for pooled in expired:
+            self._discard(pooled.mailbox)
+        return len(expired)
+
+    def forget_folder(self, folder: str) -> None:
+        """
+        삭제/이름 변경된 폴더를 선택하고 있던 유휴 연결이
+        다음 사용 때 폴더를 다시 선택하도록 표시합니다.
+        """
+        with self._lock:
+            for pooled in self._idle:
+                if pooled.mailbox.selected == folder:
+                    pooled.mailbox.selected = None
+
+    def close(self) -> None:
+        """모든 유휴 연결을 닫고 풀을 종료합니다."""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for pooled in idle:
+            self._discard(pooled.mailbox)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+            }
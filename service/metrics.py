@@ -0,0 +1,344 @@
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from service.profiling import end_span, start_span
+
+T = TypeVar('T')
+
+# 이름 앞에 붙는 접두사 (Prometheus/OpenMetrics 출력)
+PREFIX = "navermail"
+# 지연 히스토그램 버킷(초)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# tool 호출 하나의 지연을 나누는 구간
+#   pool_wait  연결 풀에 빈 슬롯이 생기길 기다린 시간
+#   connect    새 연결의 TLS 핸드셰이크 + LOGIN + 첫 SELECT
+#   imap       IMAP 응답을 기다리며 소켓에서 읽은 시간
+#   parse      FETCH 응답을 메일 객체로 파싱한 시간
+#   serialize  결과를 JSON/텍스트 등으로 변환한 시간 (안에서 일어난 IMAP/파싱 시간 제외)
+PHASES = ("pool_wait", "connect", "imap", "parse", "serialize")
+# tool 호출 밖(백그라운드 동기화, IDLE 감시)에서 일어난 작업의 tool 라벨
+BACKGROUND = "background"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class CallStats:
+    """tool 호출 하나 동안 쌓인 IMAP 사용량과 구간별 시간"""
+    tool: str
+    commands: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    phases: Dict[str, float] = field(default_factory=dict)
+    failed: bool = False
+    # 대량 작업은 여러 스레드에서 동시에 기록하므로 잠금이 필요함
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, commands: int = 0, sent: int = 0, received: int = 0,
+            phase: Optional[str] = None, seconds: float = 0.0) -> None:
+        with self._lock:
+            self.commands += commands
+            self.bytes_sent += sent
+            self.bytes_received += received
+            if phase:
+                self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+class _Histogram:
+    __slots__ = ('count', 'sum', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+
+
+class Metrics:
+    """
+    프로세스 전체에서 공유하는 카운터/히스토그램 저장소.
+    외부 의존성 없이 snapshot(JSON)과 OpenMetrics 텍스트로 내보냅니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> dict:
+        """
+        tool별 호출 수, 평균 지연과 구간별 평균 시간, 호출당 IMAP 명령 수/전송량을 모아 반환합니다.
+        other_ms는 구간에 속하지 않은 시간(executor 대기, 파이썬 처리 등)입니다.
+        대량 작업처럼 여러 연결에서 동시에 처리한 호출은 구간 시간이 스레드별 합계라 평균 지연보다 클 수 있습니다.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (h.count, h.sum, h.max) for key, h in self._histograms.items()}
+
+        def total(name: str, **labels: str) -> float:
+            wanted = set(labels.items())
+            return sum(value for (key, key_labels), value in counters.items()
+                       if key == name and wanted <= set(key_labels))
+
+        tools = {}
+        for (name, labels), (count, seconds, longest) in sorted(histograms.items()):
+            if name != "tool_seconds":
+                continue
+            tool = dict(labels)["tool"]
+            phases = {phase: round(total("phase_seconds_total", tool=tool, phase=phase) / count * 1000, 3)
+                      for phase in PHASES}
+            mean_ms = seconds / count * 1000
+            tools[tool] = {
+                "calls": count,
+                "errors": int(total("tool_calls_total", tool=tool, status="error")),
+                "mean_ms": round(mean_ms, 3),
+                "max_ms": round(longest * 1000, 3),
+                "phases_ms": phases,
+                "other_ms": round(max(0.0, mean_ms - sum(phases.values())), 3),
+                "imap_commands": round(total("imap_commands_total", tool=tool) / count, 2),
+                "imap_bytes_sent": int(total("imap_bytes_sent_total", tool=tool) / count),
+                "imap_bytes_received": int(total("imap_bytes_received_total", tool=tool) / count),
+            }
+
+        services = {}
+        for (name, labels), (count, seconds, longest) in sorted(histograms.items()):
+            if name == "service_call_seconds":
+                services[dict(labels)["operation"]] = {
+                    "calls": count,
+                    "mean_ms": round(seconds / count * 1000, 3),
+                    "max_ms": round(longest * 1000, 3),
+                }
+
+        commands: Dict[str, int] = {}
+        for (name, labels), value in counters.items():
+            if name == "imap_commands_total":
+                command = dict(labels)["command"]
+                commands[command] = commands.get(command, 0) + int(value)
+
+        connects = total("imap_connects_total")
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "tools": tools,
+            "service_calls": services,
+            "imap": {
+                "commands": dict(sorted(commands.items(), key=lambda item: -item[1])),
+                "bytes_sent": int(total("imap_bytes_sent_total")),
+                "bytes_received": int(total("imap_bytes_received_total")),
+                "connects": int(connects),
+                "connect_mean_ms": round(total("imap_connect_seconds_total") / connects * 1000, 3)
+                if connects else None,
+            },
+        }
+
+    def to_openmetrics(self, gauges: Optional[List[Tuple[str, Dict[str, str], float]]] = None) -> str:
+        """
+        Prometheus/OpenMetrics 텍스트 형식으로 내보냅니다.
+        gauges는 내보내는 시점의 값(연결 풀, 캐시 등)을 (이름, 라벨, 값)으로 받습니다.
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (h.count, h.sum, list(h.buckets))) for key, h in self._histograms.items())
+
+        lines: List[str] = []
+        declared = set()
+
+        def declare(name: str, kind: str) -> str:
+            full = f"{PREFIX}_{name}"
+            family = full[:-len("_total")] if kind == "counter" and full.endswith("_total") else full
+            if family not in declared:
+                declared.add(family)
+                lines.append(f"# TYPE {family} {kind}")
+            return full
+
+        for (name, labels), value in counters:
+            full = declare(name, "counter")
+            lines.append(f"{full}{_format_labels(dict(labels))} {_format_value(value)}")
+        for (name, labels), (count, seconds, buckets) in histograms:
+            full = declare(name, "histogram")
+            base = dict(labels)
+            for bound, bucket in zip(BUCKETS, buckets):
+                lines.append(f"{full}_bucket{_format_labels({**base, 'le': str(bound)})} {bucket}")
+            lines.append(f"{full}_bucket{_format_labels({**base, 'le': '+Inf'})} {count}")
+            lines.append(f"{full}_count{_format_labels(base)} {count}")
+            lines.append(f"{full}_sum{_format_labels(base)} {_format_value(seconds)}")
+        for name, labels, value in sorted(gauges or [], key=lambda gauge: gauge[0]):
+            full = declare(name, "gauge")
+            lines.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+        lines.append("# EOF")
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for key, value in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+METRICS = Metrics()
+
+# 현재 실행 중인 tool 호출 (MailExecutor가 작업 스레드로 컨텍스트를 넘겨줌)
+_current_call: contextvars.ContextVar[Optional[CallStats]] = contextvars.ContextVar('current_call', default=None)
+# 스레드마다 진행 중인 구간 스택. 안쪽 구간 시간을 바깥 구간에서 빼 구간끼리 겹치지 않게 함
+_local = threading.local()
+
+
+class _Frame:
+    __slots__ = ('child', 'absorb_io')
+
+    def __init__(self, absorb_io: bool):
+        self.child = 0.0
+        self.absorb_io = absorb_io
+
+
+def _stack() -> List[_Frame]:
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _tool() -> str:
+    call = _current_call.get()
+    return call.tool if call else BACKGROUND
+
+
+def _record_phase(phase: str, seconds: float) -> None:
+    call = _current_call.get()
+    if call:
+        call.add(phase=phase, seconds=seconds)
+    METRICS.inc("phase_seconds_total", seconds, tool=_tool(), phase=phase)
+
+
+@contextmanager
+def phase(name: str, absorb_io: bool = False) -> Iterator[None]:
+    """
+    블록 실행 시간을 name 구간으로 기록합니다. 안쪽 구간의 시간은 빠집니다.
+    absorb_io가 True이면 블록 안의 IMAP 응답 대기도 imap이 아니라 이 구간에 포함합니다. (로그인 등)
+    """
+    stack = _stack()
+    frame = _Frame(absorb_io)
+    stack.append(frame)
+    # 프로파일링 중인 호출이면 같은 구간을 스팬으로도 남김
+    current = start_span(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        end_span(current)
+        stack.pop()
+        if stack:
+            stack[-1].child += elapsed
+        _record_phase(name, elapsed - frame.child)
+
+
+def timed(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """함수 실행 시간을 name 구간으로 기록하는 데코레이터"""
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_command(command: str) -> None:
+    """IMAP 명령 하나를 보낸 것을 기록합니다."""
+    call = _current_call.get()
+    if call:
+        call.add(commands=1)
+    METRICS.inc("imap_commands_total", tool=_tool(), command=command)
+
+
+def record_io(seconds: float = 0.0, sent: int = 0, received: int = 0) -> None:
+    """IMAP 소켓 입출력(보낸/받은 바이트, 응답을 기다린 시간)을 기록합니다."""
+    call = _current_call.get()
+    tool = call.tool if call else BACKGROUND
+    stack = _stack()
+    absorbed = bool(stack) and stack[-1].absorb_io
+    if stack and not absorbed:
+        stack[-1].child += seconds
+    if call:
+        call.add(sent=sent, received=received)
+    if sent:
+        METRICS.inc("imap_bytes_sent_total", sent, tool=tool)
+    if received:
+        METRICS.inc("imap_bytes_received_total", received, tool=tool)
+    if seconds and not absorbed:
+        _record_phase("imap", seconds)
+
+
+def record_connect(seconds: float) -> None:
+    METRICS.inc("imap_connects_total", tool=_tool())
+    METRICS.inc("imap_connect_seconds_total", seconds)
+
+
+def record_service_call(operation: str, seconds: float) -> None:
+    METRICS.observe("service_call_seconds", seconds, operation=operation)
+
+
+def mark_failed() -> None:
+    """진행 중인 tool 호출을 실패로 기록합니다. (예외를 잡아 오류 메시지로 응답한 경우)"""
+    call = _current_call.get()
+    if call:
+        call.failed = True
+
+
+@contextmanager
+def track_call(tool: str) -> Iterator[CallStats]:
+    """
+    tool 호출 하나를 추적합니다. 블록 안(과 MailExecutor 작업 스레드)에서 일어난
+    IMAP 명령/전송량과 구간별 시간이 이 호출로 집계됩니다.
+    """
+    call = CallStats(tool)
+    token = _current_call.set(call)
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call.failed = True
+        raise
+    finally:
+        _current_call.reset(token)
+        METRICS.observe("tool_seconds", time.perf_counter() - started, tool=tool)
+        METRICS.inc("tool_calls_total", tool=tool, status="error" if call.failed else "ok")
@@ -0,0 +1,264 @@
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import pstats
+import random
+import secrets
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+# 프로파일링 설정 환경 변수 (명령줄 옵션의 기본값)
+PROFILE_ENV = "NAVER_MAIL_PROFILE"  # "cprofile", "spans" 또는 "cprofile,spans"
+PROFILE_DIR_ENV = "NAVER_MAIL_PROFILE_DIR"
+PROFILE_SAMPLE_RATE_ENV = "NAVER_MAIL_PROFILE_SAMPLE_RATE"
+PROFILE_MODES = ("cprofile", "spans")
+# 스팬을 모아 쓰는 파일 이름 (profile_dir 안, 스팬 하나가 JSON 한 줄)
+SPANS_FILE = "spans.jsonl"
+
+
+@dataclass
+class Span:
+    """OpenTelemetry 스팬과 같은 필드를 가진 구간 기록"""
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    thread: str = ""
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self, trace_id: str) -> dict:
+        return {
+            "traceId": trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": {"thread.name": self.thread, **self.attributes},
+        }
+
+
+class CallProfile:
+    """프로파일링하기로 뽑힌 tool 호출 하나의 cProfile 결과와 스팬"""
+
+    def __init__(self, tool: str, modes: Iterable[str]):
+        self.tool = tool
+        self.modes = set(modes)
+        self.trace_id = secrets.token_hex(16)
+        self.root = Span(f"tool {tool}", secrets.token_hex(8), None, time.time_ns(),
+                         thread=threading.current_thread().name)
+        self.attributes: Dict[str, Any] = {"tool": tool}
+        self.profile: Optional[cProfile.Profile] = None
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cprofile(self) -> bool:
+        return "cprofile" in self.modes
+
+    @property
+    def spans_enabled(self) -> bool:
+        return "spans" in self.modes
+
+    def add_span(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def profiling(self) -> Iterator[None]:
+        """
+        블록 실행을 cProfile로 기록합니다.
+        Python 3.12부터 cProfile은 sys.monitoring을 사용해 모든 스레드(IMAP 작업 스레드 포함)를 기록하는 대신
+        프로세스에서 하나만 켤 수 있으므로, 다른 호출이 이미 기록 중이면 이 호출은 스팬만 남깁니다.
+        기록 중에 동시에 진행된 다른 호출의 작업도 통계에 섞일 수 있습니다.
+        """
+        if not self.cprofile or not _cprofile_lock.acquire(blocking=False):
+            if self.cprofile:
+                self.attributes["cprofile"] = "skipped"
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            try:
+                profile.enable()
+            except ValueError:
+                # 서버 밖의 프로파일러(python -m cProfile 등)가 이미 켜져 있음
+                self.attributes["cprofile"] = "skipped"
+                profile = None
+            try:
+                yield
+            finally:
+                if profile:
+                    profile.disable()
+            self.profile = profile
+        finally:
+            _cprofile_lock.release()
+
+
+class Profiler:
+    """
+    tool 호출을 sample_rate 비율로 골라 cProfile 통계(.prof)나 스팬(spans.jsonl)을 output_dir에 저장합니다.
+    .prof 파일은 `python -m pstats` 또는 snakeviz 등으로 볼 수 있습니다.
+    파일 쓰기는 이벤트 루프를 막지 않도록 전용 스레드 하나에서 호출이 끝난 순서대로 처리합니다.
+    """
+
+    def __init__(self, modes: Iterable[str], output_dir: str = "profiles", sample_rate: float = 1.0,
+                 tools: Optional[Iterable[str]] = None):
+        self.modes = set(modes)
+        unknown = self.modes - set(PROFILE_MODES)
+        if unknown or not self.modes:
+            raise ValueError(f"지원하지 않는 프로파일링 방식입니다: {', '.join(unknown) or '(없음)'} "
+                             f"(가능한 값: {', '.join(PROFILE_MODES)})")
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate는 0보다 크고 1 이하여야 합니다.")
+        self.output_dir = os.path.expanduser(output_dir)
+        self.sample_rate = sample_rate
+        self.tools = set(tools) if tools else None
+        self._write_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-writer")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def sample(self, tool: str) -> bool:
+        if self.tools is not None and tool not in self.tools:
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def submit(self, call: CallProfile) -> Future:
+        """
+        call을 파일 쓰기 스레드에 넘깁니다. (.prof 저장과 pstats 변환은 수십 ms가 걸릴 수 있음)
+        쓰기에 실패해도 tool 호출에는 영향이 없으며, 오류는 반환한 Future에 남습니다.
+        """
+        return self._writer.submit(self.write, call)
+
+    def close(self, wait: bool = True) -> None:
+        """아직 쓰지 않은 결과를 모두 쓰고(wait가 True이면 기다림) 파일 쓰기 스레드를 멈춥니다."""
+        self._writer.shutdown(wait=wait)
+
+    def write(self, call: CallProfile) -> None:
+        if call.profile:
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(call.root.start_ns / 1e9))
+            path = os.path.join(self.output_dir, f"{stamp}-{call.tool}-{call.trace_id[:8]}.prof")
+            pstats.Stats(call.profile).dump_stats(path)
+            call.attributes["cprofile"] = os.path.basename(path)
+        if call.spans_enabled:
+            call.root.attributes.update(call.attributes)
+            spans = [call.root] + sorted(call.spans, key=lambda span: span.start_ns)
+            lines = ''.join(json.dumps(span.to_dict(call.trace_id), ensure_ascii=False, default=str) + '\n'
+                            for span in spans)
+            with self._write_lock, open(os.path.join(self.output_dir, SPANS_FILE), 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+
+_profiler: Optional[Profiler] = None
+# 현재 프로파일링 중인 tool 호출 (MailExecutor가 작업 스레드로 컨텍스트를 넘겨줌)
+_current_profile: contextvars.ContextVar[Optional[CallProfile]] = contextvars.ContextVar(
+    'current_profile', default=None)
+# 스레드마다 열려 있는 스팬 스택
+_local = threading.local()
+# cProfile은 프로세스에서 하나만 켤 수 있음
+_cprofile_lock = threading.Lock()
+
+
+def configure_profiling(profiler: Optional[Profiler]) -> None:
+    """tool 호출 프로파일링을 켭니다. None이면 끕니다. (이전 프로파일러는 남은 결과를 쓴 뒤 닫음)"""
+    global _profiler
+    previous, _profiler = _profiler, profiler
+    if previous and previous is not profiler:
+        previous.close()
+
+
+def _stack() -> List[str]:
+    stack = getattr(_local, 'spans', None)
+    if stack is None:
+        stack = _local.spans = []
+    return stack
+
+
+def start_span(name: str, push: bool = True, **attributes: Any) -> Optional[Span]:
+    """
+    진행 중인 tool 호출이 스팬을 기록하고 있으면 스팬을 시작합니다. 아니면 None을 반환합니다.
+    push가 True이면 이 스레드에서 이후 시작하는 스팬의 부모가 됩니다.
+    """
+    call = _current_profile.get()
+    if call is None or not call.spans_enabled:
+        return None
+    stack = _stack()
+    span = Span(name, secrets.token_hex(8), stack[-1] if stack else call.root.span_id, time.time_ns(),
+                thread=threading.current_thread().name, attributes=attributes)
+    if push:
+        stack.append(span.span_id)
+    return span
+
+
+def end_span(span: Optional[Span], pop: bool = True) -> None:
+    if span is None:
+        return
+    span.end_ns = time.time_ns()
+    if pop:
+        stack = _stack()
+        if stack and stack[-1] == span.span_id:
+            stack.pop()
+    call = _current_profile.get()
+    if call:
+        call.add_span(span)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    current = start_span(name, **attributes)
+    try:
+        yield current
+    finally:
+        end_span(current)
+
+
+def traced(func: Callable[..., T], name: Optional[str] = None) -> Callable[..., T]:
+    """
+    진행 중인 tool 호출이 스팬을 기록하고 있으면 func 실행을 스팬으로 감쌉니다.
+    작업 스레드에서 실행할 함수에 쓰면 그 스레드의 스팬들이 이 스팬 아래에 놓입니다.
+    스팬을 기록하지 않으면 func를 그대로 반환합니다.
+    """
+    call = _current_profile.get()
+    if call is None or not call.spans_enabled:
+        return func
+    name = name or getattr(func, '__name__', repr(func))
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def profile_call(tool: str) -> Iterator[Optional[CallProfile]]:
+    """
+    프로파일링이 켜져 있고 이 호출이 표본으로 뽑히면 호출 전체를 기록해 끝날 때 파일로 씁니다.
+    파일 쓰기는 Profiler의 쓰기 스레드에서 하므로 호출 응답을 늦추지 않습니다.
+    """
+    profiler = _profiler
+    if profiler is None or not profiler.sample(tool):
+        yield None
+        return
+    call = CallProfile(tool, profiler.modes)
+    token = _current_profile.set(call)
+    try:
+        with call.profiling():
+            yield call
+    except BaseException as e:
+        call.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_profile.reset(token)
+        call.root.end_ns = time.time_ns()
+        profiler.submit(call)
@@ -0,0 +1,95 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qsl, quote, unquote, urlsplit
+
+# MCP 리소스 URI 형식
+#   navermail://{folder}                               폴더 (최근 메일 목록)
+#   navermail://{folder}/{uid}                         메일 한 통
+#   navermail://{folder}/{uid}/attachments/{section}   첨부파일 파트
+# 폴더 이름은 "/"까지 퍼센트 인코딩합니다.
+# 기본 계정이 아닌 계정은 navermail://{account}@{folder}처럼 계정 이름을 앞에 붙입니다.
+SCHEME = "navermail"
+
+
+@dataclass
+class ResourceRef:
+    """파싱한 리소스 URI"""
+    folder: str
+    uid: Optional[str] = None
+    section: Optional[str] = None
+    query: Dict[str, str] = field(default_factory=dict)
+    account: Optional[str] = None  # None이면 기본 계정
+
+    @property
+    def kind(self) -> str:
+        if self.section is not None:
+            return "attachment"
+        if self.uid is not None:
+            return "message"
+        return "folder"
+
+
+def folder_uri(folder: str, account: Optional[str] = None) -> str:
+    prefix = f"{quote(account, safe='')}@" if account else ""
+    return f"{SCHEME}://{prefix}{quote(folder, safe='')}"
+
+
+def message_uri(folder: str, uid: str, account: Optional[str] = None) -> str:
+    return f"{folder_uri(folder, account)}/{uid}"
+
+
+def attachment_uri(folder: str, uid: str, section: str, account: Optional[str] = None) -> str:
+    return f"{message_uri(folder, uid, account)}/attachments/{section}"
+
+
+def canonical_uri(ref: ResourceRef) -> str:
+    """쿼리 문자열을 뺀 리소스 URI (구독 URI 비교에 사용)"""
+    if ref.section is not None:
+        return attachment_uri(ref.folder, ref.uid, ref.section, ref.account)
+    if ref.uid is not None:
+        return message_uri(ref.folder, ref.uid, ref.account)
+    return folder_uri(ref.folder, ref.account)
+
+
+def parse_uri(uri: str) -> ResourceRef:
+    """리소스 URI를 폴더/UID/파트 번호로 나눕니다. 형식이 맞지 않으면 ValueError를 발생시킵니다."""
+    parts = urlsplit(str(uri))
+    if parts.scheme != SCHEME or not parts.netloc:
+        raise ValueError(f"지원하지 않는 리소스 URI입니다: {uri}")
+    # 폴더/계정 이름의 "@"는 퍼센트 인코딩되므로 남아있는 "@"는 계정 구분자뿐임
+    account, _, folder = parts.netloc.rpartition('@')
+    ref = ResourceRef(folder=unquote(folder), query=dict(parse_qsl(parts.query)),
+                      account=unquote(account) or None)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    if not segments:
+        return ref
+    if not segments[0].isdigit():
+        raise ValueError(f"잘못된 UID입니다: {segments[0]}")
+    ref.uid = segments[0]
+    if len(segments) == 1:
+        return ref
+    if len(segments) == 3 and segments[1] == "attachments":
+        ref.section = segments[2]
+        return ref
+    raise ValueError(f"지원하지 않는 리소스 URI입니다: {uri}")
+
+
+def folder_etag(status: Dict[str, int]) -> str:
+    """
+    STATUS 결과로 폴더 ETag를 만듭니다.
+    HIGHESTMODSEQ가 있으면 플래그 변경까지, 없으면 메일 추가/삭제만 반영됩니다.
+    """
+    values = [status.get(key, '') for key in ('UIDVALIDITY', 'UIDNEXT', 'MESSAGES', 'HIGHESTMODSEQ')]
+    return '"' + '-'.join(str(value) for value in values) + '"'
+
+
+def message_etag(uidvalidity: Optional[int], uid: str, modseq: Optional[int],
+                 flags: Iterable[str] = ()) -> str:
+    """
+    메일 ETag를 만듭니다. 같은 UIDVALIDITY에서 UID의 내용은 바뀌지 않으므로
+    바뀔 수 있는 값은 플래그뿐이며, MODSEQ가 있으면 MODSEQ를, 없으면 플래그 해시를 사용합니다.
+    """
+    version = str(modseq) if modseq is not None else hashlib.sha1(
+        ' '.join(sorted(flags)).encode()).hexdigest()[:12]
+    return f'"{uidvalidity or 0}-{uid}-{version}"'
@@ -0,0 +1,256 @@
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+from imap_tools import MailMessage
+
+from service.body_renderer import html_to_text
+from service.mail_message import HeaderMailMessage
+
+# 한글/한자/가나는 띄어쓰기 단위와 검색어 단위가 다르므로 2-gram으로 색인
+_CJK_RUN_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+')
+_WORD_RE = re.compile(r'\w+')
+
+# 색인 검색으로 처리할 수 있는 조건 -> FTS5 컬럼 (None이면 전체 컬럼)
+INDEX_COLUMNS = {
+    'text': None,
+    'subject': 'subject',
+    'from': 'sender',
+    'to': 'recipients',
+    'cc': 'recipients',
+    'body': 'body',
+    'attachment': 'attachments',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    folder TEXT PRIMARY KEY,
+    uidvalidity INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL,
+    uid INTEGER NOT NULL,
+    date TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    has_body INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (folder, uid)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5 (
+    subject, sender, recipients, body, attachments,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def _ngrams(word: str) -> List[str]:
+    tokens = []
+    pos = 0
+    for run in _CJK_RUN_RE.finditer(word):
+        if run.start() > pos:
+            tokens.append(word[pos:run.start()])
+        chars = run.group()
+        if len(chars) == 1:
+            tokens.append(chars)
+        else:
+            tokens.extend(chars[i:i + 2] for i in range(len(chars) - 1))
+        pos = run.end()
+    if pos < len(word):
+        tokens.append(word[pos:])
+    return tokens
+
+
+def tokenize(text: Optional[str]) -> str:
+    """색인/검색 공통 전처리: 소문자화 후 한글 등은 2-gram으로 쪼갭니다."""
+    if not text:
+        return ''
+    return ' '.join(token for word in _WORD_RE.findall(text.lower()) for token in _ngrams(word))
+
+
+def _match_term(value: str) -> Optional[str]:
+    """검색어 한 개를 FTS5 MATCH 식으로 바꿉니다. 단어마다 2-gram 구(phrase)로 검색합니다."""
+    # 마지막 토큰은 접두어로 검색 ("회" -> "회의", "mail" -> "mailbox", "발신자2" -> "발신자20")
+    phrases = ['"' + ' '.join(_ngrams(word)) + '"*' for word in _WORD_RE.findall(value.lower())]
+    return ' AND '.join(phrases) or None
+
+
+class SearchIndex:
+    """
+    이 서버가 가져온 메일로 점진적으로 만드는 로컬 전문 검색 색인 (SQLite FTS5).
+
+    목록 조회로 받은 헤더는 제목/발신자/수신자/첨부파일 이름을,
+    상세 조회로 받은 원본이나 본문 파트는 본문 텍스트(HTML은 태그 제거)까지 색인합니다.
+    서버의 TEXT/BODY 검색 없이 이미 받아본 메일을 순위대로 찾을 때 사용합니다.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Args:
+            path: SQLite 파일 경로 (":memory:"이면 프로세스 메모리에만 저장)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    # 폴더 단위 관리
+
+    def check_uidvalidity(self, folder: str, uidvalidity: Optional[int]) -> None:
+        """UIDVALIDITY가 바뀌었으면 해당 폴더의 색인을 모두 비웁니다."""
+        if uidvalidity is None:
+            return
+        with self._lock:
+            row = self._db.execute(
+                "SELECT uidvalidity FROM folders WHERE folder = ?", (folder,)).fetchone()
+            if row and row[0] == uidvalidity:
+                return
+            self._db.execute("BEGIN")
+            if row:
+                self._delete_folder_rows(folder)
+            self._db.execute(
+                "INSERT OR REPLACE INTO folders (folder, uidvalidity) VALUES (?, ?)",
+                (folder, uidvalidity))
+            self._db.execute("COMMIT")
+
+    def get_uidvalidity(self, folder: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT uidvalidity FROM folders WHERE folder = ?", (folder,)).fetchone()
+        return row[0] if row else None
+
+    def _delete_folder_rows(self, folder: str) -> None:
+        self._db.execute(
+            "DELETE FROM docs_fts WHERE rowid IN (SELECT id FROM docs WHERE folder = ?)", (folder,))
+        self._db.execute("DELETE FROM docs WHERE folder = ?", (folder,))
+
+    def drop_folder(self, folder: str) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._delete_folder_rows(folder)
+            self._db.execute("DELETE FROM folders WHERE folder = ?", (folder,))
+            self._db.execute("COMMIT")
+
+    # 색인
+
+    def add(self, folder: str, mails: Iterable[MailMessage], bodies: Optional[Dict[str, str]] = None) -> None:
+        """
+        메일을 색인에 추가합니다.
+        본문까지 색인된 메일은 헤더만 있는 메일로 덮어쓰지 않습니다.
+
+        Args:
+            folder: 메일이 있는 폴더
+            mails: 색인할 메일 (원본 또는 헤더만 가져온 메일)
+            bodies: 헤더만 가져온 메일의 본문 텍스트 {uid: 본문} (본문 파트만 따로 받은 경우)
+        """
+        with self._lock:
+            self._db.execute("BEGIN")
+            for mail in mails:
+                self._add_one(folder, mail, (bodies or {}).get(mail.uid))
+            self._db.execute("COMMIT")
+
+    def _add_one(self, folder: str, mail: MailMessage, body: Optional[str] = None) -> None:
+        headers_only = isinstance(mail, HeaderMailMessage)
+        has_body = not headers_only or body is not None
+        row = self._db.execute(
+            "SELECT id, has_body FROM docs WHERE folder = ? AND uid = ?",
+            (folder, int(mail.uid))).fetchone()
+        if row and row[1] and not has_body:
+            return
+
+        if headers_only:
+            body = body or ''
+            filenames = [part.filename for part in mail.attachment_parts if part.filename]
+        else:
+            body = mail.text or html_to_text(mail.html, strip_quotes=False)
+            filenames = [att.filename for att in mail.attachments if att.filename]
+        sender = f"{mail.from_values.name} {mail.from_}" if mail.from_values else mail.from_
+        recipients = ' '.join(
+            f"{value.name} {value.email}" for value in (*mail.to_values, *mail.cc_values))
+
+        date = mail.date.date().isoformat() if mail.date.year > 1900 else None
+        size = mail.size_rfc822 or mail.size
+        if row:
+            doc_id = row[0]
+            self._db.execute(
+                "UPDATE docs SET date = ?, size = ?, has_body = ? WHERE id = ?",
+                (date, size, int(has_body), doc_id))
+            self._db.execute("DELETE FROM docs_fts WHERE rowid = ?", (doc_id,))
+        else:
+            doc_id = self._db.execute(
+                "INSERT INTO docs (folder, uid, date, size, has_body) VALUES (?, ?, ?, ?, ?)",
+                (folder, int(mail.uid), date, size, int(has_body))).lastrowid
+        self._db.execute(
+            "INSERT INTO docs_fts (rowid, subject, sender, recipients, body, attachments) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (doc_id, tokenize(mail.subject), tokenize(sender), tokenize(recipients),
+             tokenize(body), tokenize(' '.join(filenames))))
+
+    def discard(self, folder: str, uids: Iterable[str]) -> None:
+        """이동/삭제되어 폴더에서 사라진 메일을 색인에서 제거합니다."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            for uid in uids:
+                row = self._db.execute(
+                    "SELECT id FROM docs WHERE folder = ? AND uid = ?", (folder, int(uid))).fetchone()
+                if row:
+                    self._db.execute("DELETE FROM docs_fts WHERE rowid = ?", (row[0],))
+                    self._db.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+            self._db.execute("COMMIT")
+
+    # 검색
+
+    def search(self, folder: str, terms: dict, since: Optional[str] = None, before: Optional[str] = None,
+               larger: Optional[int] = None, smaller: Optional[int] = None,
+               limit: Optional[int] = None) -> List[str]:
+        """
+        색인에서 조건에 맞는 메일의 UID를 관련도 순으로 반환합니다.
+
+        Args:
+            folder: 검색할 폴더
+            terms: {INDEX_COLUMNS의 키: 검색어}
+            since/before: 받은 날짜 범위 (YYYY-MM-DD)
+            larger/smaller: 메일 크기 범위 (bytes)
+            limit: 최대 결과 개수
+        """
+        expressions = []
+        for key, value in terms.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            matches = [m for m in (_match_term(str(v)) for v in values) if m]
+            if not matches:
+                continue
+            expr = ' OR '.join(f"({m})" for m in matches)
+            column = INDEX_COLUMNS[key]
+            expressions.append(f"{column} : ({expr})" if column else f"({expr})")
+
+        where = ["docs.folder = ?"]
+        params: list = [folder]
+        for clause, value in (("docs.date >= ?", since), ("docs.date < ?", before),
+                              ("docs.size > ?", larger), ("docs.size < ?", smaller)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+
+        if expressions:
+            sql = ("SELECT docs.uid FROM docs_fts JOIN docs ON docs.id = docs_fts.rowid "
+                   f"WHERE docs_fts MATCH ? AND {' AND '.join(where)} ORDER BY bm25(docs_fts), docs.uid DESC")
+            params.insert(0, ' AND '.join(expressions))
+        else:
+            sql = f"SELECT docs.uid FROM docs WHERE {' AND '.join(where)} ORDER BY docs.uid DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [str(row[0]) for row in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total, with_body = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(has_body), 0) FROM docs").fetchone()
+        return {'path': self.path, 'messages': total, 'with_body': with_body}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,140 @@
+import datetime
+from typing import Any, Dict, List, Optional, Union
+from imap_tools import AND, OR
+
+# MCP tool 인자 이름 -> imap_tools 검색 키
+_TEXT_KEYS = {
+    'from': 'from_',
+    'to': 'to',
+    'cc': 'cc',
+    'subject': 'subject',
+    'body': 'body',
+    'text': 'text',
+}
+_FLAG_KEYS = ('seen', 'flagged', 'answered')
+# 플래그 검색 키 -> IMAP 시스템 플래그
+FLAG_NAMES = {
+    'seen': '\\Seen',
+    'flagged': '\\Flagged',
+    'answered': '\\Answered',
+}
+
+# MCP tool inputSchema에서 재사용하는 검색 조건 속성
+SEARCH_CRITERIA_SCHEMA: Dict[str, Any] = {
+    "from": {
+        "type": ["string", "array"],
+        "items": {"type": "string"},
+        "description": "발신자 (여러 개면 그 중 하나라도 일치)"
+    },
+    "to": {
+        "type": "string",
+        "description": "수신자"
+    },
+    "cc": {
+        "type": "string",
+        "description": "참조"
+    },
+    "subject": {
+        "type": ["string", "array"],
+        "items": {"type": "string"},
+        "description": "제목에 포함된 문자열 (여러 개면 그 중 하나라도 일치)"
+    },
+    "body": {
+        "type": "string",
+        "description": "본문에 포함된 문자열"
+    },
+    "text": {
+        "type": "string",
+        "description": "헤더 또는 본문에 포함된 문자열"
+    },
+    "since": {
+        "type": "string",
+        "description": "이 날짜 이후(포함) 받은 메일 (YYYY-MM-DD)"
+    },
+    "before": {
+        "type": "string",
+        "description": "이 날짜 이전(미포함) 받은 메일 (YYYY-MM-DD)"
+    },
+    "older_than_days": {
+        "type": "number",
+        "description": "N일보다 오래된 메일"
+    },
+    "seen": {
+        "type": "boolean",
+        "description": "true: 읽은 메일, false: 읽지 않은 메일"
+    },
+    "flagged": {
+        "type": "boolean",
+        "description": "true: 중요 메일, false: 중요하지 않은 메일"
+    },
+    "answered": {
+        "type": "boolean",
+        "description": "true: 답장한 메일, false: 답장하지 않은 메일"
+    },
+    "larger": {
+        "type": "number",
+        "description": "이 크기(bytes)보다 큰 메일"
+    },
+    "smaller": {
+        "type": "number",
+        "description": "이 크기(bytes)보다 작은 메일"
+    },
+    "attachment": {
+        "type": "string",
+        "description": "첨부파일 이름 (local 검색에서만 사용)"
+    },
+}
+
+
+def parse_date(key: str, value: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}'는 YYYY-MM-DD 형식이어야 합니다: {value}")
+
+
+def build_search_criteria(args: Dict[str, Any]) -> Optional[Union[AND, OR]]:
+    """
+    MCP tool 인자를 IMAP SEARCH 조건(imap_tools AND/OR)으로 변환합니다.
+    조건이 하나도 없으면 None을 반환합니다.
+    """
+    conditions: List[Union[AND, OR]] = []
+    params: Dict[str, Any] = {}
+
+    for arg_key, imap_key in _TEXT_KEYS.items():
+        value = args.get(arg_key)
+        if value in (None, '', []):
+            continue
+        if isinstance(value, list):
+            # 여러 값은 OR로 묶음 (예: 발신자 중 하나라도 일치)
+            conditions.append(OR(**{imap_key: [str(v) for v in value]}))
+        else:
+            params[imap_key] = str(value)
+
+    if args.get('since'):
+        params['date_gte'] = parse_date('since', args['since'])
+    if args.get('before'):
+        params['date_lt'] = parse_date('before', args['before'])
+    if args.get('older_than_days') is not None:
+        days = int(args['older_than_days'])
+        params['date_lt'] = datetime.date.today() - datetime.timedelta(days=days)
+
+    for key in _FLAG_KEYS:
+        if args.get(key) is not None:
+            params[key] = bool(args[key])
+
+    if args.get('larger') is not None:
+        params['size_gt'] = int(args['larger'])
+    if args.get('smaller') is not None:
+        params['size_lt'] = int(args['smaller'])
+
+    if params:
+        conditions.insert(0, AND(**params))
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else AND(*conditions)
+
+
+def search_charset(criteria: Optional[Union[AND, OR]]) -> str:
+    """비ASCII 검색어가 있으면 UTF-8, 아니면 US-ASCII를 사용합니다."""
+    return 'US-ASCII' if str(criteria or '').isascii() else 'UTF-8'
@@ -0,0 +1,41 @@
+"""
+오프라인 테스트 공용 fixture: bench/fake_imap.py의 가짜 IMAP 서버에 연결된 MailService
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from bench.fake_imap import FakeIMAPServer, FakeMailStore
+from service.accounts import AccountConfig, AccountRegistry
+from service.mail_service import MailService
+from service.mailbox_pool import MailBoxPool
+
+
+@pytest.fixture
+def imap_server():
+    """빈 INBOX를 가진 가짜 IMAP 서버. 테스트에서 server.store에 메일을 채워 사용"""
+    server = FakeIMAPServer(FakeMailStore()).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def mail_service(imap_server):
+    pool = MailBoxPool("me", "password", host="127.0.0.1", port=imap_server.port, ssl=False, max_size=2)
+    service = MailService("me", "password", pool=pool)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def accounts(imap_server, monkeypatch):
+    """가짜 IMAP 서버에 연결하는 기본 계정 하나를 server.ACCOUNTS로 설정한 레지스트리"""
+    import server
+    config = AccountConfig("default", "me", "password", host="127.0.0.1", port=imap_server.port, ssl=False,
+                           pool_size=2)
+    registry = AccountRegistry([config])
+    monkeypatch.setattr(server, "ACCOUNTS", registry)
+    yield registry
+    registry.close()
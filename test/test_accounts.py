@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+계정 설정(AccountConfig)과 레지스트리(AccountRegistry) 테스트:
+비밀번호 환경 변수, 계정별 캐시/색인 경로, 설정 파일, 등록되지 않은 계정, 지연 생성과 종료
+"""
+import asyncio
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+import server
+from service.accounts import AccountConfig, AccountRegistry, load_account_configs
+
+
+def test_password_from_env(monkeypatch):
+    monkeypatch.setenv("WORK_PW", "secret")
+    config = AccountConfig.from_dict({"name": "work", "naver_id": "me", "naver_password_env": "WORK_PW"})
+    assert config.naver_password == "secret"
+    # 비밀번호는 repr에 드러나지 않음
+    assert "secret" not in repr(config)
+
+    # 항목에 직접 적은 비밀번호보다 환경 변수가 우선
+    config = AccountConfig.from_dict({"naver_id": "me", "naver_password": "pw", "naver_password_env": "WORK_PW"})
+    assert config.naver_password == "secret"
+    assert config.name == "me"
+
+
+def test_missing_password_env_is_rejected(monkeypatch):
+    monkeypatch.delenv("MISSING_PW", raising=False)
+    with pytest.raises(ValueError):
+        AccountConfig.from_dict({"name": "work", "naver_id": "me", "naver_password_env": "MISSING_PW"})
+    monkeypatch.setenv("MISSING_PW", "")
+    with pytest.raises(ValueError):
+        AccountConfig.from_dict({"name": "work", "naver_id": "me", "naver_password_env": "MISSING_PW"})
+    with pytest.raises(ValueError):
+        AccountConfig.from_dict({"naver_password": "pw"})
+
+
+def test_default_paths_are_namespaced_per_account():
+    defaults = {"cache_path": "/tmp/mail.db", "index_path": "/tmp/index.sqlite", "pool_size": 8,
+                "max_concurrency": None}
+    work = AccountConfig.from_dict({"name": "work", "naver_id": "me", "naver_password": "pw"}, defaults)
+    home = AccountConfig.from_dict({"name": "home", "naver_id": "me2", "naver_password": "pw"}, defaults)
+    assert (work.cache_path, work.index_path) == ("/tmp/mail.work.db", "/tmp/index.work.sqlite")
+    assert (home.cache_path, home.index_path) == ("/tmp/mail.home.db", "/tmp/index.home.sqlite")
+    assert work.pool_size == 8 and work.max_concurrency is None
+
+    # 계정 항목에 직접 적은 경로와 메모리 캐시는 그대로 사용
+    config = AccountConfig.from_dict(
+        {"name": "work", "naver_id": "me", "naver_password": "pw", "cache_path": "/data/work.db"},
+        {"cache_path": "/tmp/mail.db", "index_path": ":memory:"})
+    assert (config.cache_path, config.index_path) == ("/data/work.db", ":memory:")
+
+    # 알 수 없는 키는 무시
+    config = AccountConfig.from_dict({"naver_id": "me", "naver_password": "pw", "unknown": 1}, {"transport": "http"})
+    assert not hasattr(config, "unknown")
+
+
+def test_load_account_configs(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME_PW", "pw2")
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps({"default": "home", "accounts": [
+        {"name": "work", "naver_id": "me", "naver_password": "pw"},
+        {"name": "home", "naver_id": "me2", "naver_password_env": "HOME_PW", "pool_size": 1},
+    ]}))
+    configs, default = load_account_configs(str(path))
+    assert [config.name for config in configs] == ["work", "home"]
+    assert default == "home" and configs[1].naver_password == "pw2" and configs[1].pool_size == 1
+
+    # 배열만 담은 파일은 첫 계정이 기본 계정
+    path.write_text(json.dumps([{"name": "work", "naver_id": "me", "naver_password": "pw"}]))
+    assert load_account_configs(str(path))[1] == "work"
+
+    path.write_text(json.dumps({"accounts": []}))
+    with pytest.raises(ValueError):
+        load_account_configs(str(path))
+
+
+def test_registry_rejects_invalid_configs():
+    config = AccountConfig("work", "me", "pw")
+    with pytest.raises(ValueError):
+        AccountRegistry([])
+    with pytest.raises(ValueError):
+        AccountRegistry([config, AccountConfig("work", "me2", "pw")])
+    with pytest.raises(ValueError):
+        AccountRegistry([config], default="home")
+
+
+def test_registry_creates_accounts_lazily_and_closes_them(imap_server):
+    imap_server.store.seed(count=2, body_size=10)
+    configs = [AccountConfig(name, "me", "password", host="127.0.0.1", port=imap_server.port, ssl=False, pool_size=1)
+               for name in ("work", "home")]
+    registry = AccountRegistry(configs)
+    assert registry.default == "work" and registry.names() == ["work", "home"]
+    # 동기화/감시를 설정하지 않은 계정은 start에서도 만들지 않음
+    registry.start()
+    assert registry.active() == []
+
+    home = registry.get("home")
+    assert registry.get("home") is home
+    assert [account.name for account in registry.active()] == ["home"]
+    assert imap_server.command_counts["LOGIN"] == 0
+    assert [mail.uid for mail in home.service.get_mails(max_count=5)] == ["2", "1"]
+    assert imap_server.command_counts["LOGIN"] == 1
+
+    work = registry.get()
+    assert work.name == "work" and work is not home
+    with pytest.raises(ValueError, match="등록되지 않은 계정"):
+        registry.get("unknown")
+
+    registry.close()
+    assert registry.active() == []
+    assert home.service.pool.stats()["idle"] == 0
+    assert imap_server.command_counts["LOGOUT"] == 1
+    # 닫은 뒤 다시 요청하면 새로 만듦
+    assert registry.get("home") is not home
+    registry.close()
+
+
+def test_unknown_account_in_tool_call_is_an_error(imap_server, accounts):
+    async def call():
+        async with create_connected_server_and_client_session(server.server) as client:
+            return await client.call_tool("list_mails", {"account": "unknown"})
+
+    result = asyncio.run(call())
+    assert result.isError
+    assert "등록되지 않은 계정" in result.content[0].text
+    assert accounts.active() == []
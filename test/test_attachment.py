@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+첨부파일 조각 디코딩(StreamDecoder)과 저장 도우미 테스트 (네트워크 불필요)
+"""
+import asyncio
+import base64
+import email
+import io
+import os
+import quopri
+import random
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+import server
+from service.attachment import StreamDecoder, read_base64, resolve_save_dir, safe_filename, save_spool
+
+
+def _decode_in_pieces(encoding: str, encoded: bytes, sizes) -> bytes:
+    out = io.BytesIO()
+    decoder = StreamDecoder(encoding, out)
+    pos = 0
+    for size in sizes:
+        decoder.feed(encoded[pos:pos + size])
+        pos += size
+    decoder.feed(encoded[pos:])
+    decoder.close()
+    assert decoder.written == len(out.getvalue())
+    return out.getvalue()
+
+
+PAYLOAD = random.Random(1).randbytes(10_000)
+
+
+@pytest.mark.parametrize("sizes", [[], [1], [3, 5, 7], [76, 77, 1], [4] * 100, [1] * 300])
+def test_base64_split_anywhere(sizes):
+    # 76글자마다 줄바꿈이 들어간 MIME base64를 임의의 위치에서 잘라 넣어도 원본과 같음
+    encoded = base64.encodebytes(PAYLOAD).replace(b"\n", b"\r\n")
+    assert _decode_in_pieces("base64", encoded, sizes) == PAYLOAD
+
+
+def test_base64_without_padding():
+    encoded = base64.b64encode(b"abcde").rstrip(b"=")
+    assert _decode_in_pieces("BASE64", encoded, [3]) == b"abcde"
+
+
+def test_invalid_base64_raises_value_error():
+    decoder = StreamDecoder("base64", io.BytesIO())
+    with pytest.raises(ValueError, match="base64"):
+        decoder.feed(b"ab!d")
+
+
+@pytest.mark.parametrize("sizes", [[], [1], [2, 2, 2], [10, 1, 1, 1], [1] * 200])
+def test_quoted_printable_split_inside_escape(sizes):
+    text = ("한글 본문입니다 = 등호와 긴 줄 " * 20).encode()
+    encoded = quopri.encodestring(text)
+    assert b"=\n" in encoded and b"=ED" in encoded
+    assert _decode_in_pieces("quoted-printable", encoded, sizes) == text
+
+
+@pytest.mark.parametrize("encoding", ["7bit", "8bit", "binary", None])
+def test_identity_encodings(encoding):
+    assert _decode_in_pieces(encoding, b"raw \r\n bytes", [4]) == b"raw \r\n bytes"
+
+
+def test_read_base64_matches_one_shot_encoding():
+    file = io.BytesIO(PAYLOAD)
+    file.read()
+    assert read_base64(file, chunk_size=3 * 7) == base64.b64encode(PAYLOAD).decode("ascii")
+
+
+def test_safe_filename():
+    assert safe_filename("../../etc/passwd", "x") == "passwd"
+    assert safe_filename('보고서:최종?.pdf', "x") == "보고서_최종_.pdf"
+    assert safe_filename(" .. ", "attachment-2") == "attachment-2"
+    assert safe_filename(None, "attachment-2") == "attachment-2"
+
+
+def test_save_spool_does_not_overwrite(tmp_path):
+    first = save_spool(io.BytesIO(b"one"), str(tmp_path / "out"), "a.txt")
+    second = save_spool(io.BytesIO(b"two"), str(tmp_path / "out"), "a.txt")
+    assert os.path.basename(first) == "a.txt"
+    assert os.path.basename(second) == "a (1).txt"
+    with open(second, "rb") as f:
+        assert f.read() == b"two"
+
+
+def test_fetch_attachment_in_chunks(imap_server, mail_service):
+    imap_server.store.seed(count=1, body_size=100, attachment_size=5000)
+    raw = imap_server.store.folders["INBOX"].messages[0].raw
+    expected = [part for part in email.message_from_bytes(raw).walk() if part.get_filename()][0]
+
+    part, spool = mail_service.fetch_attachment("1", "2", chunk_size=1000)
+    try:
+        assert part.filename == "첨부0.bin"
+        assert spool.read() == expected.get_payload(decode=True)
+    finally:
+        spool.close()
+    # 인코딩된 크기(약 6.7KB)를 1000바이트씩 나눠 받음
+    assert imap_server.command_counts["UID FETCH"] == 1 + 7
+
+    assert mail_service.fetch_attachment("1", "9") is None
+    with pytest.raises(ValueError):
+        mail_service.fetch_attachment("1", "2", max_size=100)
+
+
+def test_resolve_save_dir_stays_inside_download_dir(tmp_path):
+    root = tmp_path / "downloads"
+    root.mkdir()
+    (tmp_path / "elsewhere").mkdir()
+    os.symlink(tmp_path / "elsewhere", root / "link")
+
+    assert resolve_save_dir(str(root), ".") == os.path.realpath(root)
+    assert resolve_save_dir(str(root), "2024/메일") == os.path.join(os.path.realpath(root), "2024", "메일")
+    for save_dir in ("..", "../elsewhere", "a/../../elsewhere", str(tmp_path / "elsewhere"), "link"):
+        with pytest.raises(ValueError):
+            resolve_save_dir(str(root), save_dir)
+
+
+def test_get_attachment_saves_only_into_download_dir(imap_server, accounts, tmp_path):
+    imap_server.store.seed(count=1, body_size=100, attachment_size=500)
+    args = {"uid": "1", "section": "2"}
+
+    # 다운로드 디렉터리가 설정되지 않으면 어떤 경로에도 저장하지 않음
+    with pytest.raises(server.ToolCallError):
+        asyncio.run(server.call_tool("get_attachment", {**args, "save_dir": str(tmp_path)}))
+
+    accounts.get().config.download_dir = str(tmp_path / "downloads")
+    with pytest.raises(server.ToolCallError):
+        asyncio.run(server.call_tool("get_attachment", {**args, "save_dir": "../escaped"}))
+    assert not (tmp_path / "escaped").exists()
+
+    result = asyncio.run(server.call_tool("get_attachment", {**args, "save_dir": "."}))
+    assert os.listdir(tmp_path / "downloads") == ["첨부0.bin"]
+    assert "첨부파일을 저장했습니다" in result[0].text
+
+    # save_dir 없이 부르면 파일을 쓰지 않고 리소스로 반환
+    result = asyncio.run(server.call_tool("get_attachment", args))
+    assert str(result[1].resource.uri) == "navermail://INBOX/1/attachments/2"
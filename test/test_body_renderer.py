@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+본문 정리(body_renderer) 테스트: 인용/서명 제거, 글자/토큰 예산, 부분 FETCH 디코딩 (네트워크 불필요)
+"""
+import base64
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from service.body_renderer import (
+    decode_part,
+    estimate_tokens,
+    fetch_limit,
+    html_to_text,
+    render_body,
+    strip_quoted,
+    truncate_to_budget,
+)
+from service.bodystructure import BodyPart
+
+
+def test_strip_quoted_reply_markers():
+    assert strip_quoted("네 확인했습니다.\n\n> 확인 부탁드립니다.\n> 감사합니다.") == "네 확인했습니다."
+    assert strip_quoted("좋아요\n\nOn Mon, Jan 15, 2024 at 10:00 Kim <kim@example.com> wrote:\nold") == "좋아요"
+    assert strip_quoted("답장\n-----Original Message-----\nFrom: a") == "답장"
+    assert strip_quoted("답장\n-----원본 메시지-----\n보낸 사람: a") == "답장"
+    assert strip_quoted("답장\n2024. 1. 15. 오전 10:00, 김철수 작성:\n이전") == "답장"
+
+
+def test_strip_quoted_outlook_header_needs_following_line():
+    text = "본문\n\nFrom: Kim\nSent: Monday\nSubject: Re: 회의\n이전 메일"
+    assert strip_quoted(text) == "본문"
+    # "From:" 다음에 Sent/Date 줄이 없으면 본문의 일부로 봄
+    assert strip_quoted("From: 서울 지사\n도착했습니다") == "From: 서울 지사\n도착했습니다"
+
+
+def test_strip_quoted_signatures():
+    assert strip_quoted("내용\n-- \n홍길동 드림") == "내용"
+    assert strip_quoted("내용\n\nSent from my iPhone") == "내용"
+    assert strip_quoted("내용\n\niPhone에서 보냄") == "내용"
+
+
+def test_strip_quoted_keeps_text_when_everything_is_quoted():
+    assert strip_quoted("> 인용만 있음\n") == "> 인용만 있음"
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("안녕하세요") == 5
+    assert estimate_tokens("안녕 hi") == 3
+
+
+def test_truncate_within_budget_is_untouched():
+    assert truncate_to_budget("짧은 본문", max_chars=100, max_tokens=100) == ("짧은 본문", False)
+    assert truncate_to_budget("abc", max_chars=3) == ("abc", False)
+    assert truncate_to_budget("abc") == ("abc", False)
+
+
+def test_truncate_by_chars_on_word_boundary():
+    text = "alpha beta gamma delta"
+    value, truncated = truncate_to_budget(text, max_chars=12)
+    assert truncated
+    assert value == "alpha beta\n...(이하 12자 생략)"
+    # 경계가 예산의 80%보다 앞이면 글자 수대로 자름
+    value, _ = truncate_to_budget("a " + "x" * 20, max_chars=10)
+    assert value.startswith("a " + "x" * 8 + "\n")
+
+
+def test_truncate_by_tokens_counts_hangul_as_one_token():
+    value, truncated = truncate_to_budget("가" * 30, max_tokens=10)
+    assert truncated
+    assert value == "가" * 10 + "\n...(이하 20자 생략)"
+    # 영문은 4글자가 1토큰
+    value, _ = truncate_to_budget("x" * 100, max_tokens=10)
+    assert value.startswith("x" * 40 + "\n")
+    # 두 예산 중 작은 쪽을 따름
+    value, _ = truncate_to_budget("x" * 100, max_chars=20, max_tokens=10)
+    assert value.startswith("x" * 20 + "\n")
+
+
+def test_truncate_partial_does_not_count_omitted_chars():
+    assert truncate_to_budget("x" * 50, max_chars=10, partial=True) == ("x" * 10 + "\n...(이하 생략)", True)
+
+
+def test_html_to_text_keeps_paragraphs():
+    value = ("<html><head><title>t</title><style>p {}</style></head><body><p>첫&nbsp;문단</p>"
+             "<div>둘째<br>줄</div><ul><li>하나</li><li>둘</li></ul>"
+             "<blockquote>이전 메일</blockquote><!-- 주석 --></body></html>")
+    assert html_to_text(value) == "첫 문단\n둘째\n줄\n\n- 하나\n- 둘"
+    assert "이전 메일" in html_to_text(value, strip_quotes=False)
+
+
+def test_render_body_prefers_plain_text():
+    body = render_body("본문\n> 인용", "<p>HTML</p>", max_chars=100)
+    assert (body.text, body.content_type, body.truncated) == ("본문", "text/plain", False)
+    body = render_body("  ", "<p>HTML 본문</p>")
+    assert (body.text, body.content_type) == ("HTML 본문", "text/html")
+    assert render_body(None, None).to_dict() == {"body": "", "body_type": None, "body_truncated": False}
+
+
+def test_render_body_partial_is_marked_truncated():
+    body = render_body("앞부분", partial=True)
+    assert body.truncated
+    assert body.text == "앞부분\n...(이하 생략)"
+
+
+def test_fetch_limit():
+    plain = BodyPart(section="1", content_type="text/plain", size=1_000_000)
+    html_part = BodyPart(section="2", content_type="text/html", size=1_000_000)
+    assert fetch_limit(plain) is None
+    assert fetch_limit(plain, max_chars=100) == 100 * 4 + 2048
+    assert fetch_limit(plain, max_chars=1000, max_tokens=100) == 400 * 4 + 2048
+    assert fetch_limit(html_part, max_chars=100) == (100 * 4 + 2048) * 4
+    # 파트 전체가 더 작으면 전부 받음
+    assert fetch_limit(BodyPart(section="1", content_type="text/plain", size=500), max_chars=100) is None
+
+
+def test_decode_partial_base64_and_quoted_printable():
+    part = BodyPart(section="1", content_type="text/plain", params={"charset": "utf-8"}, encoding="base64")
+    encoded = base64.encodebytes("안녕하세요 반갑습니다".encode())
+    assert decode_part(encoded, part) == "안녕하세요 반갑습니다"
+    # 중간에서 잘린 base64는 4의 배수 길이까지만 디코딩
+    assert decode_part(encoded[:10], part, partial=True) == "안녕"
+
+    qp = BodyPart(section="1", content_type="text/plain", params={"charset": "utf-8"}, encoding="quoted-printable")
+    assert decode_part(b"caf=C3=A9 =E", qp, partial=True) == "café "
+    assert decode_part(b"caf=C3=A9=\r\n!", qp) == "café!"
+
+
+def test_decode_part_charset():
+    part = BodyPart(section="1", content_type="text/plain", params={"charset": "euc-kr"}, encoding="8bit")
+    assert decode_part("한글".encode("euc-kr"), part) == "한글"
+
+
+def test_iter_mail_bodies_fetches_only_the_budget(imap_server, mail_service):
+    imap_server.store.seed(count=3, body_size=20_000)
+    bodies = {mail.uid: body for mail, body in mail_service.iter_mail_bodies(["1", "2", "3"], max_chars=100)}
+    assert sorted(bodies) == ["1", "2", "3"]
+    for body in bodies.values():
+        assert body.content_type == "text/plain"
+        assert body.truncated
+        assert len(body.text) < 150
+    # 본문 파트의 앞부분만 받으므로 원본 크기(메일당 20KB 이상)보다 훨씬 적게 전송됨
+    assert imap_server.bytes_sent < 3 * 20_000
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+BODYSTRUCTURE 파서 테스트 (네트워크 불필요)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from service.bodystructure import get_attachment_parts, iter_body_parts, parse_bodystructure
+
+
+MIXED = (
+    b'1 (UID 7 BODYSTRUCTURE ((("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "BASE64" 120 2 NIL NIL NIL NIL)'
+    b'("TEXT" "HTML" ("CHARSET" "UTF-8") NIL NIL "QUOTED-PRINTABLE" 300 5 NIL NIL NIL NIL) "ALTERNATIVE" '
+    b'("BOUNDARY" "b2") NIL NIL NIL)'
+    b'("APPLICATION" "PDF" ("NAME" "=?UTF-8?B?67O06rOg7IScLnBkZg==?=") NIL NIL "BASE64" 4096 NIL '
+    b'("ATTACHMENT" ("FILENAME*" "utf-8\'\'%EB%B3%B4%EA%B3%A0%EC%84%9C.pdf")) NIL NIL)'
+    b'("IMAGE" "PNG" NIL "<logo@example>" NIL "BASE64" 800 NIL ("INLINE" NIL) NIL NIL) "MIXED" '
+    b'("BOUNDARY" "b1") NIL NIL NIL))'
+)
+
+
+def test_parse_returns_none_without_bodystructure():
+    assert parse_bodystructure(b'1 (UID 7 FLAGS (\\Seen))') is None
+
+
+def test_parse_atoms_strings_and_nil():
+    structure = parse_bodystructure(b'1 (BODYSTRUCTURE ("TEXT" "PLAIN" ("CHARSET" "US-ASCII") NIL NIL "7BIT" 42 3))')
+    assert structure == ["TEXT", "PLAIN", ["CHARSET", "US-ASCII"], None, None, "7BIT", 42, 3]
+
+
+def test_parse_literal_and_escaped_quote():
+    raw = (b'1 (BODYSTRUCTURE ("APPLICATION" "OCTET-STREAM" ("NAME" {9}\r\na "b" c.d) NIL '
+           b'"say \\"hi\\"" "BASE64" 10 NIL NIL NIL NIL))')
+    structure = parse_bodystructure(raw)
+    assert structure[2] == ["NAME", 'a "b" c.d']
+    assert structure[4] == 'say "hi"'
+    assert structure[6] == 10
+
+
+def test_single_part_message_is_section_1():
+    structure = parse_bodystructure(b'1 (BODYSTRUCTURE ("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "8BIT" 5 1 NIL NIL NIL NIL))')
+    parts = list(iter_body_parts(structure))
+    assert [part.section for part in parts] == ["1"]
+    assert parts[0].content_type == "text/plain"
+    assert parts[0].charset == "UTF-8"
+    assert parts[0].encoding == "8bit"
+    assert not parts[0].is_attachment
+
+
+def test_nested_multipart_sections():
+    parts = list(iter_body_parts(parse_bodystructure(MIXED)))
+    assert [(part.section, part.content_type) for part in parts] == [
+        ("1.1", "text/plain"),
+        ("1.2", "text/html"),
+        ("2", "application/pdf"),
+        ("3", "image/png"),
+    ]
+    assert parts[1].size == 300
+    assert parts[1].encoding == "quoted-printable"
+
+
+def test_attachment_filename_decoding():
+    attachments = get_attachment_parts(parse_bodystructure(MIXED))
+    assert [part.section for part in attachments] == ["2", "3"]
+    pdf, logo = attachments
+    # Content-Disposition의 RFC 2231 filename*이 Content-Type의 name보다 우선
+    assert pdf.filename == "보고서.pdf"
+    assert pdf.disposition == "attachment"
+    assert pdf.to_dict()["size"] == 4096
+    # 파일명이 없어도 Content-ID가 있으면 첨부파일(인라인 이미지)로 취급
+    assert logo.filename is None
+    assert logo.content_id == "<logo@example>"
+    assert logo.disposition == "inline"
+    assert logo.is_attachment
+
+
+def test_rfc2047_name_param():
+    structure = parse_bodystructure(
+        b'1 (BODYSTRUCTURE ("APPLICATION" "PDF" ("NAME" "=?UTF-8?B?67O06rOg7IScLnBkZg==?=") NIL NIL "BASE64" 10 NIL NIL NIL NIL))')
+    (part,) = iter_body_parts(structure)
+    assert part.filename == "보고서.pdf"
+
+
+def test_message_rfc822_extension_fields():
+    # message/rfc822는 envelope, body, lines 뒤에 확장 필드가 옴
+    raw = (b'1 (BODYSTRUCTURE (("TEXT" "PLAIN" NIL NIL NIL "7BIT" 3 1 NIL NIL NIL NIL)'
+           b'("MESSAGE" "RFC822" NIL NIL NIL "7BIT" 500 (NIL "fwd" NIL NIL NIL NIL NIL NIL NIL NIL) '
+           b'("TEXT" "PLAIN" NIL NIL NIL "7BIT" 10 1 NIL NIL NIL NIL) 12 NIL ("ATTACHMENT" ("FILENAME" "fwd.eml")) NIL NIL) '
+           b'"MIXED" ("BOUNDARY" "x") NIL NIL NIL))')
+    parts = list(iter_body_parts(parse_bodystructure(raw)))
+    assert [part.section for part in parts] == ["1", "2"]
+    forwarded = parts[1]
+    assert forwarded.content_type == "message/rfc822"
+    assert forwarded.filename == "fwd.eml"
+    assert forwarded.disposition == "attachment"
+    assert [part.section for part in get_attachment_parts(parse_bodystructure(raw))] == ["2"]
+
+
+def test_empty_structure():
+    assert list(iter_body_parts(None)) == []
+    assert get_attachment_parts([]) == []
+
+
+def test_listing_fetches_headers_and_bodystructure_only(imap_server, mail_service):
+    imap_server.store.seed(count=3, body_size=20_000, attachment_size=50, attachment_every=2)
+    for message in imap_server.store.folders["INBOX"].messages:
+        message.flags = []
+    mails = mail_service.get_mails(max_count=3)
+    assert [mail.uid for mail in mails] == ["3", "2", "1"]
+    # 가짜 서버가 실제 메일로 만든 BODYSTRUCTURE에서 첨부파일 개수를 계산
+    assert [mail.attachment_count for mail in mails] == [1, 0, 1]
+    assert mails[0].attachment_parts[0].filename == "첨부2.bin"
+    # 본문 없이 한 번의 UID FETCH로 가져오고, 목록 조회는 \Seen을 붙이지 않음
+    assert imap_server.command_counts["UID FETCH"] == 1
+    assert imap_server.bytes_sent < 20_000
+    assert all(not message.flags for message in imap_server.store.folders["INBOX"].messages)
+
+
+def test_list_attachments_from_fake_server(imap_server, mail_service):
+    # 가짜 서버가 실제 메일로 만든 BODYSTRUCTURE를 파싱해 첨부파일 파트를 찾는지 확인
+    imap_server.store.seed(count=3, body_size=100, attachment_size=50, attachment_every=2)
+    attachments = mail_service.list_attachments(["1", "2", "3"])
+    assert {uid: [part.section for part in parts] for uid, parts in attachments.items()} == {
+        "1": ["2"], "2": [], "3": ["2"],
+    }
+    part = attachments["1"][0]
+    assert part.filename == "첨부0.bin"
+    assert part.content_type == "application/octet-stream"
+    assert part.encoding == "base64"
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+UID 집합 압축/분할(bulk) 테스트: max_length, max_count 경계 (네트워크 불필요)
+"""
+import os
+import random
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from service.bulk import (
+    MAX_CHUNK_UIDS,
+    BulkResult,
+    ChunkResult,
+    chunk_uids,
+    compress_uids,
+    normalize_uids,
+)
+
+
+def _expand(uid_set: str) -> list:
+    uids = []
+    for item in uid_set.split(','):
+        start, _, end = item.partition(':')
+        uids.extend(range(int(start), int(end or start) + 1))
+    return uids
+
+
+def test_compress_uids():
+    assert compress_uids([]) == ""
+    assert compress_uids(["5"]) == "5"
+    assert compress_uids([3, "1", 2, 2, " 7 ", 9, 8, 20]) == "1:3,7:9,20"
+
+
+@pytest.mark.parametrize("uid", ["abc", "0", "-1", "1:5", ""])
+def test_invalid_uids(uid):
+    with pytest.raises(ValueError):
+        normalize_uids(["1", uid])
+
+
+def test_chunk_length_exactly_at_limit():
+    # "1,3,5"는 정확히 5글자이므로 한 묶음, "7"부터 다음 묶음
+    chunks = chunk_uids([1, 3, 5, 7], max_length=5)
+    assert [chunk.uid_set for chunk in chunks] == ["1,3,5", "7"]
+    assert chunks[0].uids == ["1", "3", "5"]
+
+
+def test_chunk_length_one_over_limit():
+    chunks = chunk_uids([1, 3, 5, 7], max_length=4)
+    assert [chunk.uid_set for chunk in chunks] == ["1,3", "5,7"]
+
+
+def test_chunk_count_exactly_at_limit():
+    chunks = chunk_uids(range(1, 501))
+    assert [(chunk.uid_set, len(chunk.uids)) for chunk in chunks] == [("1:500", 500)]
+    chunks = chunk_uids(range(1, 502))
+    assert [chunk.uid_set for chunk in chunks] == ["1:500", "501"]
+    assert len(chunks[0].uids) == MAX_CHUNK_UIDS
+
+
+def test_run_is_split_across_count_boundary():
+    # 앞 묶음에 3개가 있으면 긴 구간은 남은 2개만 채우고 나머지를 다음 묶음으로 넘김
+    chunks = chunk_uids([1, 3, 5, 10, 11, 12, 13, 14, 15], max_count=5)
+    assert [chunk.uid_set for chunk in chunks] == ["1,3,5,10:11", "12:15"]
+    assert [len(chunk.uids) for chunk in chunks] == [5, 4]
+
+
+def test_single_run_longer_than_max_length_is_kept():
+    # 구간 하나는 더 나눌 수 없으므로 max_length보다 길어도 그대로 한 묶음
+    chunks = chunk_uids(range(1000, 1101), max_length=3)
+    assert [chunk.uid_set for chunk in chunks] == ["1000:1100"]
+
+
+def test_empty():
+    assert chunk_uids([]) == []
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_sets_respect_limits(seed):
+    rng = random.Random(seed)
+    uids = rng.sample(range(1, 5000), rng.randint(1, 2000))
+    max_length = rng.choice([10, 50, 200, 1000])
+    max_count = rng.choice([1, 7, 100, 500])
+    chunks = chunk_uids(uids, max_length=max_length, max_count=max_count)
+
+    seen = []
+    for chunk in chunks:
+        assert len(chunk.uid_set) <= max_length
+        assert 0 < len(chunk.uids) <= max_count
+        assert _expand(chunk.uid_set) == [int(uid) for uid in chunk.uids]
+        seen.extend(chunk.uids)
+    assert [int(uid) for uid in seen] == sorted(set(uids))
+    # 마지막 묶음을 빼면 모두 어느 한쪽 한도에 닿을 때만 나눔
+    for chunk, following in zip(chunks, chunks[1:]):
+        first_run = following.uid_set.split(',')[0]
+        assert (len(chunk.uids) == max_count
+                or len(chunk.uid_set) + 1 + len(first_run) > max_length
+                or int(chunk.uids[-1]) + 1 == int(following.uids[0]))
+
+
+def test_bulk_result_text():
+    result = BulkResult("flag", "INBOX", [ChunkResult("1:500", 500, True), ChunkResult("501:600", 100, False, "NO")])
+    assert result.total == 600
+    assert result.succeeded == 500
+    assert not result.ok
+    assert result.to_text("완료").splitlines() == [
+        "600개 중 500개만 처리되었습니다. (1/2개 묶음 실패)",
+        "- UID 1:500 (500개): 성공",
+        "- UID 501:600 (100개): 실패: NO",
+    ]
+    ok = BulkResult("flag", "INBOX", [ChunkResult("1:500", 500, True), ChunkResult("501", 1, True)])
+    assert ok.to_text("완료") == "완료 (2개 묶음으로 처리)"
+    dry = BulkResult("delete", "INBOX", matched=["1", "2"], dry_run=True)
+    assert dry.total == 2
+    assert dry.to_dict()["dry_run"] is True
+
+
+def test_flag_mails_in_chunks(imap_server, mail_service):
+    imap_server.store.seed(count=1200, body_size=10)
+    for message in imap_server.store.folders["INBOX"].messages:
+        message.flags = []
+
+    result = mail_service.mark_as_read([str(uid) for uid in range(1, 1201)])
+    assert result.ok
+    assert [chunk.uid_set for chunk in result.chunks] == ["1:500", "501:1000", "1001:1200"]
+    assert imap_server.command_counts["UID STORE"] == 3
+    assert all("\\Seen" in message.flags for message in imap_server.store.folders["INBOX"].messages)
+
+
+def _inbox_uids(imap_server):
+    return [message.uid for message in imap_server.store.folders["INBOX"].messages]
+
+
+def _clear_flags(imap_server):
+    for message in imap_server.store.folders["INBOX"].messages:
+        message.flags = []
+
+
+def test_by_query_dry_run_only_searches(imap_server, mail_service):
+    imap_server.store.seed(count=10, body_size=10)
+    _clear_flags(imap_server)
+    imap_server.store.seed("Archive", count=0)
+
+    results = [
+        mail_service.delete_by_query({"from": "example.com"}, dry_run=True),
+        mail_service.move_by_query({"from": "example.com"}, "Archive", dry_run=True),
+        mail_service.flag_by_query({"from": "example.com"}, "seen", True, dry_run=True),
+    ]
+    assert [(result.dry_run, result.total, result.chunks) for result in results] == [(True, 10, [])] * 3
+    assert imap_server.command_counts["UID SEARCH"] == 3
+    for command in ("UID STORE", "UID MOVE", "UID COPY", "UID EXPUNGE", "EXPUNGE"):
+        assert imap_server.command_counts[command] == 0
+    assert _inbox_uids(imap_server) == list(range(1, 11))
+    assert all(not message.flags for message in imap_server.store.folders["INBOX"].messages)
+
+
+@pytest.mark.parametrize("criteria", [{}, {"seen": None}, {"subject": []}])
+def test_by_query_rejects_empty_criteria(imap_server, mail_service, criteria):
+    imap_server.store.seed(count=3, body_size=10)
+    with pytest.raises(ValueError):
+        mail_service.delete_by_query(criteria)
+    with pytest.raises(ValueError):
+        mail_service.move_by_query(criteria, "Archive")
+    # flag_by_query가 붙이는 플래그 조건만으로는 폴더 전체에 적용되므로 역시 거부
+    with pytest.raises(ValueError):
+        mail_service.flag_by_query(criteria, "seen", True)
+    assert imap_server.command_counts["UID SEARCH"] == 0
+    assert _inbox_uids(imap_server) == [1, 2, 3]
+
+
+def test_flag_by_query_skips_messages_already_flagged(imap_server, mail_service):
+    imap_server.store.seed(count=6, body_size=10)
+    messages = imap_server.store.folders["INBOX"].messages
+    for message in messages:
+        message.flags = ["\\Seen"] if message.uid <= 3 else []
+
+    result = mail_service.flag_by_query({"from": "example.com"}, "seen", True)
+    assert result.matched == ["4", "5", "6"]
+    assert [chunk.uid_set for chunk in result.chunks] == ["4:6"]
+    assert imap_server.command_counts["UID STORE"] == 1
+    assert all("\\Seen" in message.flags for message in messages)
+
+    # 반대로 읽지 않음 표시는 읽은 메일만 대상으로 함
+    messages[0].flags = []
+    result = mail_service.flag_by_query({"from": "example.com"}, "seen", False)
+    assert result.matched == ["2", "3", "4", "5", "6"]
+
+    with pytest.raises(ValueError):
+        mail_service.flag_by_query({"from": "example.com"}, "deleted", True)
+
+
+def test_delete_and_move_by_query_in_chunks(imap_server, mail_service):
+    imap_server.store.seed(count=1200, body_size=10)
+    imap_server.store.seed("Archive", count=0)
+    _clear_flags(imap_server)
+
+    result = mail_service.move_by_query({"subject": "[1"}, "Archive")
+    moved = [uid for uid in range(1, 1201) if f"[{uid - 1}]".startswith("[1")]
+    assert result.ok and result.total == len(moved)
+    assert imap_server.command_counts["UID MOVE"] == len(result.chunks)
+    assert [message.uid for message in imap_server.store.folders["Archive"].messages] == list(range(1, len(moved) + 1))
+
+    result = mail_service.delete_by_query({"from": "example.com"})
+    remaining = 1200 - len(moved)
+    assert result.ok and result.total == remaining
+    assert [chunk.count for chunk in result.chunks] == [500, remaining - 500]
+    assert imap_server.command_counts["UID EXPUNGE"] == 2
+    assert _inbox_uids(imap_server) == []
+
+
+def test_expunging_by_query_requires_uidplus(imap_server, mail_service):
+    imap_server.capabilities = "IMAP4rev1 IDLE"
+    imap_server.store.seed(count=3, body_size=10)
+    imap_server.store.seed("Archive", count=0)
+    messages = imap_server.store.folders["INBOX"].messages
+    # 사용자가 다른 클라이언트에서 삭제 표시만 해 둔 메일
+    messages[0].flags = ["\\Deleted"]
+    messages[1].flags = []
+    messages[2].flags = []
+
+    with pytest.raises(ValueError, match="UIDPLUS"):
+        mail_service.delete_by_query({"from": "sender2@"})
+    with pytest.raises(ValueError, match="UIDPLUS"):
+        mail_service.move_by_query({"from": "sender2@"}, "Archive")
+    assert imap_server.command_counts["UID SEARCH"] == 0
+    assert _inbox_uids(imap_server) == [1, 2, 3]
+
+    # UID를 직접 준 삭제는 일반 EXPUNGE로 대신하므로 다른 \Deleted 메일도 함께 지워짐 (tool 설명에 명시)
+    assert mail_service.delete_mails(["2"]).ok
+    assert _inbox_uids(imap_server) == [3]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+출력 형태 인코더 테스트: 형태별 왕복 변환, msgpack의 base64 포장, fast extra가 없을 때의 표준 라이브러리 대체
+"""
+import base64
+import importlib
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+import service.encoder as encoder
+from service.encoder import dumps, encode
+
+SAMPLE = [
+    {"uid": "1", "subject": "회의 안내 \"긴급\"", "size": 1024, "seen": True, "flags": ["\\Seen"], "cc": None},
+    {"uid": "2", "subject": "emoji 📎 첨부", "size": 0, "seen": False, "flags": [], "score": 0.5},
+]
+
+
+@pytest.fixture
+def without_fast_extra(monkeypatch):
+    """orjson과 msgpack이 설치되지 않은 것처럼 encoder를 다시 불러옴"""
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    monkeypatch.setitem(sys.modules, "msgpack", None)
+    yield importlib.reload(encoder)
+    monkeypatch.undo()
+    importlib.reload(encoder)
+
+
+def test_json_round_trip():
+    text = encode(SAMPLE, "json")
+    assert json.loads(text) == SAMPLE
+    assert '": ' not in text and '", "' not in text
+    # 한글과 이모지는 이스케이프하지 않음
+    assert "회의 안내" in text and "📎" in text
+
+
+def test_jsonl_round_trip():
+    text = encode(SAMPLE, "jsonl")
+    assert text.endswith("\n")
+    assert [json.loads(line) for line in text.splitlines()] == SAMPLE
+    assert encode(SAMPLE[0], "jsonl") == dumps(SAMPLE[0]) + "\n"
+    assert encode([], "jsonl") == ""
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        encode(SAMPLE, "xml")
+    with pytest.raises(ValueError):
+        encode(SAMPLE, "text")
+
+
+def test_orjson_matches_stdlib():
+    orjson = pytest.importorskip("orjson")
+    assert encoder.orjson is orjson
+    text = encode(SAMPLE, "json")
+    assert orjson.loads(text) == SAMPLE
+    assert text == json.dumps(SAMPLE, ensure_ascii=False, separators=(',', ':'))
+
+
+def test_msgpack_round_trip_from_base64():
+    msgpack = pytest.importorskip("msgpack")
+    assert "msgpack" in encoder.FORMATS and "msgpack" in encoder.DATA_FORMATS
+    text = encode(SAMPLE, "msgpack")
+    # TextContent에 담을 수 있는 ASCII 문자열
+    assert text.isascii()
+    assert msgpack.unpackb(base64.b64decode(text, validate=True), raw=False) == SAMPLE
+    # 바이트는 bin 타입으로 유지
+    packed = encode({"raw": b"\x00\xff"}, "msgpack")
+    assert msgpack.unpackb(base64.b64decode(packed), raw=False) == {"raw": b"\x00\xff"}
+
+
+def test_stdlib_fallback_without_fast_extra(without_fast_extra):
+    fallback = without_fast_extra
+    assert fallback.orjson is None and fallback.msgpack is None
+    assert fallback.FORMATS == ("json", "jsonl", "text")
+    assert fallback.DATA_FORMATS == ("json", "jsonl")
+
+    text = fallback.encode(SAMPLE, "json")
+    assert json.loads(text) == SAMPLE
+    assert text == json.dumps(SAMPLE, ensure_ascii=False, separators=(',', ':'))
+    assert [json.loads(line) for line in fallback.encode(SAMPLE, "jsonl").splitlines()] == SAMPLE
+    with pytest.raises(ValueError, match="msgpack"):
+        fallback.encode(SAMPLE, "msgpack")
+
+
+def test_optional_modules_are_restored_after_fallback():
+    # without_fast_extra fixture가 끝나면 설치된 모듈을 다시 씀
+    assert encoder.orjson is sys.modules.get("orjson")
+    assert encoder.msgpack is sys.modules.get("msgpack")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+폴더 STATUS/LIST 응답 파싱과 폴더 캐시 테스트 (네트워크 불필요)
+"""
+import os
+import sys
+import types
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from imap_tools.imap_utf7 import utf7_encode
+
+import service.folders
+from service.folders import FolderCache, FolderStats, parse_list_response, parse_status_response
+
+
+def test_status_atom_and_quoted_names():
+    data = [
+        b'INBOX (MESSAGES 12 UNSEEN 3 UIDNEXT 40 UIDVALIDITY 7)',
+        b'"Sent Messages" (MESSAGES 5 UIDNEXT 6)',
+        b'"a \\"quoted\\" name" (MESSAGES 1)',
+    ]
+    assert parse_status_response(data) == {
+        "INBOX": {"MESSAGES": 12, "UNSEEN": 3, "UIDNEXT": 40, "UIDVALIDITY": 7},
+        "Sent Messages": {"MESSAGES": 5, "UIDNEXT": 6},
+        'a "quoted" name': {"MESSAGES": 1},
+    }
+
+
+def test_status_modified_utf7_name():
+    name = "받은 편지함/업무"
+    data = [b'"' + utf7_encode(name) + b'" (MESSAGES 2 UNSEEN 1 SIZE 2048)']
+    assert parse_status_response(data) == {name: {"MESSAGES": 2, "UNSEEN": 1, "SIZE": 2048}}
+
+
+def test_status_literal_name():
+    # 이름에 특수 문자가 있으면 리터럴로 오고 항목은 다음 bytes에 이어짐
+    data = [(b'{7}', b'a"b\\c d'), b' (MESSAGES 4 UNSEEN 0)', b'INBOX (MESSAGES 1)']
+    assert parse_status_response(data) == {
+        'a"b\\c d': {"MESSAGES": 4, "UNSEEN": 0},
+        "INBOX": {"MESSAGES": 1},
+    }
+
+
+def test_status_ignores_unparseable_items():
+    data = [None, b'garbage', b'INBOX (messages 3 highestmodseq 99)']
+    assert parse_status_response(data) == {"INBOX": {"MESSAGES": 3, "HIGHESTMODSEQ": 99}}
+    assert parse_status_response([]) == {}
+
+
+def test_list_response():
+    data = [
+        b'(\\HasNoChildren) "/" INBOX',
+        b'(\\HasChildren \\Noselect) "/" "' + utf7_encode("보관함") + b'"',
+        (b'(\\HasNoChildren) "/" {5}', b'a"b c'),
+        b'not a list line',
+    ]
+    folders = parse_list_response(data)
+    assert [(folder.name, folder.delim, folder.flags) for folder in folders] == [
+        ("INBOX", "/", ("\\HasNoChildren",)),
+        ("보관함", "/", ("\\HasChildren", "\\Noselect")),
+        ('a"b c', "/", ("\\HasNoChildren",)),
+    ]
+
+
+def test_folder_stats_dict():
+    stats = FolderStats.from_status("INBOX", {"MESSAGES": 3, "UNSEEN": 1, "UIDNEXT": 4, "UIDVALIDITY": 1})
+    assert stats.to_dict() == {"name": "INBOX", "messages": 3, "unseen": 1, "uidnext": 4, "uidvalidity": 1}
+    assert FolderStats.from_status("INBOX", {"SIZE": 10}).to_dict()["size"] == 10
+
+
+def test_folder_cache_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(service.folders, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    cache = FolderCache(ttl=10)
+    assert cache.get() is None
+    cache.set(["INBOX"])
+    now[0] += 10
+    assert cache.get() == ["INBOX"]
+    now[0] += 0.1
+    assert cache.get() is None
+    cache.set(["INBOX"])
+    cache.invalidate()
+    assert cache.get() is None
+
+
+def test_folder_stats_on_fake_server(imap_server, mail_service):
+    store = imap_server.store
+    store.seed(count=4, body_size=10)
+    # 가짜 서버는 폴더 이름을 IMAP 전송 형식(modified UTF-7) 그대로 보관함
+    store.seed(utf7_encode("보관함").decode(), count=2, body_size=10)
+    for message in store.folders["INBOX"].messages:
+        message.flags = ["\\Seen"] if message.uid > 1 else []
+
+    # LIST-STATUS로 폴더 목록과 STATUS를 한 번에 받음
+    stats = {item.name: item for item in mail_service.get_folder_stats()}
+    assert (stats["INBOX"].messages, stats["INBOX"].unseen, stats["INBOX"].uidnext) == (4, 1, 5)
+    assert stats["보관함"].messages == 2
+    assert imap_server.command_counts["STATUS"] == 0
+    # 폴더 캐시도 채워지므로 LIST를 다시 보내지 않음
+    lists = imap_server.command_counts["LIST"]
+    assert {folder.name for folder in mail_service.get_folder_list()} >= {"INBOX", "보관함"}
+    assert imap_server.command_counts["LIST"] == lists
+
+    # 폴더를 지정하면 STATUS를 파이프라인으로 보내고 없는 폴더는 빠짐
+    stats = mail_service.get_folder_stats(["보관함", "없는폴더", "INBOX"])
+    assert [item.name for item in stats] == ["보관함", "INBOX"]
+    assert imap_server.command_counts["STATUS"] == 3
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+MailCache 테스트: UIDVALIDITY 초기화, LRU 제거, FLAGS 반영 (네트워크 불필요)
+"""
+import itertools
+import os
+import sys
+import types
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+import service.mail_cache
+from service.mail_cache import MailCache
+from service.mail_message import HeaderMailMessage
+
+
+def _header(uid: int, flags: str = "", padding: int = 0) -> HeaderMailMessage:
+    meta = (f'{uid} (UID {uid} FLAGS ({flags}) RFC822.SIZE 100 '
+            f'BODYSTRUCTURE ("TEXT" "PLAIN" NIL NIL NIL "7BIT" 10 1) BODY[HEADER] NIL)').encode()
+    header = f"Subject: mail {uid}\r\nX-Padding: {'x' * padding}\r\n\r\n".encode()
+    return HeaderMailMessage.from_raw(meta, header)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """last_access가 같은 값이 되지 않도록 호출마다 1초씩 증가하는 시계"""
+    ticks = itertools.count(1_700_000_000)
+    monkeypatch.setattr(service.mail_cache, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def test_headers_round_trip_and_hit_count():
+    cache = MailCache()
+    cache.check_uidvalidity("INBOX", 1)
+    cache.put_headers("INBOX", [_header(1, "\\Seen"), _header(2)])
+
+    found = cache.get_headers("INBOX", ["1", "2", "3"])
+    assert sorted(found) == ["1", "2"]
+    assert found["1"].subject == "mail 1"
+    assert found["1"].flags == ("\\Seen",)
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+    # 다른 폴더의 같은 UID와는 섞이지 않음
+    assert cache.get_headers("Sent", ["1"]) == {}
+
+
+def test_uidvalidity_change_clears_folder():
+    cache = MailCache()
+    cache.check_uidvalidity("INBOX", 10)
+    cache.check_uidvalidity("Sent", 20)
+    cache.put_headers("INBOX", [_header(1), _header(2)])
+    cache.put_headers("Sent", [_header(1)])
+
+    # 같은 UIDVALIDITY면 그대로 유지
+    cache.check_uidvalidity("INBOX", 10)
+    assert len(cache.get_headers("INBOX", ["1", "2"])) == 2
+
+    cache.check_uidvalidity("INBOX", 11)
+    assert cache.get_uidvalidity("INBOX") == 11
+    assert cache.get_headers("INBOX", ["1", "2"]) == {}
+    assert len(cache.get_headers("Sent", ["1"])) == 1
+    assert cache.stats()["messages"] == 1
+    assert cache.stats()["bytes"] == len(_header(1).raw_meta) + len(_header(1).raw_header)
+
+
+def test_uidvalidity_none_is_ignored():
+    cache = MailCache()
+    cache.check_uidvalidity("INBOX", 5)
+    cache.put_headers("INBOX", [_header(1)])
+    cache.check_uidvalidity("INBOX", None)
+    assert cache.get_uidvalidity("INBOX") == 5
+    assert len(cache.get_headers("INBOX", ["1"])) == 1
+
+
+def test_lru_eviction_keeps_recently_read(clock):
+    size = len(_header(1, padding=1000).raw_meta) + len(_header(1, padding=1000).raw_header)
+    cache = MailCache(max_bytes=size * 3)
+    cache.put_headers("INBOX", [_header(1, padding=1000)])
+    cache.put_headers("INBOX", [_header(2, padding=1000)])
+    cache.put_headers("INBOX", [_header(3, padding=1000)])
+    # 1번을 다시 읽으면 2번이 가장 오래 사용하지 않은 메일이 됨
+    assert "1" in cache.get_headers("INBOX", ["1"])
+
+    cache.put_headers("INBOX", [_header(4, padding=1000)])
+    assert sorted(cache.get_headers("INBOX", ["1", "2", "3", "4"])) == ["1", "3", "4"]
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_eviction_counts_header_and_body_once(clock):
+    cache = MailCache(max_bytes=10_000)
+    cache.put_headers("INBOX", [_header(1)])
+    meta = b'1 (UID 1 FLAGS () RFC822.SIZE 6000 BODY[] NIL)'
+    cache.put_message("INBOX", "1", [], meta, b"Subject: big\r\n\r\n" + b"x" * 6000)
+    # 같은 메일을 다시 저장해도 크기가 두 번 더해지지 않음
+    cache.put_message("INBOX", "1", [], meta, b"Subject: big\r\n\r\n" + b"x" * 6000)
+    assert cache.get_message("INBOX", "1").subject == "big"
+
+    cache.put_message("INBOX", "2", [], meta.replace(b"UID 1", b"UID 2"), b"Subject: big\r\n\r\n" + b"x" * 6000)
+    assert cache.get_message("INBOX", "1") is None
+    assert cache.get_message("INBOX", "2") is not None
+    assert cache.stats()["messages"] == 1
+
+
+def test_set_flags_and_discard():
+    cache = MailCache()
+    cache.put_headers("INBOX", [_header(1, "\\Seen"), _header(2)])
+    cache.set_flags("INBOX", ["1", "2"], "\\Flagged", True)
+    cache.set_flags("INBOX", ["1"], "\\Seen", False)
+    found = cache.get_headers("INBOX", ["1", "2"])
+    assert found["1"].flags == ("\\Flagged",)
+    assert found["2"].flags == ("\\Flagged",)
+
+    cache.discard("INBOX", ["1"])
+    assert sorted(cache.get_headers("INBOX", ["1", "2"])) == ["2"]
+
+
+def test_service_reuses_cache_until_uidvalidity_changes(imap_server, mail_service):
+    imap_server.store.seed(count=5, body_size=100)
+    mail_service.cache = MailCache()
+
+    assert len(mail_service.get_mail_headers(["1", "2", "3"])) == 3
+    assert imap_server.command_counts["UID FETCH"] == 1
+    assert len(mail_service.get_mail_headers(["1", "2", "3"])) == 3
+    assert imap_server.command_counts["UID FETCH"] == 1
+
+    # 서버에서 UIDVALIDITY가 바뀌면 다음 SELECT 때 캐시를 버리고 다시 가져옴
+    imap_server.store.folders["INBOX"].uidvalidity += 1
+    mail_service.pool.forget_folder("INBOX")
+    assert len(mail_service.get_mail_headers(["1", "2", "3"])) == 3
+    assert imap_server.command_counts["UID FETCH"] == 2
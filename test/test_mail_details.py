@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+get_mail_detail(s) 응답 생성 테스트: 메일마다 바로 직렬화하고 찾지 못한 UID를 알림
+"""
+import asyncio
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mcp.shared.memory import create_connected_server_and_client_session
+
+import server
+
+
+def test_details_are_yielded_one_by_one(imap_server, mail_service):
+    imap_server.store.seed(count=3, body_size=2000)
+    details = server.iter_mail_details(mail_service, ["1", "9", "2"], "INBOX", "json", {"max_chars": 100})
+    first = next(details)
+    assert json.loads(first.text)["uid"] == "1"
+    # 첫 메일을 내보낼 때까지 다음 메일을 직렬화하지 않음
+    assert imap_server.command_counts["UID FETCH"] <= 2
+
+    rest = list(details)
+    assert json.loads(rest[0].text)["uid"] == "2"
+    assert rest[-1].text == "UID 9에 해당하는 메일을 찾을 수 없습니다."
+
+
+def test_full_body_and_legacy_arguments(imap_server, mail_service):
+    imap_server.store.seed(count=1, body_size=2000)
+    contents = server.render_mail_details(mail_service, ["1"], "INBOX", "json",
+                                          {"full_body": True, "max_body_chars": 10})
+    assert len(contents) == 1
+    # 예전 인자 max_body_chars는 더 이상 본문을 자르지 않음
+    assert len(json.loads(contents[0].text)["text_content"]) > 1000
+
+
+def test_get_mail_details_reports_progress_per_mail(imap_server, accounts):
+    imap_server.store.seed(count=3, body_size=500)
+    progress = []
+
+    async def on_progress(done, total, message):
+        progress.append((done, total))
+
+    async def call():
+        async with create_connected_server_and_client_session(server.server) as client:
+            return await client.call_tool("get_mail_details", {"uids": ["1", "2", "3"], "format": "json"},
+                                          progress_callback=on_progress)
+
+    result = asyncio.run(call())
+    assert not result.isError
+    assert [json.loads(content.text)["uid"] for content in result.content] == ["1", "2", "3"]
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_progress_callback_and_request_context(imap_server, mail_service):
+    imap_server.store.seed(count=2, body_size=500)
+    calls = []
+    contents = server.render_mail_details(mail_service, ["1", "2"], "INBOX", "json", {}, calls.append)
+    assert len(contents) == 2 and calls == [1, 2]
+    # 요청 컨텍스트 밖(또는 progressToken이 없는 요청)에서는 알림 함수를 만들지 않음
+    assert server.progress_reporter(2) is None
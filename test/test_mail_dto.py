@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+메일 DTO 변환 테스트 (네트워크 불필요, 실제 계정으로 확인하는 스크립트는 test_dto.py)
+"""
+import json
+import os
+import sys
+from email.message import EmailMessage
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from imap_tools import MailMessage
+
+from service.mail_dto import (
+    MailDTO,
+    MailListDTO,
+    MailSummaryDTO,
+    chunk_text,
+    iter_mails_json,
+    iter_mails_jsonl,
+    mails_to_json,
+    mails_to_jsonl,
+)
+from service.mail_message import HeaderMailMessage
+
+
+def _raw(uid: int, body: str = "본문입니다", attachment: bool = False) -> bytes:
+    message = EmailMessage()
+    message["Subject"] = f"메일 {uid}"
+    message["From"] = '"홍길동" <hong@example.com>'
+    message["To"] = "me@naver.com, you@naver.com"
+    message["Cc"] = "cc@naver.com"
+    message["Date"] = "Mon, 15 Jan 2024 10:00:00 +0900"
+    message.set_content(body)
+    if attachment:
+        message.add_attachment(b"0123456789", maintype="application", subtype="pdf", filename="보고서.pdf")
+    return message.as_bytes()
+
+
+def _full(uid: int, **kwargs) -> MailMessage:
+    raw = _raw(uid, **kwargs)
+    return MailMessage([(f"{uid} (UID {uid} FLAGS (\\Seen) RFC822.SIZE {len(raw)} BODY[] {{{len(raw)}}}".encode(), raw)])
+
+
+def _header(uid: int) -> HeaderMailMessage:
+    raw = _raw(uid)
+    meta = (f'{uid} (UID {uid} FLAGS () RFC822.SIZE 5000 BODYSTRUCTURE (("TEXT" "PLAIN" ("CHARSET" "UTF-8") '
+            f'NIL NIL "8BIT" 10 1 NIL NIL NIL NIL)("APPLICATION" "PDF" NIL NIL NIL "BASE64" 16 NIL '
+            f'("ATTACHMENT" ("FILENAME" "a.pdf")) NIL NIL) "MIXED" ("BOUNDARY" "b") NIL NIL NIL) BODY[HEADER] NIL)')
+    return HeaderMailMessage.from_raw(meta.encode(), raw[:raw.index(b"\n\n") + 2])
+
+
+def test_summary_uses_slots_and_parsed_sender():
+    dto = MailSummaryDTO.from_mail_message(_full(3))
+    assert not hasattr(dto, "__dict__")
+    assert dto.from_name == "홍길동"
+    assert dto.from_email == "hong@example.com"
+    assert dto.to_emails == ["me@naver.com", "you@naver.com"]
+    assert dto.cc_emails == ["cc@naver.com"]
+    assert dto.flags == ["\\Seen"]
+    assert "text_content" not in dto.to_dict()
+    assert dto.to_summary_text() == "2024-01-15T10:00:00 | 홍길동 | 메일 3"
+
+
+def test_summary_from_headers_counts_attachments_from_bodystructure():
+    dto = MailSummaryDTO.from_mail_message(_header(4))
+    assert dto.has_attachments
+    assert dto.attachment_count == 1
+    assert dto.size == 5000
+
+
+def test_detail_fields_are_lazy():
+    mail = _full(1, body="가" * 50)
+    dto = MailDTO.from_mail_message(mail, max_body_chars=10)
+    assert not hasattr(dto, "__dict__")
+    # 본문은 처음 읽을 때 꺼냄
+    assert "text" not in mail.__dict__
+    assert dto.text_content.startswith("가" * 10 + "\n...(이하 ")
+    assert "text" in mail.__dict__
+    assert dto.text_content is dto.text_content
+
+
+def test_detail_attachments_for_full_and_header_mail():
+    full = MailDTO.from_mail_message(_full(1, attachment=True)).to_dict()
+    assert full["attachments"] == [{"filename": "보고서.pdf", "content_type": "application/pdf", "size": 10}]
+
+    header = MailDTO.from_mail_message(_header(2)).to_dict()
+    assert header["text_content"] is None
+    assert header["html_content"] is None
+    assert header["attachments"] == [{"filename": "a.pdf", "content_type": "application/pdf", "size": 16}]
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_streamed_json_matches_list_dto(count):
+    mails = [_full(uid) for uid in range(1, count + 1)]
+    page_info = {"has_more": True, "last_uid": "1"}
+    expected = MailListDTO(mails, page_info).to_dict()
+    assert json.loads(''.join(iter_mails_json(iter(mails), page_info))) == expected
+    assert json.loads(mails_to_json(mails, page_info)) == expected
+
+
+def test_jsonl_lines_and_chunks():
+    mails = [_full(uid) for uid in range(1, 6)]
+    lines = list(iter_mails_jsonl(mails, {"has_more": False, "total": 5}))
+    assert len(lines) == 6
+    assert all(line.endswith("\n") for line in lines)
+    assert json.loads(lines[-1]) == {"page_info": {"has_more": False, "total": 5}}
+
+    chunks = mails_to_jsonl(mails, max_chars=len(lines[0]) * 2)
+    assert ''.join(chunks) == ''.join(lines[:-1])
+    # 덩어리마다 온전한 줄로 끝남
+    assert all(chunk.endswith("\n") for chunk in chunks)
+    assert [json.loads(line)["uid"] for chunk in chunks for line in chunk.splitlines()] == ["1", "2", "3", "4", "5"]
+
+
+def test_chunk_text_limits():
+    assert list(chunk_text(["aa", "bb", "cc"], max_chars=4)) == ["aabb", "cc"]
+    # 한 조각이 max_chars보다 길어도 자르지 않음
+    assert list(chunk_text(["aaaaa", "b"], max_chars=4)) == ["aaaaa", "b"]
+    assert list(chunk_text([], max_chars=4)) == []
+
+
+def test_summary_text_page_hint():
+    mails = [_full(1)]
+    assert MailListDTO(mails, {"has_more": True}).to_summary_text().splitlines()[0] == "메일 1개 (다음 페이지 있음)"
+    assert MailListDTO(mails, {"has_more": True, "last_uid": "1"}).to_summary_text().splitlines()[0] == \
+        "메일 1개 (다음 페이지 있음, last_uid: 1)"
+    assert MailListDTO([]).to_summary_text() == "메일이 없습니다."
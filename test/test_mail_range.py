@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+인덱스 기반 페이징(get_mails_by_range) 테스트: 범위 경계, 빈 폴더, 최신순 정렬, 동기화 미러 사용 여부
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from service.mail_sync import MailSync
+
+
+def _uids(result):
+    return [mail.uid for mail in result["mails"]]
+
+
+def test_range_is_newest_first(imap_server, mail_service):
+    imap_server.store.seed(count=7, body_size=10)
+    result = mail_service.get_mails_by_range(0, 3)
+    assert _uids(result) == ["7", "6", "5"]
+    assert result["total"] == 7 and result["has_more"]
+    assert result["mails"][0].subject.startswith("[6] ")
+
+    result = mail_service.get_mails_by_range(3, 3)
+    assert _uids(result) == ["4", "3", "2"]
+    assert result["has_more"]
+    # 전체 UID 목록(UID SEARCH ALL)은 받지 않음
+    assert imap_server.command_counts["UID SEARCH"] == 0
+
+
+def test_range_at_or_past_the_end(imap_server, mail_service):
+    imap_server.store.seed(count=5, body_size=10)
+    result = mail_service.get_mails_by_range(3, 10)
+    assert _uids(result) == ["2", "1"]
+    assert result == {"mails": result["mails"], "total": 5, "has_more": False}
+
+    result = mail_service.get_mails_by_range(0, 5)
+    assert len(result["mails"]) == 5 and not result["has_more"]
+
+    for start_index in (5, 6, 100):
+        result = mail_service.get_mails_by_range(start_index, 3)
+        assert result == {"mails": [], "total": 5, "has_more": False}
+
+
+def test_range_on_empty_folder(imap_server, mail_service):
+    imap_server.store.create("Empty")
+    assert mail_service.get_mails_by_range(0, 10, folder="Empty") == {"mails": [], "total": 0, "has_more": False}
+
+
+def test_range_rejects_invalid_arguments(mail_service):
+    with pytest.raises(ValueError):
+        mail_service.get_mails_by_range(-1, 10)
+    with pytest.raises(ValueError):
+        mail_service.get_mails_by_range(0, 0)
+
+
+def test_range_with_cold_sync_uses_sequence_numbers(imap_server, mail_service):
+    imap_server.store.seed(count=6, body_size=10)
+    mail_service.sync = MailSync(mail_service.pool)
+
+    # 한 번도 동기화하지 않은 폴더는 전체 UID 목록을 받지 않고 시퀀스 번호 범위로 가져옴
+    result = mail_service.get_mails_by_range(1, 2)
+    assert _uids(result) == ["5", "4"]
+    assert result["total"] == 6
+    assert imap_server.command_counts["UID SEARCH"] == 0
+    assert mail_service.sync.get_state("INBOX") is None
+
+
+def test_range_with_synced_mirror_uses_mirror(imap_server, mail_service):
+    imap_server.store.seed(count=6, body_size=10)
+    mail_service.sync = MailSync(mail_service.pool)
+    mail_service.sync.sync_folder("INBOX")
+    searches = imap_server.command_counts["UID SEARCH"]
+    statuses = imap_server.command_counts["STATUS"]
+
+    result = mail_service.get_mails_by_range(4, 10)
+    assert _uids(result) == ["2", "1"]
+    assert result["total"] == 6 and not result["has_more"]
+    assert imap_server.command_counts["UID SEARCH"] == searches
+    assert imap_server.command_counts["STATUS"] == statuses
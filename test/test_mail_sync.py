@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+동기화 엔진(MailSync) 테스트: 동기화 폴더 설정, 폴더 삭제/이름 변경 시 미러 정리
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from service.accounts import AccountConfig
+from service.mail_sync import MailSync
+
+
+def test_sync_folders_config():
+    config = AccountConfig.from_dict({"naver_id": "me", "naver_password": "pw"})
+    assert config.sync_folders == ["INBOX"]
+    config = AccountConfig.from_dict({"naver_id": "me", "naver_password": "pw", "sync_folders": "INBOX,Sent,"})
+    assert config.sync_folders == ["INBOX", "Sent"]
+    config = AccountConfig.from_dict({"naver_id": "me", "naver_password": "pw"}, {"sync_folders": ["Work"]})
+    assert config.sync_folders == ["Work"]
+
+
+def test_forget_uids_and_folder(imap_server, mail_service):
+    imap_server.store.seed(count=3, body_size=10)
+    sync = MailSync(mail_service.pool)
+    assert sync.sync_folder("INBOX").uids == [1, 2, 3]
+    sync.forget("INBOX", ["2"])
+    assert sync.get_state("INBOX").uids == [1, 3]
+    sync.forget("INBOX")
+    assert sync.get_state("INBOX") is None
+
+
+def test_delete_and_rename_folder_drop_mirror(imap_server, mail_service):
+    imap_server.store.seed("A", count=2, body_size=10)
+    imap_server.store.seed("B", count=2, body_size=10)
+    mail_service.sync = MailSync(mail_service.pool)
+    mail_service.sync.sync_folder("A")
+    mail_service.sync.sync_folder("B")
+
+    mail_service.delete_folder("A")
+    mail_service.rename_folder("B", "C")
+    assert mail_service.sync.get_state("A") is None
+    assert mail_service.sync.get_state("B") is None
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+IDLE 감시기(MailWatcher) 테스트: 새 메일 대기, 감시 폴더 수 제한, 감시 스레드 오류 보고
+"""
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from bench.fake_imap import make_message
+from service.mail_watcher import MailWatcher
+
+
+@pytest.fixture
+def make_watcher(mail_service):
+    watchers = []
+
+    def make(**kwargs):
+        kwargs.setdefault("poll_interval", 0.05)
+        watcher = MailWatcher(mail_service.pool, **kwargs)
+        watchers.append(watcher)
+        return watcher
+
+    yield make
+    for watcher in watchers:
+        watcher.stop()
+
+
+def _wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+
+def test_wait_for_new_mail(imap_server, make_watcher):
+    imap_server.store.seed(count=2, body_size=10)
+    watcher = make_watcher()
+    assert watcher.wait_for_new_mail("INBOX", timeout=0.2) is None
+
+    folder = imap_server.store.folders["INBOX"]
+    with imap_server.store.lock:
+        folder.append(make_message(3, 10))
+    assert watcher.wait_for_new_mail("INBOX", timeout=5, since_uid="2") == ["3"]
+    # 기다리는 호출이 없던 동안 도착한 메일도 since_uid로 바로 받음
+    _wait_until(lambda: watcher.wait_for_new_mail("INBOX", timeout=0, since_uid="0") == ["3"])
+
+
+def test_least_recently_used_folder_is_evicted(imap_server, make_watcher):
+    for name in ("A", "B", "C"):
+        imap_server.store.seed(name, count=1, body_size=10)
+    watcher = make_watcher(max_folders=2)
+    watcher.watch(["A"], pinned=False)
+    watcher.watch(["B"], pinned=False)
+    watcher.watch(["A"], pinned=False)
+    watcher.watch(["C"], pinned=False)
+    assert sorted(watcher.folders()) == ["A", "C"]
+    # 감시를 끝낸 폴더의 전용 연결은 닫힘
+    _wait_until(lambda: imap_server.command_counts["LOGOUT"] >= 1)
+
+
+def test_pinned_folders_are_not_evicted(imap_server, make_watcher):
+    for name in ("A", "B", "C"):
+        imap_server.store.seed(name, count=1, body_size=10)
+    watcher = make_watcher(max_folders=2)
+    watcher.watch(["A", "B"])
+    with pytest.raises(RuntimeError, match="한도"):
+        watcher.watch(["C"])
+    watcher.release("A")
+    watcher.watch(["C"])
+    assert sorted(watcher.folders()) == ["B", "C"]
+
+
+def test_idle_folder_watch_ends(imap_server, make_watcher):
+    imap_server.store.seed(count=1, body_size=10)
+    watcher = make_watcher(idle_timeout=0.2)
+    assert watcher.wait_for_new_mail("INBOX", timeout=0.1) is None
+    _wait_until(lambda: not watcher.is_watching("INBOX"))
+    _wait_until(lambda: imap_server.command_counts["LOGOUT"] >= 1)
+
+    # 고정한 폴더는 계속 감시함
+    watcher.watch(["INBOX"])
+    time.sleep(0.5)
+    assert watcher.is_watching("INBOX")
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_dead_watch_is_reported(imap_server, make_watcher):
+    watcher = make_watcher()
+    # 없는 폴더는 선택에 실패해 감시 스레드가 끝나므로 "새 메일 없음" 대신 오류를 알림
+    with pytest.raises(RuntimeError, match="없는폴더"):
+        watcher.wait_for_new_mail("없는폴더", timeout=5)
+    assert not watcher.is_watching("없는폴더")
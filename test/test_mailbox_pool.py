@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+연결 풀(MailBoxPool) 테스트: 끊어진 연결 교체, 유휴 연결 정리, 동시 사용 개수 제한, 오류 난 연결 폐기
+"""
+import imaplib
+import os
+import sys
+import threading
+import time
+import types
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+import service.mailbox_pool as mailbox_pool
+from service.mailbox_pool import MailBoxPool
+
+
+@pytest.fixture
+def pool(imap_server):
+    pool = MailBoxPool("me", "password", host="127.0.0.1", port=imap_server.port, ssl=False, max_size=2)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """풀이 보는 monotonic 시각을 테스트에서 움직임"""
+    now = [1000.0]
+    monkeypatch.setattr(mailbox_pool, "time", types.SimpleNamespace(
+        monotonic=lambda: now[0], perf_counter=time.perf_counter))
+    return now
+
+
+def test_connection_closed_by_server_is_replaced(imap_server, pool):
+    imap_server.store.seed(count=3, body_size=10)
+    with pool.acquire("INBOX") as mailbox:
+        assert mailbox.uids() == ["1", "2", "3"]
+    assert imap_server.drop_connections() == 1
+    time.sleep(0.05)
+
+    # 방금 쓴 연결이라 NOOP 확인 주기 전이지만, 끊어진 소켓을 알아채고 새 연결로 첫 명령을 보냄
+    with pool.acquire("INBOX") as mailbox:
+        assert mailbox.uids() == ["1", "2", "3"]
+    assert imap_server.command_counts["LOGIN"] == 2
+    assert pool.stats()["idle"] == 1
+
+
+def test_select_on_dead_reused_connection_retries_once(imap_server, pool, monkeypatch):
+    imap_server.store.seed(count=2, body_size=10)
+    imap_server.store.seed("Archive", count=1, body_size=10)
+    with pool.acquire("INBOX"):
+        pass
+    imap_server.drop_connections()
+    time.sleep(0.05)
+    # 끊어진 걸 미리 알아채지 못해 폴더 선택 중에 오류가 나는 경우
+    monkeypatch.setattr(pool, "_is_alive", lambda pooled: True)
+
+    with pool.acquire("Archive") as mailbox:
+        assert mailbox.uids() == ["1"]
+    assert imap_server.command_counts["LOGIN"] == 2
+    assert pool.stats() == {"max_size": 2, "in_use": 0, "idle": 1}
+
+
+def test_select_error_on_new_connection_is_not_retried(imap_server, pool, monkeypatch):
+    def broken_select(self, folder, readonly=False):
+        raise imaplib.IMAP4.abort("socket error")
+
+    with pool.acquire():
+        pass
+    monkeypatch.setattr(mailbox_pool.PooledMailBox, "select", broken_select)
+    monkeypatch.setattr(pool, "_is_alive", lambda pooled: True)
+    # 재사용한 연결에서 한 번, 새 연결에서는 _connect의 초기 선택이 실패하므로 더 시도하지 않음
+    with pytest.raises(imaplib.IMAP4.abort):
+        with pool.acquire("Archive"):
+            pass
+    assert pool.stats() == {"max_size": 2, "in_use": 0, "idle": 0}
+
+
+def test_idle_timeout_prunes_and_skips_expired_connections(imap_server, clock):
+    pool = MailBoxPool("me", "password", host="127.0.0.1", port=imap_server.port, ssl=False,
+                       max_size=2, idle_timeout=10)
+    try:
+        with pool.acquire(), pool.acquire():
+            pass
+        assert pool.stats()["idle"] == 2
+
+        clock[0] += 5
+        assert pool.prune() == 0
+        clock[0] += 6
+        assert pool.prune() == 2
+        assert pool.stats()["idle"] == 0
+        assert imap_server.command_counts["LOGOUT"] == 2
+
+        # prune 전에 꺼내도 만료된 연결은 쓰지 않고 새로 연결
+        with pool.acquire():
+            pass
+        clock[0] += 11
+        with pool.acquire():
+            pass
+        assert imap_server.command_counts["LOGIN"] == 4
+        assert imap_server.command_counts["LOGOUT"] == 3
+    finally:
+        pool.close()
+
+
+def test_semaphore_bounds_concurrent_connections(imap_server, pool):
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with pool.acquire("INBOX"):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+    assert imap_server.command_counts["LOGIN"] == 2
+    assert pool.stats() == {"max_size": 2, "in_use": 0, "idle": 2}
+
+
+def test_connection_error_inside_block_discards_connection(imap_server, pool):
+    with pytest.raises(imaplib.IMAP4.abort):
+        with pool.acquire("INBOX"):
+            raise imaplib.IMAP4.abort("socket error")
+    assert pool.stats()["idle"] == 0
+    assert imap_server.command_counts["LOGOUT"] == 1
+
+    # 소켓과 무관한 오류는 연결을 그대로 풀에 돌려줌
+    with pytest.raises(ValueError):
+        with pool.acquire("INBOX"):
+            raise ValueError("bad argument")
+    assert pool.stats()["idle"] == 1
+    with pool.acquire("INBOX"):
+        pass
+    assert imap_server.command_counts["LOGIN"] == 2
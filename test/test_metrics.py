@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+metrics 테스트: 작업 스레드로의 호출 컨텍스트 전달, 구간 시간 계산, OpenMetrics 출력, tool 호출 뒤 snapshot
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import types
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+from starlette.testclient import TestClient
+
+import server
+import service.metrics as metrics
+from service.executor import MailExecutor
+from service.metrics import METRICS, Metrics, phase, record_command, record_io, track_call
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """metrics가 보는 perf_counter를 테스트에서 움직임"""
+    now = [100.0]
+    monkeypatch.setattr(metrics, "time", types.SimpleNamespace(perf_counter=lambda: now[0], time=time.time))
+    return now
+
+
+def _counter(name, **labels):
+    return METRICS._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+
+def test_call_stats_follow_executor_threads():
+    executor = MailExecutor(max_workers=2)
+
+    def work():
+        record_command("UID FETCH")
+        record_io(sent=10, received=100)
+        return threading.current_thread().name
+
+    async def call():
+        with track_call("list_mails") as stats:
+            names = await asyncio.gather(executor.run(work), executor.run(work))
+        return stats, names
+
+    try:
+        stats, names = asyncio.run(call())
+    finally:
+        executor.shutdown()
+    assert all(name.startswith("imap-worker") for name in names)
+    assert (stats.commands, stats.bytes_sent, stats.bytes_received) == (2, 20, 200)
+    assert _counter("imap_commands_total", tool="list_mails", command="UID FETCH") == 2
+    assert _counter("tool_calls_total", tool="list_mails", status="ok") == 1
+
+    # 컨텍스트를 넘기지 않은 스레드(백그라운드 동기화 등)는 호출에 섞이지 않음
+    with track_call("list_mails") as stats:
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    assert stats.commands == 0
+    assert _counter("imap_commands_total", tool="background", command="UID FETCH") == 1
+
+
+def test_nested_phases_do_not_overlap(clock):
+    with track_call("get_mail") as stats:
+        with phase("serialize"):
+            clock[0] += 1.0
+            with phase("parse"):
+                clock[0] += 2.0
+                # 파싱 도중 IMAP 응답을 0.5초 기다림
+                record_io(0.5, received=10)
+            clock[0] += 0.25
+    assert stats.phases == {"imap": 0.5, "parse": 1.5, "serialize": 1.25}
+    assert _counter("phase_seconds_total", tool="get_mail", phase="parse") == 1.5
+
+
+def test_absorb_io_keeps_io_in_phase(clock):
+    with track_call("list_mails") as stats:
+        with phase("connect", absorb_io=True):
+            clock[0] += 1.0
+            record_io(0.75, sent=5, received=20)
+    assert stats.phases == {"connect": 1.0}
+    assert (stats.bytes_sent, stats.bytes_received) == (5, 20)
+    assert _counter("phase_seconds_total", tool="list_mails", phase="imap") == 0
+
+
+def test_failed_call_is_counted_as_error():
+    with pytest.raises(RuntimeError):
+        with track_call("delete_mails"):
+            raise RuntimeError("boom")
+    with track_call("delete_mails"):
+        metrics.mark_failed()
+    assert _counter("tool_calls_total", tool="delete_mails", status="error") == 2
+    assert METRICS.snapshot()["tools"]["delete_mails"]["errors"] == 2
+
+
+def test_openmetrics_format():
+    registry = Metrics()
+    registry.inc("imap_commands_total", 3, tool="list_mails", command="UID FETCH")
+    registry.inc("imap_bytes_sent_total", 1.5, tool='a"b\\c')
+    registry.observe("tool_seconds", 0.02, tool="list_mails")
+    registry.observe("tool_seconds", 3.0, tool="list_mails")
+    text = registry.to_openmetrics([("pool_connections", {"account": "work", "state": "idle"}, 2)])
+    lines = text.splitlines()
+
+    assert text.endswith("# EOF\n")
+    assert lines.count("# TYPE navermail_imap_commands counter") == 1
+    assert 'navermail_imap_commands_total{command="UID FETCH",tool="list_mails"} 3' in lines
+    assert 'navermail_imap_bytes_sent_total{tool="a\\"b\\\\c"} 1.5' in lines
+    assert "# TYPE navermail_tool_seconds histogram" in lines
+    assert 'navermail_tool_seconds_bucket{tool="list_mails",le="0.01"} 0' in lines
+    assert 'navermail_tool_seconds_bucket{tool="list_mails",le="0.025"} 1' in lines
+    assert 'navermail_tool_seconds_bucket{tool="list_mails",le="10.0"} 2' in lines
+    assert 'navermail_tool_seconds_bucket{tool="list_mails",le="+Inf"} 2' in lines
+    assert 'navermail_tool_seconds_count{tool="list_mails"} 2' in lines
+    assert 'navermail_tool_seconds_sum{tool="list_mails"} 3.02' in lines
+    assert "# TYPE navermail_pool_connections gauge" in lines
+    assert 'navermail_pool_connections{account="work",state="idle"} 2' in lines
+
+
+def _call_tools(*calls):
+    async def run():
+        async with create_connected_server_and_client_session(server.server) as client:
+            return [await client.call_tool(name, args) for name, args in calls]
+    return asyncio.run(run())
+
+
+def test_snapshot_after_tool_call(imap_server, accounts):
+    imap_server.store.seed(count=5, body_size=10)
+    listed, unknown, snapshot = _call_tools(
+        ("list_mails", {"max_count": 3}),
+        ("list_mails", {"account": "unknown"}),
+        ("server_metrics", {"format": "json"}),
+    )
+    assert not listed.isError and unknown.isError
+    data = json.loads(snapshot.content[0].text)
+
+    tool = data["tools"]["list_mails"]
+    assert tool["calls"] == 2 and tool["errors"] == 1
+    assert tool["imap_commands"] > 0 and tool["imap_bytes_received"] > 0
+    assert set(tool["phases_ms"]) == set(metrics.PHASES)
+    assert tool["phases_ms"]["connect"] > 0 and tool["phases_ms"]["serialize"] > 0
+    assert "get_mails" in data["service_calls"]
+    assert data["imap"]["connects"] == 1 and data["imap"]["commands"]["LOGIN"] == 1
+    assert data["imap"]["bytes_sent"] > 0
+    assert data["accounts"]["default"]["pool"] == {"max_size": 2, "in_use": 0, "idle": 1}
+    # tool 호출 하나의 IMAP 명령 수는 가짜 서버가 받은 명령 수와 같음
+    assert sum(data["imap"]["commands"].values()) == sum(imap_server.command_counts.values())
+
+
+def test_metrics_endpoint(imap_server, accounts):
+    imap_server.store.seed(count=2, body_size=10)
+    _call_tools(("list_mails", {}))
+    with TestClient(server.create_http_app()) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/openmetrics-text")
+    lines = response.text.splitlines()
+    assert lines[-1] == "# EOF"
+    assert 'navermail_tool_calls_total{status="ok",tool="list_mails"} 1' in lines
+    assert 'navermail_pool_connections{account="default",state="idle"} 1' in lines
+    assert 'navermail_pool_connections_max{account="default"} 2' in lines
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+프로파일링 테스트: 표본 추출, cProfile 동시 사용 제한, spans.jsonl 기록, 파일 쓰기 스레드, 표본 호출 전체 흐름
+"""
+import asyncio
+import contextvars
+import json
+import os
+import pstats
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+import server
+import service.profiling as profiling
+from service.metrics import phase
+from service.profiling import SPANS_FILE, CallProfile, Profiler, configure_profiling, profile_call, span, traced
+
+
+@pytest.fixture
+def use_profiler():
+    """Profiler를 켜고 테스트가 끝나면 남은 결과를 쓴 뒤 끔"""
+    def use(profiler):
+        configure_profiling(profiler)
+        return profiler
+    yield use
+    configure_profiling(None)
+
+
+def _read_spans(directory):
+    with open(os.path.join(directory, SPANS_FILE), encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_profiler_options(tmp_path):
+    with pytest.raises(ValueError):
+        Profiler(["flamegraph"], str(tmp_path))
+    with pytest.raises(ValueError):
+        Profiler([], str(tmp_path))
+    for rate in (0, -0.5, 1.5):
+        with pytest.raises(ValueError):
+            Profiler(["spans"], str(tmp_path), sample_rate=rate)
+    profiler = Profiler(["spans"], str(tmp_path / "nested" / "dir"))
+    assert os.path.isdir(profiler.output_dir)
+    profiler.close()
+
+
+def test_sample_rate_and_tool_filter(tmp_path, monkeypatch):
+    profiler = Profiler(["spans"], str(tmp_path), sample_rate=0.25, tools=["list_mails"])
+    try:
+        draws = iter([0.1, 0.3, 0.2499, 0.25])
+        monkeypatch.setattr(profiling.random, "random", lambda: next(draws))
+        assert [profiler.sample("list_mails") for _ in range(4)] == [True, False, True, False]
+        # 대상이 아닌 tool은 난수를 뽑지 않고 제외
+        assert not profiler.sample("get_mail")
+    finally:
+        profiler.close()
+
+    profiler = Profiler(["spans"], str(tmp_path))
+    monkeypatch.setattr(profiling.random, "random", lambda: pytest.fail("sample_rate 1이면 난수를 쓰지 않음"))
+    assert profiler.sample("get_mail")
+    profiler.close()
+
+
+def test_only_one_call_runs_cprofile_at_a_time():
+    first = CallProfile("list_mails", ["cprofile"])
+    second = CallProfile("get_mail", ["cprofile", "spans"])
+    with first.profiling():
+        with second.profiling():
+            sum(range(1000))
+        assert second.profile is None and second.attributes["cprofile"] == "skipped"
+        assert profiling._cprofile_lock.locked()
+    assert not profiling._cprofile_lock.locked()
+    if first.attributes.get("cprofile") != "skipped":  # 바깥 프로파일러(coverage 등)가 없을 때
+        assert first.profile is not None
+
+    # 먼저 쓰던 호출이 끝나면 다음 호출이 cProfile을 씀
+    with second.profiling():
+        pass
+    assert not profiling._cprofile_lock.locked()
+
+    # cprofile 모드가 아니면 잠금을 잡지 않음
+    spans_only = CallProfile("get_mail", ["spans"])
+    with profiling._cprofile_lock, spans_only.profiling():
+        pass
+    assert spans_only.profile is None and "cprofile" not in spans_only.attributes
+
+
+def test_spans_are_written_as_one_trace(tmp_path, use_profiler):
+    use_profiler(Profiler(["spans"], str(tmp_path)))
+
+    def worker():
+        with span("fetch", folder="INBOX"):
+            pass
+
+    with profile_call("list_mails") as call:
+        with phase("serialize"):
+            with span("inner"):
+                pass
+        call.attributes["account"] = "work"
+        # 작업 스레드의 스팬은 컨텍스트가 넘어가야 같은 호출에 기록됨
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(traced(worker),))
+        thread.start()
+        thread.join()
+    configure_profiling(None)
+
+    spans = {record["name"]: record for record in _read_spans(tmp_path)}
+    root = spans["tool list_mails"]
+    assert set(spans) == {"tool list_mails", "serialize", "inner", "worker", "fetch"}
+    assert {record["traceId"] for record in spans.values()} == {root["traceId"]}
+    assert root["parentSpanId"] is None
+    assert root["attributes"]["tool"] == "list_mails" and root["attributes"]["account"] == "work"
+    assert spans["serialize"]["parentSpanId"] == root["spanId"]
+    assert spans["inner"]["parentSpanId"] == spans["serialize"]["spanId"]
+    assert spans["worker"]["parentSpanId"] == root["spanId"]
+    assert spans["fetch"]["parentSpanId"] == spans["worker"]["spanId"]
+    assert spans["fetch"]["attributes"]["folder"] == "INBOX"
+    assert spans["fetch"]["attributes"]["thread.name"] != root["attributes"]["thread.name"]
+    assert all(record["endTimeUnixNano"] >= record["startTimeUnixNano"] for record in spans.values())
+
+    # 프로파일링하지 않는 호출은 스팬을 남기지 않음
+    with profile_call("list_mails") as call:
+        assert call is None
+        with span("ignored") as ignored:
+            assert ignored is None
+
+
+def test_failed_call_is_recorded_with_error(tmp_path, use_profiler):
+    use_profiler(Profiler(["spans"], str(tmp_path)))
+    with pytest.raises(KeyError):
+        with profile_call("get_mail"):
+            raise KeyError("uid")
+    configure_profiling(None)
+    assert _read_spans(tmp_path)[0]["attributes"]["error"] == "KeyError"
+
+
+def test_files_are_written_off_the_calling_thread(tmp_path, use_profiler, monkeypatch):
+    profiler = use_profiler(Profiler(["spans"], str(tmp_path)))
+    written = []
+    release = threading.Event()
+    original = profiler.write
+
+    def slow_write(call):
+        release.wait(5)
+        written.append(threading.current_thread().name)
+        original(call)
+
+    monkeypatch.setattr(profiler, "write", slow_write)
+    for _ in range(3):
+        with profile_call("list_mails"):
+            pass
+    # 쓰기가 끝나지 않아도 호출은 바로 끝남
+    assert written == []
+    release.set()
+    profiler.close()
+    assert len(written) == 3 and all(name.startswith("profile-writer") for name in written)
+    assert len(_read_spans(tmp_path)) == 3
+
+
+def test_sampled_tool_call_end_to_end(tmp_path, imap_server, accounts, use_profiler):
+    imap_server.store.seed(count=4, body_size=10)
+    use_profiler(Profiler(["cprofile", "spans"], str(tmp_path), tools=["list_mails"]))
+
+    async def call():
+        async with create_connected_server_and_client_session(server.server) as client:
+            listed = await client.call_tool("list_mails", {"max_count": 2})
+            pinged = await client.call_tool("ping", {})
+            return listed, pinged
+
+    listed, pinged = asyncio.run(call())
+    assert not listed.isError and not pinged.isError
+    configure_profiling(None)
+
+    spans = _read_spans(tmp_path)
+    root = spans[0]
+    assert root["name"] == "tool list_mails"
+    attributes = root["attributes"]
+    assert attributes["account"] == "default" and attributes["failed"] is False
+    assert attributes["imap_commands"] > 0 and attributes["imap_bytes_received"] > 0
+    names = {record["name"] for record in spans}
+    assert {"get_mails", "connect", "serialize", "imap LOGIN"} <= names
+    assert not any(record["name"] == "tool ping" for record in spans)
+
+    prof_files = [name for name in os.listdir(tmp_path) if name.endswith(".prof")]
+    if attributes.get("cprofile") != "skipped":
+        assert prof_files == [attributes["cprofile"]]
+        assert prof_files[0].endswith(f"-list_mails-{root['traceId'][:8]}.prof")
+        assert pstats.Stats(str(tmp_path / prof_files[0])).total_calls > 0
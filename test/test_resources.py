@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+MCP 리소스 URI 생성/파싱 테스트 (네트워크 불필요)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from service.resources import (
+    ResourceRef,
+    attachment_uri,
+    canonical_uri,
+    folder_etag,
+    folder_uri,
+    message_etag,
+    message_uri,
+    parse_uri,
+)
+
+
+def test_uri_builders_encode_folder_and_account():
+    assert folder_uri("INBOX") == "navermail://INBOX"
+    assert folder_uri("보낸메일함/2024") == "navermail://%EB%B3%B4%EB%82%B8%EB%A9%94%EC%9D%BC%ED%95%A8%2F2024"
+    assert message_uri("INBOX", "42", "work") == "navermail://work@INBOX/42"
+    assert attachment_uri("INBOX", "42", "2.1") == "navermail://INBOX/42/attachments/2.1"
+
+
+def test_parse_folder_message_and_attachment():
+    assert parse_uri("navermail://INBOX") == ResourceRef(folder="INBOX")
+    ref = parse_uri("navermail://INBOX/42")
+    assert (ref.kind, ref.folder, ref.uid) == ("message", "INBOX", "42")
+    ref = parse_uri("navermail://INBOX/42/attachments/2.1")
+    assert (ref.kind, ref.uid, ref.section) == ("attachment", "42", "2.1")
+    assert parse_uri("navermail://INBOX/").kind == "folder"
+
+
+@pytest.mark.parametrize("folder", ["INBOX", "보낸메일함/2024", "a@b", "100% done", "x?y#z"])
+@pytest.mark.parametrize("account", [None, "work", "me@naver.com"])
+def test_round_trip(folder, account):
+    for uri in (folder_uri(folder, account), message_uri(folder, "7", account),
+                attachment_uri(folder, "7", "3", account)):
+        ref = parse_uri(uri)
+        assert ref.folder == folder
+        assert ref.account == account
+        assert canonical_uri(ref) == uri
+
+
+def test_query_is_parsed_and_dropped_from_canonical_uri():
+    ref = parse_uri("navermail://work@INBOX?limit=5&unseen=true")
+    assert ref.query == {"limit": "5", "unseen": "true"}
+    assert ref.account == "work"
+    assert canonical_uri(ref) == "navermail://work@INBOX"
+
+
+@pytest.mark.parametrize("uri", [
+    "http://INBOX/1",
+    "navermail://",
+    "navermail:///1",
+    "navermail://INBOX/abc",
+    "navermail://INBOX/1/2",
+    "navermail://INBOX/1/parts/2",
+    "navermail://INBOX/1/attachments/2/3",
+])
+def test_invalid_uris(uri):
+    with pytest.raises(ValueError):
+        parse_uri(uri)
+
+
+def test_etags():
+    status = {"UIDVALIDITY": 1, "UIDNEXT": 10, "MESSAGES": 9}
+    assert folder_etag(status) == '"1-10-9-"'
+    assert folder_etag({**status, "HIGHESTMODSEQ": 55}) == '"1-10-9-55"'
+    assert message_etag(1, "5", 77) == '"1-5-77"'
+    # MODSEQ가 없으면 플래그가 바뀔 때만 달라짐 (순서는 무관)
+    assert message_etag(1, "5", None, ["\\Seen", "\\Flagged"]) == message_etag(1, "5", None, ["\\Flagged", "\\Seen"])
+    assert message_etag(1, "5", None, ["\\Seen"]) != message_etag(1, "5", None, [])
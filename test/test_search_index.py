@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+로컬 검색 색인(SearchIndex) 테스트: 한글 2-gram 검색, 컬럼 조건, 본문 색인 (네트워크 불필요)
+"""
+import os
+import sys
+from email.message import EmailMessage
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from imap_tools import MailMessage
+
+from service.mail_message import HeaderMailMessage
+from service.search_index import SearchIndex, tokenize
+
+
+def _message(uid: int, subject: str, body: str = "", sender: str = "보낸이 <sender@example.com>",
+             html: str = "") -> bytes:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = sender
+    message["To"] = "받는이 <me@naver.com>"
+    message["Date"] = "Mon, 15 Jan 2024 10:00:00 +0900"
+    message.set_content(body or " ")
+    if html:
+        message.add_alternative(html, subtype="html")
+    return message.as_bytes()
+
+
+def _full(uid: int, *args, **kwargs) -> MailMessage:
+    raw = _message(uid, *args, **kwargs)
+    return MailMessage([(f"{uid} (UID {uid} FLAGS () RFC822.SIZE {len(raw)} BODY[] {{{len(raw)}}}".encode(), raw)])
+
+
+def _header(uid: int, *args, **kwargs) -> HeaderMailMessage:
+    raw = _message(uid, *args, **kwargs)
+    header = raw[:raw.index(b"\n\n") + 2]
+    meta = (f'{uid} (UID {uid} FLAGS () RFC822.SIZE {len(raw)} '
+            f'BODYSTRUCTURE ("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "8BIT" 10 1) BODY[HEADER] NIL)').encode()
+    return HeaderMailMessage.from_raw(meta, header)
+
+
+def test_tokenize_splits_hangul_into_bigrams():
+    assert tokenize("주간 회의록 Report") == "주간 회의 의록 report"
+    assert tokenize("발신자20") == "발신 신자 20"
+    assert tokenize("한") == "한"
+    assert tokenize(None) == ""
+
+
+def test_hangul_substring_and_prefix_match():
+    index = SearchIndex()
+    index.add("INBOX", [
+        _header(1, "주간 회의록 공유"),
+        _header(2, "프로젝트 일정 안내"),
+        _header(3, "회식 장소"),
+    ])
+    # 단어 중간의 부분 문자열도 2-gram 구로 찾음
+    assert index.search("INBOX", {"subject": "의록"}) == ["1"]
+    assert index.search("INBOX", {"subject": "회의록"}) == ["1"]
+    # 마지막 글자는 접두어로 검색 ("회" -> 회의록, 회식)
+    assert sorted(index.search("INBOX", {"subject": "회"})) == ["1", "3"]
+    assert index.search("INBOX", {"subject": "젝트 일정"}) == ["2"]
+    # 2-gram이 순서대로 이어져야 일치 ("록회의"는 "회의록"과 다름)
+    assert index.search("INBOX", {"subject": "록회의"}) == []
+
+
+def test_columns_lists_and_folders():
+    index = SearchIndex()
+    index.add("INBOX", [
+        _header(1, "결제 안내", sender="김철수 <kim@example.com>"),
+        _header(2, "뉴스레터", sender="이영희 <lee@example.com>"),
+    ])
+    index.add("Sent", [_header(1, "결제 안내")])
+    assert index.search("INBOX", {"from": "철수"}) == ["1"]
+    assert index.search("INBOX", {"subject": "철수"}) == []
+    assert sorted(index.search("INBOX", {"from": ["kim", "영희"]})) == ["1", "2"]
+    assert index.search("INBOX", {"text": "lee@example"}) == ["2"]
+    assert index.search("Sent", {"subject": "결제"}) == ["1"]
+
+
+def test_body_is_indexed_and_not_overwritten_by_headers():
+    index = SearchIndex()
+    index.add("INBOX", [_full(1, "안내", body="다음 주 워크숍은 판교에서 진행합니다")])
+    index.add("INBOX", [_full(2, "공지", html="<p>분기&nbsp;실적 <b>발표</b></p><style>p {}</style>")])
+    assert index.search("INBOX", {"body": "워크숍"}) == ["1"]
+    assert index.search("INBOX", {"text": "판교"}) == ["1"]
+    assert index.stats()["with_body"] == 2
+
+    # 이후 목록 조회로 받은 헤더가 본문 색인을 지우지 않음
+    index.add("INBOX", [_header(1, "안내")])
+    assert index.search("INBOX", {"body": "워크숍"}) == ["1"]
+
+
+def test_html_only_body_is_indexed_as_text():
+    raw = _message(1, "html", html="<p>분기&nbsp;실적 <b>발표</b></p><style>.x { color: red }</style>")
+    mail = MailMessage([(f"1 (UID 1 FLAGS () RFC822.SIZE {len(raw)} BODY[] {{{len(raw)}}}".encode(), raw)])
+    # text/plain 파트를 비워 HTML만 있는 메일로 만듦
+    mail.__dict__["text"] = ""
+    index = SearchIndex()
+    index.add("INBOX", [mail])
+    assert index.search("INBOX", {"body": "실적 발표"}) == ["1"]
+    assert index.search("INBOX", {"body": "color"}) == []
+
+
+def test_uidvalidity_change_and_discard():
+    index = SearchIndex()
+    index.check_uidvalidity("INBOX", 1)
+    index.add("INBOX", [_header(1, "회의"), _header(2, "회의")])
+    index.discard("INBOX", ["1"])
+    assert index.search("INBOX", {"subject": "회의"}) == ["2"]
+
+    index.check_uidvalidity("INBOX", 2)
+    assert index.search("INBOX", {"subject": "회의"}) == []
+    assert index.stats()["messages"] == 0
+
+
+def test_date_and_size_filters_without_terms():
+    index = SearchIndex()
+    index.add("INBOX", [_header(1, "a"), _header(2, "b", body="x" * 10)])
+    assert index.search("INBOX", {}, since="2024-01-15") == ["2", "1"]
+    assert index.search("INBOX", {}, before="2024-01-15") == []
+    assert index.search("INBOX", {}, limit=1) == ["2"]
+
+
+def test_local_search_after_listing(imap_server, mail_service):
+    imap_server.store.seed(count=5, body_size=100)
+    imap_server.store.folders["INBOX"].append(_message(6, "분기 실적 보고"), [])
+    mail_service.index = SearchIndex()
+
+    mail_service.get_mails(max_count=6)
+    assert mail_service.index.stats()["messages"] == 6
+    result = mail_service.search_mails({"subject": "실적"}, local=True)
+    assert [mail.uid for mail in result["mails"]] == ["6"]
+
+
+def test_separately_fetched_body_is_indexed():
+    index = SearchIndex()
+    index.add("INBOX", [_header(1, "안내"), _header(2, "공지")], {"1": "워크숍 장소는 판교입니다"})
+    assert index.search("INBOX", {"body": "판교"}) == ["1"]
+    assert index.stats()["with_body"] == 1
+    # 이후 헤더만 다시 색인해도 본문은 남음
+    index.add("INBOX", [_header(1, "안내")])
+    assert index.search("INBOX", {"body": "워크숍"}) == ["1"]
+
+
+def test_viewed_bodies_are_indexed(imap_server, mail_service):
+    imap_server.store.folders["INBOX"].append(_message(1, "일정", body="다음 주 워크숍은 판교에서 진행합니다"), [])
+    html_only = EmailMessage()
+    html_only["Subject"] = "공지"
+    html_only.set_content("<p>분기 <b>실적</b> 발표</p>", subtype="html")
+    imap_server.store.folders["INBOX"].append(html_only.as_bytes(), [])
+    mail_service.index = SearchIndex()
+
+    list(mail_service.iter_mail_bodies(["1", "2"], max_chars=1000))
+    assert mail_service.index.stats()["with_body"] == 2
+    assert mail_service.search_mails({"body": "판교"}, local=True)["mails"][0].uid == "1"
+    assert mail_service.search_mails({"text": "실적 발표"}, local=True)["mails"][0].uid == "2"
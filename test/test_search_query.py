@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+검색 조건 변환(build_search_criteria) 테스트 (네트워크 불필요)
+"""
+import datetime
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from imap_tools import AND
+
+from service.search_query import build_search_criteria, search_charset
+
+
+def test_no_conditions_returns_none():
+    assert build_search_criteria({}) is None
+    assert build_search_criteria({"subject": "", "from": [], "to": None}) is None
+
+
+def test_single_text_condition():
+    assert str(build_search_criteria({"subject": "hi"})) == '(SUBJECT "hi")'
+
+
+def test_list_values_are_ored_and_combined_with_and():
+    criteria = build_search_criteria({
+        "from": ["a@example.com", "b@example.com"],
+        "subject": "회의",
+        "seen": False,
+        "since": "2024-01-02",
+        "larger": 100,
+    })
+    assert str(criteria) == (
+        '((SINCE 2-Jan-2024 UNSEEN LARGER 100 SUBJECT "회의") '
+        '(OR FROM "a@example.com" FROM "b@example.com"))'
+    )
+
+
+def test_flags_and_sizes():
+    criteria = build_search_criteria({"flagged": True, "answered": False, "smaller": 5000})
+    assert sorted(str(criteria).strip("()").split()) == ["5000", "FLAGGED", "SMALLER", "UNANSWERED"]
+
+
+def test_older_than_days_overrides_before():
+    criteria = build_search_criteria({"before": "2020-01-01", "older_than_days": 7})
+    expected = datetime.date.today() - datetime.timedelta(days=7)
+    assert str(criteria) == str(AND(date_lt=expected))
+
+
+def test_invalid_date():
+    with pytest.raises(ValueError, match="since"):
+        build_search_criteria({"since": "2024/01/02"})
+
+
+def test_search_charset():
+    assert search_charset(None) == "US-ASCII"
+    assert search_charset(build_search_criteria({"subject": "report"})) == "US-ASCII"
+    assert search_charset(build_search_criteria({"subject": "보고서"})) == "UTF-8"
+
+
+def test_search_mails_on_fake_server(imap_server, mail_service):
+    store = imap_server.store
+    store.seed(count=20, body_size=100)
+    inbox = store.folders["INBOX"]
+    # 제목에 "[3]"이 들어간 메일만 읽지 않은 상태로 둠
+    for message in inbox.messages:
+        message.flags = [] if message.uid == 4 else ["\\Seen"]
+
+    result = mail_service.search_mails({"subject": "[3]", "seen": False})
+    assert [mail.uid for mail in result["mails"]] == ["4"]
+    assert not result["has_more"]
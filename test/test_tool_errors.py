@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+tool 오류 응답 테스트: 클라이언트에는 짧은 메시지(isError)만, traceback은 서버 로그에만 남김
+"""
+import asyncio
+import logging
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mcp.shared.memory import create_connected_server_and_client_session
+
+import server
+
+
+def _call_tool(name, args):
+    async def call():
+        async with create_connected_server_and_client_session(server.server) as client:
+            return await client.call_tool(name, args)
+    return asyncio.run(call())
+
+
+def test_unexpected_error_returns_short_message(imap_server, accounts, monkeypatch, caplog):
+    def broken(*args, **kwargs):
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(accounts.get().service, "search_mails", broken)
+    with caplog.at_level(logging.WARNING, logger="navermail"):
+        result = _call_tool("search_mails", {"subject": "급여 명세서"})
+
+    assert result.isError
+    text = result.content[0].text
+    assert text == ("search_mails 실행 중 오류가 발생했습니다 (RuntimeError: connection reset). "
+                    "자세한 내용은 서버 로그를 확인해주세요.")
+    assert "Traceback" not in text and "급여 명세서" not in text
+
+    # traceback은 서버 로그에 남고, 인자는 로그에도 남기지 않음
+    [record] = [record for record in caplog.records if record.name == "navermail"]
+    assert record.levelno == logging.ERROR and record.exc_info[0] is RuntimeError
+    assert "search_mails" in record.getMessage() and "급여 명세서" not in caplog.text
+    assert "Traceback" in caplog.text
+
+
+def test_invalid_argument_returns_its_message(imap_server, accounts, caplog):
+    with caplog.at_level(logging.WARNING, logger="navermail"):
+        result = _call_tool("list_mails_by_range", {"start_index": -1})
+
+    assert result.isError
+    assert result.content[0].text == "start_index는 0 이상, count는 1 이상이어야 합니다."
+    [record] = [record for record in caplog.records if record.name == "navermail"]
+    assert record.levelno == logging.WARNING and record.exc_info is None
+
+
+def test_unknown_tool_is_an_error(accounts):
+    result = _call_tool("no_such_tool", {})
+    assert result.isError
+    assert result.content[0].text == "Unknown tool: no_such_tool"